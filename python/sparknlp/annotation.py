@@ -83,7 +83,10 @@ class Annotation:
         same_begin = self.begin == other.begin
         same_end = self.end == other.end
         same_metadata = dict(self.metadata) == other.metadata
-        same_embeddings = self.embeddings == other.embeddings
+        # embeddings may be NumPy arrays, which do not compare to a single boolean
+        same_embeddings = self.embeddings is other.embeddings or (
+            self.embeddings is not None and other.embeddings is not None
+            and list(self.embeddings) == list(other.embeddings))
 
         same_annotation = \
             same_annotator_type and same_result and same_begin and same_end and same_metadata and same_embeddings
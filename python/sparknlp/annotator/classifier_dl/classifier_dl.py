@@ -13,12 +13,12 @@
 #  limitations under the License.
 """Contains classes for ClassifierDL."""
 
-from sparknlp.annotator.param import EvaluationDLParams, ClassifierEncoder
+from sparknlp.annotator.param import EvaluationDLParams, ClassifierEncoder, TrainingShardsParams
 from sparknlp.base import DocumentAssembler
 from sparknlp.common import *
 
 
-class ClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, ClassifierEncoder):
+class ClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, ClassifierEncoder, TrainingShardsParams):
     """Trains a ClassifierDL for generic Multi-class Text Classification.
 
     ClassifierDL uses the state-of-the-art Universal Sentence Encoder as an
@@ -86,6 +86,15 @@ class ClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, ClassifierEnco
         Folder path to save training logs
     randomSeed
         Random seed for shuffling
+    shardSize
+        Maximum number of training records in a shard, by default 10000
+    shardsPath
+        Local folder the training shards are written into, a temporary folder
+        by default
+    spillTrainingData
+        Whether to spill the encoded training data to local shards once and read
+        them on every epoch, instead of collecting the training data to the
+        driver, by default False
     testDataset
         Path to test dataset. If set used to calculate statistic on it during training.
     validationSplit
@@ -175,7 +184,10 @@ class ClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, ClassifierEnco
             batchSize=64,
             dropout=float(0.5),
             enableOutputLogs=False,
-            evaluationLogExtended=False
+            evaluationLogExtended=False,
+            spillTrainingData=False,
+            shardsPath="",
+            shardSize=10000
         )
 
 
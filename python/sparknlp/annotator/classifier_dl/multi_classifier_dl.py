@@ -13,12 +13,12 @@
 #  limitations under the License.
 """Contains classes for MultiClassifierDL."""
 
-from sparknlp.annotator.param import EvaluationDLParams, ClassifierEncoder
+from sparknlp.annotator.param import EvaluationDLParams, ClassifierEncoder, TrainingShardsParams
 from sparknlp.annotator.classifier_dl import ClassifierDLModel
 from sparknlp.common import *
 
 
-class MultiClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, ClassifierEncoder):
+class MultiClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, ClassifierEncoder, TrainingShardsParams):
     """Trains a MultiClassifierDL for Multi-label Text Classification.
 
     MultiClassifierDL uses a Bidirectional GRU with a convolutional model that
@@ -99,8 +99,17 @@ class MultiClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, Classifie
         Folder path to save training logs
     randomSeed
         Random seed, by default 44
+    shardSize
+        Maximum number of training records in a shard, by default 10000
+    shardsPath
+        Local folder the training shards are written into, a temporary folder
+        by default
     shufflePerEpoch
         whether to shuffle the training data on each Epoch, by default False
+    spillTrainingData
+        Whether to spill the encoded training data to local shards once and read
+        them on every epoch, instead of collecting the training data to the
+        driver, by default False
     testDataset
         Path to test dataset. If set used to calculate statistic on it during training.
     threshold
@@ -223,7 +232,10 @@ class MultiClassifierDLApproach(AnnotatorApproach, EvaluationDLParams, Classifie
             threshold=float(0.5),
             randomSeed=44,
             shufflePerEpoch=False,
-            enableOutputLogs=False
+            enableOutputLogs=False,
+            spillTrainingData=False,
+            shardsPath="",
+            shardSize=10000
         )
 
 
@@ -158,7 +158,7 @@ class RoBertaForSequenceClassification(AnnotatorModel,
         )
 
     @staticmethod
-    def loadSavedModel(folder, spark_session):
+    def loadSavedModel(folder, spark_session, quantize="none"):
         """Loads a locally saved model.
 
         Parameters
@@ -167,6 +167,10 @@ class RoBertaForSequenceClassification(AnnotatorModel,
             Folder of the saved model
         spark_session : pyspark.sql.SparkSession
             The current SparkSession
+        quantize : str, optional
+            Quantization of an ONNX model when it is imported, either "none" or
+            "dynamic_int8" to store the weights of its matrix products as 8-bit
+            integers, by default "none"
 
         Returns
         -------
@@ -174,7 +178,7 @@ class RoBertaForSequenceClassification(AnnotatorModel,
             The restored model
         """
         from sparknlp.internal import _RoBertaSequenceClassifierLoader
-        jModel = _RoBertaSequenceClassifierLoader(folder, spark_session._jsparkSession)._java_obj
+        jModel = _RoBertaSequenceClassifierLoader(folder, spark_session._jsparkSession, quantize)._java_obj
         return RoBertaForSequenceClassification(java_model=jModel)
 
     @staticmethod
@@ -164,7 +164,7 @@ class BertEmbeddings(AnnotatorModel,
         )
 
     @staticmethod
-    def loadSavedModel(folder, spark_session):
+    def loadSavedModel(folder, spark_session, quantize="none"):
         """Loads a locally saved model.
 
         Parameters
@@ -173,6 +173,10 @@ class BertEmbeddings(AnnotatorModel,
             Folder of the saved model
         spark_session : pyspark.sql.SparkSession
             The current SparkSession
+        quantize : str, optional
+            Quantization of an ONNX model when it is imported, either "none" or
+            "dynamic_int8" to store the weights of its matrix products as 8-bit
+            integers, by default "none"
 
         Returns
         -------
@@ -180,7 +184,7 @@ class BertEmbeddings(AnnotatorModel,
             The restored model
         """
         from sparknlp.internal import _BertLoader
-        jModel = _BertLoader(folder, spark_session._jsparkSession)._java_obj
+        jModel = _BertLoader(folder, spark_session._jsparkSession, quantize)._java_obj
         return BertEmbeddings(java_model=jModel)
 
     @staticmethod
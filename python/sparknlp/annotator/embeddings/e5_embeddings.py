@@ -149,7 +149,7 @@ class E5Embeddings(AnnotatorModel,
         )
 
     @staticmethod
-    def loadSavedModel(folder, spark_session):
+    def loadSavedModel(folder, spark_session, quantize="none"):
         """Loads a locally saved model.
 
         Parameters
@@ -158,6 +158,10 @@ class E5Embeddings(AnnotatorModel,
             Folder of the saved model
         spark_session : pyspark.sql.SparkSession
             The current SparkSession
+        quantize : str, optional
+            Quantization of an ONNX model when it is imported, either "none" or
+            "dynamic_int8" to store the weights of its matrix products as 8-bit
+            integers, by default "none"
 
         Returns
         -------
@@ -165,7 +169,7 @@ class E5Embeddings(AnnotatorModel,
             The restored model
         """
         from sparknlp.internal import _E5Loader
-        jModel = _E5Loader(folder, spark_session._jsparkSession)._java_obj
+        jModel = _E5Loader(folder, spark_session._jsparkSession, quantize)._java_obj
         return E5Embeddings(java_model=jModel)
 
     @staticmethod
@@ -128,6 +128,16 @@ class WordEmbeddings(AnnotatorApproach, HasEmbeddingsProperties, HasStorage):
                           "cache size for items retrieved from storage. Increase for performance but higher memory consumption",
                           typeConverter=TypeConverters.toInt)
 
+    storageFormat = Param(Params._dummy(),
+                          "storageFormat",
+                          "format used to look up embeddings: rocksdb (default) or mmap",
+                          typeConverter=TypeConverters.toString)
+
+    storageQuantization = Param(Params._dummy(),
+                                "storageQuantization",
+                                "encoding of the vectors in storage: none (float32), fp16 or int8",
+                                typeConverter=TypeConverters.toString)
+
     def setWriteBufferSize(self, v):
         """Sets buffer size limit before dumping to disk storage while writing,
         by default 10000.
@@ -150,12 +160,47 @@ class WordEmbeddings(AnnotatorApproach, HasEmbeddingsProperties, HasStorage):
         """
         return self._set(readCacheSize=v)
 
+    def setStorageFormat(self, v):
+        """Sets the format used to look up embeddings, by default "rocksdb".
+
+        With "mmap", the RocksDB index is converted once into a read-only
+        vocabulary and float matrix, which is shipped to every executor and
+        memory mapped there. It opens instantly and is shared by all tasks of
+        an executor.
+
+        Parameters
+        ----------
+        v : str
+            Either "rocksdb" or "mmap"
+        """
+        if v not in ("rocksdb", "mmap"):
+            raise ValueError("storageFormat must be either 'rocksdb' or 'mmap'")
+        return self._set(storageFormat=v)
+
+    def setStorageQuantization(self, v):
+        """Sets the encoding of the vectors in storage, by default "none".
+
+        "fp16" stores half precision values and "int8" stores 8-bit integers
+        with one scale factor per vector, which makes the index 2 to 4 times
+        smaller. Vectors are dequantized to float32 on lookup.
+
+        Parameters
+        ----------
+        v : str
+            One of "none", "fp16" or "int8"
+        """
+        if v not in ("none", "fp16", "int8"):
+            raise ValueError("storageQuantization must be one of 'none', 'fp16' or 'int8'")
+        return self._set(storageQuantization=v)
+
     @keyword_only
     def __init__(self):
         super(WordEmbeddings, self).__init__(classname="com.johnsnowlabs.nlp.embeddings.WordEmbeddings")
         self._setDefault(
             caseSensitive=False,
             writeBufferSize=10000,
+            storageFormat="rocksdb",
+            storageQuantization="none",
             storageRef=self.uid
         )
 
@@ -265,6 +310,11 @@ class WordEmbeddingsModel(AnnotatorModel, HasEmbeddingsProperties, HasStorageMod
                           "cache size for items retrieved from storage. Increase for performance but higher memory consumption",
                           typeConverter=TypeConverters.toInt)
 
+    storageFormat = Param(Params._dummy(),
+                          "storageFormat",
+                          "format used to look up embeddings: rocksdb (default) or mmap",
+                          typeConverter=TypeConverters.toString)
+
     def setReadCacheSize(self, v):
         """Sets cache size for items retrieved from storage. Increase for
         performance but higher memory consumption.
@@ -276,6 +326,38 @@ class WordEmbeddingsModel(AnnotatorModel, HasEmbeddingsProperties, HasStorageMod
         """
         return self._set(readCacheSize=v)
 
+    def setStorageFormat(self, v):
+        """Sets the format used to look up embeddings, by default "rocksdb".
+
+        With "mmap", the RocksDB index is converted once into a read-only
+        vocabulary and float matrix, which is shipped to every executor and
+        memory mapped there. It opens instantly and is shared by all tasks of
+        an executor.
+
+        Parameters
+        ----------
+        v : str
+            Either "rocksdb" or "mmap"
+        """
+        if v not in ("rocksdb", "mmap"):
+            raise ValueError("storageFormat must be either 'rocksdb' or 'mmap'")
+        return self._set(storageFormat=v)
+
+    def getReadCacheStats(self):
+        """Gets the counters of the read cache for items retrieved from
+        storage in the JVM of the driver, for example when annotating with a
+        :class:`.LightPipeline`.
+
+        All counters are zero until the model has read from storage.
+
+        Returns
+        -------
+        dict
+            Number of ``hits``, ``misses`` and ``evictions`` of the cache and
+            its current ``size``
+        """
+        return {key: int(value) for key, value in self._java_obj.getReadCacheStatsJava().items()}
+
     @keyword_only
     def __init__(self, classname="com.johnsnowlabs.nlp.embeddings.WordEmbeddingsModel", java_model=None):
         super(WordEmbeddingsModel, self).__init__(
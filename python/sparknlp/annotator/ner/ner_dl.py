@@ -15,12 +15,12 @@
 
 import sys
 
-from sparknlp.annotator.param import EvaluationDLParams
+from sparknlp.annotator.param import EvaluationDLParams, TrainingShardsParams
 from sparknlp.common import *
 from sparknlp.annotator.ner.ner_approach import NerApproach
 
 
-class NerDLApproach(AnnotatorApproach, NerApproach, EvaluationDLParams):
+class NerDLApproach(AnnotatorApproach, NerApproach, EvaluationDLParams, TrainingShardsParams):
     """This Named Entity recognition annotator allows to train generic NER model
     based on Neural Networks.
 
@@ -132,6 +132,22 @@ class NerDLApproach(AnnotatorApproach, NerApproach, EvaluationDLParams):
     enableMemoryOptimizer
         Whether to optimize for large datasets or not. Enabling this option can
         slow down training, by default False
+    spillTrainingData
+        Whether to spill the encoded training data to local shards once and read
+        them on every epoch, instead of collecting the training data to the
+        driver, by default False
+    shardSize
+        Maximum number of training records in a shard, by default 10000
+    shardsPath
+        Local folder the training shards are written into, a temporary folder
+        by default
+    trainingCachePath
+        Local folder in which the encoded training data is cached and shared by
+        the trainings on the same data, or empty not to cache it, by default ""
+    trainingCacheMaxSize
+        Maximum size of the trainingCachePath folder, in bytes or with a unit
+        such as ``10g``, after which the least recently used caches are
+        deleted, or ``0`` for no limit, by default ``10g``
     useBestModel
         Whether to restore and use the model that has achieved the best performance
         at the end of the training.
@@ -225,6 +241,14 @@ class NerDLApproach(AnnotatorApproach, NerApproach, EvaluationDLParams):
                                   "Whether to optimize for large datasets or not. Enabling this option can slow down training.",
                                   TypeConverters.toBoolean)
 
+    trainingCachePath = Param(Params._dummy(), "trainingCachePath",
+                              "Local folder in which the encoded training data is cached and shared by the trainings on the same data, or empty not to cache it",
+                              TypeConverters.toString)
+
+    trainingCacheMaxSize = Param(Params._dummy(), "trainingCacheMaxSize",
+                                 "Maximum size of the trainingCachePath folder, in bytes or with a unit such as 10g, after which the least recently used caches are deleted, or 0 for no limit",
+                                 TypeConverters.toString)
+
     useBestModel = Param(Params._dummy(), "useBestModel",
                          "Whether to restore and use the model that has achieved the best performance at the end of the training.",
                          TypeConverters.toBoolean)
@@ -351,6 +375,37 @@ class NerDLApproach(AnnotatorApproach, NerApproach, EvaluationDLParams):
         """
         return self._set(enableMemoryOptimizer=value)
 
+    def setTrainingCachePath(self, path):
+        """Sets a local folder in which the encoded training data is cached, by
+        default "" (not cached).
+
+        The first training encodes the training data into a sub folder named
+        after a fingerprint of the datasets. Later trainings on the same
+        datasets, columns and validation split, e.g. with other hyperparameters,
+        read the encoded data from it instead of encoding it again.
+
+        Parameters
+        ----------
+        path : str
+            Local folder of the cached training data
+        """
+        return self._set(trainingCachePath=path)
+
+    def setTrainingCacheMaxSize(self, size):
+        """Sets the maximum size of the trainingCachePath folder, after which
+        the least recently used caches are deleted, by default "10g".
+
+        Training data computed by annotators, e.g. by the stages before NerDL
+        in a Pipeline, is only cached for the same DataFrame. Save it, e.g. to
+        parquet, to reuse its cache across Pipeline fits and sessions.
+
+        Parameters
+        ----------
+        size : str
+            Size in bytes or with a unit such as "10g", or "0" for no limit
+        """
+        return self._set(trainingCacheMaxSize=size)
+
     def setUseBestModel(self, value):
         """Whether to restore and use the model that has achieved the best performance at the end of the training.
         The metric that is being monitored is F1 for testDataset and if it's not set it will be validationSplit, and if it's not set finally looks for loss.
@@ -395,7 +450,12 @@ class NerDLApproach(AnnotatorApproach, NerApproach, EvaluationDLParams):
             enableOutputLogs=False,
             enableMemoryOptimizer=False,
             useBestModel=False,
-            bestModelMetric="f1_micro"
+            bestModelMetric="f1_micro",
+            spillTrainingData=False,
+            shardsPath="",
+            shardSize=10000,
+            trainingCachePath="",
+            trainingCacheMaxSize="10g"
         )
 
 
@@ -14,7 +14,7 @@
 """Contains classes for OpenAICompletion."""
 from sparknlp.common import *
 
-class OpenAICompletion(AnnotatorModel):
+class OpenAICompletion(AnnotatorModel, HasBatchedAnnotate, HasOpenAIClientProperties):
     """Transformer that makes a request for OpenAI Completion API for each executor.
 
    See OpenAI API Doc: https://platform.openai.com/docs/api-reference/completions/create for reference
@@ -346,5 +346,11 @@ class OpenAICompletion(AnnotatorModel):
             echo=False,
             presencePenalty=0,
             frequencyPenalty=0,
-            bestOf=1
+            bestOf=1,
+            batchSize=32,
+            baseUrl="https://api.openai.com/v1",
+            concurrency=4,
+            maxRetries=3,
+            retryBackoff=1000,
+            responseCacheSize=0
         )
@@ -86,7 +86,7 @@ from sparknlp.common import *
    """
 
 
-class OpenAIEmbeddings(AnnotatorModel):
+class OpenAIEmbeddings(AnnotatorModel, HasBatchedAnnotate, HasOpenAIClientProperties):
 
     name = "OpenAIEmbeddings"
 
@@ -104,6 +104,11 @@ class OpenAIEmbeddings(AnnotatorModel):
                  "A unique identifier representing your end-user, which can help OpenAI to monitor and detect abuse.",
                  typeConverter=TypeConverters.toString)
 
+    inputsPerRequest = Param(Params._dummy(),
+                             "inputsPerRequest",
+                             "Maximum number of documents embedded by a single request",
+                             typeConverter=TypeConverters.toInt)
+
     def setModel(self, value):
         """Sets model ID of the OpenAI model to use
 
@@ -124,9 +129,29 @@ class OpenAIEmbeddings(AnnotatorModel):
         """
         return self._set(user=value)
 
+    def setInputsPerRequest(self, value):
+        """Sets the maximum number of documents embedded by a single request,
+        by default 16.
+
+        Parameters
+        ----------
+        value : int
+           Maximum number of documents embedded by a single request
+        """
+        return self._set(inputsPerRequest=value)
+
     @keyword_only
     def __init__(self, classname="com.johnsnowlabs.ml.ai.OpenAIEmbeddings", java_model=None):
         super(OpenAIEmbeddings, self).__init__(
             classname=classname,
             java_model=java_model
         )
+        self._setDefault(
+            batchSize=64,
+            inputsPerRequest=16,
+            baseUrl="https://api.openai.com/v1",
+            concurrency=4,
+            maxRetries=3,
+            retryBackoff=1000,
+            responseCacheSize=0
+        )
@@ -15,3 +15,4 @@
 """Module of annotators for params."""
 from sparknlp.annotator.param.evaluation_dl_params import *
 from sparknlp.annotator.param.classifier_encoder import *
+from sparknlp.annotator.param.training_shards_params import *
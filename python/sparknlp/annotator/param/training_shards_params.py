@@ -0,0 +1,68 @@
+#  Copyright 2017-2022 John Snow Labs
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from sparknlp.common import *
+from sparknlp.internal import ParamsGettersSetters
+
+
+class TrainingShardsParams(ParamsGettersSetters):
+
+    spillTrainingData = Param(Params._dummy(), "spillTrainingData",
+                              "Whether to spill the encoded training data to local shards once and read them on every epoch, instead of collecting the training data to the driver",
+                              TypeConverters.toBoolean)
+
+    shardsPath = Param(Params._dummy(), "shardsPath",
+                       "Local folder the training shards are written into, a temporary folder by default",
+                       TypeConverters.toString)
+
+    shardSize = Param(Params._dummy(), "shardSize",
+                      "Maximum number of training records in a shard",
+                      TypeConverters.toInt)
+
+    def setSpillTrainingData(self, value):
+        """Sets whether to spill the encoded training data to local shards once
+        and read them on every epoch, instead of collecting the training data to
+        the driver, by default False.
+
+        Embeddings are stored in the shards as half precision floats.
+
+        Parameters
+        ----------
+        value : bool
+            Whether to spill the training data to local shards
+        """
+        return self._set(spillTrainingData=value)
+
+    def setShardsPath(self, value):
+        """Sets the local folder the training shards are written into, a
+        temporary folder by default. Shards are deleted once the training is
+        finished.
+
+        Parameters
+        ----------
+        value : str
+            Local folder of the training shards
+        """
+        return self._set(shardsPath=value)
+
+    def setShardSize(self, value):
+        """Sets the maximum number of training records in a shard, by default
+        10000.
+
+        Parameters
+        ----------
+        value : int
+            Maximum number of training records in a shard
+        """
+        return self._set(shardSize=value)
@@ -82,6 +82,9 @@ class GPT2Transformer(AnnotatorModel, HasBatchedAnnotate, HasEngine):
     ignoreTokenIds
         A list of token ids which are ignored in the decoder's output, by
         default []
+    useCache
+        Whether to cache the keys and values of previous steps, by default
+        False. Only models exported with past key values support it.
 
     Notes
     -----
@@ -179,6 +182,9 @@ class GPT2Transformer(AnnotatorModel, HasBatchedAnnotate, HasEngine):
                            "A list of token ids which are ignored in the decoder's output",
                            typeConverter=TypeConverters.toListInt)
 
+    useCache = Param(Params._dummy(), "useCache", "Cache internal state of the model",
+                     typeConverter=TypeConverters.toBoolean)
+
     def setTask(self, value):
         """Sets the transformer's task, e.g. ``summarize:``.
 
@@ -300,6 +306,22 @@ class GPT2Transformer(AnnotatorModel, HasBatchedAnnotate, HasEngine):
         """
         return self._set(noRepeatNgramSize=value)
 
+    def setUseCache(self, value):
+        """Sets whether to cache the keys and values of previous steps, so
+        that every generated token only runs the last token through the model
+        instead of the whole prefix, by default False.
+
+        Only models exported with a ``past_key_values`` input and a
+        ``present_key_values`` output in their signatures support it, others
+        log a warning and decode the whole prefix.
+
+        Parameters
+        ----------
+        value : bool
+            Whether to cache the keys and values of previous steps
+        """
+        return self._set(useCache=value)
+
     @keyword_only
     def __init__(self, classname="com.johnsnowlabs.nlp.annotators.seq2seq.GPT2Transformer", java_model=None):
         super(GPT2Transformer, self).__init__(
@@ -317,7 +339,8 @@ class GPT2Transformer(AnnotatorModel, HasBatchedAnnotate, HasEngine):
             repetitionPenalty=1.0,
             noRepeatNgramSize=0,
             ignoreTokenIds=[],
-            batchSize=4
+            batchSize=4,
+            useCache=False
         )
 
     @staticmethod
@@ -57,6 +57,10 @@ class DocumentSimilarityRankerApproach(AnnotatorApproach, HasEnableCachingProper
         "Whether to set visibleDistances in ranking output (Default: `false`).
     identityRanking
         Whether to include identity in ranking result set. Useful for debug. (Default: `false`).
+    buildSearchIndex
+        Whether to build an HNSW index of the training documents to search
+        them, by default False. The index is a file saved next to the model as
+        ``similarity_index.bin`` and memory mapped where the model is used.
 
     Examples
     --------
@@ -152,6 +156,12 @@ class DocumentSimilarityRankerApproach(AnnotatorApproach, HasEnableCachingProper
                             "Whether to include identity in ranking result set. Useful for debug. (Default: `false`).",
                             typeConverter=TypeConverters.toBoolean)
 
+    buildSearchIndex = Param(Params._dummy(),
+                             "buildSearchIndex",
+                             "Whether to build an HNSW index of the training documents to search them "
+                             "(Default: `false`)",
+                             typeConverter=TypeConverters.toBoolean)
+
     asRetrieverQuery = Param(Params._dummy(),
                              "asRetrieverQuery",
                              "Whether to set the model as retriever RAG with a specific query string."
@@ -222,6 +232,22 @@ class DocumentSimilarityRankerApproach(AnnotatorApproach, HasEnableCachingProper
         """
         return self._set(identityRanking=value)
 
+    def setBuildSearchIndex(self, value):
+        """Sets whether to build an approximate nearest neighbour index of the
+        training documents, so that the model can rank documents it was not
+        trained on and be searched, also from a LightPipeline, by default False.
+
+        The index is an HNSW graph built on the driver. It is not stored in the
+        params of the model but in a file saved next to it, which is memory
+        mapped wherever the model is used.
+
+        Parameters
+        ----------
+        value : bool
+            Whether to build a search index of the training documents
+        """
+        return self._set(buildSearchIndex=value)
+
     def asRetriever(self, value):
         """Sets the query to use the document similarity ranker as a retriever in a RAG fashion.
             (Default: `""`, empty if this annotator is not used as retriever)
@@ -244,7 +270,8 @@ class DocumentSimilarityRankerApproach(AnnotatorApproach, HasEnableCachingProper
             numHashTables=3,
             visibleDistances=False,
             identityRanking=False,
-            asRetrieverQuery=""
+            asRetrieverQuery="",
+            buildSearchIndex=False
         )
 
     def _create_model(self, java_model):
@@ -252,11 +279,69 @@ class DocumentSimilarityRankerApproach(AnnotatorApproach, HasEnableCachingProper
 
 
 class DocumentSimilarityRankerModel(AnnotatorModel, HasEmbeddingsProperties):
+    """Instantiated model of the DocumentSimilarityRankerApproach.
+
+    Documents the model was trained on get their precomputed rankings. If it
+    was trained with ``buildSearchIndex``, other documents are ranked with
+    the HNSW index of the training documents, a memory mapped file saved next
+    to the model.
+    """
 
     name = "DocumentSimilarityRankerModel"
     inputAnnotatorTypes = [AnnotatorType.SENTENCE_EMBEDDINGS]
     outputAnnotatorType = AnnotatorType.DOC_SIMILARITY_RANKINGS
 
+    numberOfNeighbours = Param(Params._dummy(),
+                               "numberOfNeighbours",
+                               "The number of neighbours returned for documents the model was not trained on",
+                               typeConverter=TypeConverters.toInt)
+
+    visibleDistances = Param(Params._dummy(),
+                             "visibleDistances",
+                             "Whether to set visibleDistances in ranking output (Default: `false`)",
+                             typeConverter=TypeConverters.toBoolean)
+
+    def setNumberOfNeighbours(self, value):
+        """Sets the number of neighbours returned for documents the model was
+        not trained on, by default 10.
+
+        Parameters
+        ----------
+        value : int
+            the number of neighbours
+        """
+        return self._set(numberOfNeighbours=value)
+
+    def setVisibleDistances(self, value):
+        """Sets whether to include distances in the rankings of documents the
+        model was not trained on, by default False.
+
+        Parameters
+        ----------
+        value : bool
+            whether to include distances in the rankings
+        """
+        return self._set(visibleDistances=value)
+
+    def search(self, embedding, k=10):
+        """Searches the documents the model was trained on for the closest
+        ones to a sentence embedding.
+
+        Parameters
+        ----------
+        embedding : List[float]
+            Sentence embedding of the query
+        k : int, optional
+            Maximum number of neighbours to return, by default 10
+
+        Returns
+        -------
+        List[Tuple[int, float]]
+            Indices and distances of the neighbours, sorted by distance
+        """
+        neighbors = self._java_obj.searchJava([float(value) for value in embedding], k)
+        return [(int(neighbor[0]), float(neighbor[1])) for neighbor in neighbors]
+
     def __init__(self, classname="com.johnsnowlabs.nlp.annotators.similarity.DocumentSimilarityRankerModel",
                  java_model=None):
         super(DocumentSimilarityRankerModel, self).__init__(
@@ -488,7 +488,7 @@ class ContextSpellCheckerApproach(AnnotatorApproach):
         return ContextSpellCheckerModel(java_model=java_model)
 
 
-class ContextSpellCheckerModel(AnnotatorModel, HasEngine):
+class ContextSpellCheckerModel(AnnotatorModel, HasBatchedAnnotate, HasEngine):
     """Implements a deep-learning based Noisy Channel Model Spell Algorithm.
     Correction candidates are extracted combining context information and word
     information.
@@ -548,6 +548,8 @@ class ContextSpellCheckerModel(AnnotatorModel, HasEngine):
         Whether to correct special symbols or skip spell checking for them
     compareLowcase
         If true will compare tokens in low case with vocabulary.
+    batchSize
+        Number of rows whose sentences are decoded together, by default 16.
     configProtoBytes
         ConfigProto from tensorflow, serialized into byte array.
     vocabFreq
@@ -887,6 +889,9 @@ class ContextSpellCheckerModel(AnnotatorModel, HasEngine):
             classname=classname,
             java_model=java_model
         )
+        self._setDefault(
+            batchSize=16
+        )
 
     @staticmethod
     def pretrained(name="spellcheck_dl", lang="en", remote_loc=None):
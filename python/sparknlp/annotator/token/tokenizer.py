@@ -455,6 +455,9 @@ class TokenizerModel(AnnotatorModel):
         Character list used to separate from the inside of tokens
     splitChars
         Character list used to separate from the inside of tokens
+    useCompiledScanner
+        Whether to find token candidates with a precompiled character scanner
+        instead of regex replacements over each sentence, by default True
     """
     name = "TokenizerModel"
 
@@ -492,6 +495,12 @@ class TokenizerModel(AnnotatorModel):
                        "character list used to separate from the inside of tokens",
                        typeConverter=TypeConverters.toListString)
 
+    useCompiledScanner = Param(Params._dummy(),
+                               "useCompiledScanner",
+                               "Whether to find token candidates with a precompiled character scanner instead of regex"
+                               " replacements over each sentence",
+                               typeConverter=TypeConverters.toBoolean)
+
     def __init__(self, classname="com.johnsnowlabs.nlp.annotators.TokenizerModel", java_model=None):
         super(TokenizerModel, self).__init__(
             classname=classname,
@@ -499,7 +508,8 @@ class TokenizerModel(AnnotatorModel):
         )
         self._setDefault(
             targetPattern="\\S+",
-            caseSensitiveExceptions=True
+            caseSensitiveExceptions=True,
+            useCompiledScanner=True
         )
 
     def setSplitPattern(self, value):
@@ -538,6 +548,18 @@ class TokenizerModel(AnnotatorModel):
         split_chars.append(value)
         return self._set(splitChars=split_chars)
 
+    def setUseCompiledScanner(self, value):
+        """Sets whether to find token candidates with a precompiled character
+        scanner instead of regex replacements over each sentence, by default
+        True. Both produce the same tokens.
+
+        Parameters
+        ----------
+        value : bool
+            Whether to use the compiled scanner
+        """
+        return self._set(useCompiledScanner=value)
+
     @staticmethod
     def pretrained(name="token_rules", lang="en", remote_loc=None):
         """Downloads and loads a pretrained model.
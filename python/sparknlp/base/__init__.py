@@ -21,6 +21,7 @@ from sparknlp.base.graph_finisher import *
 from sparknlp.base.has_recursive_fit import *
 from sparknlp.base.has_recursive_transform import *
 from sparknlp.base.light_pipeline import *
+from sparknlp.base.async_light_pipeline import *
 from sparknlp.base.recursive_pipeline import *
 from sparknlp.base.token_assembler import *
 from sparknlp.base.image_assembler import *
@@ -0,0 +1,163 @@
+#  Copyright 2017-2022 John Snow Labs
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""Contains classes for the AsyncLightPipeline."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sparknlp.base.light_pipeline import LightPipeline, _decodePackedAnnotations, _decodePackedResults
+
+
+class AsyncLightPipeline:
+    """Creates an asyncio friendly LightPipeline from a Spark PipelineModel,
+    meant for serving many concurrent requests.
+
+    The stages of the pipeline are validated once at construction. Texts
+    submitted concurrently with :meth:`.annotate` or :meth:`.fullAnnotate`
+    are coalesced into micro-batches, which are annotated with a single call
+    to the JVM on a bounded thread pool, so the event loop is never blocked.
+
+    Parameters
+    ----------
+    pipelineModel : :class:`pyspark.ml.PipelineModel`
+        The PipelineModel containing Spark NLP Annotators
+    parse_embeddings : bool, optional
+        Whether to parse embeddings, by default False
+    max_batch_size : int, optional
+        Maximum number of texts sent to the JVM in one call, by default 32
+    batch_timeout : float, optional
+        Seconds to wait for more texts before sending an incomplete batch,
+        by default 0.005
+    max_workers : int, optional
+        Maximum number of batches annotated concurrently, by default 4
+
+    Notes
+    -----
+    An instance should be used from a single event loop. Only text inputs
+    are supported.
+
+    Examples
+    --------
+    >>> from sparknlp.base import AsyncLightPipeline
+    >>> light = AsyncLightPipeline(pipeline.fit(data))
+    >>> await light.annotate("We are very happy about Spark NLP")
+    {
+        'document': ['We are very happy about Spark NLP'],
+        'token': ['We', 'are', 'very', 'happy', 'about', 'Spark', 'NLP']
+    }
+    >>> results = await asyncio.gather(*[light.fullAnnotate(text) for text in texts])
+    >>> light.close()
+    """
+
+    def __init__(self, pipelineModel, parse_embeddings=False, max_batch_size=32, batch_timeout=0.005,
+                 max_workers=4):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        light_pipeline = LightPipeline(pipelineModel, parse_embeddings, bulk_transfer=True)
+        stages = pipelineModel.stages
+        if not light_pipeline._skipPipelineValidation(stages):
+            light_pipeline._validateStagesInputCols(stages)
+
+        self.pipeline_model = pipelineModel
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout
+        self._lightPipeline = light_pipeline._lightPipeline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = {"annotate": [], "fullAnnotate": []}
+        self._timers = {}
+
+    async def annotate(self, target):
+        """Annotates a single text, extracting the results.
+
+        Parameters
+        ----------
+        target : str
+            The text to be annotated
+
+        Returns
+        -------
+        dict
+            The results of each output column
+        """
+        return await self.__submit("annotate", target)
+
+    async def fullAnnotate(self, target):
+        """Annotates a single text into `Annotation` type results.
+
+        Parameters
+        ----------
+        target : str
+            The text to be annotated
+
+        Returns
+        -------
+        dict
+            The annotations of each output column
+        """
+        return await self.__submit("fullAnnotate", target)
+
+    def close(self):
+        """Shuts down the thread pool once all submitted batches finished."""
+        self._executor.shutdown(wait=True)
+
+    async def __submit(self, method, target):
+        if type(target) is not str:
+            raise TypeError("target for annotation must be 'str'")
+
+        # the loop running this coroutine, get_running_loop requires Python 3.7
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        pending = self._pending[method]
+        pending.append((target, future))
+
+        if len(pending) >= self.max_batch_size:
+            self.__flush(loop, method)
+        elif len(pending) == 1:
+            self._timers[method] = loop.call_later(self.batch_timeout, self.__flush, loop, method)
+
+        return await future
+
+    def __flush(self, loop, method):
+        timer = self._timers.pop(method, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending[method]
+        if not batch:
+            return
+        self._pending[method] = []
+
+        targets = [target for target, _ in batch]
+        futures = [future for _, future in batch]
+        batch_future = loop.run_in_executor(self._executor, self.__annotateBatch, method, targets)
+        batch_future.add_done_callback(lambda done: self.__resolve(done, futures))
+
+    def __annotateBatch(self, method, targets):
+        if method == "annotate":
+            return _decodePackedResults(self._lightPipeline.annotatePackedJava(targets))
+        else:
+            return _decodePackedAnnotations(self._lightPipeline.fullAnnotatePackedJava(targets))
+
+    @staticmethod
+    def __resolve(batch_future, futures):
+        if batch_future.cancelled() or batch_future.exception() is not None:
+            error = batch_future.exception() if not batch_future.cancelled() else asyncio.CancelledError()
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for future, result in zip(futures, batch_future.result()):
+                if not future.done():
+                    future.set_result(result)
@@ -13,6 +13,8 @@
 #  limitations under the License.
 """Contains classes for the LightPipeline."""
 
+import struct
+
 import sparknlp.internal as _internal
 from sparknlp.annotation import Annotation
 from sparknlp.annotation_audio import AnnotationAudio
@@ -41,6 +43,10 @@ class LightPipeline:
         The PipelineModel containing Spark NLP Annotators
     parse_embeddings : bool, optional
         Whether to parse embeddings, by default False
+    bulk_transfer : bool, optional
+        Whether to transfer text results from the JVM as a single packed
+        buffer per call instead of fetching every annotation field through
+        the gateway, by default False
 
     Notes
     -----
@@ -63,9 +69,10 @@ class LightPipeline:
     }
     """
 
-    def __init__(self, pipelineModel, parse_embeddings=False):
+    def __init__(self, pipelineModel, parse_embeddings=False, bulk_transfer=False):
         self.pipeline_model = pipelineModel
         self.parse_embeddings = parse_embeddings
+        self.bulk_transfer = bulk_transfer
         self._lightPipeline = _internal._LightPipeline(pipelineModel, parse_embeddings).apply()
 
     def _validateStagesInputCols(self, stages):
@@ -239,6 +246,9 @@ class LightPipeline:
             if type(target) is str:
                 target = [target]
 
+            if self.bulk_transfer:
+                return _decodePackedAnnotations(self._lightPipeline.fullAnnotatePackedJava(target))
+
             for annotations_result in self._lightPipeline.fullAnnotateJava(target):
                 result.append(self.__buildStages(annotations_result))
             return result
@@ -267,6 +277,11 @@ class LightPipeline:
 
     def __fullAnnotateQuestionAnswering(self, question, context):
         result = []
+        if self.bulk_transfer:
+            if type(question) is str and type(context) is str:
+                question, context = [question], [context]
+            return _decodePackedAnnotations(self._lightPipeline.fullAnnotatePackedJava(question, context))
+
         if type(question) is str and type(context) is str:
             annotations_dict = self._lightPipeline.fullAnnotateJava(question, context)
             result.append(self.__buildStages(annotations_dict))
@@ -277,6 +292,52 @@ class LightPipeline:
 
         return result
 
+    def fullAnnotateEmbeddings(self, target):
+        """Annotates the data provided and returns the embeddings of each
+        output column as a contiguous NumPy matrix.
+
+        The results are transferred from the JVM as a single buffer. The
+        matrices are read-only views into that buffer and the ``embeddings``
+        of each returned `Annotation` is a row of the matrix of its column, so
+        no per-float conversion happens. Use ``numpy.array(matrix)`` to get a
+        writable copy.
+
+        Output columns may have embeddings of different dimensions, but all
+        the annotations of a column must have the same dimension.
+
+        Parameters
+        ----------
+        target : list or str
+            The text to be annotated
+
+        Returns
+        -------
+        List[Tuple[dict, dict]]
+            For each text, a dictionary of the annotations per output column
+            and a dictionary of ``numpy.ndarray`` of shape
+            ``(annotations, dimension)`` and dtype float32 per output column.
+            Columns without embeddings have an empty matrix.
+
+        Examples
+        --------
+        >>> light = LightPipeline(pipeline.fit(data))
+        >>> annotations, embeddings = light.fullAnnotateEmbeddings("Hello from John Snow Labs")[0]
+        >>> embeddings["embeddings"].shape
+        (5, 768)
+        >>> annotations["embeddings"][0].embeddings.shape
+        (768,)
+        """
+        stages = self.pipeline_model.stages
+        if not self._skipPipelineValidation(stages):
+            self._validateStagesInputCols(stages)
+
+        if type(target) is str:
+            target = [target]
+        if type(target) is not list or type(target[0]) is not str:
+            raise TypeError("argument for annotation must be 'str' or list[str]")
+
+        return _decodePackedEmbeddings(self._lightPipeline.fullAnnotateEmbeddingsPackedJava(target))
+
     def fullAnnotateImage(self, path_to_image):
         """Annotates the data provided into `Annotation` type results.
 
@@ -350,6 +411,9 @@ class LightPipeline:
         if not self._skipPipelineValidation(stages):
             self._validateStagesInputCols(stages)
 
+        if self.bulk_transfer:
+            return self.__annotatePacked(target, optional_target)
+
         if optional_target == "":
             if type(target) is str:
                 annotations = self._lightPipeline.annotateJava(target)
@@ -376,6 +440,48 @@ class LightPipeline:
 
         return result
 
+    def __annotatePacked(self, target, optional_target):
+        if optional_target == "":
+            if type(target) is str:
+                return _decodePackedResults(self._lightPipeline.annotatePackedJava([target]))[0]
+            elif type(target) is list:
+                if type(target[0]) is list:
+                    raise TypeError("target is a 1D list")
+                return _decodePackedResults(self._lightPipeline.annotatePackedJava(target))
+            else:
+                raise TypeError("target for annotation must be 'str' or list")
+        else:
+            if type(target) is str and type(optional_target) is str:
+                packed = self._lightPipeline.annotatePackedJava([target], [optional_target])
+                return _decodePackedResults(packed)[0]
+            elif type(target) is list and type(optional_target) is list:
+                if type(target[0]) is list or type(optional_target[0]) is list:
+                    raise TypeError("target and optional_target is a 1D list")
+                return _decodePackedResults(self._lightPipeline.annotatePackedJava(target, optional_target))
+            else:
+                raise TypeError("target and optional_target for annotation must be both 'str' or both lists")
+
+    def search(self, target, k=10):
+        """Searches the documents a DocumentSimilarityRankerModel of the
+        pipeline was trained on for the closest ones to a text.
+
+        The ranker must have been trained with ``buildSearchIndex``.
+
+        Parameters
+        ----------
+        target : str
+            Text to search the neighbours of
+        k : int, optional
+            Maximum number of neighbours to return, by default 10
+
+        Returns
+        -------
+        List[Tuple[int, float]]
+            Indices and distances of the neighbours, sorted by distance
+        """
+        neighbors = self._lightPipeline.searchJava(target, k)
+        return [(int(neighbor[0]), float(neighbor[1])) for neighbor in neighbors]
+
     def transform(self, dataframe):
         """Transforms a dataframe provided with the stages of the LightPipeline.
 
@@ -416,3 +522,105 @@ class LightPipeline:
             Whether to ignore unsupported AnnotatorModels.
         """
         return self._lightPipeline.getIgnoreUnsupported()
+
+
+class _PackedReader:
+    """Sequential reader over a little-endian buffer packed by
+    ``com.johnsnowlabs.nlp.util.AnnotationPacker``."""
+
+    _INT = struct.Struct("<i")
+
+    def __init__(self, buffer):
+        # py4j returns a writable bytearray, the matrices are read-only views into it
+        self.buffer = memoryview(buffer)
+        self.offset = 0
+
+    def readInt(self):
+        value = self._INT.unpack_from(self.buffer, self.offset)[0]
+        self.offset += 4
+        return value
+
+    def readString(self):
+        length = self.readInt()
+        value = str(self.buffer[self.offset:self.offset + length], "utf-8")
+        self.offset += length
+        return value
+
+    def readMatrix(self):
+        import numpy as np
+
+        rows = self.readInt()
+        dimension = self.readInt()
+        self.offset += -self.offset % 4
+        matrix = np.frombuffer(self.buffer, dtype="<f4", count=rows * dimension, offset=self.offset)
+        matrix.setflags(write=False)
+        self.offset += 4 * rows * dimension
+        return matrix.reshape(rows, dimension)
+
+    def readFloats(self):
+        length = self.readInt()
+        values = list(struct.unpack_from("<%df" % length, self.buffer, self.offset))
+        self.offset += 4 * length
+        return values
+
+
+def _decodePackedColumns(buffer, readEmbeddings, readColumnEnd):
+    """Decodes the annotations of each column of each document of a packed buffer.
+
+    ``readEmbeddings`` reads the embeddings packed after each annotation and
+    ``readColumnEnd`` whatever is packed after the annotations of a column.
+    Returns a list of documents, each a list of ``(column, annotations, end)``.
+    """
+    reader = _PackedReader(buffer)
+    documents = []
+    for _ in range(reader.readInt()):
+        columns = []
+        for _ in range(reader.readInt()):
+            column = reader.readString()
+            annotations = []
+            for _ in range(reader.readInt()):
+                annotator_type = reader.readString()
+                begin = reader.readInt()
+                end = reader.readInt()
+                result = reader.readString()
+                metadata = {}
+                for _ in range(reader.readInt()):
+                    key = reader.readString()
+                    metadata[key] = reader.readString()
+                embeddings = readEmbeddings(reader)
+                annotations.append(Annotation(annotator_type, begin, end, result, metadata, embeddings))
+            columns.append((column, annotations, readColumnEnd(reader)))
+        documents.append(columns)
+    return documents
+
+
+def _decodePackedAnnotations(buffer):
+    documents = _decodePackedColumns(buffer, lambda reader: reader.readFloats(), lambda reader: None)
+    return [{column: annotations for column, annotations, _ in columns} for columns in documents]
+
+
+def _decodePackedEmbeddings(buffer):
+    documents = []
+    for columns in _decodePackedColumns(buffer, lambda reader: [], lambda reader: reader.readMatrix()):
+        annotations_by_column = {}
+        matrices = {}
+        for column, annotations, matrix in columns:
+            if matrix.shape[0] == len(annotations):
+                for annotation, row in zip(annotations, matrix):
+                    annotation.embeddings = row
+            annotations_by_column[column] = annotations
+            matrices[column] = matrix
+        documents.append((annotations_by_column, matrices))
+    return documents
+
+
+def _decodePackedResults(buffer):
+    reader = _PackedReader(buffer)
+    documents = []
+    for _ in range(reader.readInt()):
+        columns = {}
+        for _ in range(reader.readInt()):
+            column = reader.readString()
+            columns[column] = [reader.readString() for _ in range(reader.readInt())]
+        documents.append(columns)
+    return documents
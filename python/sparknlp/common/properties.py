@@ -19,6 +19,10 @@ from pyspark.ml.param import Param, Params, TypeConverters
 class HasBatchedAnnotate:
     batchSize = Param(Params._dummy(), "batchSize", "Size of every batch", TypeConverters.toInt)
 
+    maxTokensPerBatch = Param(Params._dummy(), "maxTokensPerBatch",
+                              "Maximum number of padded tokens per batch, batching sentences of similar length together",
+                              TypeConverters.toInt)
+
     def setBatchSize(self, v):
         """Sets batch size.
 
@@ -39,6 +43,32 @@ class HasBatchedAnnotate:
         """
         return self.getOrDefault("batchSize")
 
+    def setMaxTokensPerBatch(self, v):
+        """Sets the maximum number of padded tokens per batch.
+
+        When set to a positive value, transformer based annotators sort
+        sentences by their number of tokens and batch sentences of similar
+        length together, so that short sentences are not padded to the length
+        of a long one. The output order is not affected. Values lower than 1
+        disable it, by default 0.
+
+        Parameters
+        ----------
+        v : int
+            Maximum number of padded tokens per batch
+        """
+        return self._set(maxTokensPerBatch=v)
+
+    def getMaxTokensPerBatch(self):
+        """Gets the maximum number of padded tokens per batch.
+
+        Returns
+        -------
+        int
+            Maximum number of padded tokens per batch
+        """
+        return self.getOrDefault("maxTokensPerBatch")
+
 
 class HasCaseSensitiveProperties:
     caseSensitive = Param(Params._dummy(),
@@ -196,6 +226,89 @@ class HasEnableCachingProperties:
         return self.getOrDefault(self.enableCaching)
 
 
+class HasOpenAIClientProperties:
+    baseUrl = Param(Params._dummy(),
+                    "baseUrl",
+                    "Base URL of the OpenAI compatible API",
+                    typeConverter=TypeConverters.toString)
+
+    concurrency = Param(Params._dummy(),
+                        "concurrency",
+                        "Maximum number of requests in flight for each partition",
+                        typeConverter=TypeConverters.toInt)
+
+    maxRetries = Param(Params._dummy(),
+                       "maxRetries",
+                       "Number of times a request failing with status 429, a 5xx status or an I/O error is retried",
+                       typeConverter=TypeConverters.toInt)
+
+    retryBackoff = Param(Params._dummy(),
+                         "retryBackoff",
+                         "Wait before the first retry in milliseconds, doubled on every retry",
+                         typeConverter=TypeConverters.toInt)
+
+    responseCacheSize = Param(Params._dummy(),
+                              "responseCacheSize",
+                              "Maximum number of responses cached on each executor, or 0 to not cache responses",
+                              typeConverter=TypeConverters.toInt)
+
+    def setBaseUrl(self, value):
+        """Sets the base URL of the API, for example the URL of a local OpenAI
+        compatible server, by default ``https://api.openai.com/v1``.
+
+        Parameters
+        ----------
+        value : str
+            Base URL of the OpenAI compatible API
+        """
+        return self._set(baseUrl=value)
+
+    def setConcurrency(self, value):
+        """Sets the maximum number of requests in flight for each partition, by
+        default 4.
+
+        Parameters
+        ----------
+        value : int
+            Maximum number of requests in flight for each partition
+        """
+        return self._set(concurrency=value)
+
+    def setMaxRetries(self, value):
+        """Sets the number of times a request failing with status 429, a 5xx
+        status or an I/O error is retried, by default 3.
+
+        Parameters
+        ----------
+        value : int
+            Number of retries of a failed request
+        """
+        return self._set(maxRetries=value)
+
+    def setRetryBackoff(self, value):
+        """Sets the wait before the first retry in milliseconds, doubled on
+        every retry, by default 1000.
+
+        Parameters
+        ----------
+        value : int
+            Wait before the first retry in milliseconds
+        """
+        return self._set(retryBackoff=value)
+
+    def setResponseCacheSize(self, value):
+        """Sets the maximum number of responses cached on each executor by the
+        hash of their request and API key, by default 0 which does not cache
+        responses.
+
+        Parameters
+        ----------
+        value : int
+            Maximum number of responses cached on each executor
+        """
+        return self._set(responseCacheSize=value)
+
+
 class HasBatchedAnnotateImage:
     batchSize = Param(Params._dummy(), "batchSize", "Size of every batch", TypeConverters.toInt)
 
@@ -474,6 +587,32 @@ class HasEngine:
         """
         return self.getOrDefault(self.engine)
 
+    def setOnnxSessionOptions(self, value):
+        """Sets the ONNX Runtime session options of this annotator, overriding the
+        ``spark.jsl.settings.onnx`` configuration for the models it runs.
+
+        Options are named without that prefix: ``intraOpNumThreads``,
+        ``interOpNumThreads``, ``executionMode``, ``optimizationLevel``,
+        ``gpuDeviceId`` and ``sessionPoolSize``, the number of sessions per model
+        and executor or ``"auto"`` for one per task slot, up to 8. Each pooled
+        session holds its own copy of the model in memory.
+
+        Parameters
+        ----------
+        value : Dict[str, str]
+            Session options of this annotator
+
+        Examples
+        --------
+        >>> embeddings.setOnnxSessionOptions({
+        ...     "intraOpNumThreads": 2,
+        ...     "executionMode": "SEQUENTIAL",
+        ...     "sessionPoolSize": "auto"
+        ... })
+        """
+        self._call_java("setOnnxSessionOptions", {k: str(v) for k, v in value.items()})
+        return self
+
 
 class HasCandidateLabelsProperties:
     candidateLabels = Param(Params._dummy(), "candidateLabels",
@@ -49,8 +49,9 @@ class _AlbertQuestionAnsweringLoader(ExtendedJavaWrapper):
 
 
 class _BertLoader(ExtendedJavaWrapper):
-    def __init__(self, path, jspark):
-        super(_BertLoader, self).__init__("com.johnsnowlabs.nlp.embeddings.BertEmbeddings.loadSavedModel", path, jspark)
+    def __init__(self, path, jspark, quantize="none"):
+        super(_BertLoader, self).__init__("com.johnsnowlabs.nlp.embeddings.BertEmbeddings.loadSavedModel", path, jspark,
+                                          quantize)
 
 
 class _BertSentenceLoader(ExtendedJavaWrapper):
@@ -144,8 +145,9 @@ class _ElmoLoader(ExtendedJavaWrapper):
 
 
 class _E5Loader(ExtendedJavaWrapper):
-    def __init__(self, path, jspark):
-        super(_E5Loader, self).__init__("com.johnsnowlabs.nlp.embeddings.E5Embeddings.loadSavedModel", path, jspark)
+    def __init__(self, path, jspark, quantize="none"):
+        super(_E5Loader, self).__init__("com.johnsnowlabs.nlp.embeddings.E5Embeddings.loadSavedModel", path, jspark,
+                                        quantize)
 
 
 class _BGELoader(ExtendedJavaWrapper):
@@ -224,10 +226,10 @@ class _RoBertaSentenceLoader(ExtendedJavaWrapper):
 
 
 class _RoBertaSequenceClassifierLoader(ExtendedJavaWrapper):
-    def __init__(self, path, jspark):
+    def __init__(self, path, jspark, quantize="none"):
         super(_RoBertaSequenceClassifierLoader, self).__init__(
             "com.johnsnowlabs.nlp.annotators.classifier.dl.RoBertaForSequenceClassification.loadSavedModel", path,
-            jspark)
+            jspark, quantize)
 
 
 class _RoBertaTokenClassifierLoader(ExtendedJavaWrapper):
@@ -312,12 +314,45 @@ class _XlnetTokenClassifierLoader(ExtendedJavaWrapper):
             "com.johnsnowlabs.nlp.annotators.classifier.dl.XlnetForTokenClassification.loadSavedModel", path, jspark)
 
 
+class _BuildBundle(ExtendedJavaWrapper):
+    def __init__(self, names, languages, remote_locs, path):
+        super(_BuildBundle, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.buildBundle",
+                                           names, languages, remote_locs, path)
+
+
+class _ClearBundle(ExtendedJavaWrapper):
+    def __init__(self):
+        super(_ClearBundle, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.clearBundle")
+
+
 class _ClearCache(ExtendedJavaWrapper):
     def __init__(self, name, language, remote_loc):
         super(_ClearCache, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.clearCache", name,
                                           language, remote_loc)
 
 
+class _EvictCache(ExtendedJavaWrapper):
+    def __init__(self, name):
+        super(_EvictCache, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.evictCache", name)
+
+
+class _ListCache(ExtendedJavaWrapper):
+    def __init__(self):
+        super(_ListCache, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.listCache")
+
+
+class _PruneCache(ExtendedJavaWrapper):
+    def __init__(self, max_size):
+        super(_PruneCache, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.pruneCache",
+                                          max_size)
+
+
+class _Prefetch(ExtendedJavaWrapper):
+    def __init__(self, name, language, remote_loc):
+        super(_Prefetch, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.prefetch", name,
+                                        language, remote_loc)
+
+
 class _CoNLLGeneratorExportFromTargetAndPipeline(ExtendedJavaWrapper):
     def __init__(self, spark, target, pipeline, output_path):
         if type(pipeline) == PipelineModel:
@@ -449,6 +484,11 @@ class _StorageHelper(ExtendedJavaWrapper):
                                              database, storage_ref, within_storage)
 
 
+class _UseBundle(ExtendedJavaWrapper):
+    def __init__(self, path):
+        super(_UseBundle, self).__init__("com.johnsnowlabs.nlp.pretrained.PythonResourceDownloader.useBundle", path)
+
+
 class _SpanBertCorefLoader(ExtendedJavaWrapper):
     def __init__(self, path, jspark):
         super(_SpanBertCorefLoader, self).__init__(
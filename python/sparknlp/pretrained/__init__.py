@@ -13,5 +13,6 @@
 #  limitations under the License.
 """Module for pretrained pipelines and resources."""
 from sparknlp.pretrained.pretrained_pipeline import *
+from sparknlp.pretrained.resource_bundle import *
 from sparknlp.pretrained.resource_downloader import *
 from sparknlp.pretrained.utils import *
@@ -0,0 +1,86 @@
+#  Copyright 2017-2023 John Snow Labs
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+"""Contains classes for bundles of pretrained resources."""
+
+import sparknlp.internal as _internal
+
+
+class ResourceBundle(object):
+    """Models and pipelines downloaded once into a folder or archive, from which
+    ``pretrained()`` calls and :class:`.PretrainedPipeline` load them without any
+    lookup of the remote repository.
+
+    A bundle can also be set with the ``spark.jsl.settings.pretrained.bundle``
+    configuration, so that it is used as soon as the session starts.
+
+    Examples
+    --------
+    Build the bundle where the models can be downloaded:
+
+    >>> ResourceBundle.build([
+    ...     ("explain_document_dl", "en"),
+    ...     ("pos_anc", "en"),
+    ... ], "/models/bundle.zip")
+
+    Then load the models from it, for example on a cluster without internet access:
+
+    >>> ResourceBundle.use("/models/bundle.zip")
+    ['explain_document_dl', 'pos_anc']
+    >>> pos = PerceptronModel.pretrained("pos_anc", "en")
+    """
+
+    @staticmethod
+    def build(resources, path):
+        """Downloads models and pipelines and copies them into a bundle.
+
+        Parameters
+        ----------
+        resources : List[tuple]
+            Name and language of each model or pipeline, optionally followed by
+            its remote location
+        path : str
+            Folder of the bundle, or local ``.zip`` file to archive it into
+
+        Returns
+        -------
+        str
+            Location of the bundle
+        """
+        names = [resource[0] for resource in resources]
+        languages = [resource[1] for resource in resources]
+        remote_locs = [resource[2] if len(resource) > 2 else None for resource in resources]
+        return _internal._BuildBundle(names, languages, remote_locs, path).apply()
+
+    @staticmethod
+    def use(path):
+        """Loads models and pipelines from a bundle instead of downloading them. All
+        resources of the bundle are validated first.
+
+        Parameters
+        ----------
+        path : str
+            Folder of the bundle or local ``.zip`` archive of it
+
+        Returns
+        -------
+        List[str]
+            Names of the resources of the bundle
+        """
+        return list(_internal._UseBundle(path).apply())
+
+    @staticmethod
+    def clear():
+        """Stops loading models and pipelines from the bundle set with :meth:`.use`.
+        """
+        _internal._ClearBundle().apply()
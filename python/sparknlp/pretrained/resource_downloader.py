@@ -170,6 +170,73 @@ class ResourceDownloader(object):
         """
         _internal._ClearCache(name, language, remote_loc).apply()
 
+    @staticmethod
+    def listCache():
+        """Lists the models and pipelines in the local cache, least recently used
+        first.
+
+        Returns
+        -------
+        List[dict]
+            Entries with the ``name``, ``path``, ``size`` in bytes, ``checksum`` and
+            ``lastAccessed`` time in milliseconds of each resource
+        """
+        return [dict(entry) for entry in _internal._ListCache().apply()]
+
+    @staticmethod
+    def prefetch(name, language, remote_loc=None):
+        """Downloads a model or pipeline into the local cache without loading it,
+        for example when a worker starts.
+
+        Parameters
+        ----------
+        name : str
+            Name of the model or pipeline
+        language : str
+            Language of the model or pipeline
+        remote_loc : str, optional
+            Directory of the remote Spark NLP Folder, by default None
+
+        Returns
+        -------
+        str
+            Path of the resource in the cache
+        """
+        return _internal._Prefetch(name, language, remote_loc).apply()
+
+    @staticmethod
+    def evictCache(name):
+        """Removes a resource from the local cache.
+
+        Parameters
+        ----------
+        name : str
+            Name of the resource in the cache, as listed by :meth:`.listCache`
+
+        Returns
+        -------
+        bool
+            Whether the resource was in the cache
+        """
+        return _internal._EvictCache(name).apply()
+
+    @staticmethod
+    def pruneCache(max_size):
+        """Evicts the least recently used resources until the local cache fits in a
+        size.
+
+        Parameters
+        ----------
+        max_size : str
+            Size in bytes, or with a unit such as ``"500m"`` or ``"10g"``
+
+        Returns
+        -------
+        List[str]
+            Names of the evicted resources
+        """
+        return list(_internal._PruneCache(str(max_size)).apply())
+
     @staticmethod
     def showPublicModels(annotator=None, lang=None, version=None):
         """Prints all pretrained models for a particular annotator model, that are
@@ -87,4 +87,39 @@ class DocumentSimilarityRankerTestSpec(unittest.TestCase):
                     "finished_doc_similarity_rankings_id",
                     "finished_doc_similarity_rankings_neighbors")
             .show(10, False)
-        )
\ No newline at end of file
+        )
+
+@pytest.mark.slow
+class DocumentSimilarityRankerLightPipelineSearchTestSpec(unittest.TestCase):
+    def setUp(self):
+        self.data = SparkSessionForTest.spark.createDataFrame([
+            ["Third document, climate change is arguably one of the most pressing problems of our time."],
+            ["Fifth document, Florence in Italy, is among the most beautiful cities in Europe."],
+            ["Seventh document, the French Riviera is the Mediterranean coastline of the southeast corner of France."]
+        ]).toDF("text")
+
+    def runTest(self):
+        document_assembler = DocumentAssembler() \
+            .setInputCol("text") \
+            .setOutputCol("document")
+
+        sentence_embeddings = RoBertaSentenceEmbeddings.pretrained() \
+            .setInputCols(["document"]) \
+            .setOutputCol("sentence_embeddings")
+
+        document_similarity_ranker = DocumentSimilarityRankerApproach() \
+            .setInputCols("sentence_embeddings") \
+            .setOutputCol("doc_similarity_rankings") \
+            .setBuildSearchIndex(True)
+
+        pipeline = Pipeline(stages=[
+            document_assembler,
+            sentence_embeddings,
+            document_similarity_ranker
+        ])
+
+        light = LightPipeline(pipeline.fit(self.data))
+        neighbors = light.search("Climate change is one of the most pressing problems of our time.", k=2)
+
+        assert len(neighbors) == 2
+        assert neighbors[0][1] <= neighbors[1][1]
@@ -0,0 +1,63 @@
+#  Copyright 2017-2022 John Snow Labs
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import asyncio
+import unittest
+
+import pytest
+
+from sparknlp.annotator import *
+from sparknlp.base import *
+from test.util import SparkSessionForTest
+
+
+@pytest.mark.fast
+class AsyncLightPipelineTestSpec(unittest.TestCase):
+
+    def setUp(self):
+        self.spark = SparkSessionForTest.spark
+        self.texts = ["This is a text input", "This is another text input", "And a third one"]
+        data = self.spark.createDataFrame([[self.texts[0]]]).toDF("text")
+
+        document_assembler = DocumentAssembler() \
+            .setInputCol("text") \
+            .setOutputCol("document")
+
+        tokenizer = Tokenizer() \
+            .setInputCols(["document"]) \
+            .setOutputCol("token")
+
+        self.model = Pipeline().setStages([document_assembler, tokenizer]).fit(data)
+
+    def runTest(self):
+        light_pipeline = LightPipeline(self.model)
+        async_light_pipeline = AsyncLightPipeline(self.model, max_batch_size=2)
+
+        async def annotate_all():
+            annotations = await asyncio.gather(*[async_light_pipeline.annotate(text) for text in self.texts])
+            full_annotations = await asyncio.gather(
+                *[async_light_pipeline.fullAnnotate(text) for text in self.texts])
+            return annotations, full_annotations
+
+        loop = asyncio.new_event_loop()
+        try:
+            annotations, full_annotations = loop.run_until_complete(annotate_all())
+        finally:
+            loop.close()
+        async_light_pipeline.close()
+
+        self.assertEqual(annotations, light_pipeline.annotate(self.texts))
+        self.assertEqual(len(full_annotations), len(self.texts))
+        for text, result in zip(self.texts, full_annotations):
+            self.assertEqual(result["document"][0].result, text)
+            self.assertEqual(result["token"], light_pipeline.fullAnnotate(text)[0]["token"])
@@ -101,6 +101,30 @@ class LightPipelineNoisyTextInputTest(LightPipelineTextSetUp, unittest.TestCase)
             self.assertTrue(len(result["token"]) > 0)
 
 
+@pytest.mark.fast
+class LightPipelineBulkTransferTest(LightPipelineTextSetUp, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+    def runTest(self):
+        light_pipeline = LightPipeline(self.model)
+        bulk_light_pipeline = LightPipeline(self.model, bulk_transfer=True)
+
+        texts = [self.text, self.text]
+        expected = light_pipeline.fullAnnotate(texts)
+        annotations_result = bulk_light_pipeline.fullAnnotate(texts)
+
+        self.assertEqual(len(annotations_result), len(texts))
+        for expected_result, result in zip(expected, annotations_result):
+            self.assertEqual(set(expected_result.keys()), set(result.keys()))
+            for column in result:
+                self.assertEqual(expected_result[column], result[column])
+
+        self.assertEqual(light_pipeline.annotate(self.text), bulk_light_pipeline.annotate(self.text))
+        self.assertEqual(light_pipeline.annotate(texts), bulk_light_pipeline.annotate(texts))
+
+
 class LightPipelineImageSetUp(unittest.TestCase):
 
     def setUp(self):
@@ -406,3 +430,25 @@ class LightPipelineWithEmbeddings(unittest.TestCase):
         full_result = light_pipeline.fullAnnotate("Hello from John Snow Labs ! ")[0]
         self.assertTrue(len(full_result["embeddings"]) > 0)
 
+
+@pytest.mark.slow
+class LightPipelineEmbeddingsMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pipeline = PretrainedPipeline('onto_recognize_entities_bert_tiny', lang='en')
+
+    def runTest(self):
+        light_pipeline = LightPipeline(self.pipeline.model)
+        annotations, embeddings = light_pipeline.fullAnnotateEmbeddings("Hello from John Snow Labs ! ")[0]
+
+        matrix = embeddings["embeddings"]
+        self.assertEqual(matrix.dtype.name, "float32")
+        self.assertEqual(matrix.shape[0], len(annotations["embeddings"]))
+        self.assertEqual(matrix.shape[0], len(annotations["token"]))
+        self.assertEqual(embeddings["token"].size, 0)
+
+        first_embeddings = annotations["embeddings"][0].embeddings
+        self.assertEqual(first_embeddings.shape, (matrix.shape[1],))
+        self.assertTrue(first_embeddings.base is not None)
+        self.assertFalse(matrix.flags.writeable)
+        self.assertFalse(first_embeddings.flags.writeable)
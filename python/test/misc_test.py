@@ -31,6 +31,21 @@ class UtilitiesTestSpec(unittest.TestCase):
         assert (regex_rule.rule() == "\w+")
 
 
+@pytest.mark.fast
+class AnnotationEqualityTestSpec(unittest.TestCase):
+
+    def runTest(self):
+        from sparknlp.annotation import Annotation
+
+        def annotation(embeddings):
+            return Annotation("token", 0, 4, "Hello", {}, embeddings)
+
+        self.assertEqual(annotation(None), annotation(None))
+        self.assertNotEqual(annotation(None), annotation([1.0]))
+        self.assertNotEqual(annotation([1.0]), annotation(None))
+        self.assertEqual(annotation([1.0, 2.0]), annotation([1.0, 2.0]))
+
+
 @pytest.mark.fast
 class SerializersTestSpec(unittest.TestCase):
     def setUp(self):
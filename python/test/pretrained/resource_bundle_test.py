@@ -0,0 +1,41 @@
+#  Copyright 2017-2023 John Snow Labs
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from sparknlp.annotator import PerceptronModel
+from sparknlp.pretrained import ResourceBundle
+from test.util import SparkContextForTest
+
+
+@pytest.mark.slow
+class ResourceBundleTestSpec(unittest.TestCase):
+
+    def setUp(self):
+        self.spark = SparkContextForTest.spark
+        self.bundle = os.path.join(tempfile.mkdtemp(), "bundle.zip")
+
+    def runTest(self):
+        location = ResourceBundle.build([("pos_anc", "en")], self.bundle)
+        assert location == self.bundle
+
+        assert ResourceBundle.use(self.bundle) == ["pos_anc"]
+        try:
+            pos = PerceptronModel.pretrained("pos_anc", "en")
+            assert pos is not None
+        finally:
+            ResourceBundle.clear()
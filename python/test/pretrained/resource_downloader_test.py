@@ -31,3 +31,17 @@ class ResourceDownloaderShowTestSpec(unittest.TestCase):
         ResourceDownloader.showPublicPipelines("en")
         ResourceDownloader.showPublicPipelines("en", "2.5.0")
         ResourceDownloader.showUnCategorizedResources()
+
+
+@pytest.mark.slow
+class ResourceDownloaderCacheTestSpec(unittest.TestCase):
+
+    def runTest(self):
+        path = ResourceDownloader.prefetch("pos_anc", "en")
+        entries = ResourceDownloader.listCache()
+        cached = [entry for entry in entries if entry["path"] == path]
+        assert len(cached) == 1
+        assert cached[0]["size"] > 0
+
+        assert ResourceDownloader.evictCache(cached[0]["name"])
+        assert not ResourceDownloader.evictCache(cached[0]["name"])
@@ -21,7 +21,7 @@ import com.johnsnowlabs.ml.ai.util.PrepareEmbeddings
 import com.johnsnowlabs.ml.onnx.{OnnxSession, OnnxWrapper}
 import com.johnsnowlabs.ml.tensorflow.sign.{ModelSignatureConstants, ModelSignatureManager}
 import com.johnsnowlabs.ml.tensorflow.{TensorResources, TensorflowWrapper}
-import com.johnsnowlabs.ml.util.{ModelArch, ONNX, TensorFlow}
+import com.johnsnowlabs.ml.util.{DynamicBatching, ModelArch, ONNX, TensorFlow}
 import com.johnsnowlabs.nlp.annotators.common._
 import com.johnsnowlabs.nlp.{Annotation, AnnotatorType}
 import org.slf4j.{Logger, LoggerFactory}
@@ -365,12 +365,12 @@ private[johnsnowlabs] class Bert(
       originalTokenSentences: Seq[TokenizedSentence],
       batchSize: Int,
       maxSentenceLength: Int,
-      caseSensitive: Boolean): Seq[WordpieceEmbeddingsSentence] = {
+      caseSensitive: Boolean,
+      maxTokensPerBatch: Int = 0): Seq[WordpieceEmbeddingsSentence] = {
 
     /*Run embeddings calculation by batches*/
-    sentences.zipWithIndex
-      .grouped(batchSize)
-      .flatMap { batch =>
+    DynamicBatching
+      .predict(sentences.zipWithIndex, batchSize, maxTokensPerBatch)(_._1.tokens.length) { batch =>
         val encoded = PrepareEmbeddings.prepareBatchInputsWithPadding(
           batch,
           maxSentenceLength,
@@ -419,7 +419,6 @@ private[johnsnowlabs] class Bert(
           WordpieceEmbeddingsSentence(tokensWithEmbeddings, originalIndexedTokens.sentenceIndex)
         }
       }
-      .toSeq
   }
 
   def predictSequence(
@@ -427,14 +426,13 @@ private[johnsnowlabs] class Bert(
       sentences: Seq[Sentence],
       batchSize: Int,
       maxSentenceLength: Int,
-      isLong: Boolean = false): Seq[Annotation] = {
+      isLong: Boolean = false,
+      maxTokensPerBatch: Int = 0): Seq[Annotation] = {
 
     /*Run embeddings calculation by batches*/
-    tokens
-      .zip(sentences)
-      .zipWithIndex
-      .grouped(batchSize)
-      .flatMap { batch =>
+    DynamicBatching
+      .predict(tokens.zip(sentences).zipWithIndex, batchSize, maxTokensPerBatch)(
+        _._1._1.tokens.length) { batch =>
         val tokensBatch = batch.map(x => (x._1._1, x._2))
         val sentencesBatch = batch.map(x => x._1._2)
         val encoded = PrepareEmbeddings.prepareBatchInputsWithPadding(
@@ -468,7 +466,6 @@ private[johnsnowlabs] class Bert(
             embeddings = vectors)
         }
       }
-      .toSeq
   }
 
 }
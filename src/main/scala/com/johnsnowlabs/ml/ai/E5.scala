@@ -20,7 +20,7 @@ import ai.onnxruntime.{OnnxTensor, TensorInfo}
 import com.johnsnowlabs.ml.onnx.{OnnxSession, OnnxWrapper}
 import com.johnsnowlabs.ml.tensorflow.sign.{ModelSignatureConstants, ModelSignatureManager}
 import com.johnsnowlabs.ml.tensorflow.{TensorResources, TensorflowWrapper}
-import com.johnsnowlabs.ml.util.{LinAlg, ONNX, TensorFlow}
+import com.johnsnowlabs.ml.util.{DynamicBatching, LinAlg, ONNX, TensorFlow}
 import com.johnsnowlabs.nlp.annotators.common._
 import com.johnsnowlabs.nlp.{Annotation, AnnotatorType}
 import org.slf4j.{Logger, LoggerFactory}
@@ -223,14 +223,12 @@ private[johnsnowlabs] class E5(
       sentences: Seq[Annotation],
       tokenizedSentences: Seq[WordpieceTokenizedSentence],
       batchSize: Int,
-      maxSentenceLength: Int): Seq[Annotation] = {
-
-    tokenizedSentences
-      .zip(sentences)
-      .zipWithIndex
-      .grouped(batchSize)
-      .toArray
-      .flatMap { batch =>
+      maxSentenceLength: Int,
+      maxTokensPerBatch: Int = 0): Seq[Annotation] = {
+
+    DynamicBatching
+      .predict(tokenizedSentences.zip(sentences).zipWithIndex, batchSize, maxTokensPerBatch)(
+        _._1._1.tokens.length) { batch =>
         val tokensBatch = batch.map(x => x._1._1.tokens)
         val tokens = tokensBatch.map(x =>
           Array(sentenceStartTokenId) ++ x
@@ -16,30 +16,78 @@
 
 package com.johnsnowlabs.ml.ai
 
+import com.johnsnowlabs.ml.tensorflow.sign.ModelSignatureConstants
 import com.johnsnowlabs.ml.tensorflow.{TensorResources, TensorflowWrapper}
 import com.johnsnowlabs.nlp.annotators.common.{Sentence, SentenceSplit}
 import com.johnsnowlabs.nlp.annotators.tokenizer.bpe.Gpt2Tokenizer
 import com.johnsnowlabs.nlp.{Annotation, AnnotatorType}
-import org.tensorflow.Session
+import org.slf4j.{Logger, LoggerFactory}
+import org.tensorflow.proto.framework.GraphDef
+import org.tensorflow.{Session, Tensor}
 
 import scala.collection.JavaConverters._
 import scala.collection.mutable
 import scala.math.exp
 
+/** Runs GPT2 generation with a TensorFlow model.
+  *
+  * If the exported model takes the keys and values of the previous steps as an extra input, they
+  * can be cached: after the prompt, every step only runs the last generated token through the
+  * decoder instead of the whole prefix. The serving signature of such a model has, next to
+  * `input_ids` and `attention_mask`, a `past_key_values` input of shape `(layers, 2, batch,
+  * heads, past length, head size)` and a `present_key_values` output with the updated keys and
+  * values in the same layout. Their tensors are read from the `serving_default` signature of the
+  * model. Models without them, or whose past input has dynamic layer, head or size dimensions,
+  * always decode the whole prefix.
+  */
 private[johnsnowlabs] class GPT2(
     val tensorflow: TensorflowWrapper,
     val bpeTokenizer: Gpt2Tokenizer,
-    configProtoBytes: Option[Array[Byte]] = None)
+    configProtoBytes: Option[Array[Byte]] = None,
+    signatures: Option[Map[String, String]] = None)
     extends Serializable {
 
+  private val _tfGpt2Signatures: Map[String, String] = signatures.getOrElse(Map.empty)
+
   // keys representing the input and output tensors of the GPT2 model
-  private val inputIdsKey = "serving1_serving1_input_ids:0"
-  private val attentionMaskKey = "serving1_serving1_attention_mask:0"
-  private val outputLogitsKey = "StatefulPartitionedCall:0"
+  private val inputIdsKey = _tfGpt2Signatures
+    .getOrElse(ModelSignatureConstants.InputIds.key, "serving1_serving1_input_ids:0")
+  private val attentionMaskKey = _tfGpt2Signatures
+    .getOrElse(ModelSignatureConstants.AttentionMask.key, "serving1_serving1_attention_mask:0")
+  private val outputLogitsKey = _tfGpt2Signatures
+    .getOrElse(ModelSignatureConstants.LogitsOutput.key, "StatefulPartitionedCall:0")
+  private val pastKeyValuesKey =
+    _tfGpt2Signatures.get(ModelSignatureConstants.PastKeyValues.key)
+  private val presentKeyValuesKey =
+    _tfGpt2Signatures.get(ModelSignatureConstants.PresentKeyValues.key)
 
   private val paddingTokenId = 50256
   private val eosTokenId = 50256
 
+  @transient private lazy val logger: Logger = LoggerFactory.getLogger("GPT2")
+  @transient @volatile private var warnedNoCache = false
+
+  /** Dimensions of the past keys and values input, if the model has one */
+  private lazy val pastKeyValuesShape: Option[Array[Long]] =
+    pastKeyValuesKey.filter(_ => presentKeyValuesKey.isDefined).flatMap { key =>
+      val pastNodeName = key.split(":").head
+      GraphDef
+        .parseFrom(tensorflow.graph)
+        .getNodeList
+        .asScala
+        .find(node => node.getName == pastNodeName && node.getOp == "Placeholder")
+        .flatMap(node => Option(node.getAttrMap.get("shape")))
+        .map(_.getShape.getDimList.asScala.map(_.getSize).toArray)
+    }
+
+  /** Whether the model takes the keys and values of the previous steps as input, with static
+    * dimensions apart from the batch and the past length, so that an empty past can be built
+    */
+  def supportsCache: Boolean = pastKeyValuesShape.exists(_.zipWithIndex.forall {
+    case (_, 2) | (_, 4) => true
+    case (size, _) => size >= 0
+  })
+
   private def sessionWarmup(): Unit = {
     val dummyInput = Array.fill(128)(0) ++ Array(eosTokenId)
     tag(
@@ -71,7 +119,8 @@ private[johnsnowlabs] class GPT2(
       noRepeatNgramSize: Int,
       task: String,
       randomSeed: Option[Int] = None,
-      ignoreTokenIds: Array[Int] = Array()): Seq[Annotation] = {
+      ignoreTokenIds: Array[Int] = Array(),
+      useCache: Boolean = false): Seq[Annotation] = {
 
     val batchDecoder = sentences.grouped(batchSize).toArray.flatMap { batch =>
       val batchSP = encode(batch, task)
@@ -87,7 +136,8 @@ private[johnsnowlabs] class GPT2(
         repetitionPenalty,
         noRepeatNgramSize,
         randomSeed,
-        ignoreTokenIds)
+        ignoreTokenIds,
+        useCache)
       decode(spIds)
     }
 
@@ -118,7 +168,8 @@ private[johnsnowlabs] class GPT2(
       repetitionPenalty: Double,
       noRepeatNgramSize: Int,
       randomSeed: Option[Int],
-      ignoreTokenIds: Array[Int] = Array()): Array[Array[Int]] = {
+      ignoreTokenIds: Array[Int] = Array(),
+      useCache: Boolean = false): Array[Array[Int]] = {
 
     val numReturn_sequences = 1
     // from config
@@ -144,6 +195,14 @@ private[johnsnowlabs] class GPT2(
       Array.fill[Int](diff)(this.paddingTokenId) ++ tokenIds.take(maxSentenceLength)
     }
 
+    if (useCache && !supportsCache && !warnedNoCache) {
+      warnedNoCache = true
+      logger.warn(
+        "useCache is set, but the GPT2 model has no past_key_values input with static layer," +
+          " head and size dimensions and present_key_values output in its serving signature." +
+          " The whole prefix is decoded instead.")
+    }
+
     generateNoBeamSearch(
       paddedBatch,
       maxOutputLength,
@@ -158,7 +217,8 @@ private[johnsnowlabs] class GPT2(
       vocab_size,
       randomSeed,
       session,
-      ignoreTokenIds)
+      ignoreTokenIds,
+      useCache && supportsCache)
   }
 
   def generateNoBeamSearch(
@@ -175,7 +235,8 @@ private[johnsnowlabs] class GPT2(
       vocab_size: Int,
       randomSeed: Option[Int],
       session: Session,
-      ignoreTokenIds: Array[Int] = Array()): Array[Array[Int]] = {
+      ignoreTokenIds: Array[Int] = Array(),
+      useCache: Boolean = false): Array[Array[Int]] = {
 
     /** Generate sequences for each example without beam search (numBeams == 1). All returned
       * sequence are generated independently.
@@ -190,45 +251,70 @@ private[johnsnowlabs] class GPT2(
     var unfinishedSents = List.fill(decoderInputs.length)(1)
     var sentLengths = List.fill(decoderInputs.length)(maxOutputLength)
 
+    // keys and values of all previous steps, only used with cache
+    var pastKeyValues: Option[Tensor] = None
+
     while (!stopDecoder) {
       val decoderInputLength = decoderInputs.head.length
       val tensorDecoder = new TensorResources()
 
+      // with cache, only the last generated token is new to the model
+      val useLastIdOnly = useCache && pastKeyValues.isDefined
+      val sequenceLength = if (useLastIdOnly) 1 else decoderInputLength
+
       val decoderInputBuffers =
-        tensorDecoder.createIntBuffer(decoderInputs.length * decoderInputLength)
+        tensorDecoder.createIntBuffer(decoderInputs.length * sequenceLength)
       val decoderAttentionBuffers =
         tensorDecoder.createIntBuffer(decoderInputs.length * decoderInputLength)
 
       decoderInputs.zipWithIndex.foreach { case (pieceIds, idx) =>
-        val offset = idx * decoderInputLength
-        decoderInputBuffers.offset(offset).write(pieceIds)
+        decoderInputBuffers
+          .offset(idx * sequenceLength)
+          .write(if (useLastIdOnly) pieceIds.takeRight(1) else pieceIds)
         val paddingMasks = pieceIds.map(_ => 1)
-        decoderAttentionBuffers.offset(offset).write(paddingMasks)
+        decoderAttentionBuffers.offset(idx * decoderInputLength).write(paddingMasks)
       }
 
       val inputIdTensors = tensorDecoder.createIntBufferTensor(
-        Array(decoderInputs.length.toLong, decoderInputLength),
+        Array(decoderInputs.length.toLong, sequenceLength),
         decoderInputBuffers)
       val attentionMaskTensors = tensorDecoder.createIntBufferTensor(
         Array(decoderInputs.length.toLong, decoderInputLength),
         decoderAttentionBuffers)
       val runner = session.runner
 
-      // TODO add past to the model and use cache
       runner
         .feed(inputIdsKey, inputIdTensors)
         .feed(attentionMaskKey, attentionMaskTensors)
         .fetch(outputLogitsKey)
 
+      if (useCache) {
+        runner
+          .feed(
+            pastKeyValuesKey.get,
+            pastKeyValues.getOrElse(emptyPastKeyValues(tensorDecoder, decoderInputs.length)))
+          .fetch(presentKeyValuesKey.get)
+      } else if (supportsCache) {
+        // the past is an input of these models, without cache it is always empty
+        runner.feed(pastKeyValuesKey.get, emptyPastKeyValues(tensorDecoder, decoderInputs.length))
+      }
+
       val decoderOuts = runner.run().asScala
       val decoderOutputs = TensorResources
         .extractFloats(decoderOuts.head)
         .grouped(vocab_size)
         .toArray
-        .grouped(decoderInputLength)
+        .grouped(sequenceLength)
         .toArray
       var nextTokenLogits = for (decoderOutput <- decoderOutputs) yield decoderOutput.last
 
+      // the present keys and values are kept open as the past of the next step
+      val stepOuts = if (useCache) {
+        pastKeyValues.foreach(_.close())
+        pastKeyValues = Some(decoderOuts(1))
+        decoderOuts.take(1)
+      } else decoderOuts
+
       nextTokenLogits = nextTokenLogits.map(logits => {
         logits.indices
           .map(i => {
@@ -315,7 +401,7 @@ private[johnsnowlabs] class GPT2(
         .map(x => {
           x._1 ++ Array(x._2)
         })
-      decoderOuts.foreach(_.close())
+      stepOuts.foreach(_.close())
 
       curLen += 1
 
@@ -335,7 +421,7 @@ private[johnsnowlabs] class GPT2(
       }
 
       tensorDecoder.clearTensors()
-      tensorDecoder.clearSession(decoderOuts)
+      tensorDecoder.clearSession(stepOuts)
       inputIdTensors.close()
 
       // stop when there is a eos in each sentence, or if we exceed the maximum length
@@ -344,9 +430,22 @@ private[johnsnowlabs] class GPT2(
         || (decoderInputs.head.length > maxOutputLength))
 
     }
+    pastKeyValues.foreach(_.close())
     decoderInputs
   }
 
+  /** Past keys and values of length zero, fed to the first step of a cached generation. Only
+    * built for models that [[supportsCache]].
+    */
+  private def emptyPastKeyValues(tensorResources: TensorResources, batchSize: Int): Tensor = {
+    val shape = pastKeyValuesShape.get.zipWithIndex.map {
+      case (_, 2) => batchSize.toLong
+      case (_, 4) => 0L
+      case (size, _) => size
+    }
+    tensorResources.createFloatBufferTensor(shape, tensorResources.createFloatBuffer(0))
+  }
+
   def createNextTokenLogitsPenalties(
       inputIds: Seq[Array[Int]],
       logits: Array[Array[Float]],
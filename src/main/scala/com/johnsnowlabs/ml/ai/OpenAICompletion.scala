@@ -18,20 +18,24 @@ package com.johnsnowlabs.ml.ai
 import com.fasterxml.jackson.databind.ObjectMapper
 import com.fasterxml.jackson.module.scala.DefaultScalaModule
 import com.johnsnowlabs.ml.ai.model.CompletionResponse
-import com.johnsnowlabs.nlp.{Annotation, AnnotatorModel, HasSimpleAnnotate}
+import com.johnsnowlabs.ml.ai.util.{HasOpenAIClientProperties, OpenAIClient, OpenAIRequest}
+import com.johnsnowlabs.nlp.{Annotation, AnnotatorModel, HasBatchedAnnotate}
 import com.johnsnowlabs.nlp.AnnotatorType.DOCUMENT
 import com.johnsnowlabs.nlp.serialization.StructFeature
 import com.johnsnowlabs.util.{ConfigHelper, ConfigLoader, JsonBuilder, JsonParser}
-import org.apache.http.client.methods.HttpPost
-import org.apache.http.entity.{ContentType, StringEntity}
-import org.apache.http.impl.client.{CloseableHttpClient, HttpClients}
-import org.apache.http.util.EntityUtils
 import org.apache.spark.broadcast.Broadcast
 import org.apache.spark.ml.param.{BooleanParam, FloatParam, IntParam, Param, StringArrayParam}
 import org.apache.spark.ml.util.Identifiable
 import org.apache.spark.sql.{Dataset, SparkSession}
+import org.json4s.DefaultFormats
+import org.json4s.jackson.Serialization
 
 /** Transformer that makes a request for OpenAI Completion API for each executor.
+  *
+  * Up to `concurrency` prompts are requested at a time for each partition, over connections
+  * kept alive and shared by all the tasks of an executor. Requests failing with status 429 or
+  * 5xx are retried with an exponential backoff. The API can be replaced by any OpenAI
+  * compatible server with `setBaseUrl`.
   *
   * @see
   *   [[https://platform.openai.com/docs/api-reference/completions/create OpenAI API Doc]] for
@@ -99,7 +103,8 @@ import org.apache.spark.sql.{Dataset, SparkSession}
 
 class OpenAICompletion(override val uid: String)
     extends AnnotatorModel[OpenAICompletion]
-    with HasSimpleAnnotate[OpenAICompletion] {
+    with HasBatchedAnnotate[OpenAICompletion]
+    with HasOpenAIClientProperties {
 
   def this() = this(Identifiable.randomUID("OPENAI_COMPLETION"))
 
@@ -209,7 +214,8 @@ class OpenAICompletion(override val uid: String)
     echo -> false,
     presencePenalty -> 0f,
     frequencyPenalty -> 0f,
-    bestOf -> 1)
+    bestOf -> 1,
+    batchSize -> 32)
 
   override def beforeAnnotate(dataset: Dataset[_]): Dataset[_] = {
     this.setBearerTokenIfNotSet(
@@ -218,17 +224,16 @@ class OpenAICompletion(override val uid: String)
     dataset
   }
 
-  /** takes a document and annotations and produces new annotations of this annotator's annotation
-    * type
+  /** Requests a completion for every document of a batch, `concurrency` of them at a time
     *
-    * @param annotations
-    *   Annotations that correspond to inputAnnotationCols generated by previous annotators if any
+    * @param batchedAnnotations
+    *   Annotations in batches that correspond to inputAnnotationCols generated by previous
+    *   annotators if any
     * @return
-    *   any number of annotations processed for every input annotation. Not necessary one to one
-    *   relationship
+    *   a completion for every input document, in the rows of the batch
     */
-  override def annotate(annotations: Seq[Annotation]): Seq[Annotation] = {
-    val prompts = annotations.map(annotation => annotation.result)
+  override def batchAnnotate(batchedAnnotations: Seq[Array[Annotation]]): Seq[Seq[Annotation]] = {
+    val prompts = batchedAnnotations.map(_.map(annotation => annotation.result))
     val logitBiasString = getLogitBiasAsJsonString
 
     val suffixJson = JsonBuilder.formatOptionalField("suffix", get(suffix))
@@ -251,7 +256,7 @@ class OpenAICompletion(override val uid: String)
       """
         |{
         |    "model": "%s",
-        |    "prompt": "%s",
+        |    "prompt": %s,
         |    "stream": false
         |    %s
         |    %s
@@ -269,10 +274,10 @@ class OpenAICompletion(override val uid: String)
         |}
         |""".stripMargin
 
-    val jsons = prompts.map(prompt =>
+    val jsons = prompts.flatten.map(prompt =>
       jsonTemplate.format(
         $(model),
-        prompt,
+        Serialization.write(prompt)(DefaultFormats),
         suffixJson,
         maxTokensJson,
         temperatureJson,
@@ -286,12 +291,22 @@ class OpenAICompletion(override val uid: String)
         bestOfJson,
         logitBiasJson,
         userJson))
-    val openAIUrlCompletion = "https://api.openai.com/v1/completions"
-    val annotationsCompletion = jsons.map { json =>
-      val response = post(openAIUrlCompletion, json)
-      Annotation(DOCUMENT, 0, response.length, response, Map())
-    }
-    annotationsCompletion
+
+    val bearerToken = getBearerToken
+    require(bearerToken.nonEmpty || isSet(baseUrl), "OpenAI API Key required")
+
+    val requests = jsons.map(json => OpenAIRequest(endpoint("completions"), json))
+    val completions = OpenAIClient
+      .postAll(requests, clientSettings(bearerToken))
+      .map { responseBody =>
+        JsonParser.parseObject[CompletionResponse](responseBody).choices.head.text
+      }
+      .iterator
+
+    prompts.map(_.map { _ =>
+      val completion = completions.next()
+      Annotation(DOCUMENT, 0, completion.length, completion, Map())
+    }.toSeq)
   }
 
   private def getLogitBiasAsJsonString: Option[String] = {
@@ -301,32 +316,4 @@ class OpenAICompletion(override val uid: String)
     } else None
   }
 
-  private def post(url: String, jsonBody: String): String = {
-    val httpPost = new HttpPost(url)
-    httpPost.setEntity(new StringEntity(jsonBody, ContentType.APPLICATION_JSON))
-    val bearerToken = getBearerToken
-    require(bearerToken.nonEmpty, "OpenAI API Key required")
-    httpPost.setHeader("Authorization", s"Bearer $bearerToken")
-
-    var text: String = null
-    var responseBody: String = ""
-
-    val httpclient: CloseableHttpClient = HttpClients.createDefault()
-    try {
-      val response = httpclient.execute(httpPost)
-      responseBody = EntityUtils.toString(response.getEntity)
-      val completionResponse = JsonParser.parseObject[CompletionResponse](responseBody)
-      text = completionResponse.choices.head.text
-    } catch {
-      case ex: Exception =>
-        if (responseBody.contains("error"))
-          throw new Exception(responseBody)
-        else ex.printStackTrace()
-    } finally {
-      httpclient.close()
-    }
-
-    text
-  }
-
 }
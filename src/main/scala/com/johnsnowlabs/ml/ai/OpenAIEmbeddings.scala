@@ -1,19 +1,24 @@
 package com.johnsnowlabs.ml.ai
 
 import com.johnsnowlabs.ml.ai.model.TextEmbeddingResponse
+import com.johnsnowlabs.ml.ai.util.{HasOpenAIClientProperties, OpenAIClient, OpenAIRequest}
 import com.johnsnowlabs.nlp.AnnotatorType.DOCUMENT
-import com.johnsnowlabs.nlp.{Annotation, AnnotatorModel, HasSimpleAnnotate}
-import com.johnsnowlabs.util.{ConfigHelper, ConfigLoader, JsonBuilder, JsonParser}
-import org.apache.http.client.methods.HttpPost
-import org.apache.http.entity.{ContentType, StringEntity}
-import org.apache.http.impl.client.{CloseableHttpClient, HttpClients}
-import org.apache.http.util.EntityUtils
+import com.johnsnowlabs.nlp.{Annotation, AnnotatorModel, HasBatchedAnnotate}
+import com.johnsnowlabs.util.{ConfigHelper, ConfigLoader, JsonParser}
 import org.apache.spark.broadcast.Broadcast
-import org.apache.spark.ml.param.Param
+import org.apache.spark.ml.param.{IntParam, Param}
 import org.apache.spark.ml.util.Identifiable
 import org.apache.spark.sql.{Dataset, SparkSession}
+import org.json4s.jackson.Serialization
+import org.json4s.{DefaultFormats, Formats}
 
 /** Transformer that makes a request for OpenAI Embeddings API for each executor.
+  *
+  * Documents are embedded in batches of `inputsPerRequest` per request, with up to
+  * `concurrency` requests in flight for each partition, over connections kept alive and shared
+  * by all the tasks of an executor. Requests failing with status 429 or 5xx are retried with an
+  * exponential backoff. The API can be replaced by any OpenAI compatible server with
+  * `setBaseUrl`.
   *
   * @see
   *   [[https://platform.openai.com/docs/api-reference/embeddings/create OpenAI API Doc]] for
@@ -75,8 +80,9 @@ import org.apache.spark.sql.{Dataset, SparkSession}
   */
 
 class OpenAIEmbeddings(override val uid: String)
-    extends AnnotatorModel[OpenAICompletion]
-    with HasSimpleAnnotate[OpenAICompletion] {
+    extends AnnotatorModel[OpenAIEmbeddings]
+    with HasBatchedAnnotate[OpenAIEmbeddings]
+    with HasOpenAIClientProperties {
 
   def this() = this(Identifiable.randomUID("OPENAI_EMBEDDINGS"))
 
@@ -94,6 +100,26 @@ class OpenAIEmbeddings(override val uid: String)
 
   def setUser(value: String): this.type = set(user, value)
 
+  /** Maximum number of documents embedded by a single request (Default: `16`)
+    *
+    * @group param
+    */
+  val inputsPerRequest = new IntParam(
+    this,
+    "inputsPerRequest",
+    "Maximum number of documents embedded by a single request")
+
+  /** @group setParam */
+  def setInputsPerRequest(value: Int): this.type = {
+    require(value > 0, "inputsPerRequest must be greater than 0")
+    set(inputsPerRequest, value)
+  }
+
+  /** @group getParam */
+  def getInputsPerRequest: Int = $(inputsPerRequest)
+
+  setDefault(batchSize -> 64, inputsPerRequest -> 16)
+
   private var bearerToken: Option[Broadcast[String]] = None
 
   def setBearerTokenIfNotSet(spark: SparkSession, openAIKey: Option[String]): this.type = {
@@ -114,64 +140,32 @@ class OpenAIEmbeddings(override val uid: String)
     dataset
   }
 
-  /** takes a document and annotations and produces new annotations of this annotator's annotation
-    * type
-    *
-    * @param annotations
-    *   Annotations that correspond to inputAnnotationCols generated by previous annotators if any
-    * @return
-    *   any number of annotations processed for every input annotation. Not necessary one to one
-    *   relationship
-    */
-  override def annotate(annotations: Seq[Annotation]): Seq[Annotation] = {
-
-    val inputs = annotations.map(annotation => annotation.result)
-    val userJson = JsonBuilder.formatOptionalField("user", get(user))
-
-    val jsonTemplate =
-      """
-        |{
-        |    "model": "%s",
-        |    "input": "%s"
-        |    %s
-        |}
-        |""".stripMargin
-
-    val jsons = inputs.map(input => (input, jsonTemplate.format($(model), input, userJson)))
-    val openAIUrlEmbeddings = "https://api.openai.com/v1/embeddings"
-    val annotationsEmbeddings = jsons.map { case (input, json) =>
-      val response = post(openAIUrlEmbeddings, json)
-      Annotation(DOCUMENT, 0, input.length, input, Map(), embeddings = response)
-    }
-    annotationsEmbeddings
-  }
-
-  private def post(url: String, jsonBody: String): Array[Float] = {
-    val httpPost = new HttpPost(url)
-    httpPost.setEntity(new StringEntity(jsonBody, ContentType.APPLICATION_JSON))
+  override def batchAnnotate(batchedAnnotations: Seq[Array[Annotation]]): Seq[Seq[Annotation]] = {
+    val inputs = batchedAnnotations.map(_.map(annotation => annotation.result))
     val bearerToken = getBearerToken
-    require(bearerToken.nonEmpty, "OpenAI API Key required")
-    httpPost.setHeader("Authorization", s"Bearer $bearerToken")
-
-    var embeddings: List[Float] = List.empty
-    var responseBody: String = ""
-
-    val httpclient: CloseableHttpClient = HttpClients.createDefault()
-    try {
-      val response = httpclient.execute(httpPost)
-      responseBody = EntityUtils.toString(response.getEntity)
-      val textEmbeddingResponse = JsonParser.parseObject[TextEmbeddingResponse](responseBody)
-      embeddings = textEmbeddingResponse.data.head.embedding
-    } catch {
-      case ex: Exception =>
-        if (responseBody.contains("error"))
-          throw new Exception(responseBody)
-        else ex.printStackTrace()
-    } finally {
-      httpclient.close()
-    }
-
-    embeddings.toArray
+    require(bearerToken.nonEmpty || isSet(baseUrl), "OpenAI API Key required")
+    implicit val formats: Formats = DefaultFormats
+
+    val requests = inputs.flatten
+      .grouped($(inputsPerRequest))
+      .map { group =>
+        val body = Map("model" -> $(model), "input" -> group.toList) ++
+          get(user).map(value => "user" -> value)
+        OpenAIRequest(endpoint("embeddings"), Serialization.write(body))
+      }
+      .toList
+
+    val embeddings = OpenAIClient
+      .postAll(requests, clientSettings(bearerToken))
+      .flatMap { responseBody =>
+        val textEmbeddingResponse = JsonParser.parseObject[TextEmbeddingResponse](responseBody)
+        textEmbeddingResponse.data.sortBy(_.index).map(_.embedding.toArray)
+      }
+      .iterator
+
+    inputs.map(_.map { input =>
+      Annotation(DOCUMENT, 0, input.length, input, Map(), embeddings = embeddings.next())
+    }.toSeq)
   }
 
 }
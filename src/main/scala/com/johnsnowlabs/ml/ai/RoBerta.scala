@@ -21,7 +21,7 @@ import com.johnsnowlabs.ml.ai.util.PrepareEmbeddings
 import com.johnsnowlabs.ml.onnx.{OnnxSession, OnnxWrapper}
 import com.johnsnowlabs.ml.tensorflow.sign.{ModelSignatureConstants, ModelSignatureManager}
 import com.johnsnowlabs.ml.tensorflow.{TensorResources, TensorflowWrapper}
-import com.johnsnowlabs.ml.util.{ModelArch, ONNX, TensorFlow}
+import com.johnsnowlabs.ml.util.{DynamicBatching, ModelArch, ONNX, TensorFlow}
 import com.johnsnowlabs.nlp.annotators.common._
 import com.johnsnowlabs.nlp.{Annotation, AnnotatorType}
 import org.slf4j.{Logger, LoggerFactory}
@@ -227,12 +227,12 @@ private[johnsnowlabs] class RoBerta(
       originalTokenSentences: Seq[TokenizedSentence],
       batchSize: Int,
       maxSentenceLength: Int,
-      caseSensitive: Boolean): Seq[WordpieceEmbeddingsSentence] = {
+      caseSensitive: Boolean,
+      maxTokensPerBatch: Int = 0): Seq[WordpieceEmbeddingsSentence] = {
 
     /*Run embeddings calculation by batches*/
-    sentences.zipWithIndex
-      .grouped(batchSize)
-      .flatMap { batch =>
+    DynamicBatching
+      .predict(sentences.zipWithIndex, batchSize, maxTokensPerBatch)(_._1.tokens.length) { batch =>
         val encoded = PrepareEmbeddings.prepareBatchInputsWithPadding(
           batch,
           maxSentenceLength,
@@ -282,7 +282,6 @@ private[johnsnowlabs] class RoBerta(
           WordpieceEmbeddingsSentence(tokensWithEmbeddings, originalIndexedTokens.sentenceIndex)
         }
       }
-      .toSeq
   }
 
   def predictSequence(
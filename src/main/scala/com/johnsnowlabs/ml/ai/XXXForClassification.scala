@@ -16,7 +16,7 @@
 
 package com.johnsnowlabs.ml.ai
 
-import com.johnsnowlabs.ml.util.TensorFlow
+import com.johnsnowlabs.ml.util.{DynamicBatching, TensorFlow}
 import com.johnsnowlabs.nlp.annotators.common._
 import com.johnsnowlabs.nlp.{ActivationFunction, Annotation, AnnotatorType}
 
@@ -32,20 +32,21 @@ private[johnsnowlabs] trait XXXForClassification {
       batchSize: Int,
       maxSentenceLength: Int,
       caseSensitive: Boolean,
-      tags: Map[String, Int]): Seq[Annotation] = {
+      tags: Map[String, Int],
+      maxTokensPerBatch: Int = 0): Seq[Annotation] = {
 
     val wordPieceTokenizedSentences =
       tokenizeWithAlignment(tokenizedSentences, maxSentenceLength, caseSensitive)
 
     /*Run calculation by batches*/
-    wordPieceTokenizedSentences.zipWithIndex
-      .grouped(batchSize)
-      .flatMap { batch =>
+    DynamicBatching
+      .predict(wordPieceTokenizedSentences.zipWithIndex, batchSize, maxTokensPerBatch)(
+        _._1.tokens.length) { batch =>
         val encoded = encode(batch, maxSentenceLength)
         val logits = tag(encoded)
 
         /*Combine tokens and calculated logits*/
-        batch.zip(logits).flatMap { case (sentence, tokenVectors) =>
+        batch.zip(logits).map { case (sentence, tokenVectors) =>
           val tokenLength = sentence._1.tokens.length
 
           /*All wordpiece logits*/
@@ -59,7 +60,7 @@ private[johnsnowlabs] trait XXXForClassification {
           labelsWithScores
         }
       }
-      .toSeq
+      .flatten
 
   }
 
@@ -71,58 +72,63 @@ private[johnsnowlabs] trait XXXForClassification {
       caseSensitive: Boolean,
       coalesceSentences: Boolean = false,
       tags: Map[String, Int],
-      activation: String = ActivationFunction.softmax): Seq[Annotation] = {
+      activation: String = ActivationFunction.softmax,
+      maxTokensPerBatch: Int = 0): Seq[Annotation] = {
 
     val wordPieceTokenizedSentences =
       tokenizeWithAlignment(tokenizedSentences, maxSentenceLength, caseSensitive)
 
     /*Run calculation by batches*/
-    wordPieceTokenizedSentences
-      .zip(sentences)
-      .zipWithIndex
-      .grouped(batchSize)
-      .flatMap { batch =>
+    val logits = DynamicBatching
+      .predict(
+        wordPieceTokenizedSentences.zip(sentences).zipWithIndex,
+        batchSize,
+        maxTokensPerBatch)(_._1._1.tokens.length) { batch =>
         val tokensBatch = batch.map(x => (x._1._1, x._2))
         val encoded = encode(tokensBatch, maxSentenceLength)
-        val logits = tagSequence(encoded, activation)
-        activation match {
-          case ActivationFunction.softmax =>
-            if (coalesceSentences) {
-              val scores = logits.transpose.map(_.sum / logits.length)
-              val label = scoresToLabelForSequenceClassifier(tags, scores)
-              val meta = constructMetaForSequenceClassifier(tags, scores)
-              Array(constructAnnotationForSequenceClassifier(sentences.head, label, meta))
-            } else {
-              sentences.zip(logits).map { case (sentence, scores) =>
-                val label = scoresToLabelForSequenceClassifier(tags, scores)
-                val meta = constructMetaForSequenceClassifier(tags, scores)
-                constructAnnotationForSequenceClassifier(sentence, label, meta)
-              }
-            }
+        tagSequence(encoded, activation).toSeq
+      }
+      .toArray
 
-          case ActivationFunction.sigmoid =>
-            if (coalesceSentences) {
-              val scores = logits.transpose.map(_.sum / logits.length)
-              val labels = scores.zipWithIndex
-                .filter(x => x._1 > sigmoidThreshold)
-                .flatMap(x => tags.filter(_._2 == x._2))
-              val meta = constructMetaForSequenceClassifier(tags, scores)
-              labels.map(label =>
-                constructAnnotationForSequenceClassifier(sentences.head, label._1, meta))
-            } else {
-              sentences.zip(logits).flatMap { case (sentence, scores) =>
-                val labels = scores.zipWithIndex
-                  .filter(x => x._1 > sigmoidThreshold)
-                  .flatMap(x => tags.filter(_._2 == x._2))
-                val meta = constructMetaForSequenceClassifier(tags, scores)
-                labels.map(label =>
-                  constructAnnotationForSequenceClassifier(sentence, label._1, meta))
-              }
-            }
+    if (logits.isEmpty)
+      return Seq.empty
+
+    activation match {
+      case ActivationFunction.softmax =>
+        if (coalesceSentences) {
+          val scores = logits.transpose.map(_.sum / logits.length)
+          val label = scoresToLabelForSequenceClassifier(tags, scores)
+          val meta = constructMetaForSequenceClassifier(tags, scores)
+          Seq(constructAnnotationForSequenceClassifier(sentences.head, label, meta))
+        } else {
+          sentences.zip(logits).map { case (sentence, scores) =>
+            val label = scoresToLabelForSequenceClassifier(tags, scores)
+            val meta = constructMetaForSequenceClassifier(tags, scores)
+            constructAnnotationForSequenceClassifier(sentence, label, meta)
+          }
+        }
 
+      case ActivationFunction.sigmoid =>
+        if (coalesceSentences) {
+          val scores = logits.transpose.map(_.sum / logits.length)
+          val labels = scores.zipWithIndex
+            .filter(x => x._1 > sigmoidThreshold)
+            .flatMap(x => tags.filter(_._2 == x._2))
+          val meta = constructMetaForSequenceClassifier(tags, scores)
+          labels.map(label =>
+            constructAnnotationForSequenceClassifier(sentences.head, label._1, meta))
+        } else {
+          sentences.zip(logits).flatMap { case (sentence, scores) =>
+            val labels = scores.zipWithIndex
+              .filter(x => x._1 > sigmoidThreshold)
+              .flatMap(x => tags.filter(_._2 == x._2))
+            val meta = constructMetaForSequenceClassifier(tags, scores)
+            labels.map(label =>
+              constructAnnotationForSequenceClassifier(sentence, label._1, meta))
+          }
         }
-      }
-      .toSeq
+
+    }
 
   }
 
@@ -0,0 +1,118 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.ai.util
+
+import org.apache.spark.ml.param.{IntParam, Param, Params}
+
+/** Parameters of the requests sent by the OpenAI annotators through [[OpenAIClient]] */
+trait HasOpenAIClientProperties extends Params {
+
+  /** Base URL of the API, for example the URL of a local OpenAI compatible server (Default:
+    * `https://api.openai.com/v1`)
+    *
+    * @group param
+    */
+  val baseUrl = new Param[String](this, "baseUrl", "Base URL of the OpenAI compatible API")
+
+  /** @group setParam */
+  def setBaseUrl(value: String): this.type = set(baseUrl, value)
+
+  /** @group getParam */
+  def getBaseUrl: String = $(baseUrl)
+
+  /** Maximum number of requests in flight for each partition (Default: `4`)
+    *
+    * @group param
+    */
+  val concurrency =
+    new IntParam(this, "concurrency", "Maximum number of requests in flight for each partition")
+
+  /** @group setParam */
+  def setConcurrency(value: Int): this.type = {
+    require(value > 0, "concurrency must be greater than 0")
+    set(concurrency, value)
+  }
+
+  /** @group getParam */
+  def getConcurrency: Int = $(concurrency)
+
+  /** Number of times a request failing with status 429, a 5xx status or an I/O error is retried
+    * (Default: `3`)
+    *
+    * @group param
+    */
+  val maxRetries = new IntParam(
+    this,
+    "maxRetries",
+    "Number of times a request failing with status 429, a 5xx status or an I/O error is retried")
+
+  /** @group setParam */
+  def setMaxRetries(value: Int): this.type = set(maxRetries, value)
+
+  /** @group getParam */
+  def getMaxRetries: Int = $(maxRetries)
+
+  /** Wait before the first retry in milliseconds, doubled on every retry, unless the server
+    * answers with a `Retry-After` header (Default: `1000`)
+    *
+    * @group param
+    */
+  val retryBackoff = new IntParam(
+    this,
+    "retryBackoff",
+    "Wait before the first retry in milliseconds, doubled on every retry")
+
+  /** @group setParam */
+  def setRetryBackoff(value: Int): this.type = set(retryBackoff, value)
+
+  /** @group getParam */
+  def getRetryBackoff: Int = $(retryBackoff)
+
+  /** Maximum number of responses cached on each executor by the hash of their request and API
+    * key, or `0` to not cache responses (Default: `0`)
+    *
+    * @group param
+    */
+  val responseCacheSize = new IntParam(
+    this,
+    "responseCacheSize",
+    "Maximum number of responses cached on each executor, or 0 to not cache responses")
+
+  /** @group setParam */
+  def setResponseCacheSize(value: Int): this.type = set(responseCacheSize, value)
+
+  /** @group getParam */
+  def getResponseCacheSize: Int = $(responseCacheSize)
+
+  setDefault(
+    baseUrl -> "https://api.openai.com/v1",
+    concurrency -> 4,
+    maxRetries -> 3,
+    retryBackoff -> 1000,
+    responseCacheSize -> 0)
+
+  protected def endpoint(path: String): String = $(baseUrl).stripSuffix("/") + "/" + path
+
+  protected def clientSettings(bearerToken: String): OpenAIClientSettings =
+    OpenAIClientSettings(
+      bearerToken = bearerToken,
+      concurrency = $(concurrency),
+      maxRetries = $(maxRetries),
+      retryBackoff = $(retryBackoff).toLong,
+      responseCacheSize = $(responseCacheSize))
+
+}
@@ -0,0 +1,222 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.ai.util
+
+import com.johnsnowlabs.nlp.util.LruMap
+import com.johnsnowlabs.util.ConfigHelper
+import org.apache.http.client.methods.HttpPost
+import org.apache.http.entity.{ContentType, StringEntity}
+import org.apache.http.impl.client.{
+  CloseableHttpClient,
+  DefaultConnectionKeepAliveStrategy,
+  HttpClients
+}
+import org.apache.http.impl.conn.PoolingHttpClientConnectionManager
+import org.apache.http.util.EntityUtils
+import org.slf4j.{Logger, LoggerFactory}
+
+import java.io.IOException
+import java.nio.charset.StandardCharsets.UTF_8
+import java.security.MessageDigest
+import java.util.concurrent.atomic.AtomicInteger
+import java.util.concurrent.{Executors, ThreadFactory, TimeUnit}
+import scala.concurrent.duration.Duration
+import scala.concurrent.{Await, ExecutionContext, Future}
+import scala.util.Try
+
+/** Request to an OpenAI compatible API
+  *
+  * @param url
+  *   URL of the endpoint
+  * @param body
+  *   JSON body of the request
+  */
+case class OpenAIRequest(url: String, body: String)
+
+/** Settings of the requests sent by an annotator with [[OpenAIClient]]
+  *
+  * @param bearerToken
+  *   API key sent as bearer token, not sent if empty
+  * @param concurrency
+  *   Maximum number of requests in flight for each partition
+  * @param maxRetries
+  *   Number of times a request failing with 429, a 5xx status or an I/O error is retried
+  * @param retryBackoff
+  *   Wait before the first retry in milliseconds, doubled on every retry
+  * @param responseCacheSize
+  *   Maximum number of responses kept in the response cache, or 0 to not cache them
+  */
+case class OpenAIClientSettings(
+    bearerToken: String,
+    concurrency: Int,
+    maxRetries: Int,
+    retryBackoff: Long,
+    responseCacheSize: Int)
+
+/** HTTP client of the OpenAI annotators, shared by all the tasks of an executor.
+  *
+  * Connections are kept alive in a pool that grows with the concurrency requested by the
+  * annotators, so that every task slot of the executor can have that many requests in flight.
+  * Responses can be cached by the hash of their URL, body and API key, so the same prompts
+  * sent by several stages or runs are only requested once per executor, while requests sent
+  * with different API keys never share responses.
+  */
+object OpenAIClient {
+
+  private val logger: Logger = LoggerFactory.getLogger("OpenAIClient")
+
+  private val idleConnectionTimeout = 30L
+
+  private val connectionManager = {
+    val manager = new PoolingHttpClientConnectionManager()
+    manager.setMaxTotal(1)
+    manager.setDefaultMaxPerRoute(1)
+    manager
+  }
+
+  private lazy val httpClient: CloseableHttpClient = HttpClients
+    .custom()
+    .setConnectionManager(connectionManager)
+    .setKeepAliveStrategy(DefaultConnectionKeepAliveStrategy.INSTANCE)
+    .evictExpiredConnections()
+    .evictIdleConnections(idleConnectionTimeout, TimeUnit.SECONDS)
+    .build()
+
+  private lazy val executionContext: ExecutionContext =
+    ExecutionContext.fromExecutorService(Executors.newCachedThreadPool(new ThreadFactory {
+      private val counter = new AtomicInteger()
+      override def newThread(runnable: Runnable): Thread = {
+        val thread = new Thread(runnable, s"openai-client-${counter.incrementAndGet()}")
+        thread.setDaemon(true)
+        thread
+      }
+    }))
+
+  // Least recently used responses, as many as the largest cache size requested
+  private var responseCache = new LruMap[String, String](0)
+  private var responseCacheSize = 0
+
+  /** Sends requests with at most `settings.concurrency` of them in flight.
+    *
+    * @return
+    *   Bodies of the responses, in the order of the requests
+    */
+  def postAll(requests: Seq[OpenAIRequest], settings: OpenAIClientSettings): Seq[String] = {
+    require(settings.concurrency > 0, "concurrency must be greater than 0")
+    implicit val ec: ExecutionContext = executionContext
+    ensurePoolSize(settings.concurrency)
+    val cache = ensureResponseCacheSize(settings.responseCacheSize)
+
+    val responses = new Array[String](requests.length)
+    val next = new AtomicInteger()
+    val workers = (1 to math.min(settings.concurrency, requests.length)).map { _ =>
+      Future {
+        var index = next.getAndIncrement()
+        while (index < requests.length) {
+          responses(index) =
+            if (settings.responseCacheSize <= 0) postWithRetries(requests(index), settings)
+            else
+              cache.getOrElseUpdate(
+                hash(requests(index), settings.bearerToken),
+                postWithRetries(requests(index), settings))
+          index = next.getAndIncrement()
+        }
+      }
+    }
+    Await.result(Future.sequence(workers), Duration.Inf)
+    responses.toSeq
+  }
+
+  def post(request: OpenAIRequest, settings: OpenAIClientSettings): String =
+    postAll(Seq(request), settings).head
+
+  /** Removes all the responses from the response cache of this executor */
+  def clearResponseCache(): Unit = synchronized(responseCache.clear())
+
+  private def postWithRetries(request: OpenAIRequest, settings: OpenAIClientSettings): String = {
+    var attempt = 0
+    var result: Option[String] = None
+    while (result.isEmpty) {
+      val httpPost = new HttpPost(request.url)
+      httpPost.setEntity(new StringEntity(request.body, ContentType.APPLICATION_JSON))
+      if (settings.bearerToken.nonEmpty)
+        httpPost.setHeader("Authorization", s"Bearer ${settings.bearerToken}")
+
+      val (status, retryAfter, responseBody) =
+        try {
+          val response = httpClient.execute(httpPost)
+          try {
+            (
+              response.getStatusLine.getStatusCode,
+              Option(response.getFirstHeader("Retry-After")).flatMap(header =>
+                Try(header.getValue.trim.toLong * 1000).toOption),
+              EntityUtils.toString(response.getEntity, UTF_8))
+          } finally {
+            response.close()
+          }
+        } catch {
+          case exception: IOException if attempt < settings.maxRetries =>
+            logger.warn(s"Request to ${request.url} failed: ${exception.getMessage}")
+            (-1, None, "")
+        }
+
+      val retriable = status == -1 || status == 429 || status >= 500
+      if (status >= 200 && status < 300) result = Some(responseBody)
+      else if (retriable && attempt < settings.maxRetries) {
+        val backoff = retryAfter.getOrElse(settings.retryBackoff << attempt)
+        logger.info(s"Retrying request to ${request.url} in $backoff ms (status $status)")
+        Thread.sleep(backoff)
+        attempt += 1
+      } else
+        throw new Exception(
+          s"Request to ${request.url} failed with status $status: $responseBody")
+    }
+    result.get
+  }
+
+  // The tasks running on this executor share the pool, each with `concurrency` requests
+  private def ensurePoolSize(concurrency: Int): Unit = connectionManager.synchronized {
+    val size = concurrency * ConfigHelper.taskSlots
+    if (connectionManager.getDefaultMaxPerRoute < size) {
+      connectionManager.setDefaultMaxPerRoute(size)
+      connectionManager.setMaxTotal(math.max(connectionManager.getMaxTotal, size))
+    }
+  }
+
+  // Replaces the cache by a larger one, keeping the recency of its responses
+  private def ensureResponseCacheSize(size: Int): LruMap[String, String] = synchronized {
+    if (size > responseCacheSize) {
+      val resized = new LruMap[String, String](size)
+      responseCache.foreach { case (key, response) => resized.update(key, response) }
+      responseCache = resized
+      responseCacheSize = size
+    }
+    responseCache
+  }
+
+  // Only the hash of the API key is kept in the cache, as part of the hash of the request
+  private def hash(request: OpenAIRequest, bearerToken: String): String = {
+    val digest = MessageDigest.getInstance("SHA-256")
+    digest.update(bearerToken.getBytes(UTF_8))
+    digest.update(0.toByte)
+    digest.update(request.url.getBytes(UTF_8))
+    digest.update(0.toByte)
+    digest.update(request.body.getBytes(UTF_8))
+    digest.digest().map(byte => f"${byte & 0xff}%02x").mkString
+  }
+
+}
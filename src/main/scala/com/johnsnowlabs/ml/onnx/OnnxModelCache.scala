@@ -0,0 +1,410 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.onnx
+
+import com.johnsnowlabs.util.{ConfigHelper, ConfigLoader, FileHelper}
+import org.apache.commons.io.FileUtils
+import org.apache.hadoop.fs.{FileStatus, FileSystem, Path}
+import org.apache.spark.network.util.JavaUtils
+import org.apache.spark.scheduler.{SparkListener, SparkListenerApplicationEnd}
+import org.apache.spark.sql.SparkSession
+import org.apache.spark.{SparkContext, SparkFiles}
+import org.slf4j.{Logger, LoggerFactory}
+
+import java.io.{File, FileInputStream, IOException}
+import java.nio.channels.{FileChannel, FileLock, OverlappingFileLockException}
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.{Files, Paths, StandardCopyOption, StandardOpenOption}
+import java.security.MessageDigest
+import java.util.concurrent.ConcurrentHashMap
+
+/** Local cache of ONNX models, addressed by the content of the files they are read from.
+  *
+  * A model is extracted once into `<cache folder>/<key>`, next to its external data file, and its
+  * sessions are created from that path instead of a byte array on the heap. Wrappers of cached
+  * models only carry an [[OnnxModelCache.CachedModel]] through Spark serialization. On a cluster,
+  * the files of the model are shipped once per application to every executor with
+  * `SparkContext.addFile`.
+  *
+  * When the cache grows larger than `spark.jsl.settings.onnx.modelCacheMaxSize`, the least
+  * recently used models are evicted, except the ones in use. Every JVM holds a shared lock on
+  * `<cache folder>/.locks/<key>.lock` for the models it opened, so that JVMs sharing the cache
+  * folder never evict a model another one still runs.
+  */
+object OnnxModelCache {
+
+  private val logger: Logger = LoggerFactory.getLogger("OnnxModelCache")
+
+  // Keyed by application and model, as a JVM can run several applications one after the other
+  private val distributed = ConcurrentHashMap.newKeySet[String]()
+  private val localPaths = new ConcurrentHashMap[String, String]()
+  private val opened = ConcurrentHashMap.newKeySet[String]()
+  // Shared locks of the models opened by this JVM, held while it runs
+  private val inUse = new ConcurrentHashMap[String, FileLock]()
+
+  // Hidden folders of the cache, which are not models
+  private val sourcesFolderName = ".sources"
+  private val shippingFolderName = ".shipping"
+  private val locksFolderName = ".locks"
+
+  /** Reference to the files of a cached model
+    *
+    * @param key
+    *   Content key of the model
+    * @param folder
+    *   Cache folder of the model on the driver
+    * @param modelFileName
+    *   Name of the ONNX model file
+    * @param dataFileName
+    *   Name of the external data file of the model, if it has one
+    */
+  case class CachedModel(
+      key: String,
+      folder: String,
+      modelFileName: String,
+      dataFileName: Option[String]) {
+
+    def modelPath: String = Paths.get(folder, modelFileName).toString
+
+    def fileNames: Seq[String] = modelFileName +: dataFileName.toSeq
+
+  }
+
+  def cacheFolder: String = ConfigLoader.getConfigStringValue(ConfigHelper.onnxModelCacheFolder)
+
+  def cacheMaxSize: Long = {
+    val maxSize = ConfigLoader.getConfigStringValue(ConfigHelper.onnxModelCacheMaxSize)
+    if (maxSize.trim.isEmpty) 0L else JavaUtils.byteStringAsBytes(maxSize.trim)
+  }
+
+  /** Computes the key of a model from the names and contents of its files and the variant, such
+    * as a quantization, extracted from them.
+    *
+    * Hashing the contents of large models takes seconds, so the key is computed once for the
+    * paths, sizes and modification times of the files and then read from the `.sources` folder
+    * of the cache.
+    *
+    * @param sourceKey
+    *   [[sourceKey]] of the files the given ones were copied from. The key is recorded for it
+    *   instead of the temporary copies.
+    */
+  def key(files: Seq[File], variant: String, sourceKey: Option[String] = None): String = {
+    val statusKey = sourceKey.getOrElse(
+      hash(
+        files.flatMap { file =>
+          Seq(file.getCanonicalPath, file.length.toString, file.lastModified.toString)
+        } :+ variant))
+    val source = Paths.get(cacheFolder, sourcesFolderName, statusKey).toFile
+
+    recordedKey(source).getOrElse {
+      val key = contentKey(files, variant)
+      try {
+        source.getParentFile.mkdirs()
+        val staging = File.createTempFile(s".$statusKey", "", source.getParentFile)
+        Files.write(staging.toPath, key.getBytes(UTF_8))
+        Files.move(staging.toPath, source.toPath, StandardCopyOption.ATOMIC_MOVE)
+      } catch {
+        case e: IOException =>
+          logger.warn(s"Could not record the key of ONNX model ${files.head}: ${e.getMessage}")
+      }
+      key
+    }
+  }
+
+  /** Computes a key for files of a Hadoop file system from their qualified paths, sizes and
+    * modification times, so that they are only copied to the driver when they changed. The
+    * files of folders are listed recursively.
+    */
+  def sourceKey(fs: FileSystem, paths: Seq[Path], variant: String): String = {
+    val statuses = paths.flatMap { path =>
+      val status = fs.getFileStatus(path)
+      if (status.isDirectory) {
+        val files = fs.listFiles(path, true)
+        new Iterator[FileStatus] {
+          def hasNext: Boolean = files.hasNext
+          def next(): FileStatus = files.next()
+        }.toList.sortBy(_.getPath.toString)
+      } else Seq(status)
+    }
+    hash(statuses.flatMap { status =>
+      Seq(status.getPath.toString, status.getLen.toString, status.getModificationTime.toString)
+    } :+ variant)
+  }
+
+  /** Returns the cached model of the files of a [[sourceKey]], if they were read before and the
+    * model was not evicted since.
+    */
+  def getCached(sourceKey: String, dataFileName: String): Option[CachedModel] = {
+    val root = new File(cacheFolder)
+    recordedKey(Paths.get(cacheFolder, sourcesFolderName, sourceKey).toFile).flatMap { key =>
+      markInUse(root, key)
+      Some(new File(root, key)).filter(_.isDirectory).map(folder => open(folder, dataFileName))
+    }
+  }
+
+  private def recordedKey(source: File): Option[String] = {
+    val recorded =
+      try {
+        if (source.isFile) Some(new String(Files.readAllBytes(source.toPath), UTF_8).trim)
+        else None
+      } catch {
+        // pruned concurrently
+        case _: IOException => None
+      }
+    recorded.filter(_.nonEmpty)
+  }
+
+  private def contentKey(files: Seq[File], variant: String): String = {
+    val digest = MessageDigest.getInstance("SHA-256")
+    val buffer = new Array[Byte](1 << 20)
+    files.foreach { file =>
+      digest.update(file.getName.getBytes(UTF_8))
+      val input = new FileInputStream(file)
+      try {
+        var read = input.read(buffer)
+        while (read != -1) {
+          digest.update(buffer, 0, read)
+          read = input.read(buffer)
+        }
+      } finally {
+        input.close()
+      }
+    }
+    digest.update(variant.getBytes(UTF_8))
+    digest.digest().map(byte => f"${byte & 0xff}%02x").mkString
+  }
+
+  private def hash(values: Seq[String]): String = {
+    val digest = MessageDigest.getInstance("SHA-256")
+    values.foreach { value =>
+      digest.update(value.getBytes(UTF_8))
+      digest.update(0.toByte)
+    }
+    digest.digest().map(byte => f"${byte & 0xff}%02x").mkString
+  }
+
+  /** Returns the cached model of a key, extracting it first if it is not cached yet.
+    *
+    * The model is extracted into a staging folder and moved in place once complete, so models
+    * read concurrently by several threads or applications are never seen half written. Models
+    * extracted here may evict the least recently used models of the cache.
+    *
+    * @param key
+    *   Content key of the model
+    * @param dataFileName
+    *   Name of the external data file, if the model has one
+    * @param extract
+    *   Writes the model and its data file into the given folder
+    */
+  def getOrExtract(key: String, dataFileName: String)(extract: File => Unit): CachedModel = {
+    val root = new File(cacheFolder)
+    root.mkdirs()
+    val folder = new File(root, key)
+    // marked before the folder is checked, so that no other JVM evicts it meanwhile
+    markInUse(root, key)
+
+    if (!folder.exists()) {
+      val staging = Files.createTempDirectory(root.toPath, s".$key").toFile
+      try {
+        extract(staging)
+        Files.move(staging.toPath, folder.toPath, StandardCopyOption.ATOMIC_MOVE)
+        logger.info(s"Extracted ONNX model into ${folder.getAbsolutePath}")
+      } catch {
+        case _: IOException if folder.exists() =>
+          logger.info(s"ONNX model ${folder.getAbsolutePath} was extracted concurrently")
+      } finally {
+        FileHelper.delete(staging.getAbsolutePath)
+      }
+      if (cacheMaxSize > 0) evictToSize(root, cacheMaxSize)
+      pruneSources(root)
+    }
+    open(folder, dataFileName)
+  }
+
+  private def open(folder: File, dataFileName: String): CachedModel = {
+    // the modification time of a model folder records its last use
+    folder.setLastModified(System.currentTimeMillis())
+
+    val fileNames = folder.list()
+    val modelFileName = fileNames
+      .find(_ != dataFileName)
+      .getOrElse(throw new IllegalStateException(s"No ONNX model in ${folder.getAbsolutePath}"))
+    CachedModel(
+      key = folder.getName,
+      folder = folder.getAbsolutePath,
+      modelFileName = modelFileName,
+      dataFileName = fileNames.find(_ == dataFileName))
+  }
+
+  /** Deletes the keys recorded in the `.sources` folder of a cache for models it no longer has,
+    * along with the keys of files that changed since their model was evicted.
+    */
+  private[onnx] def pruneSources(root: File): Unit =
+    Option(new File(root, sourcesFolderName).listFiles())
+      .getOrElse(Array.empty[File])
+      .filterNot(_.getName.startsWith("."))
+      .foreach { source =>
+        if (recordedKey(source).forall(key => !new File(root, key).isDirectory)) source.delete()
+      }
+
+  /** Marks a model as in use by this JVM until it exits, with a shared lock that keeps other JVMs
+    * from evicting it. Models are kept in use once opened, since their sessions may be created
+    * again and [[OnnxWrapper.saveToFile]] copies their files.
+    */
+  private def markInUse(root: File, key: String): Unit = inUse.synchronized {
+    opened.add(key)
+    if (!inUse.containsKey(key)) {
+      val channel = lockChannel(root, key)
+      try inUse.put(key, channel.lock(0L, Long.MaxValue, true))
+      catch {
+        case e: IOException =>
+          channel.close()
+          logger.warn(s"Could not lock ONNX model $key, other JVMs may evict it: ${e.getMessage}")
+      }
+    }
+  }
+
+  /** Runs a block holding the exclusive lock of a model, unless a JVM has it in use. The lock
+    * files of models in use by this JVM are never opened here, as closing another channel of the
+    * same file releases the locks of the whole process on some systems.
+    *
+    * @return
+    *   Whether the block was run
+    */
+  private def ifNotInUse(root: File, key: String)(block: => Unit): Boolean =
+    inUse.synchronized {
+      !opened.contains(key) && {
+        val channel = lockChannel(root, key)
+        try {
+          val lock =
+            try channel.tryLock()
+            catch { case _: OverlappingFileLockException => null }
+          lock != null && {
+            try block
+            finally lock.release()
+            true
+          }
+        } finally {
+          channel.close()
+        }
+      }
+    }
+
+  private def lockChannel(root: File, key: String): FileChannel = {
+    val locks = new File(root, locksFolderName)
+    locks.mkdirs()
+    FileChannel.open(
+      new File(locks, s"$key.lock").toPath,
+      StandardOpenOption.CREATE,
+      StandardOpenOption.READ,
+      StandardOpenOption.WRITE)
+  }
+
+  /** Deletes the least recently used models of a cache folder until it is not larger than
+    * `maxSize`. Models in use by this or another JVM sharing the folder are kept.
+    *
+    * @return
+    *   Keys of the evicted models
+    */
+  private[onnx] def evictToSize(root: File, maxSize: Long): Seq[String] = {
+    val models = Option(root.listFiles())
+      .getOrElse(Array.empty[File])
+      .filter(file => file.isDirectory && !file.getName.startsWith("."))
+      .map(folder => (folder, FileUtils.sizeOf(folder)))
+      .sortBy { case (folder, _) => folder.lastModified() }
+
+    var total = models.map(_._2).sum
+    models.collect {
+      case (folder, size)
+          if total > maxSize && ifNotInUse(root, folder.getName)(
+            FileHelper.delete(folder.getAbsolutePath)) =>
+        logger.info(s"Evicted ONNX model ${folder.getAbsolutePath} from the cache")
+        total -= size
+        folder.getName
+    }.toSeq
+  }
+
+  /** Name under which a file of a cached model is shipped to the cluster */
+  def resolveFileName(key: String, fileName: String): String = s"onnx_${key}_$fileName"
+
+  /** Ships the files of a cached model to the executors, if the active session runs on a cluster.
+    * Local sessions share the cache folder of the driver.
+    */
+  def distribute(model: CachedModel): Unit =
+    SparkSession.getActiveSession
+      .orElse(SparkSession.getDefaultSession)
+      .map(_.sparkContext)
+      .filterNot(_.isLocal)
+      .foreach(sparkContext => distribute(model, sparkContext))
+
+  def distribute(model: CachedModel, sparkContext: SparkContext): Unit =
+    distributed.synchronized {
+      if (!distributed.contains(s"${sparkContext.applicationId}/${model.key}")) {
+        // addFile ships a file under its own name, so the files are linked under unique names.
+        // They are served from there while the application runs and deleted when it ends.
+        val shipping = shippingFolder(sparkContext)
+        model.fileNames.foreach { fileName =>
+          val shipped = new File(shipping, resolveFileName(model.key, fileName))
+          if (!shipped.exists()) linkOrCopy(new File(model.folder, fileName), shipped)
+          sparkContext.addFile(shipped.getAbsolutePath)
+        }
+        distributed.add(s"${sparkContext.applicationId}/${model.key}")
+      }
+    }
+
+  private def shippingFolder(sparkContext: SparkContext): File = {
+    val folder = Paths.get(cacheFolder, shippingFolderName, sparkContext.applicationId).toFile
+    if (folder.mkdirs()) {
+      sparkContext.addSparkListener(new SparkListener {
+        override def onApplicationEnd(applicationEnd: SparkListenerApplicationEnd): Unit =
+          FileHelper.delete(folder.getAbsolutePath)
+      })
+    }
+    folder
+  }
+
+  /** Path of the model file on this JVM: the cache folder of the driver if it exists here,
+    * otherwise the files shipped to this executor by [[distribute]].
+    */
+  def localModelPath(model: CachedModel): String =
+    if (new File(model.modelPath).exists()) model.modelPath
+    else localPaths.computeIfAbsent(model.key, _ => linkShippedFiles(model))
+
+  // The external data file is resolved next to the model file, under its original name
+  private[onnx] def linkShippedFiles(model: CachedModel): String = {
+    val folder = new File(SparkFiles.getRootDirectory(), s"onnx_${model.key}")
+    folder.mkdirs()
+    model.fileNames.foreach { fileName =>
+      val shipped = new File(SparkFiles.get(resolveFileName(model.key, fileName)))
+      require(
+        shipped.exists(),
+        s"ONNX model file $fileName was not found in the cache or shipped to this executor")
+      val linked = new File(folder, fileName)
+      if (!linked.exists()) linkOrCopy(shipped, linked)
+    }
+    new File(folder, model.modelFileName).getAbsolutePath
+  }
+
+  private def linkOrCopy(source: File, target: File): Unit =
+    try {
+      Files.createLink(target.toPath, source.toPath)
+    } catch {
+      case _: IOException | _: UnsupportedOperationException =>
+        Files.copy(source.toPath, target.toPath, StandardCopyOption.REPLACE_EXISTING)
+    }
+
+}
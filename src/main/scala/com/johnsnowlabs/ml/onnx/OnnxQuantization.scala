@@ -0,0 +1,473 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.onnx
+
+import java.io.ByteArrayOutputStream
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.{ByteBuffer, ByteOrder}
+import scala.collection.mutable
+
+/** Quantization of ONNX graphs when they are imported.
+  *
+  *   - `none`: the graph is kept as exported
+  *   - `dynamic_int8`: the constant weights of `MatMul` and `Gemm` nodes are stored as `int8`
+  *     with one scale per weight, and their inputs are quantized to `uint8` at run time with
+  *     `DynamicQuantizeLinear`, so products run as `MatMulInteger`. It requires opset 11.
+  *
+  * Graphs are rewritten at the protobuf level, every other part of the model is kept as is.
+  * Weights stored in external data files and products inside subgraphs (e.g. `If` branches or
+  * `Loop` bodies) are not quantized, and float weights are kept while subgraphs refer to them.
+  */
+object OnnxQuantization {
+
+  val NONE = "none"
+  val DYNAMIC_INT8 = "dynamic_int8"
+
+  val quantizations: Seq[String] = Seq(NONE, DYNAMIC_INT8)
+
+  def quantize(model: Array[Byte], quantization: String): Array[Byte] = quantization match {
+    case NONE => model
+    case DYNAMIC_INT8 => quantizeDynamicInt8(model)
+    case other => throw new IllegalArgumentException(unknownQuantization(other))
+  }
+
+  def unknownQuantization(quantization: String): String =
+    s"Unknown ONNX quantization $quantization. Must be one of ${quantizations.mkString(", ")}"
+
+  // Field numbers of onnx.proto
+  private val ModelGraph = 7
+  private val ModelOpsetImport = 8
+  private val OpsetDomain = 1
+  private val OpsetVersion = 2
+  private val GraphNode = 1
+  private val GraphInitializer = 5
+  private val GraphInput = 11
+  private val GraphOutput = 12
+  private val ValueInfoName = 1
+  private val NodeInput = 1
+  private val NodeOutput = 2
+  private val NodeName = 3
+  private val NodeOpType = 4
+  private val NodeAttribute = 5
+  private val NodeDomain = 7
+  private val AttributeName = 1
+  private val AttributeFloat = 2
+  private val AttributeInt = 3
+  private val AttributeGraph = 6
+  private val AttributeGraphs = 11
+  private val AttributeType = 20
+  private val TensorDims = 1
+  private val TensorDataType = 2
+  private val TensorFloatData = 4
+  private val TensorName = 8
+  private val TensorRawData = 9
+  private val TensorDataLocation = 14
+
+  private val FloatType = 1
+  private val Int8Type = 3
+  private val IntAttributeType = 2
+  private val ExternalDataLocation = 1
+
+  private def quantizeDynamicInt8(model: Array[Byte]): Array[Byte] = {
+    val fields = Protobuf.parse(model)
+
+    val opsetVersion = fields
+      .filter(_.number == ModelOpsetImport)
+      .map(opset => Protobuf.parse(opset.bytes))
+      .find { opset =>
+        val domain = opset.find(_.number == OpsetDomain).map(_.string).getOrElse("")
+        domain.isEmpty || domain == "ai.onnx"
+      }
+      .flatMap(_.find(_.number == OpsetVersion).map(_.varint))
+      .getOrElse(0L)
+    require(
+      opsetVersion >= 11,
+      s"$DYNAMIC_INT8 quantization requires ONNX opset 11 or later, the model uses $opsetVersion")
+
+    Protobuf.encode(fields.map { field =>
+      if (field.number == ModelGraph)
+        Protobuf.bytesField(ModelGraph, quantizeGraph(Protobuf.parse(field.bytes)))
+      else field
+    })
+  }
+
+  /** A node computing `output = input x weight (+ bias)` with a constant weight */
+  private case class ConstantProduct(
+      input: String,
+      weight: String,
+      transposed: Boolean,
+      bias: Option[String],
+      output: String)
+
+  private def quantizeGraph(graph: Seq[ProtoField]): Array[Byte] = {
+    // Subgraphs can use the values of the outer graph, their float weights are always kept
+    val subgraphReferences = graph
+      .filter(_.number == GraphNode)
+      .flatMap(field => subgraphInputs(Protobuf.parse(field.bytes)))
+      .toSet
+
+    val initializers = graph
+      .filter(_.number == GraphInitializer)
+      .map { field =>
+        val tensor = Protobuf.parse(field.bytes)
+        (tensor.find(_.number == TensorName).map(_.string).getOrElse(""), tensor)
+      }
+      .toMap
+
+    val nodes = mutable.ArrayBuffer[Array[Byte]]()
+    val newInitializers = mutable.ArrayBuffer[Array[Byte]]()
+    val quantizedWeights = mutable.Map[(String, Boolean), (String, String, String)]()
+    val quantizedInputs = mutable.Map[String, (String, String, String)]()
+
+    graph.filter(_.number == GraphNode).foreach { field =>
+      val node = Protobuf.parse(field.bytes)
+      constantProduct(node, initializers) match {
+        case Some(product) =>
+          val (weight, weightScale, weightZeroPoint) = quantizedWeights.getOrElseUpdate(
+            (product.weight, product.transposed),
+            quantizeWeight(
+              initializers(product.weight),
+              product.weight,
+              product.transposed,
+              newInitializers))
+          val (input, inputScale, inputZeroPoint) = quantizedInputs.getOrElseUpdate(
+            product.input, {
+              val names = (
+                product.input + "_quantized",
+                product.input + "_scale",
+                product.input + "_zero_point")
+              nodes += encodeNode(
+                "DynamicQuantizeLinear",
+                Seq(product.input),
+                Seq(names._1, names._2, names._3),
+                product.input + "_DynamicQuantizeLinear")
+              names
+            })
+
+          val name = nodeName(node, product.output)
+          val matMulOutput =
+            if (product.bias.isDefined) product.output + "_matmul" else product.output
+          nodes += encodeNode(
+            "MatMulInteger",
+            Seq(input, weight, inputZeroPoint, weightZeroPoint),
+            Seq(product.output + "_matmul_integer"),
+            name + "_MatMulInteger")
+          nodes += encodeNode(
+            "Cast",
+            Seq(product.output + "_matmul_integer"),
+            Seq(product.output + "_matmul_float"),
+            name + "_Cast",
+            Seq(
+              Protobuf.encode(
+                Seq(
+                  Protobuf.stringField(AttributeName, "to"),
+                  Protobuf.varintField(AttributeInt, FloatType),
+                  Protobuf.varintField(AttributeType, IntAttributeType)))))
+          nodes += encodeNode(
+            "Mul",
+            Seq(inputScale, weightScale),
+            Seq(product.output + "_matmul_scale"),
+            name + "_ScaleMul")
+          nodes += encodeNode(
+            "Mul",
+            Seq(product.output + "_matmul_float", product.output + "_matmul_scale"),
+            Seq(matMulOutput),
+            name + "_Mul")
+          product.bias.foreach { bias =>
+            nodes +=
+              encodeNode("Add", Seq(matMulOutput, bias), Seq(product.output), name + "_Add")
+          }
+        case None =>
+          nodes += field.bytes
+      }
+    }
+
+    // Float weights are dropped once no node or graph output uses them anymore
+    val used = nodes.flatMap(node => strings(Protobuf.parse(node), NodeInput)).toSet ++
+      subgraphReferences ++
+      graph
+        .filter(_.number == GraphOutput)
+        .flatMap(output => strings(Protobuf.parse(output.bytes), ValueInfoName))
+    val dropped = quantizedWeights.keys.map(_._1).filterNot(used.contains).toSet
+
+    val kept = graph.filter { field =>
+      field.number match {
+        case GraphNode => false
+        case GraphInitializer =>
+          !dropped.contains(
+            Protobuf.parse(field.bytes).find(_.number == TensorName).map(_.string).getOrElse(""))
+        case GraphInput =>
+          !strings(Protobuf.parse(field.bytes), ValueInfoName).exists(dropped.contains)
+        case _ => true
+      }
+    }
+
+    Protobuf.encode(
+      nodes.map(node => Protobuf.bytesField(GraphNode, node)) ++ kept ++
+        newInitializers.map(tensor => Protobuf.bytesField(GraphInitializer, tensor)))
+  }
+
+  /** Names used by the subgraphs of a node and their own subgraphs, including the values of
+    * outer graphs they capture
+    */
+  private def subgraphInputs(node: Seq[ProtoField]): Seq[String] =
+    node
+      .filter(_.number == NodeAttribute)
+      .flatMap { attribute =>
+        Protobuf
+          .parse(attribute.bytes)
+          .filter(field => field.number == AttributeGraph || field.number == AttributeGraphs)
+      }
+      .flatMap { subgraph =>
+        val fields = Protobuf.parse(subgraph.bytes)
+        fields.filter(_.number == GraphNode).flatMap { field =>
+          val subgraphNode = Protobuf.parse(field.bytes)
+          strings(subgraphNode, NodeInput) ++ subgraphInputs(subgraphNode)
+        } ++ fields
+          .filter(_.number == GraphOutput)
+          .flatMap(output => strings(Protobuf.parse(output.bytes), ValueInfoName))
+      }
+
+  private def constantProduct(
+      node: Seq[ProtoField],
+      initializers: Map[String, Seq[ProtoField]]): Option[ConstantProduct] = {
+    val inputs = strings(node, NodeInput)
+    val outputs = strings(node, NodeOutput)
+    val opType = strings(node, NodeOpType).headOption.getOrElse("")
+    val domain = strings(node, NodeDomain).headOption.getOrElse("")
+
+    def isFloatMatrix(name: String): Boolean =
+      initializers.get(name).exists(tensor => floatMatrixShape(tensor).isDefined)
+
+    val quantizable = (domain.isEmpty || domain == "ai.onnx") && outputs.length == 1 &&
+      inputs.length >= 2 && !initializers.contains(inputs.head) && isFloatMatrix(inputs(1))
+
+    if (!quantizable) None
+    else if (opType == "MatMul" && inputs.length == 2)
+      Some(ConstantProduct(inputs.head, inputs(1), transposed = false, None, outputs.head))
+    else if (opType == "Gemm") {
+      val attributes = node
+        .filter(_.number == NodeAttribute)
+        .map { attribute =>
+          val fields = Protobuf.parse(attribute.bytes)
+          (fields.find(_.number == AttributeName).map(_.string).getOrElse(""), fields)
+        }
+        .toMap
+      def float(name: String): Float = attributes
+        .get(name)
+        .flatMap(_.find(_.number == AttributeFloat))
+        .map(field => ByteBuffer.wrap(field.bytes).order(ByteOrder.LITTLE_ENDIAN).getFloat)
+        .getOrElse(1f)
+      def int(name: String): Long =
+        attributes.get(name).flatMap(_.find(_.number == AttributeInt)).map(_.varint).getOrElse(0L)
+
+      val bias = inputs.lift(2).filter(_.nonEmpty)
+      if (float("alpha") == 1f && (bias.isEmpty || float("beta") == 1f) && int("transA") == 0)
+        Some(ConstantProduct(inputs.head, inputs(1), int("transB") != 0, bias, outputs.head))
+      else None
+    } else None
+  }
+
+  /** Rows and columns of a float matrix stored in the model */
+  private def floatMatrixShape(tensor: Seq[ProtoField]): Option[(Int, Int)] = {
+    val dataType = tensor.find(_.number == TensorDataType).map(_.varint).getOrElse(0L)
+    val external =
+      tensor.find(_.number == TensorDataLocation).exists(_.varint == ExternalDataLocation)
+    val dims = tensor.filter(_.number == TensorDims).flatMap { field =>
+      if (field.wireType == Protobuf.Bytes) Protobuf.packedVarints(field.bytes)
+      else Seq(field.varint)
+    }
+    if (dataType != FloatType || external || dims.length != 2) None
+    else Some((dims.head.toInt, dims(1).toInt))
+  }
+
+  private def floatValues(tensor: Seq[ProtoField]): Array[Float] = {
+    val data = tensor.find(_.number == TensorRawData).map(_.bytes).getOrElse {
+      val floats = new ByteArrayOutputStream()
+      tensor.filter(_.number == TensorFloatData).foreach(field => floats.write(field.bytes))
+      floats.toByteArray
+    }
+    val values = new Array[Float](data.length / 4)
+    ByteBuffer.wrap(data).order(ByteOrder.LITTLE_ENDIAN).asFloatBuffer().get(values)
+    values
+  }
+
+  /** Adds the int8 weight, scale and zero point of a float matrix to the new initializers */
+  private def quantizeWeight(
+      tensor: Seq[ProtoField],
+      name: String,
+      transposed: Boolean,
+      newInitializers: mutable.ArrayBuffer[Array[Byte]]): (String, String, String) = {
+    val (rows, columns) = floatMatrixShape(tensor).get
+    val values = floatValues(tensor)
+    require(
+      values.length.toLong == rows.toLong * columns,
+      s"Weight $name of the ONNX model does not match its shape")
+    val maxAbs = values.foldLeft(0f)((max, value) => math.max(max, math.abs(value)))
+    val scale = if (maxAbs == 0f) 1f else maxAbs / 127f
+
+    // MatMulInteger multiplies by a (K, N) matrix, Gemm with transB stores it as (N, K)
+    val (k, n) = if (transposed) (columns, rows) else (rows, columns)
+    val quantized = new Array[Byte](values.length)
+    for (row <- 0 until k; column <- 0 until n) {
+      val value = if (transposed) values(column * columns + row) else values(row * n + column)
+      quantized(row * n + column) =
+        math.max(-127, math.min(127, math.round(value / scale))).toByte
+    }
+
+    val prefix = if (transposed) name + "_transposed" else name
+    val names = (prefix + "_quantized", prefix + "_scale", prefix + "_zero_point")
+    val scaleBytes = ByteBuffer.allocate(4).order(ByteOrder.LITTLE_ENDIAN).putFloat(scale).array()
+    newInitializers += encodeTensor(names._1, Int8Type, Seq(k, n), quantized)
+    newInitializers += encodeTensor(names._2, FloatType, Seq.empty, scaleBytes)
+    newInitializers += encodeTensor(names._3, Int8Type, Seq.empty, Array[Byte](0))
+    names
+  }
+
+  private def encodeTensor(
+      name: String,
+      dataType: Int,
+      dims: Seq[Int],
+      rawData: Array[Byte]): Array[Byte] =
+    Protobuf.encode(
+      dims.map(dim => Protobuf.varintField(TensorDims, dim)) ++ Seq(
+        Protobuf.varintField(TensorDataType, dataType),
+        Protobuf.stringField(TensorName, name),
+        Protobuf.bytesField(TensorRawData, rawData)))
+
+  private def encodeNode(
+      opType: String,
+      inputs: Seq[String],
+      outputs: Seq[String],
+      name: String,
+      attributes: Seq[Array[Byte]] = Seq.empty): Array[Byte] =
+    Protobuf.encode(
+      inputs.map(input => Protobuf.stringField(NodeInput, input)) ++
+        outputs.map(output => Protobuf.stringField(NodeOutput, output)) ++
+        Seq(Protobuf.stringField(NodeName, name), Protobuf.stringField(NodeOpType, opType)) ++
+        attributes.map(attribute => Protobuf.bytesField(NodeAttribute, attribute)))
+
+  private def nodeName(node: Seq[ProtoField], output: String): String =
+    strings(node, NodeName).headOption.filter(_.nonEmpty).getOrElse(output)
+
+  private def strings(message: Seq[ProtoField], number: Int): Seq[String] =
+    message.filter(_.number == number).map(_.string)
+
+  /** Field of a protobuf message. Varints are kept in `varint`, every other wire type keeps its
+    * bytes in `bytes`.
+    */
+  private case class ProtoField(number: Int, wireType: Int, varint: Long, bytes: Array[Byte]) {
+    def string: String = new String(bytes, UTF_8)
+  }
+
+  /** Protobuf wire format, enough to rewrite messages without their generated classes */
+  private object Protobuf {
+
+    val Varint = 0
+    val Fixed64 = 1
+    val Bytes = 2
+    val Fixed32 = 5
+
+    /** Reads the fields of a message, or the values of a packed repeated field */
+    private class Reader(message: Array[Byte]) {
+      private var position = 0
+
+      def hasNext: Boolean = position < message.length
+
+      def readVarint(): Long = {
+        var result = 0L
+        var shift = 0
+        var byte = 0
+        do {
+          byte = message(position)
+          position += 1
+          result |= (byte & 0x7fL) << shift
+          shift += 7
+        } while ((byte & 0x80) != 0)
+        result
+      }
+
+      def readBytes(length: Int): Array[Byte] = {
+        val bytes = java.util.Arrays.copyOfRange(message, position, position + length)
+        position += length
+        bytes
+      }
+    }
+
+    def parse(message: Array[Byte]): Seq[ProtoField] = {
+      val fields = mutable.ArrayBuffer[ProtoField]()
+      val reader = new Reader(message)
+      while (reader.hasNext) {
+        val key = reader.readVarint()
+        val number = (key >>> 3).toInt
+        val wireType = (key & 7).toInt
+        fields += (wireType match {
+          case Varint => ProtoField(number, wireType, reader.readVarint(), null)
+          case Fixed64 => ProtoField(number, wireType, 0L, reader.readBytes(8))
+          case Bytes =>
+            ProtoField(number, wireType, 0L, reader.readBytes(reader.readVarint().toInt))
+          case Fixed32 => ProtoField(number, wireType, 0L, reader.readBytes(4))
+          case other =>
+            throw new IllegalArgumentException(s"Unsupported protobuf wire type $other")
+        })
+      }
+      fields
+    }
+
+    def encode(fields: Seq[ProtoField]): Array[Byte] = {
+      val output = new ByteArrayOutputStream()
+
+      def writeVarint(value: Long): Unit = {
+        var remaining = value
+        while ((remaining & ~0x7fL) != 0) {
+          output.write(((remaining & 0x7f) | 0x80).toInt)
+          remaining >>>= 7
+        }
+        output.write(remaining.toInt)
+      }
+
+      fields.foreach { field =>
+        writeVarint(field.number.toLong << 3 | field.wireType)
+        field.wireType match {
+          case Varint => writeVarint(field.varint)
+          case Bytes =>
+            writeVarint(field.bytes.length)
+            output.write(field.bytes)
+          case _ => output.write(field.bytes)
+        }
+      }
+      output.toByteArray
+    }
+
+    def packedVarints(bytes: Array[Byte]): Seq[Long] = {
+      val values = mutable.ArrayBuffer[Long]()
+      val reader = new Reader(bytes)
+      while (reader.hasNext) values += reader.readVarint()
+      values
+    }
+
+    def varintField(number: Int, value: Long): ProtoField =
+      ProtoField(number, Varint, value, null)
+
+    def bytesField(number: Int, bytes: Array[Byte]): ProtoField =
+      ProtoField(number, Bytes, 0L, bytes)
+
+    def stringField(number: Int, value: String): ProtoField =
+      bytesField(number, value.getBytes(UTF_8))
+  }
+
+}
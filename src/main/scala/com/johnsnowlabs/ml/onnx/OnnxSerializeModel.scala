@@ -92,32 +92,41 @@ trait ReadOnnxModel {
     val uri = new java.net.URI(path.replaceAllLiterally("\\", "/"))
     val fs = FileSystem.get(uri, spark.sparkContext.hadoopConfiguration)
 
-    // 1. Create tmp directory
-    val tmpFolder = Files
-      .createTempDirectory(UUID.randomUUID().toString.takeRight(12) + suffix)
-      .toAbsolutePath
-      .toString
-
-    // 2. Copy to local dir
-    fs.copyToLocalFile(new Path(path, onnxFile), new Path(tmpFolder))
-
-    val localPath = new Path(tmpFolder, onnxFile).toString
-
     val fsPath = new Path(path, onnxFile)
-
-    // 3. Copy onnx_data file if exists
     val onnxDataFile = new Path(fsPath + dataFileSuffix)
 
-    if (fs.exists(onnxDataFile)) {
-      fs.copyToLocalFile(onnxDataFile, new Path(tmpFolder))
-    }
-    // 4. Read ONNX state
-    val onnxWrapper = OnnxWrapper.read(localPath, zipped = zipped, useBundle = useBundle)
+    // 1. Open the cached model if these files were read before
+    val sourceKey = OnnxModelCache.sourceKey(
+      fs,
+      fsPath +: Seq(onnxDataFile).filter(fs.exists),
+      OnnxQuantization.NONE)
+
+    OnnxWrapper.readCached(sourceKey).getOrElse {
+      // 2. Create tmp directory
+      val tmpFolder = Files
+        .createTempDirectory(UUID.randomUUID().toString.takeRight(12) + suffix)
+        .toAbsolutePath
+        .toString
+
+      // 3. Copy to local dir, with the onnx_data file if it exists
+      fs.copyToLocalFile(fsPath, new Path(tmpFolder))
+      if (fs.exists(onnxDataFile)) {
+        fs.copyToLocalFile(onnxDataFile, new Path(tmpFolder))
+      }
+      val localPath = new Path(tmpFolder, onnxFile).toString
 
-    // 5. Remove tmp folder
-    FileHelper.delete(tmpFolder)
+      // 4. Read ONNX state
+      val onnxWrapper = OnnxWrapper.read(
+        localPath,
+        zipped = zipped,
+        useBundle = useBundle,
+        sourceKey = Some(sourceKey))
+
+      // 5. Remove tmp folder
+      FileHelper.delete(tmpFolder)
 
-    onnxWrapper
+      onnxWrapper
+    }
   }
 
   def readOnnxModels(
@@ -139,29 +148,38 @@ trait ReadOnnxModel {
       .toString
 
     val wrappers = (modelNames map { modelName: String =>
-      // 2. Copy to local dir
-      val localModelFile = modelName
-      fs.copyToLocalFile(new Path(path, localModelFile), new Path(tmpFolder))
-
-      val localPath = new Path(tmpFolder, localModelFile).toString
-
-      val fsPath = new Path(path, localModelFile).toString
-
-      // 3. Copy onnx_data file if exists
+      val fsPath = new Path(path, modelName)
       val onnxDataFile = new Path(fsPath + dataFileSuffix)
 
-      if (fs.exists(onnxDataFile)) {
-        fs.copyToLocalFile(onnxDataFile, new Path(tmpFolder))
-      }
-
-      // 4. Read ONNX state
-      val onnxWrapper =
-        OnnxWrapper.read(localPath, zipped = zipped, useBundle = useBundle, modelName = modelName)
+      // 2. Open the cached model if these files were read before
+      val sourceKey = OnnxModelCache.sourceKey(
+        fs,
+        fsPath +: Seq(onnxDataFile).filter(fs.exists),
+        OnnxQuantization.NONE)
+
+      val onnxWrapper = OnnxWrapper
+        .readCached(sourceKey, modelName = modelName)
+        .getOrElse {
+          // 3. Copy to local dir, with the onnx_data file if it exists
+          fs.copyToLocalFile(fsPath, new Path(tmpFolder))
+          if (fs.exists(onnxDataFile)) {
+            fs.copyToLocalFile(onnxDataFile, new Path(tmpFolder))
+          }
+          val localPath = new Path(tmpFolder, modelName).toString
+
+          // 4. Read ONNX state
+          OnnxWrapper.read(
+            localPath,
+            zipped = zipped,
+            useBundle = useBundle,
+            modelName = modelName,
+            sourceKey = Some(sourceKey))
+        }
 
       (modelName, onnxWrapper)
     }).toMap
 
-    // 4. Remove tmp folder
+    // 5. Remove tmp folder
     FileHelper.delete(tmpFolder)
 
     wrappers
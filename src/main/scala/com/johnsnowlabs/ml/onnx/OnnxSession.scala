@@ -20,6 +20,7 @@ import com.johnsnowlabs.util.{ConfigHelper, ConfigLoader}
 import org.slf4j.{Logger, LoggerFactory}
 
 import java.io.Serializable
+import scala.util.DynamicVariable
 
 class OnnxSession extends Serializable {
 
@@ -35,20 +36,123 @@ class OnnxSession extends Serializable {
 
   private def getCUDASessionConfig: Map[String, String] = {
     val gpuDeviceId = ConfigLoader.getConfigIntValue(ConfigHelper.onnxGpuDeviceId)
-    Map(ConfigHelper.onnxGpuDeviceId -> gpuDeviceId.toString)
+    val sessionPoolSize =
+      ConfigLoader.getConfigStringValue(ConfigHelper.onnxSessionPoolSize)
+
+    Map(ConfigHelper.onnxGpuDeviceId -> gpuDeviceId.toString) ++
+      Map(ConfigHelper.onnxSessionPoolSize -> sessionPoolSize)
   }
 
   private def getCPUSessionConfig: Map[String, String] = {
     val intraOpNumThreads =
       ConfigLoader.getConfigIntValue(ConfigHelper.onnxIntraOpNumThreads)
+    val interOpNumThreads =
+      ConfigLoader.getConfigIntValue(ConfigHelper.onnxInterOpNumThreads)
     val optimizationLevel =
       ConfigLoader.getConfigStringValue(ConfigHelper.onnxOptimizationLevel)
     val executionMode =
       ConfigLoader.getConfigStringValue(ConfigHelper.onnxExecutionMode)
+    val sessionPoolSize =
+      ConfigLoader.getConfigStringValue(ConfigHelper.onnxSessionPoolSize)
 
     Map(ConfigHelper.onnxIntraOpNumThreads -> intraOpNumThreads.toString) ++
+      Map(ConfigHelper.onnxInterOpNumThreads -> interOpNumThreads.toString) ++
       Map(ConfigHelper.onnxOptimizationLevel -> optimizationLevel) ++
-      Map(ConfigHelper.onnxExecutionMode -> executionMode)
+      Map(ConfigHelper.onnxExecutionMode -> executionMode) ++
+      Map(ConfigHelper.onnxSessionPoolSize -> sessionPoolSize)
   }
 
 }
+
+object OnnxSession {
+
+  private val settingsPrefix = "spark.jsl.settings.onnx."
+
+  /** Session options that can be set per annotator, overriding the Spark NLP configuration */
+  val annotatorOptions: Seq[String] = Seq(
+    ConfigHelper.onnxGpuDeviceId,
+    ConfigHelper.onnxIntraOpNumThreads,
+    ConfigHelper.onnxInterOpNumThreads,
+    ConfigHelper.onnxOptimizationLevel,
+    ConfigHelper.onnxExecutionMode,
+    ConfigHelper.onnxSessionPoolSize)
+
+  /** Largest number of sessions pooled per model for `auto`, as each holds a copy of the model */
+  val maxAutoPoolSize: Int = 8
+
+  private val overridingOptions = new DynamicVariable[Map[String, String]](Map.empty)
+
+  /** Session pools leased while running a block, released once it completes */
+  private class Leases {
+    private var pools: List[OnnxWrapper.SessionPool] = Nil
+    private var released = false
+
+    def lease(pool: OnnxWrapper.SessionPool): Boolean = synchronized {
+      if (!released && !pools.exists(_ eq pool)) {
+        pool.acquire()
+        pools = pool :: pools
+      }
+      !released
+    }
+
+    def release(): Unit = {
+      val leased = synchronized {
+        released = true
+        pools
+      }
+      leased.foreach(_.release())
+    }
+  }
+
+  private val currentLeases = new DynamicVariable[Option[Leases]](None)
+
+  /** Resolves the names of annotator session options, which can be given without the
+    * `spark.jsl.settings.onnx.` prefix of their Spark NLP configuration.
+    */
+  def normalizeOptions(options: Map[String, String]): Map[String, String] =
+    options.map { case (name, value) =>
+      val option = if (name.startsWith(settingsPrefix)) name else settingsPrefix + name
+      require(
+        annotatorOptions.contains(option),
+        s"Unknown ONNX session option $name. Must be one of " +
+          annotatorOptions.map(_.stripPrefix(settingsPrefix)).mkString(", "))
+      (option, value)
+    }
+
+  /** Runs a block where the sessions of ONNX models are created with these options instead of
+    * the Spark NLP configuration. The session pools used in the block are leased until it
+    * completes, so they are not closed while it runs them.
+    */
+  def withOptions[T](options: Map[String, String])(block: => T): T = {
+    val leases = new Leases
+    try {
+      currentLeases.withValue(Some(leases)) {
+        if (options.isEmpty) block
+        else overridingOptions.withValue(overridingOptions.value ++ options)(block)
+      }
+    } finally leases.release()
+  }
+
+  /** Leases a session pool until the current [[withOptions]] block completes.
+    *
+    * @return
+    *   `false` if there is no such block, then the pool can not be released
+    */
+  private[onnx] def lease(pool: OnnxWrapper.SessionPool): Boolean =
+    currentLeases.value.exists(_.lease(pool))
+
+  /** Options overriding the Spark NLP configuration in the current block */
+  def currentOptions: Map[String, String] = overridingOptions.value
+
+  /** Number of sessions to pool, where `auto` is the number of task slots of the executor, up to
+    * [[maxAutoPoolSize]]. Every session holds its own copy of the weights of the model, so a pool
+    * takes as many times the memory of the model as it has sessions.
+    */
+  def poolSize(sessionOptions: Map[String, String]): Int =
+    sessionOptions.get(ConfigHelper.onnxSessionPoolSize).map(_.trim.toLowerCase) match {
+      case Some("auto") => math.min(ConfigHelper.taskSlots, maxAutoPoolSize)
+      case Some(size) => math.max(1, scala.util.Try(size.toInt).getOrElse(1))
+      case None => 1
+    }
+
+}
@@ -27,32 +27,95 @@ import org.apache.hadoop.fs.{FileSystem, Path}
 import java.io._
 import java.nio.file.{Files, Paths}
 import java.util.UUID
+import java.util.concurrent.atomic.AtomicInteger
 import scala.util.{Failure, Success, Try}
 
-class OnnxWrapper(var onnxModel: Array[Byte], var onnxModelPath: Option[String] = None)
+/** ONNX model and its sessions.
+  *
+  * Models read with [[OnnxWrapper.read]] are extracted into the [[OnnxModelCache]] and opened by
+  * path, so only their [[OnnxModelCache.CachedModel]] reference is serialized with the wrapper.
+  */
+class OnnxWrapper(
+    var onnxModel: Array[Byte],
+    var onnxModelPath: Option[String] = None,
+    var cachedModel: Option[OnnxModelCache.CachedModel] = None)
     extends Serializable {
 
   /** For Deserialization */
   def this() = {
-    this(null, null)
+    this(null, null, None)
   }
 
   // Important for serialization on none-kyro serializers
-  @transient private var ortSession: OrtSession = _
   @transient private var ortEnv: OrtEnvironment = _
-
-  def getSession(onnxSessionOptions: Map[String, String]): (OrtSession, OrtEnvironment) =
-    this.synchronized {
-      // TODO: After testing it works remove the Map.empty
-      if (ortSession == null && ortEnv == null) {
-        val (session, env) =
-          OnnxWrapper.withSafeOnnxModelLoader(onnxModel, onnxSessionOptions, onnxModelPath)
-        ortEnv = env
-        ortSession = session
+  @transient private var sessionPools: Map[Map[String, String], OnnxWrapper.SessionPool] = _
+  // Options of the session pools, from the least to the most recently used
+  @transient private var poolsByRecency: Vector[Map[String, String]] = _
+
+  /** Session of the model for these options, overridden by the options of the annotator running
+    * it. When several sessions are pooled, each call returns the next one in turn.
+    *
+    * Sessions returned in a [[OnnxSession.withOptions]] block, where annotators run their
+    * batches, are leased until the block completes. Once more than
+    * [[OnnxWrapper.maxSessionPools]] pools of different options are open for the same model, the
+    * least recently used pool that is not leased is closed. Pools used outside such a block are
+    * kept open until [[close]].
+    */
+  def getSession(onnxSessionOptions: Map[String, String]): (OrtSession, OrtEnvironment) = {
+    val sessionOptions = onnxSessionOptions ++ OnnxSession.currentOptions
+    val pool = this.synchronized {
+      if (sessionPools == null) {
+        sessionPools = Map.empty
+        poolsByRecency = Vector.empty
       }
-      (ortSession, ortEnv)
+      val pool = sessionPools.getOrElse(
+        sessionOptions, {
+          if (sessionPools.size >= OnnxWrapper.maxSessionPools) evictIdlePool()
+          val created = createSessionPool(sessionOptions)
+          sessionPools += (sessionOptions -> created)
+          created
+        })
+      if (!OnnxSession.lease(pool)) pool.pin()
+      if (poolsByRecency.lastOption != Some(sessionOptions))
+        poolsByRecency = poolsByRecency.filter(_ != sessionOptions) :+ sessionOptions
+      pool
+    }
+    (pool.next(), ortEnv)
+  }
+
+  // Called holding the lock of the wrapper, which pools are leased under
+  private def evictIdlePool(): Unit =
+    poolsByRecency.find(options => sessionPools(options).isIdle) match {
+      case Some(evicted) =>
+        sessionPools(evicted).close()
+        sessionPools -= evicted
+        poolsByRecency = poolsByRecency.filter(_ != evicted)
+      case None =>
+        OnnxWrapper.logger.warn(
+          s"More than ${OnnxWrapper.maxSessionPools} different ONNX session options are in use" +
+            " with the same model, none of their sessions can be closed")
     }
 
+  private def createSessionPool(sessionOptions: Map[String, String]): OnnxWrapper.SessionPool = {
+    val modelPath = cachedModel.map(OnnxModelCache.localModelPath).orElse(onnxModelPath)
+    val sessions = (0 until OnnxSession.poolSize(sessionOptions)).map { _ =>
+      val (session, env) =
+        OnnxWrapper.withSafeOnnxModelLoader(onnxModel, sessionOptions, modelPath)
+      ortEnv = env
+      session
+    }
+    new OnnxWrapper.SessionPool(sessions.toArray)
+  }
+
+  /** Closes the sessions of all pools. Later calls of [[getSession]] create new ones. */
+  def close(): Unit = this.synchronized {
+    if (sessionPools != null) {
+      sessionPools.values.foreach(_.close())
+      sessionPools = Map.empty
+      poolsByRecency = Vector.empty
+    }
+  }
+
   def saveToFile(file: String, zip: Boolean = true): Unit = {
     // 1. Create tmp director
     val tmpFolder = Files
@@ -66,7 +129,11 @@ class OnnxWrapper(var onnxModel: Array[Byte], var onnxModelPath: Option[String]
       .get(tmpFolder, fileName)
       .toString
 
-    FileUtils.writeByteArrayToFile(new File(onnxFile), onnxModel)
+    cachedModel match {
+      case Some(model) =>
+        FileUtils.copyFile(new File(OnnxModelCache.localModelPath(model)), new File(onnxFile))
+      case None => FileUtils.writeByteArrayToFile(new File(onnxFile), onnxModel)
+    }
     // 4. Zip folder
     if (zip) ZipArchiveUtil.zip(tmpFolder, file)
 
@@ -80,92 +147,140 @@ class OnnxWrapper(var onnxModel: Array[Byte], var onnxModelPath: Option[String]
 object OnnxWrapper {
   private[OnnxWrapper] val logger: Logger = LoggerFactory.getLogger("OnnxWrapper")
 
-  // TODO: make sure this.synchronized is needed or it's not a bottleneck
+  /** Number of session pools of different options per model above which idle ones are closed */
+  val maxSessionPools: Int = 4
+
+  /** Sessions of a model created with the same options, handed out in turns.
+    *
+    * Each session holds its own copy of the weights of the model. A pool is leased by the blocks
+    * running its sessions and pinned once used outside of one, it can only be closed when idle.
+    */
+  private[onnx] class SessionPool(sessions: Array[OrtSession]) {
+    private val calls = new AtomicInteger()
+    private val leases = new AtomicInteger()
+    @volatile private var pinned = false
+
+    def size: Int = sessions.length
+
+    def acquire(): Unit = leases.incrementAndGet()
+
+    def release(): Unit = leases.decrementAndGet()
+
+    def pin(): Unit = pinned = true
+
+    def isIdle: Boolean = !pinned && leases.get() == 0
+
+    def close(): Unit = sessions.foreach(_.close())
+
+    def next(): OrtSession =
+      if (sessions.length == 1) sessions(0)
+      else sessions(Math.floorMod(calls.getAndIncrement(), sessions.length))
+  }
+
+  // Sessions of different models are created concurrently, each wrapper guards its own sessions
   private def withSafeOnnxModelLoader(
       onnxModel: Array[Byte],
       sessionOptions: Map[String, String],
-      onnxModelPath: Option[String] = None): (OrtSession, OrtEnvironment) =
-    this.synchronized {
-      val env = OrtEnvironment.getEnvironment()
-      val sessionOptionsObject = if (sessionOptions.isEmpty) {
-        new SessionOptions()
-      } else {
-        mapToSessionOptionsObject(sessionOptions)
-      }
-      if (onnxModelPath.isDefined) {
-        val session = env.createSession(onnxModelPath.get, sessionOptionsObject)
-        (session, env)
-      } else {
-        val session = env.createSession(onnxModel, sessionOptionsObject)
-        (session, env)
-      }
+      onnxModelPath: Option[String] = None): (OrtSession, OrtEnvironment) = {
+    val env = OrtEnvironment.getEnvironment()
+    val sessionOptionsObject = if (sessionOptions.isEmpty) {
+      new SessionOptions()
+    } else {
+      mapToSessionOptionsObject(sessionOptions)
+    }
+    if (onnxModelPath.isDefined) {
+      val session = env.createSession(onnxModelPath.get, sessionOptionsObject)
+      (session, env)
+    } else {
+      val session = env.createSession(onnxModel, sessionOptionsObject)
+      (session, env)
     }
+  }
 
-  // TODO: the parts related to onnx_data should be refactored once we support addFile()
+  /** Reads an exported or saved model into the [[OnnxModelCache]], unless the same files were
+    * read before, and creates its sessions.
+    *
+    * @param sourceKey
+    *   [[OnnxModelCache.sourceKey]] of the files `modelPath` was copied from, if it is a
+    *   temporary copy
+    */
   def read(
       modelPath: String,
       zipped: Boolean = true,
       useBundle: Boolean = false,
       modelName: String = "model",
-      dataFileSuffix: String = "_data"): OnnxWrapper = {
-
-    // 1. Create tmp folder
-    val tmpFolder = Files
-      .createTempDirectory(UUID.randomUUID().toString.takeRight(12) + "_onnx")
-      .toAbsolutePath
-      .toString
-
-    // 2. Unpack archive
-    val folder =
-      if (zipped)
-        ZipArchiveUtil.unzip(new File(modelPath), Some(tmpFolder))
-      else
-        modelPath
+      dataFileSuffix: String = "_data",
+      quantization: String = OnnxQuantization.NONE,
+      sourceKey: Option[String] = None): OnnxWrapper = {
+    require(
+      OnnxQuantization.quantizations.contains(quantization),
+      OnnxQuantization.unknownQuantization(quantization))
+
+    // 1. Find the model and its .onnx_data file, next to the model or its archive
+    val sourceFile =
+      if (zipped) new File(modelPath)
+      else if (useBundle) Paths.get(modelPath, s"$modelName.onnx").toFile
+      else new File(modelPath, new File(modelPath).list().head)
 
-    val sessionOptions = new OnnxSession().getSessionOptions
-    val onnxFile =
-      if (useBundle) Paths.get(modelPath, s"$modelName.onnx").toString
-      else Paths.get(folder, new File(folder).list().head).toString
-
-    var onnxDataFile: File = null
-
-    // see if the onnx model has a .onnx_data file
-    // get parent directory of onnx file if modelPath is a file
     val parentDir = if (zipped) Paths.get(modelPath).getParent.toString else modelPath
+    val dataFileName = modelName + dataFileSuffix
+    val dataFile = Some(Paths.get(parentDir, dataFileName).toFile).filter(_.exists())
+
+    val appliedQuantization =
+      if (dataFile.isDefined && quantization != OnnxQuantization.NONE) {
+        logger.warn(s"Weights of $modelName are stored as external data and are not quantized")
+        OnnxQuantization.NONE
+      } else quantization
+
+    // 2. Extract the model into the cache
+    val key = OnnxModelCache.key(sourceFile +: dataFile.toSeq, appliedQuantization, sourceKey)
+    val cachedModel = OnnxModelCache.getOrExtract(key, dataFileName) { folder =>
+      val modelFile =
+        if (zipped) {
+          val unzipped =
+            ZipArchiveUtil.unzip(sourceFile, Some(new File(folder, ".unzipped").getPath))
+          val unzippedFile = new File(unzipped, new File(unzipped).list().head)
+          val modelFile = new File(folder, unzippedFile.getName)
+          Files.move(unzippedFile.toPath, modelFile.toPath)
+          FileHelper.delete(unzipped)
+          modelFile
+        } else {
+          val modelFile = new File(folder, sourceFile.getName)
+          FileUtils.copyFile(sourceFile, modelFile)
+          modelFile
+        }
 
-    val onnxDataFileExist: Boolean = {
-      onnxDataFile = Paths.get(parentDir, modelName + dataFileSuffix).toFile
-      onnxDataFile.exists()
+      if (appliedQuantization != OnnxQuantization.NONE) {
+        val modelBytes = FileUtils.readFileToByteArray(modelFile)
+        FileUtils.writeByteArrayToFile(
+          modelFile,
+          OnnxQuantization.quantize(modelBytes, appliedQuantization))
+      }
+      dataFile.foreach(file => FileUtils.copyFile(file, new File(folder, dataFileName)))
     }
 
-    if (onnxDataFileExist) {
-      val onnxDataFileTmp =
-        Paths.get(tmpFolder, modelName + dataFileSuffix).toFile
-      FileUtils.copyFile(onnxDataFile, onnxDataFileTmp)
-    }
+    // 3. Ship the cached files to the executors and create the sessions
+    open(cachedModel)
+  }
 
-    val modelFile = new File(onnxFile)
-    val modelBytes = FileUtils.readFileToByteArray(modelFile)
-    var session: OrtSession = null
-    var env: OrtEnvironment = null
-    if (onnxDataFileExist) {
-      val (_session, _env) = withSafeOnnxModelLoader(modelBytes, sessionOptions, Some(onnxFile))
-      session = _session
-      env = _env
-    } else {
-      val (_session, _env) = withSafeOnnxModelLoader(modelBytes, sessionOptions, None)
-      session = _session
-      env = _env
+  /** Opens the cached model of files read before from a file system, without copying them again.
+    *
+    * @param sourceKey
+    *   [[OnnxModelCache.sourceKey]] of the files
+    * @return
+    *   The model, or `None` if the files changed or their model was evicted from the cache
+    */
+  def readCached(
+      sourceKey: String,
+      modelName: String = "model",
+      dataFileSuffix: String = "_data"): Option[OnnxWrapper] =
+    OnnxModelCache.getCached(sourceKey, modelName + dataFileSuffix).map(open)
 
-    }
-    // 4. Remove tmp folder
-    FileHelper.delete(tmpFolder)
+  private def open(cachedModel: OnnxModelCache.CachedModel): OnnxWrapper = {
+    OnnxModelCache.distribute(cachedModel)
+    val onnxWrapper = new OnnxWrapper(null, Some(cachedModel.modelPath), Some(cachedModel))
+    onnxWrapper.getSession(new OnnxSession().getSessionOptions)
 
-    val onnxWrapper =
-      if (onnxDataFileExist) new OnnxWrapper(modelBytes, Option(onnxFile))
-      else new OnnxWrapper(modelBytes)
-    onnxWrapper.ortSession = session
-    onnxWrapper.ortEnv = env
     onnxWrapper
   }
 
@@ -230,12 +345,18 @@ object OnnxWrapper {
     // opts.setCPUArenaAllocator(false)
 
     val intraOpNumThreads = sessionOptionsMap(ConfigHelper.onnxIntraOpNumThreads).toInt
+    val interOpNumThreads =
+      sessionOptionsMap.get(ConfigHelper.onnxInterOpNumThreads).map(_.toInt).getOrElse(0)
     val optimizationLevel = getOptLevel(sessionOptionsMap(ConfigHelper.onnxOptimizationLevel))
     val executionMode = getExecutionMode(sessionOptionsMap(ConfigHelper.onnxExecutionMode))
 
     val sessionOptions = new OrtSession.SessionOptions()
     logger.info(s"ONNX session option intraOpNumThreads=$intraOpNumThreads")
     sessionOptions.setIntraOpNumThreads(intraOpNumThreads)
+    if (interOpNumThreads > 0) {
+      logger.info(s"ONNX session option interOpNumThreads=$interOpNumThreads")
+      sessionOptions.setInterOpNumThreads(interOpNumThreads)
+    }
     logger.info(s"ONNX session option optimizationLevel=$optimizationLevel")
     sessionOptions.setOptimizationLevel(optimizationLevel)
     logger.info(s"ONNX session option executionMode=$executionMode")
@@ -16,10 +16,14 @@
 
 package com.johnsnowlabs.ml.tensorflow
 
+import com.johnsnowlabs.ml.util.ShardCodec
 import com.johnsnowlabs.nlp.Annotation
 import org.apache.spark.sql.DataFrame
 import org.apache.spark.sql.functions.{col, explode, size}
 
+import java.io.DataOutputStream
+import java.nio.ByteBuffer
+import scala.collection.JavaConverters._
 import scala.collection.mutable
 
 class ClassifierDatasetEncoder(val params: ClassifierDatasetEncoderParams) extends Serializable {
@@ -108,6 +112,94 @@ class ClassifierDatasetEncoder(val params: ClassifierDatasetEncoderParams) exten
     results.collect()
   }
 
+  /** Streams the encoded training instances of a DataFrame without collecting it, one partition
+    * at a time. Embeddings are not padded, see [[trainingShardCodec]].
+    *
+    * @param dataset
+    *   Input DataFrame with embeddings and labels
+    * @return
+    *   Iterator of sentence embeddings and one-hot encoded labels
+    */
+  def streamTrainingInstances(
+      dataset: DataFrame,
+      labelCol: String): Iterator[(Array[Float], Array[Int])] =
+    dataset
+      .select("embeddings", labelCol)
+      .toLocalIterator()
+      .asScala
+      .flatMap { row =>
+        val label = encodeTags(Array(row.getString(1))).head
+        row.getSeq[Seq[Float]](0).map(embeddings => (embeddings.toArray, label))
+      }
+
+  /** Streams the encoded training instances of a DataFrame without collecting it, one partition
+    * at a time. Embeddings are not padded, see [[trainingShardCodecMultiLabel]].
+    *
+    * @param dataset
+    *   Input DataFrame with embeddings and labels
+    * @return
+    *   Iterator of the sentence embeddings of each document and its multi-hot encoded labels
+    */
+  def streamTrainingInstancesMultiLabel(
+      dataset: DataFrame,
+      labelCol: String): Iterator[(Array[Array[Float]], Array[Float])] =
+    dataset
+      .select("embeddings", labelCol)
+      .filter(size(col("embeddings")(0)) > 0)
+      .toLocalIterator()
+      .asScala
+      .map { row =>
+        val embeddings = row.getSeq[Seq[Float]](0).map(_.toArray).toArray
+        val labels = encodeTagsMultiLabel(Array(row.getSeq[String](1).toArray)).head
+        (embeddings, labels)
+      }
+
+  /** Codec of the training instances in training shards. Labels are stored as indices and
+    * embeddings as half precision floats, which are padded to 1024 dimensions when read.
+    */
+  def trainingShardCodec: ShardCodec[(Array[Float], Array[Int])] = {
+    val numTags = tags.length
+    new ShardCodec[(Array[Float], Array[Int])] {
+      override def write(record: (Array[Float], Array[Int]), output: DataOutputStream): Unit = {
+        output.writeInt(record._2.indexOf(1))
+        ShardCodec.writeHalfs(record._1, output)
+      }
+
+      override def read(input: ByteBuffer): (Array[Float], Array[Int]) = {
+        val label = new Array[Int](numTags)
+        label(input.getInt()) = 1
+        (ShardCodec.readHalfs(input, ClassifierDatasetEncoder.embeddingsWidth), label)
+      }
+    }
+  }
+
+  /** Codec of the multi-label training instances in training shards. Labels are stored as
+    * indices and embeddings as half precision floats, which are padded to 1024 dimensions when
+    * read.
+    */
+  def trainingShardCodecMultiLabel: ShardCodec[(Array[Array[Float]], Array[Float])] = {
+    val numTags = tags.length
+    new ShardCodec[(Array[Array[Float]], Array[Float])] {
+      override def write(
+          record: (Array[Array[Float]], Array[Float]),
+          output: DataOutputStream): Unit = {
+        val labels = record._2.indices.filter(record._2(_) == 1.0f)
+        output.writeInt(labels.length)
+        labels.foreach(output.writeInt)
+        output.writeInt(record._1.length)
+        record._1.foreach(ShardCodec.writeHalfs(_, output))
+      }
+
+      override def read(input: ByteBuffer): (Array[Array[Float]], Array[Float]) = {
+        val labels = new Array[Float](numTags)
+        (1 to input.getInt()).foreach(_ => labels(input.getInt()) = 1.0f)
+        val embeddings = Array.fill(input.getInt())(
+          ShardCodec.readHalfs(input, ClassifierDatasetEncoder.embeddingsWidth))
+        (embeddings, labels)
+      }
+    }
+  }
+
   /** Converts DataFrame to Array of Arrays of Embeddings
     *
     * @param dataset
@@ -248,4 +340,11 @@ class ClassifierDatasetEncoder(val params: ClassifierDatasetEncoderParams) exten
   }
 }
 
+object ClassifierDatasetEncoder {
+
+  /** Dimension the embeddings are padded to */
+  private[tensorflow] val embeddingsWidth = 1024
+
+}
+
 case class ClassifierDatasetEncoderParams(tags: Array[String])
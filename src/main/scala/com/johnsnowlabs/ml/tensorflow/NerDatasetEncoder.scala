@@ -119,6 +119,79 @@ class NerDatasetEncoder(val params: DatasetEncoderParams) extends Serializable {
       isWordStart)
   }
 
+  /** Encodes the chars and tags of a sentence, to be batched later by [[encodeBatch]]
+    *
+    * @param sentence
+    *   sentence to encode
+    * @param tags
+    *   tag of every token of the sentence
+    */
+  def encodeSentence(
+      sentence: WordpieceEmbeddingsSentence,
+      tags: Array[String]): EncodedNerSentence = {
+    new EncodedNerSentence(
+      sentence.tokens.map(token => token.wordpiece.toCharArray.map(char2Id.getOrElse(_, 0))),
+      sentence.tokens.map(token => token.embeddings),
+      sentence.tokens.map(token => token.isWordStart),
+      tags.map(tag => tag2Id.getOrElse(tag, 0)))
+  }
+
+  /** Pads encoded sentences into a batch, like [[encodeInputData]] and [[encodeTags]] do for
+    * sentences that are not encoded yet.
+    *
+    * @return
+    *   the batch and the tag ids of its sentences
+    */
+  def encodeBatch(sentences: Array[EncodedNerSentence]): (NerBatch, Array[Array[Int]]) = {
+    if (sentences.isEmpty)
+      return (NerBatch.empty, Array.empty)
+
+    val sentenceLengths = sentences.map(_.length)
+    val maxSentenceLength = sentenceLengths.max
+
+    val defaultTagId = tag2Id(params.defaultTag)
+    val tagIds = sentences.map { sentence =>
+      Array.tabulate(maxSentenceLength)(j => getOrElse(sentence.tagIds, j, defaultTagId))
+    }
+
+    if (maxSentenceLength == 0)
+      return (NerBatch.empty, tagIds)
+
+    val wordLengths = sentences.map { sentence =>
+      Array.tabulate(maxSentenceLength) { j =>
+        if (j < sentence.length) sentence.charIds(j).length else 0
+      }
+    }
+    val maxWordLength = wordLengths.flatten.max
+    val paddingCharId = char2Id.getOrElse(Char.MinValue, 0)
+
+    val wordEmbeddings = sentences.map { sentence =>
+      Array.tabulate(maxSentenceLength)(j =>
+        getOrElse(sentence.wordEmbeddings, j, params.emptyEmbeddings))
+    }
+
+    val charIds = sentences.map { sentence =>
+      Array.tabulate(maxSentenceLength) { j =>
+        val word = getOrElse(sentence.charIds, j, Array.empty[Int])
+        Array.tabulate(maxWordLength)(k => getOrElse(word, k, paddingCharId))
+      }
+    }
+
+    val isWordStart = sentences.map { sentence =>
+      Array.tabulate(maxSentenceLength)(j => getOrElse(sentence.isWordStart, j, false))
+    }
+
+    val batch =
+      new NerBatch(
+        wordEmbeddings,
+        charIds,
+        wordLengths,
+        sentenceLengths,
+        maxSentenceLength,
+        isWordStart)
+    (batch, tagIds)
+  }
+
   /** Converts Tag names to Identifiers
     *
     * @param tags
@@ -234,6 +307,26 @@ class NerBatch(
   def batchSize: Int = wordEmbeddings.length
 }
 
+/** Sentence with its chars and tags encoded by [[NerDatasetEncoder.encodeSentence]], without
+  * any padding.
+  *
+  * @param charIds
+  *   Char ids of every word. Shape: Sentence Length x Word Length
+  * @param wordEmbeddings
+  *   Word vector representation. Shape: Sentence Length x Embeddings Dim
+  * @param isWordStart
+  *   Is current wordpiece is token start? Shape: Sentence Length
+  * @param tagIds
+  *   Tag id of every word. Shape: Sentence Length
+  */
+class EncodedNerSentence(
+    val charIds: Array[Array[Int]],
+    val wordEmbeddings: Array[Array[Float]],
+    val isWordStart: Array[Boolean],
+    val tagIds: Array[Int]) {
+  def length: Int = charIds.length
+}
+
 object NerBatch {
   def empty = new NerBatch(Array.empty, Array.empty, Array.empty, Array.empty, 0, Array.empty)
 }
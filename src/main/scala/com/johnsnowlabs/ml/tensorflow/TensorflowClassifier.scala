@@ -16,6 +16,7 @@
 
 package com.johnsnowlabs.ml.tensorflow
 
+import com.johnsnowlabs.ml.util.TrainingShards
 import com.johnsnowlabs.nlp.annotators.classifier.dl.ClassifierMetrics
 import com.johnsnowlabs.nlp.annotators.ner.Verbose
 import com.johnsnowlabs.nlp.util.io.OutputHelper
@@ -62,6 +63,86 @@ class TensorflowClassifier(
       outputLogsPath: String,
       uuid: String = Identifiable.randomUID("classifierdl")): Unit = {
 
+    val (trainSet, validationSet, testSet) = buildDatasets(inputs, testInputs, validationSplit)
+
+    trainOnBatches(
+      () => trainSet.grouped(batchSize),
+      trainSet.length,
+      () => validationSet.grouped(batchSize),
+      validationSet.length,
+      () => testSet.grouped(batchSize),
+      testSet.length,
+      classNum,
+      lr,
+      batchSize,
+      dropout,
+      startEpoch,
+      endEpoch,
+      configProtoBytes,
+      validationSplit,
+      evaluationLogExtended,
+      enableOutputLogs,
+      outputLogsPath,
+      uuid)
+  }
+
+  /** Trains on instances spilled to training shards, which are shuffled on every epoch */
+  def trainFromShards(
+      trainSet: TrainingShards[(Array[Float], Array[Int])],
+      validationSet: Option[TrainingShards[(Array[Float], Array[Int])]],
+      testSet: Option[TrainingShards[(Array[Float], Array[Int])]],
+      classNum: Int,
+      lr: Float = 5e-3f,
+      batchSize: Int = 64,
+      dropout: Float = 0.5f,
+      startEpoch: Int = 0,
+      endEpoch: Int = 10,
+      configProtoBytes: Option[Array[Byte]] = None,
+      validationSplit: Float = 0.0f,
+      evaluationLogExtended: Boolean = false,
+      enableOutputLogs: Boolean = false,
+      outputLogsPath: String,
+      uuid: String = Identifiable.randomUID("classifierdl")): Unit =
+    trainOnBatches(
+      () => trainSet.batches(batchSize),
+      trainSet.count,
+      () => validationSet.map(_.batches(batchSize, shuffle = false)).getOrElse(Iterator.empty),
+      validationSet.map(_.count).getOrElse(0L),
+      () => testSet.map(_.batches(batchSize, shuffle = false)).getOrElse(Iterator.empty),
+      testSet.map(_.count).getOrElse(0L),
+      classNum,
+      lr,
+      batchSize,
+      dropout,
+      startEpoch,
+      endEpoch,
+      configProtoBytes,
+      validationSplit,
+      evaluationLogExtended,
+      enableOutputLogs,
+      outputLogsPath,
+      uuid)
+
+  private def trainOnBatches(
+      trainSet: () => Iterator[Array[(Array[Float], Array[Int])]],
+      trainLength: Long,
+      validationSet: () => Iterator[Array[(Array[Float], Array[Int])]],
+      validationLength: Long,
+      testSet: () => Iterator[Array[(Array[Float], Array[Int])]],
+      testLength: Long,
+      classNum: Int,
+      lr: Float,
+      batchSize: Int,
+      dropout: Float,
+      startEpoch: Int,
+      endEpoch: Int,
+      configProtoBytes: Option[Array[Byte]],
+      validationSplit: Float,
+      evaluationLogExtended: Boolean,
+      enableOutputLogs: Boolean,
+      outputLogsPath: String,
+      uuid: String): Unit = {
+
     // Initialize
     if (startEpoch == 0)
       tensorflow
@@ -70,12 +151,10 @@ class TensorflowClassifier(
         .addTarget(initKey)
         .run()
 
-    val (trainSet, validationSet, testSet) = buildDatasets(inputs, testInputs, validationSplit)
-
     println(
-      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: ${trainSet.length} - classes: $classNum")
+      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: $trainLength - classes: $classNum")
     outputLog(
-      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: ${trainSet.length} - classes: $classNum",
+      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: $trainLength - classes: $classNum",
       uuid,
       enableOutputLogs,
       outputLogsPath)
@@ -88,7 +167,7 @@ class TensorflowClassifier(
       var acc = 0f
       val learningRate = lr / (1 + dropout * epoch)
 
-      for (batch <- trainSet.grouped(batchSize)) {
+      for (batch <- trainSet()) {
         val tensors = new TensorResources()
 
         val inputArrays = batch.map(x => x._1)
@@ -118,7 +197,7 @@ class TensorflowClassifier(
 
         tensors.clearTensors()
       }
-      acc /= (trainSet.length / batchSize)
+      acc /= (trainLength / batchSize)
       acc = acc.min(1.0f).max(0.0f)
 
       val endTime = (System.nanoTime() - time) / 1e9
@@ -130,32 +209,32 @@ class TensorflowClassifier(
         enableOutputLogs,
         outputLogsPath)
 
-      if (validationSet.nonEmpty && validationSplit > 0.0) {
+      if (validationLength > 0 && validationSplit > 0.0) {
         println(
-          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = ${validationSet.length}")
+          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = $validationLength")
         outputLog(
-          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = ${validationSet.length}",
+          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = $validationLength",
           uuid,
           enableOutputLogs,
           outputLogsPath)
 
-        measure(
-          validationSet,
+        measureBatches(
+          validationSet(),
           "validation",
           extended = evaluationLogExtended,
           enableOutputLogs,
           outputLogsPath)
-      } else if (validationSet.isEmpty) {
+      } else if (validationLength == 0 && validationSplit > 0.0) {
         println(f"WARNING: Could not create validation set. " +
-          f"Number of data points (${inputs._1.length}) not enough for validation split $validationSplit.")
+          f"Number of data points (${trainLength + validationLength}) not enough for validation split $validationSplit.")
       }
 
-      if (testSet.nonEmpty) {
+      if (testLength > 0) {
         println(s"Quality on test dataset: ")
         outputLog("Quality on test dataset: ", uuid, enableOutputLogs, outputLogsPath)
 
-        measure(
-          testSet,
+        measureBatches(
+          testSet(),
           "test",
           extended = evaluationLogExtended,
           enableOutputLogs,
@@ -273,29 +352,41 @@ class TensorflowClassifier(
       extended: Boolean = false,
       enableOutputLogs: Boolean = false,
       outputLogsPath: String,
-      batchSize: Int = 100): (Float, Float) = {
+      batchSize: Int = 100): (Float, Float) =
+    measureBatches(
+      labeled.grouped(batchSize),
+      sourceData,
+      extended,
+      enableOutputLogs,
+      outputLogsPath)
+
+  def measureBatches(
+      batches: Iterator[Array[(Array[Float], Array[Int])]],
+      sourceData: String,
+      extended: Boolean = false,
+      enableOutputLogs: Boolean = false,
+      outputLogsPath: String): (Float, Float) = {
 
     val started = System.nanoTime()
 
     val evaluationEncoder = if (sourceData == "validation") encoder else testEncoder.get
 
-    // ToDo: Add batch strategy
     val truePositives = mutable.Map[String, Int]()
     val falsePositives = mutable.Map[String, Int]()
     val falseNegatives = mutable.Map[String, Int]()
     val predicted = mutable.Map[String, Int]()
     val correct = mutable.Map[String, Int]()
 
-    val originalEmbeddings = labeled.map(x => x._1)
-    val originalLabels: Array[Int] = labeled.map(x => x._2).map { x =>
-      x.zipWithIndex.maxBy(_._1)._2
-    }
-
     val evaluationNumClasses =
       if (sourceData == "validation") numClasses else testEncoder.get.params.tags.length
 
-    val predictedLabels: Array[Int] = internalPredict(originalEmbeddings, evaluationNumClasses)
-    val labeledPredictions: Array[(Int, Int)] = predictedLabels.zip(originalLabels)
+    val labeledPredictions: Iterator[(Int, Int)] = batches.flatMap { labeled =>
+      val originalEmbeddings = labeled.map(x => x._1)
+      val originalLabels: Array[Int] = labeled.map(x => x._2).map { x =>
+        x.zipWithIndex.maxBy(_._1)._2
+      }
+      internalPredict(originalEmbeddings, evaluationNumClasses).zip(originalLabels)
+    }
 
     for (labeledPrediction <- labeledPredictions) {
       val predict = labeledPrediction._1
@@ -16,6 +16,7 @@
 
 package com.johnsnowlabs.ml.tensorflow
 
+import com.johnsnowlabs.ml.util.TrainingShards
 import com.johnsnowlabs.nlp.annotators.classifier.dl.ClassifierMetrics
 import com.johnsnowlabs.nlp.annotators.ner.Verbose
 import com.johnsnowlabs.nlp.util.io.OutputHelper
@@ -47,6 +48,8 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
 
   private val initKey = "init_all_tables"
 
+  private val evaluationBatchSize = 100
+
   def reshapeInputFeatures(batch: Array[Array[Array[Float]]]): Array[Array[Array[Float]]] = {
     val sequencesLength = batch.map(x => x.length)
     val maxSentenceLength = sequencesLength.max
@@ -77,6 +80,99 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
       outputLogsPath: String,
       uuid: String = Identifiable.randomUID("multiclassifierdl")): Unit = {
 
+    val (trainSet, validationSet, testSet) =
+      buildDatasets(trainInputs, testInputs, validationSplit)
+
+    val trainBatches = () => {
+      val shuffledBatch = if (shuffleEpoch) {
+        Random.shuffle(trainSet.toSeq).toArray
+      } else trainSet
+      shuffledBatch.grouped(batchSize)
+    }
+
+    trainOnBatches(
+      trainBatches,
+      trainSet.length,
+      () => validationSet.grouped(evaluationBatchSize),
+      validationSet.length,
+      () => testSet.grouped(evaluationBatchSize),
+      testInputs.isDefined,
+      classNum,
+      lr,
+      batchSize,
+      startEpoch,
+      endEpoch,
+      configProtoBytes,
+      validationSplit,
+      evaluationLogExtended,
+      enableOutputLogs,
+      outputLogsPath,
+      uuid)
+  }
+
+  /** Trains on documents spilled to training shards, which are shuffled on every epoch if
+    * `shuffleEpoch` is set
+    */
+  def trainFromShards(
+      trainSet: TrainingShards[(Array[Array[Float]], Array[Float])],
+      validationSet: Option[TrainingShards[(Array[Array[Float]], Array[Float])]],
+      testSet: Option[TrainingShards[(Array[Array[Float]], Array[Float])]],
+      classNum: Int,
+      lr: Float = 5e-3f,
+      batchSize: Int = 64,
+      startEpoch: Int = 0,
+      endEpoch: Int = 10,
+      configProtoBytes: Option[Array[Byte]] = None,
+      validationSplit: Float = 0.0f,
+      evaluationLogExtended: Boolean = false,
+      shuffleEpoch: Boolean = false,
+      enableOutputLogs: Boolean = false,
+      outputLogsPath: String,
+      uuid: String = Identifiable.randomUID("multiclassifierdl")): Unit =
+    trainOnBatches(
+      () => trainSet.batches(batchSize, shuffle = shuffleEpoch),
+      trainSet.count,
+      () =>
+        validationSet
+          .map(_.batches(evaluationBatchSize, shuffle = false))
+          .getOrElse(Iterator.empty),
+      validationSet.map(_.count).getOrElse(0L),
+      () =>
+        testSet
+          .map(_.batches(evaluationBatchSize, shuffle = false))
+          .getOrElse(Iterator.empty),
+      testSet.isDefined,
+      classNum,
+      lr,
+      batchSize,
+      startEpoch,
+      endEpoch,
+      configProtoBytes,
+      validationSplit,
+      evaluationLogExtended,
+      enableOutputLogs,
+      outputLogsPath,
+      uuid)
+
+  private def trainOnBatches(
+      trainSet: () => Iterator[Array[(Array[Array[Float]], Array[Float])]],
+      trainLength: Long,
+      validationSet: () => Iterator[Array[(Array[Array[Float]], Array[Float])]],
+      validationLength: Long,
+      testSet: () => Iterator[Array[(Array[Array[Float]], Array[Float])]],
+      hasTestSet: Boolean,
+      classNum: Int,
+      lr: Float,
+      batchSize: Int,
+      startEpoch: Int,
+      endEpoch: Int,
+      configProtoBytes: Option[Array[Byte]],
+      validationSplit: Float,
+      evaluationLogExtended: Boolean,
+      enableOutputLogs: Boolean,
+      outputLogsPath: String,
+      uuid: String): Unit = {
+
     // Initialize
     if (startEpoch == 0)
       tensorflow
@@ -85,13 +181,10 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
         .addTarget(initKey)
         .run()
 
-    val (trainSet, validationSet, testSet) =
-      buildDatasets(trainInputs, testInputs, validationSplit)
-
     println(
-      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: ${trainSet.length} - classes: $classNum")
+      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: $trainLength - classes: $classNum")
     outputLog(
-      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: ${trainSet.length} - classes: $classNum",
+      s"Training started - epochs: $endEpoch - learning_rate: $lr - batch_size: $batchSize - training_examples: $trainLength - classes: $classNum",
       uuid,
       enableOutputLogs,
       outputLogsPath)
@@ -104,11 +197,7 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
       var acc = 0f
       val learningRate = lr / (1 + 0.2 * epoch)
 
-      val shuffledBatch = if (shuffleEpoch) {
-        Random.shuffle(trainSet.toSeq).toArray
-      } else trainSet
-
-      for (batch <- shuffledBatch.grouped(batchSize)) {
+      for (batch <- trainSet()) {
         val tensors = new TensorResources()
 
         val sequenceLengthArrays = batch.map(x => x._1.length)
@@ -140,9 +229,9 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
         tensors.clearTensors()
 
       }
-      acc /= (trainSet.length / batchSize)
+      acc /= (trainLength / batchSize)
       acc = acc.min(1.0f).max(0.0f)
-      loss /= (trainSet.length / batchSize)
+      loss /= (trainLength / batchSize)
 
       val endTime = (System.nanoTime() - time) / 1e9
       println(
@@ -153,32 +242,32 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
         enableOutputLogs,
         outputLogsPath)
 
-      if (validationSet.nonEmpty && validationSplit > 0.0) {
+      if (validationLength > 0 && validationSplit > 0.0) {
         println(
-          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = ${validationSet.length} ")
+          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = $validationLength ")
         outputLog(
-          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = ${validationSet.length} ",
+          s"Quality on validation dataset (${validationSplit * 100}%), validation examples = $validationLength ",
           uuid,
           enableOutputLogs,
           outputLogsPath)
 
-        measure(
-          validationSet,
+        measureBatches(
+          validationSet(),
           "validation",
           extended = evaluationLogExtended,
           enableOutputLogs,
           outputLogsPath)
-      } else if (validationSet.isEmpty) {
+      } else if (validationLength == 0 && validationSplit > 0.0) {
         println(f"WARNING: Could not create validation set. " +
-          f"Number of data points (${trainInputs._1.length}) not enough for validation split $validationSplit.")
+          f"Number of data points (${trainLength + validationLength}) not enough for validation split $validationSplit.")
       }
 
-      if (testInputs.isDefined) {
+      if (hasTestSet) {
         println(s"Quality on test dataset: ")
         outputLog(s"Quality on test dataset: ", uuid, enableOutputLogs, outputLogsPath)
 
-        measure(
-          testSet,
+        measureBatches(
+          testSet(),
           "test",
           extended = evaluationLogExtended,
           enableOutputLogs,
@@ -276,7 +365,20 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
       enableOutputLogs: Boolean = false,
       outputLogsPath: String,
       batchSize: Int = 100,
-      uuid: String = Identifiable.randomUID("annotator")): (Float, Float) = {
+      uuid: String = Identifiable.randomUID("annotator")): (Float, Float) =
+    measureBatches(
+      inputs.grouped(batchSize),
+      sourceData,
+      extended,
+      enableOutputLogs,
+      outputLogsPath)
+
+  def measureBatches(
+      batches: Iterator[Array[(Array[Array[Float]], Array[Float])]],
+      sourceData: String,
+      extended: Boolean = false,
+      enableOutputLogs: Boolean = false,
+      outputLogsPath: String): (Float, Float) = {
 
     val started = System.nanoTime()
 
@@ -287,7 +389,7 @@ private[johnsnowlabs] class TensorflowMultiClassifier(
     val falseNegatives = mutable.Map[String, Int]()
     val labels = mutable.Map[String, Int]()
 
-    for (batch <- inputs.grouped(batchSize)) {
+    for (batch <- batches) {
       val originalEmbeddings = batch.map(x => x._1)
       val originalLabels = batch.map(x => x._2)
       val tagsWithScoresBatch = evaluationEncoder.decodeOutputData(tagIds = originalLabels)
@@ -167,6 +167,15 @@ private[johnsnowlabs] class TensorflowNer(
     }
   }
 
+  /** Encodes a batch of labeled sentences for training */
+  def encodeBatch(batch: Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)])
+      : (NerBatch, Array[Array[Int]]) = {
+    val sentences = batch.map(r => r._2)
+    val tags = getPiecesTags(batch.map(r => r._1), sentences)
+
+    (encoder.encodeInputData(sentences), encoder.encodeTags(tags))
+  }
+
   def train(
       trainDataset: => Iterator[Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]],
       trainLength: Long,
@@ -189,7 +198,56 @@ private[johnsnowlabs] class TensorflowNer(
       includeConfidence: Boolean = false,
       enableOutputLogs: Boolean = false,
       outputLogsPath: String,
-      uuid: String = Identifiable.randomUID("annotator")): Session = {
+      uuid: String = Identifiable.randomUID("annotator")): Session =
+    trainOnBatches(
+      trainDataset.map(encodeBatch),
+      trainLength,
+      validDataset,
+      validLength,
+      lr,
+      po,
+      dropout,
+      batchSize,
+      useBestModel,
+      bestModelMetric,
+      startEpoch,
+      endEpoch,
+      graphFileName,
+      test,
+      configProtoBytes,
+      validationSplit,
+      evaluationLogExtended,
+      includeConfidence,
+      enableOutputLogs,
+      outputLogsPath,
+      uuid)
+
+  /** Trains on batches that are already encoded, see [[encodeBatch]] and
+    * [[NerDatasetEncoder.encodeBatch]]. Validation and test sentences are still given as they
+    * are, to be measured.
+    */
+  def trainOnBatches(
+      trainBatches: => Iterator[(NerBatch, Array[Array[Int]])],
+      trainLength: Long,
+      validDataset: => Iterator[Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]],
+      validLength: Long,
+      lr: Float,
+      po: Float,
+      dropout: Float,
+      batchSize: Int,
+      useBestModel: Boolean,
+      bestModelMetric: String,
+      startEpoch: Int,
+      endEpoch: Int,
+      graphFileName: String,
+      test: => Iterator[Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]],
+      configProtoBytes: Option[Array[Byte]],
+      validationSplit: Float,
+      evaluationLogExtended: Boolean,
+      includeConfidence: Boolean,
+      enableOutputLogs: Boolean,
+      outputLogsPath: String,
+      uuid: String): Session = {
 
     var lastTestMircoF1, lastValMicroF1: Float = 0.0f
     var lastTestMarcoF1, lastValMacroF1: Float = 0.0f
@@ -236,13 +294,7 @@ private[johnsnowlabs] class TensorflowNer(
       val time = System.nanoTime()
       var batches = 0
       var loss = 0f
-      for (batch <- trainDataset) {
-        val sentences = batch.map(r => r._2)
-        val tags = getPiecesTags(batch.map(r => r._1), sentences)
-
-        val batchInput = encoder.encodeInputData(sentences)
-        val batchTags = encoder.encodeTags(tags)
-
+      for ((batchInput, batchTags) <- trainBatches) {
         val tensors = new TensorResources()
         val calculated = tensorflow
           .getTFSession(configProtoBytes = configProtoBytes)
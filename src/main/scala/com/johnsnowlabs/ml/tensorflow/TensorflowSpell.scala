@@ -104,6 +104,32 @@ private[johnsnowlabs] class TensorflowSpell(
     extractFloats(lossWords.get(0))
   }
 
+  /* returns the loss of the last word of each sequence given the previous ones, all the sequences
+   * must have the same length */
+  def predictLastWord(
+      dataset: Array[Array[Int]],
+      cids: Array[Array[Int]],
+      cwids: Array[Array[Int]],
+      configProtoBytes: Option[Array[Byte]] = None): Array[Float] = {
+
+    val tensors = new TensorResources
+    val width = dataset.head.length
+
+    val lossWords = tensorflow
+      .getTFSession(configProtoBytes = configProtoBytes)
+      .runner
+      .feed(dropoutRate, tensors.createTensor(1.0f))
+      .feed(wordIds, tensors.createTensor(dataset.map(_.dropRight(1))))
+      .feed(contextIds, tensors.createTensor(cids.map(_.tail)))
+      .feed(contextWordIds, tensors.createTensor(cwids.map(_.tail)))
+      .feed(inputLens, tensors.createTensor(dataset.map(_ => width - 1)))
+      .fetch(lossKey)
+      .run()
+
+    tensors.clearTensors()
+    extractFloats(lossWords.get(0)).grouped(width - 1).map(_.last).toArray
+  }
+
   def predict_(
       dataset: Array[Array[Int]],
       cids: Array[Array[Int]],
@@ -438,6 +438,8 @@ object TensorflowWrapper {
     *   : tags to retrieve on the model bundle
     * @param initAllTables
     *   : boolean flag whether to retrieve the TF init operation
+    * @param signatureDefName
+    *   : signature definition to read the signatures from, all are merged if not given
     * @return
     *   Returns a greeting based on the `name` field.
     */
@@ -447,7 +449,8 @@ object TensorflowWrapper {
       useBundle: Boolean = false,
       tags: Array[String] = Array.empty[String],
       initAllTables: Boolean = false,
-      savedSignatures: Option[Map[String, String]] = None)
+      savedSignatures: Option[Map[String, String]] = None,
+      signatureDefName: Option[String] = None)
       : (TensorflowWrapper, Option[Map[String, String]]) = {
 
     val t = new TensorResources()
@@ -477,7 +480,8 @@ object TensorflowWrapper {
 
         // Extract saved model signatures
         val saverDef = model.metaGraphDef().getSaverDef
-        val signatures = ModelSignatureManager.extractSignatures(model, saverDef)
+        val signatures =
+          ModelSignatureManager.extractSignatures(model, saverDef, signatureDefName)
 
         (graph, session, varPath, idxPath, signatures)
       } else {
@@ -223,6 +223,16 @@ object ModelSignatureConstants {
     override val value: String = "StatefulPartitionedCall:0"
   }
 
+  case object PastKeyValues extends TFInfoNameMapper {
+    override val key: String = "past_key_values"
+    override val value: String = "serving_default_past_key_values:0"
+  }
+
+  case object PresentKeyValues extends TFInfoNameMapper {
+    override val key: String = "present_key_values"
+    override val value: String = "StatefulPartitionedCall:1"
+  }
+
   case object EndLogitsOutput extends TFInfoNameMapper {
     override val key: String = "end_logits"
     override val value: String = "StatefulPartitionedCall:0"
@@ -28,6 +28,9 @@ object ModelSignatureManager {
 
   val KnownProviders: Array[String] = Array("TF1", "TF2")
 
+  /** Name of the signature definition a SavedModel is served with by default */
+  val DefaultSignatureDef: String = "serving_default"
+
   private[ModelSignatureManager] val logger: Logger =
     LoggerFactory.getLogger("ModelSignatureManager")
 
@@ -82,10 +85,15 @@ object ModelSignatureManager {
     *
     * @param model
     *   : a SavedModelBundle object
+    * @param signatureDefName
+    *   : name of the only signature definition to extract, if the model has it. All signature
+    *   definitions are merged otherwise
     * @return
     *   a list of tuples of type (OperationType, key, TFInfoName)
     */
-  def getSignaturesFromModel(model: SavedModelBundle): Map[String, String] = {
+  def getSignaturesFromModel(
+      model: SavedModelBundle,
+      signatureDefName: Option[String] = None): Map[String, String] = {
     import collection.JavaConverters._
 
     val InputPrefix = "input"
@@ -130,7 +138,12 @@ object ModelSignatureManager {
     }
 
     if (model.metaGraphDef.hasGraphDef && model.metaGraphDef.getSignatureDefCount > 0) {
-      for (sigDef <- model.metaGraphDef.getSignatureDefMap.values.asScala) {
+      val signatureDefs = model.metaGraphDef.getSignatureDefMap.asScala
+      val selected = signatureDefName
+        .flatMap(name => signatureDefs.get(name))
+        .map(Seq(_))
+        .getOrElse(signatureDefs.values)
+      for (sigDef <- selected) {
         // extract input sign map
         extractSignatureDefinitions(InputPrefix, sigDef.getInputsMap)
         // extract output sign map
@@ -185,14 +198,17 @@ object ModelSignatureManager {
     *   model framework provider, i.e. TF1 or TF2, default TF1
     * @param model
     *   loaded SavedModelBundle
+    * @param signatureDefName
+    *   name of the signature definition the model is served with, all are merged if not given
     * @return
     *   the list ot matching signatures as tuples
     */
   def extractSignatures(
       model: SavedModelBundle,
-      saverDef: SaverDef): Option[Map[String, String]] = {
+      saverDef: SaverDef,
+      signatureDefName: Option[String] = None): Option[Map[String, String]] = {
 
-    val signatureCandidates = getSignaturesFromModel(model)
+    val signatureCandidates = getSignaturesFromModel(model, signatureDefName)
     val signDefNames: Map[String, String] =
       signatureCandidates.filterKeys(_.contains(ModelSignatureConstants.Name.key))
 
@@ -0,0 +1,100 @@
+/*
+ * Copyright 2017-2022 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.util
+
+import scala.reflect.ClassTag
+
+/** Groups sequences into inference batches.
+  *
+  * By default sequences are grouped in their original order. With a positive token budget, they
+  * are sorted by length so that sequences of similar length share a batch, and a batch is closed
+  * once padding all its sequences to the longest one would exceed the budget. This reduces the
+  * amount of padding transformers compute attention over. Results are always returned in the
+  * original order.
+  */
+object DynamicBatching {
+
+  /** Runs a prediction over batches of items and returns the results in the order of the items.
+    *
+    * @param items
+    *   Items to predict
+    * @param batchSize
+    *   Maximum number of items in a batch
+    * @param maxTokensPerBatch
+    *   Maximum of padded tokens (items in batch x longest item) per batch. Values lower than 1
+    *   disable length bucketing
+    * @param length
+    *   Number of tokens of an item
+    * @param predictBatch
+    *   Prediction for a batch, which must return exactly one result per item
+    * @return
+    *   One result per item, in the original order
+    */
+  def predict[T, R: ClassTag](items: Seq[T], batchSize: Int, maxTokensPerBatch: Int)(
+      length: T => Int)(predictBatch: Seq[T] => Seq[R]): Seq[R] = {
+    if (maxTokensPerBatch <= 0) {
+      items.grouped(batchSize).flatMap(predictBatch).toSeq
+    } else {
+      val indexedItems = items.toIndexedSeq
+      val results = new Array[R](indexedItems.length)
+      bucketIndices(indexedItems.map(length), batchSize, maxTokensPerBatch).foreach { indices =>
+        val batchResults = predictBatch(indices.map(indexedItems))
+        require(
+          batchResults.length == indices.length,
+          "Dynamic batching requires exactly one result per item")
+        indices.zip(batchResults).foreach { case (index, result) => results(index) = result }
+      }
+      results.toSeq
+    }
+  }
+
+  /** Groups item indices into batches of items of similar length.
+    *
+    * @param lengths
+    *   Number of tokens of each item
+    * @param batchSize
+    *   Maximum number of items in a batch
+    * @param maxTokensPerBatch
+    *   Maximum of padded tokens (items in batch x longest item) per batch. An item longer than
+    *   the budget gets a batch of its own
+    * @return
+    *   Batches of indices, sorted by length
+    */
+  def bucketIndices(
+      lengths: Seq[Int],
+      batchSize: Int,
+      maxTokensPerBatch: Int): Seq[Seq[Int]] = {
+    val sortedIndices = lengths.indices.sortBy(lengths)
+    val batches = Seq.newBuilder[Seq[Int]]
+    var currentBatch = Vector.empty[Int]
+
+    sortedIndices.foreach { index =>
+      // Sorted ascending, so the current item is the longest of the batch it joins
+      val paddedTokens = (currentBatch.length + 1).toLong * lengths(index)
+      if (currentBatch.nonEmpty &&
+        (currentBatch.length >= batchSize || paddedTokens > maxTokensPerBatch)) {
+        batches += currentBatch
+        currentBatch = Vector.empty[Int]
+      }
+      currentBatch = currentBatch :+ index
+    }
+    if (currentBatch.nonEmpty) batches += currentBatch
+
+    batches.result()
+  }
+
+}
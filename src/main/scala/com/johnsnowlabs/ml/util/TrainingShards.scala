@@ -0,0 +1,354 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.util
+
+import com.johnsnowlabs.util.FileHelper
+
+import java.io.{BufferedOutputStream, DataOutputStream, File, FileOutputStream, RandomAccessFile}
+import java.nio.ByteBuffer
+import java.nio.channels.FileChannel
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.StandardOpenOption
+import scala.util.Random
+
+/** Writes the records of [[TrainingShards]] and reads them back from a memory-mapped shard */
+trait ShardCodec[T] extends Serializable {
+
+  def write(record: T, output: DataOutputStream): Unit
+
+  /** Reads a record starting at the position of the buffer */
+  def read(input: ByteBuffer): T
+
+}
+
+object ShardCodec {
+
+  /** Writes floats as half precision floats, preceded by their number */
+  def writeHalfs(values: Array[Float], output: DataOutputStream): Unit = {
+    output.writeInt(values.length)
+    var i = 0
+    while (i < values.length) {
+      output.writeShort(toHalf(values(i)))
+      i += 1
+    }
+  }
+
+  /** Reads floats written by [[writeHalfs]], padded with zeros to at least `minLength` */
+  def readHalfs(input: ByteBuffer, minLength: Int = 0): Array[Float] = {
+    val length = input.getInt()
+    val values = new Array[Float](math.max(length, minLength))
+    var i = 0
+    while (i < length) {
+      values(i) = toFloat(input.getShort())
+      i += 1
+    }
+    values
+  }
+
+  /** Writes ints, preceded by their number */
+  def writeInts(values: Array[Int], output: DataOutputStream): Unit = {
+    output.writeInt(values.length)
+    var i = 0
+    while (i < values.length) {
+      output.writeInt(values(i))
+      i += 1
+    }
+  }
+
+  def readInts(input: ByteBuffer): Array[Int] = {
+    val values = new Array[Int](input.getInt())
+    var i = 0
+    while (i < values.length) {
+      values(i) = input.getInt()
+      i += 1
+    }
+    values
+  }
+
+  def writeString(value: String, output: DataOutputStream): Unit = {
+    val bytes = value.getBytes(UTF_8)
+    output.writeInt(bytes.length)
+    output.write(bytes)
+  }
+
+  def readString(input: ByteBuffer): String = {
+    val bytes = new Array[Byte](input.getInt())
+    input.get(bytes)
+    new String(bytes, UTF_8)
+  }
+
+  /** Converts a float to the bits of the nearest half precision float */
+  def toHalf(value: Float): Short = {
+    val bits = java.lang.Float.floatToIntBits(value)
+    val sign = (bits >>> 16) & 0x8000
+    val exponent = ((bits >>> 23) & 0xff) - 127 + 15
+    val mantissa = bits & 0x7fffff
+
+    val half =
+      if (exponent == 0xff - 127 + 15) // infinity or NaN
+        0x7c00 | (if (mantissa != 0) 0x200 else 0)
+      else if (exponent >= 0x1f) 0x7c00 // too large, rounded to infinity
+      else if (exponent <= 0) { // subnormal or zero
+        if (exponent < -10) 0
+        else roundShift(mantissa | 0x800000, 14 - exponent)
+      } else
+        // rounding may carry into the exponent, which is still the nearest half
+        roundShift((exponent << 23) | mantissa, 13)
+
+    (sign | half).toShort
+  }
+
+  /** Converts the bits of a half precision float to a float */
+  def toFloat(half: Short): Float = {
+    val sign = (half & 0x8000) << 16
+    val exponent = (half >>> 10) & 0x1f
+    val mantissa = half & 0x3ff
+
+    val bits =
+      if (exponent == 0x1f) sign | 0x7f800000 | (mantissa << 13)
+      else if (exponent != 0) sign | ((exponent + 127 - 15) << 23) | (mantissa << 13)
+      else if (mantissa == 0) sign
+      else {
+        // subnormal half, normal float
+        var normalized = mantissa
+        var floatExponent = 127 - 14
+        while ((normalized & 0x400) == 0) {
+          normalized <<= 1
+          floatExponent -= 1
+        }
+        sign | (floatExponent << 23) | ((normalized & 0x3ff) << 13)
+      }
+    java.lang.Float.intBitsToFloat(bits)
+  }
+
+  /** Shifts right, rounding half to even */
+  private def roundShift(value: Int, shift: Int): Int = {
+    val shifted = value >>> shift
+    val remainder = value & ((1 << shift) - 1)
+    val halfway = 1 << (shift - 1)
+    if (remainder > halfway || (remainder == halfway && (shifted & 1) == 1)) shifted + 1
+    else shifted
+  }
+
+}
+
+/** Training records spilled to local shard files, so that datasets larger than the memory of the
+  * driver can be iterated over on every epoch without collecting them or recomputing them with
+  * Spark.
+  *
+  * Records are written once by a [[ShardCodec]], which stores embeddings as half precision
+  * floats. Every shard ends with the offsets of its records, so a shard is read by memory mapping
+  * it and decoding its records in any order. Shards are visited in a random order and so are the
+  * records of each shard, which were spread over the shards randomly when written.
+  *
+  * @param folder
+  *   Local folder of the shards
+  * @param shards
+  *   Shard files
+  * @param count
+  *   Number of records
+  * @param codec
+  *   Codec the records were written with
+  */
+class TrainingShards[T] private (
+    val folder: File,
+    val shards: Seq[File],
+    val count: Long,
+    codec: ShardCodec[T]) {
+
+  /** Records in the order they are stored */
+  def iterator: Iterator[T] = shards.iterator.flatMap(shard => readShard(shard, None))
+
+  /** Records in a random order */
+  def iterator(random: Random): Iterator[T] =
+    random.shuffle(shards).iterator.flatMap(shard => readShard(shard, Some(random)))
+
+  /** Batches of records, shuffled with the global random generator if `shuffle` is set */
+  def batches(batchSize: Int, shuffle: Boolean = true): Iterator[Array[T]] = {
+    val records = if (shuffle) iterator(Random) else iterator
+    records.grouped(math.max(batchSize, 1)).map(_.toArray)
+  }
+
+  /** Deletes the shards */
+  def delete(): Unit = FileHelper.delete(folder.getPath)
+
+  private def readShard(shard: File, random: Option[Random]): Iterator[T] = {
+    val channel = FileChannel.open(shard.toPath, StandardOpenOption.READ)
+    val buffer =
+      try channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size())
+      finally channel.close()
+
+    val records = buffer.getInt(buffer.limit() - 4)
+    val offsetsStart = buffer.limit() - 4 - records * 4
+    val order = random match {
+      case Some(generator) => generator.shuffle((0 until records).toVector)
+      case None => 0 until records
+    }
+    order.iterator.map { record =>
+      val input = buffer.duplicate()
+      input.position(buffer.getInt(offsetsStart + record * 4))
+      codec.read(input)
+    }
+  }
+
+}
+
+object TrainingShards {
+
+  /** Default number of records of a shard */
+  val defaultShardSize = 10000
+
+  // Shards are memory mapped as a whole, so they must stay well under 2GB
+  private val maxShardBytes = 1 << 30
+
+  // Records are spread randomly over this many shards being written
+  private val openShards = 8
+
+  private val shardPrefix = "shard-"
+
+  /** Writes records into shards, reading them once.
+    *
+    * @param records
+    *   Records to write
+    * @param folder
+    *   Local folder of the shards, created if needed
+    * @param codec
+    *   Codec of the records
+    * @param shardSize
+    *   Maximum number of records of a shard
+    * @param random
+    *   Random generator spreading the records over the shards
+    */
+  def write[T](
+      records: Iterator[T],
+      folder: File,
+      codec: ShardCodec[T],
+      shardSize: Int = defaultShardSize,
+      random: Random = Random): TrainingShards[T] = {
+    val writer = new Writer(folder, codec, shardSize, random)
+    records.foreach(writer.add)
+    writer.close()
+  }
+
+  /** Writes records into two sets of shards, each record being held out with a probability.
+    *
+    * @return
+    *   shards of the records that were kept and of the records that were held out, in the
+    *   `kept` and `heldOut` sub folders of `folder`
+    */
+  def split[T](
+      records: Iterator[T],
+      folder: File,
+      codec: ShardCodec[T],
+      holdout: Float,
+      shardSize: Int = defaultShardSize,
+      random: Random = Random): (TrainingShards[T], TrainingShards[T]) = {
+    val kept = new Writer(new File(folder, "kept"), codec, shardSize, random)
+    val heldOut = new Writer(new File(folder, "heldOut"), codec, shardSize, random)
+    records.foreach { record =>
+      if (random.nextFloat() < holdout) heldOut.add(record) else kept.add(record)
+    }
+    (kept.close(), heldOut.close())
+  }
+
+  /** Opens the shards written into `folder` by an earlier [[write]] or [[split]], e.g. by
+    * another run.
+    */
+  def open[T](folder: File, codec: ShardCodec[T]): TrainingShards[T] = {
+    val shards = Option(folder.listFiles())
+      .getOrElse(Array.empty[File])
+      .filter(_.getName.startsWith(shardPrefix))
+      .sortBy(_.getName)
+      .toSeq
+    new TrainingShards(folder, shards, shards.map(recordCount).sum, codec)
+  }
+
+  private def recordCount(shard: File): Long = {
+    val file = new RandomAccessFile(shard, "r")
+    try {
+      file.seek(file.length() - 4)
+      file.readInt()
+    } finally file.close()
+  }
+
+  private class Writer[T](folder: File, codec: ShardCodec[T], shardSize: Int, random: Random) {
+
+    require(shardSize > 0, "shardSize must be greater than 0")
+    folder.mkdirs()
+
+    private val written = Seq.newBuilder[File]
+    private var shardCount = 0
+    private var count = 0L
+    private val open = Array.fill(openShards)(newShard())
+
+    def add(record: T): Unit = {
+      val slot = random.nextInt(openShards)
+      val shard = open(slot)
+      shard.add(record)
+      count += 1
+      if (shard.records >= shardSize || shard.bytes >= maxShardBytes) {
+        shard.close()
+        written += shard.file
+        open(slot) = newShard()
+      }
+    }
+
+    def close(): TrainingShards[T] = {
+      open.foreach { shard =>
+        shard.close()
+        if (shard.records > 0) written += shard.file else shard.file.delete()
+      }
+      new TrainingShards(folder, written.result(), count, codec)
+    }
+
+    private def newShard(): ShardWriter = {
+      shardCount += 1
+      new ShardWriter(new File(folder, f"$shardPrefix$shardCount%05d"))
+    }
+
+    private class ShardWriter(val file: File) {
+
+      private val output =
+        new DataOutputStream(new BufferedOutputStream(new FileOutputStream(file), 1 << 16))
+      private var offsets = new Array[Int](64)
+
+      var records = 0
+
+      def bytes: Int = output.size()
+
+      def add(record: T): Unit = {
+        if (records == offsets.length) offsets = java.util.Arrays.copyOf(offsets, records * 2)
+        offsets(records) = output.size()
+        codec.write(record, output)
+        records += 1
+      }
+
+      def close(): Unit = {
+        var i = 0
+        while (i < records) {
+          output.writeInt(offsets(i))
+          i += 1
+        }
+        output.writeInt(records)
+        output.close()
+      }
+
+    }
+
+  }
+
+}
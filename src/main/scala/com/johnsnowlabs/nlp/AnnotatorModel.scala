@@ -65,6 +65,7 @@ abstract class AnnotatorModel[M <: Model[M]] extends RawAnnotator[M] with CanBeL
               }
             }))
         case withBatchAnnotate: HasBatchedAnnotate[M] =>
+          withBatchAnnotate.warnIfMaxTokensPerBatchIgnored()
           implicit val encoder: ExpressionEncoder[Row] =
             SparkNlpConfig.getEncoder(inputDataset, newStructType)
           val processedDataFrame = inputDataset.mapPartitions(partition => {
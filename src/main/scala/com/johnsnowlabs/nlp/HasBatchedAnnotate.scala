@@ -19,6 +19,7 @@ package com.johnsnowlabs.nlp
 import org.apache.spark.ml.Model
 import org.apache.spark.ml.param.IntParam
 import org.apache.spark.sql.Row
+import org.slf4j.LoggerFactory
 
 trait HasBatchedAnnotate[M <: Model[M]] {
 
@@ -46,6 +47,55 @@ trait HasBatchedAnnotate[M <: Model[M]] {
     */
   def getBatchSize: Int = $(batchSize)
 
+  /** Maximum number of padded tokens per batch, used by transformer based annotators to batch
+    * sentences of similar length together. When set to a positive value, sentences are sorted by
+    * their number of tokens and a batch is closed before its size times its longest sentence
+    * exceeds this budget. Annotations are still returned in their original order. Values lower
+    * than 1 disable it (Default: `0`).
+    *
+    * @group param
+    */
+  val maxTokensPerBatch = new IntParam(
+    this,
+    "maxTokensPerBatch",
+    "Maximum number of padded tokens per batch, batching sentences of similar length together")
+
+  setDefault(maxTokensPerBatch, 0)
+
+  /** Maximum number of padded tokens per batch. Values lower than 1 disable length bucketing.
+    *
+    * @group setParam
+    */
+  def setMaxTokensPerBatch(value: Int): this.type = {
+    set(this.maxTokensPerBatch, value)
+    warnIfMaxTokensPerBatchIgnored()
+    this
+  }
+
+  /** Maximum number of padded tokens per batch.
+    *
+    * @group getParam
+    */
+  def getMaxTokensPerBatch: Int = $(maxTokensPerBatch)
+
+  /** Whether this annotator batches its sentences by [[maxTokensPerBatch]]. Annotators that
+    * don't ignore it and warn when it is set.
+    */
+  protected def supportsMaxTokensPerBatch: Boolean = false
+
+  @transient private var warnedMaxTokensPerBatch = false
+
+  /** Warns once if [[maxTokensPerBatch]] is set on an annotator that ignores it */
+  private[nlp] def warnIfMaxTokensPerBatchIgnored(): Unit =
+    if (!supportsMaxTokensPerBatch && $(maxTokensPerBatch) > 0 && !warnedMaxTokensPerBatch) {
+      warnedMaxTokensPerBatch = true
+      LoggerFactory
+        .getLogger(getClass)
+        .warn(
+          s"maxTokensPerBatch is set on $uid, but ${getClass.getSimpleName} does not batch by" +
+            " tokens and only uses batchSize")
+    }
+
   def batchProcess(rows: Iterator[_]): Iterator[Row] = {
     val groupedRows = rows.grouped(getBatchSize)
 
@@ -62,7 +112,8 @@ trait HasBatchedAnnotate[M <: Model[M]] {
         row.getAs[Seq[Row]](inputCol).map(Annotation(_))
       })
     })
-    val outputAnnotations = batchAnnotate(inputAnnotations)
+    val outputAnnotations =
+      HasEngine.withOnnxSessionOptions(this)(batchAnnotate(inputAnnotations))
     batchedRows
       .zip(outputAnnotations)
       .map { case (row, annotations) =>
@@ -62,7 +62,8 @@ trait HasBatchedAnnotateAudio[M <: Model[M]] {
                   r.getMap[String, String](2)))
           })
         })
-        val outputAnnotations = batchAnnotate(inputAnnotations)
+        val outputAnnotations =
+          HasEngine.withOnnxSessionOptions(this)(batchAnnotate(inputAnnotations))
         batchedRows.zip(outputAnnotations).map { case (row, annotations) =>
           row.toSeq ++ Array(annotations.map(a => Row(a.productIterator.toSeq: _*)))
         }
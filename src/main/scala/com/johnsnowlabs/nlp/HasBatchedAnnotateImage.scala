@@ -68,7 +68,8 @@ trait HasBatchedAnnotateImage[M <: Model[M]] {
                   r.getMap[String, String](7)))
           })
         })
-        val outputAnnotations = batchAnnotate(inputAnnotations)
+        val outputAnnotations =
+          HasEngine.withOnnxSessionOptions(this)(batchAnnotate(inputAnnotations))
         batchedRows.zip(outputAnnotations).map { case (row, annotations) =>
           row.toSeq ++ Array(annotations.map(a => Row(a.productIterator.toSeq: _*)))
         }
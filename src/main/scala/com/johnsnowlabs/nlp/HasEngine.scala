@@ -16,8 +16,13 @@
 
 package com.johnsnowlabs.nlp
 
-import com.johnsnowlabs.ml.util.TensorFlow
+import com.johnsnowlabs.ml.onnx.OnnxSession
+import com.johnsnowlabs.ml.util.{ONNX, TensorFlow}
+import com.johnsnowlabs.nlp.serialization.MapFeature
 import org.apache.spark.ml.param.Param
+import org.slf4j.LoggerFactory
+
+import scala.collection.JavaConverters._
 
 trait HasEngine extends ParamsAndFeaturesWritable {
 
@@ -32,4 +37,45 @@ trait HasEngine extends ParamsAndFeaturesWritable {
   /** @group getParam */
   def getEngine: String = $(engine)
 
+  /** ONNX Runtime session options of this annotator, overriding the `spark.jsl.settings.onnx`
+    * configuration for the models it runs. Options are named without that prefix:
+    * `intraOpNumThreads`, `interOpNumThreads`, `executionMode`, `optimizationLevel`,
+    * `gpuDeviceId` and `sessionPoolSize`, the number of sessions per model and executor or `auto`
+    * for one per task slot, up to 8 (Default: empty, using the configuration). Each pooled session
+    * holds its own copy of the model in memory. They have no effect on models of other engines.
+    *
+    * @group param
+    */
+  val onnxSessionOptions: MapFeature[String, String] =
+    new MapFeature[String, String](this, "onnxSessionOptions")
+
+  /** @group setParam */
+  def setOnnxSessionOptions(value: Map[String, String]): this.type = {
+    if (value.nonEmpty && getEngine != ONNX.name)
+      LoggerFactory
+        .getLogger(getClass)
+        .warn(
+          s"onnxSessionOptions are set on $uid, but it runs a $getEngine model and ignores them")
+    set(onnxSessionOptions, OnnxSession.normalizeOptions(value))
+  }
+
+  // for Python access
+  /** @group setParam */
+  def setOnnxSessionOptions(value: java.util.HashMap[String, String]): this.type =
+    setOnnxSessionOptions(value.asScala.toMap)
+
+  /** @group getParam */
+  def getOnnxSessionOptions: Map[String, String] =
+    if (onnxSessionOptions.isSet) $$(onnxSessionOptions) else Map.empty
+
+}
+
+object HasEngine {
+
+  /** Runs a block with the ONNX session options of an annotator, if it has any */
+  def withOnnxSessionOptions[T](annotator: Any)(block: => T): T = annotator match {
+    case withEngine: HasEngine => OnnxSession.withOptions(withEngine.getOnnxSessionOptions)(block)
+    case _ => block
+  }
+
 }
@@ -17,6 +17,8 @@
 package com.johnsnowlabs.nlp
 
 import com.johnsnowlabs.nlp.annotators.cv.util.io.ImageIOUtils
+import com.johnsnowlabs.nlp.annotators.similarity.DocumentSimilarityRankerModel
+import com.johnsnowlabs.nlp.util.AnnotationPacker
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
 import org.apache.spark.ml.{PipelineModel, Transformer}
 import org.apache.spark.sql.{DataFrame, Dataset}
@@ -199,7 +201,9 @@ class LightPipeline(val pipelineModel: PipelineModel, parseEmbeddings: Boolean =
     // Benchmarks proved that parallel execution in LightPipeline gains more speed than batching entries (which require non parallel collections)
     annotations.updated(
       batchedAnnotator.getOutputCol,
-      batchedAnnotator.batchAnnotate(batchedAnnotations).head)
+      HasEngine.withOnnxSessionOptions(batchedAnnotator) {
+        batchedAnnotator.batchAnnotate(batchedAnnotations).head
+      })
   }
 
   private def processBatchedAnnotatorImage(
@@ -211,7 +215,9 @@ class LightPipeline(val pipelineModel: PipelineModel, parseEmbeddings: Boolean =
 
     annotations.updated(
       batchedAnnotatorImage.getOutputCol,
-      batchedAnnotatorImage.batchAnnotate(batchedAnnotations).head)
+      HasEngine.withOnnxSessionOptions(batchedAnnotatorImage) {
+        batchedAnnotatorImage.batchAnnotate(batchedAnnotations).head
+      })
   }
 
   private def processBatchedAnnotatorAudio(
@@ -223,7 +229,9 @@ class LightPipeline(val pipelineModel: PipelineModel, parseEmbeddings: Boolean =
 
     annotations.updated(
       batchedAnnotateAudio.getOutputCol,
-      batchedAnnotateAudio.batchAnnotate(batchedAnnotations).head)
+      HasEngine.withOnnxSessionOptions(batchedAnnotateAudio) {
+        batchedAnnotateAudio.batchAnnotate(batchedAnnotations).head
+      })
   }
 
   private def processAnnotator(
@@ -449,4 +457,69 @@ class LightPipeline(val pipelineModel: PipelineModel, parseEmbeddings: Boolean =
       .asJava
   }
 
+  /** Searches the documents a [[DocumentSimilarityRankerModel]] of the pipeline was trained on
+    * for the closest ones to a text, which is annotated up to the sentence embeddings the ranker
+    * takes. The ranker must have been trained with `buildSearchIndex`.
+    *
+    * @param target
+    *   Text to search the neighbours of
+    * @param k
+    *   Maximum number of neighbours to return
+    * @return
+    *   Indices and distances of the neighbours, sorted by distance
+    */
+  def search(target: String, k: Int): Array[(Int, Double)] = {
+    val ranker = getStages
+      .collectFirst { case ranker: DocumentSimilarityRankerModel => ranker }
+      .getOrElse(throw new IllegalArgumentException(
+        "This pipeline has no DocumentSimilarityRankerModel to search"))
+    val embeddings = fullAnnotate(target)
+      .getOrElse(ranker.getInputCols.head, Seq.empty)
+      .headOption
+      .map(_.asInstanceOf[Annotation].embeddings)
+      .getOrElse(throw new IllegalArgumentException(
+        s"No ${ranker.getInputCols.head} annotation was produced for the search target"))
+    ranker.search(embeddings, k)
+  }
+
+  /** Java compliant version of [[search]], returning pairs of index and distance */
+  def searchJava(target: String, k: Int): Array[Array[Double]] =
+    search(target, k).map { case (index, distance) => Array(index.toDouble, distance) }
+
+  /** Annotates all targets and packs the results into a single buffer, see [[AnnotationPacker]]
+    * for the layout. Used by python to avoid one gateway call per annotation field.
+    */
+  def fullAnnotatePackedJava(targets: java.util.ArrayList[String]): Array[Byte] = {
+    AnnotationPacker.packAnnotations(
+      fullAnnotate(targets.asScala.toArray).toSeq,
+      parseEmbeddings)
+  }
+
+  def fullAnnotatePackedJava(
+      targets: java.util.ArrayList[String],
+      optionalTargets: java.util.ArrayList[String]): Array[Byte] = {
+    AnnotationPacker.packAnnotations(
+      fullAnnotate(targets.asScala.toArray, optionalTargets.asScala.toArray).toSeq,
+      parseEmbeddings)
+  }
+
+  /** Annotates all targets and packs the results with the embeddings of each column laid out as a
+    * single contiguous matrix, so python can wrap them without copying. Embeddings are always
+    * included, regardless of parseEmbeddings.
+    */
+  def fullAnnotateEmbeddingsPackedJava(targets: java.util.ArrayList[String]): Array[Byte] = {
+    AnnotationPacker.packAnnotationsWithEmbeddings(fullAnnotate(targets.asScala.toArray).toSeq)
+  }
+
+  def annotatePackedJava(targets: java.util.ArrayList[String]): Array[Byte] = {
+    AnnotationPacker.packResults(annotate(targets.asScala.toArray).toSeq)
+  }
+
+  def annotatePackedJava(
+      targets: java.util.ArrayList[String],
+      optionalTargets: java.util.ArrayList[String]): Array[Byte] = {
+    AnnotationPacker.packResults(
+      annotate(targets.asScala.toArray, optionalTargets.asScala.toArray).toSeq)
+  }
+
 }
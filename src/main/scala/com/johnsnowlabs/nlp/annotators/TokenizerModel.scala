@@ -23,6 +23,8 @@ import com.johnsnowlabs.nlp.util.regex.RuleFactory
 import org.apache.spark.ml.param.{BooleanParam, IntParam, Param, StringArrayParam}
 import org.apache.spark.ml.util.Identifiable
 
+import java.util.concurrent.ConcurrentHashMap
+import java.util.regex.Pattern
 import scala.collection.mutable
 import scala.util.matching.Regex
 
@@ -56,6 +58,7 @@ class TokenizerModel(override val uid: String)
     extends AnnotatorModel[TokenizerModel]
     with HasSimpleAnnotate[TokenizerModel] {
 
+  import TokenizerModel.TokenCandidate
   import com.johnsnowlabs.nlp.AnnotatorType._
 
   /** rules
@@ -119,7 +122,21 @@ class TokenizerModel(override val uid: String)
     "splitPattern",
     "pattern to separate from the inside of tokens. takes priority over splitChars.")
 
-  setDefault(targetPattern -> "\\S+", caseSensitiveExceptions -> true)
+  /** Whether to find token candidates with a precompiled character scanner instead of regex
+    * replacements over each sentence. Both produce the same tokens (Default: `true`)
+    *
+    * @group param
+    */
+  val useCompiledScanner: BooleanParam = new BooleanParam(
+    this,
+    "useCompiledScanner",
+    "Whether to find token candidates with a precompiled character scanner instead of regex" +
+      " replacements over each sentence")
+
+  setDefault(
+    targetPattern -> "\\S+",
+    caseSensitiveExceptions -> true,
+    useCompiledScanner -> true)
 
   /** Output annotator type : TOKEN
     *
@@ -193,6 +210,20 @@ class TokenizerModel(override val uid: String)
     */
   def getCaseSensitiveExceptions(value: Boolean): Boolean = $(caseSensitiveExceptions)
 
+  /** Whether to find token candidates with a precompiled character scanner instead of regex
+    * replacements over each sentence (Default: `true`)
+    *
+    * @group setParam
+    */
+  def setUseCompiledScanner(value: Boolean): this.type = set(useCompiledScanner, value)
+
+  /** Whether to find token candidates with a precompiled character scanner instead of regex
+    * replacements over each sentence (Default: `true`)
+    *
+    * @group getParam
+    */
+  def getUseCompiledScanner: Boolean = $(useCompiledScanner)
+
   /** Set the minimum allowed length for each token
     *
     * @group setParam
@@ -259,6 +290,32 @@ class TokenizerModel(override val uid: String)
   private lazy val SPLIT_PATTERN: Regex =
     ("[^" + BREAK_CHAR + "]+").r
 
+  // Compiled split regexes with the source they were compiled from, recompiled once it changes
+  @transient private var splitPatternCache: (String, Pattern) = _
+  @transient private var splitCharsCache: (String, Pattern) = _
+
+  private def compiledSplitPattern: Pattern = {
+    val cached = splitPatternCache
+    val regex = $(splitPattern)
+    if (cached != null && cached._1 == regex) cached._2
+    else {
+      val compiled = Pattern.compile(regex)
+      splitPatternCache = (regex, compiled)
+      compiled
+    }
+  }
+
+  private def compiledSplitChars: Pattern = {
+    val cached = splitCharsCache
+    val regex = $(splitChars).mkString("|")
+    if (cached != null && cached._1 == regex) cached._2
+    else {
+      val compiled = Pattern.compile(regex)
+      splitCharsCache = (regex, compiled)
+      compiled
+    }
+  }
+
   private var compiledExceptions: Option[Regex] = None
 
   private def getOrCompileExceptionPattern(): Regex = compiledExceptions.getOrElse {
@@ -287,46 +344,23 @@ class TokenizerModel(override val uid: String)
     */
   def tag(sentences: Seq[Sentence]): Seq[TokenizedSentence] = {
     lazy val splitCharsExists = $(splitChars).map(_.last.toString)
-    sentences.map { text =>
-      /** Step 1, define breaks from non breaks */
-      val exceptionsDefined = get(exceptions).isDefined
-
-      var exceptionsWithoutBreak: Option[mutable.HashSet[String]] = None
-
-      val textContent = if (exceptionsDefined) {
-
-        /** If found, replace BREAK_PATTERN with PROTECT_CHAR, otherwise add to an exception list.
-          */
-        getOrCompileExceptionPattern().replaceAllIn(
-          text.content,
-          { m: Regex.Match =>
-            {
-              val breakReplaced = BREAK_PATTERN.replaceAllIn(m.matched, PROTECT_CHAR)
-              if (breakReplaced == m.matched)
-                exceptionsWithoutBreak.getOrElse({
-                  exceptionsWithoutBreak = Some(new mutable.HashSet[String])
-                  exceptionsWithoutBreak.get
-                }) += m.matched
-              breakReplaced
-            }
-          })
-      } else {
-        text.content
-      }
+    lazy val splitPatternRegex = compiledSplitPattern
+    lazy val splitCharsRegex = compiledSplitChars
+    val ruleFactory = $$(rules)
+    val exceptionsDefined = get(exceptions).isDefined
+    val minTokenLength = $(minLength)
+    val maxTokenLength = get(maxLength)
 
-      val protectedText = BREAK_PATTERN.replaceAllIn(textContent, BREAK_CHAR)
+    sentences.map { text =>
+      /** Steps 1 and 2, define breaks from non breaks and find token candidates */
+      val candidates =
+        if ($(useCompiledScanner) && !text.content.exists(_.isSurrogate))
+          scanCandidates(text.content, exceptionsDefined)
+        else regexCandidates(text.content, exceptionsDefined)
 
-      /** Step 2, Return protected tokens back into text and move on */
-      val tokens = SPLIT_PATTERN
-        .findAllMatchIn(protectedText)
+      val tokens = candidates
         .flatMap { candidate =>
-          /** If exceptions are defined, check for candidate whether PROTECT_CHAR present or in
-            * exception list.
-            */
-          if (exceptionsDefined &&
-            (candidate.matched.contains(PROTECT_CHAR) ||
-              (exceptionsWithoutBreak.isDefined && exceptionsWithoutBreak.get.contains(
-                candidate.matched)))) {
+          if (candidate.isProtected) {
 
             /** Put back character and move on */
             Seq(
@@ -339,16 +373,15 @@ class TokenizerModel(override val uid: String)
             /** Step 3, If no exception found, find candidates through the possible general rule
               * patterns
               */
-            val rr = $$(rules)
+            val rr = ruleFactory
               .findMatchFirstOnly(candidate.matched)
               .map { m =>
                 var curPos = m.content.start
                 (1 to m.content.groupCount)
                   .flatMap(i => {
                     val target = m.content.group(i)
-                    val applyPattern = isSet(splitPattern) && (target
-                      .split($(splitPattern))
-                      .length > 1)
+                    val applyPattern =
+                      isSet(splitPattern) && splitPatternRegex.split(target).length > 1
                     val applyChars = isSet(splitChars) && splitCharsExists.exists(target.contains)
 
                     def defaultCandidate = {
@@ -363,8 +396,8 @@ class TokenizerModel(override val uid: String)
                     if (target.nonEmpty && (applyPattern || applyChars)) {
                       try {
                         val strs =
-                          if (applyPattern) target.split($(splitPattern))
-                          else target.split($(splitChars).mkString("|"))
+                          if (applyPattern) splitPatternRegex.split(target)
+                          else splitCharsRegex.split(target)
                         strs.map { str =>
                           curPos = m.content.matched.indexOf(str, curPos)
                           val indexedToken = IndexedToken(
@@ -395,13 +428,120 @@ class TokenizerModel(override val uid: String)
           }
         }
         .filter(t =>
-          t.token.nonEmpty && t.token.length >= $(minLength) && get(maxLength).forall(m =>
+          t.token.nonEmpty && t.token.length >= minTokenLength && maxTokenLength.forall(m =>
             t.token.length <= m))
         .toArray
       TokenizedSentence(tokens, text.index)
     }
   }
 
+  /** Finds token candidates with regex replacements: breaks inside exceptions are replaced with
+    * PROTECT_CHAR, remaining breaks with BREAK_CHAR, and candidates are whatever is left in
+    * between.
+    */
+  private def regexCandidates(
+      content: String,
+      exceptionsDefined: Boolean): Iterator[TokenCandidate] = {
+    var exceptionsWithoutBreak: Option[mutable.HashSet[String]] = None
+
+    val textContent = if (exceptionsDefined) {
+
+      /** If found, replace BREAK_PATTERN with PROTECT_CHAR, otherwise add to an exception list.
+        */
+      getOrCompileExceptionPattern().replaceAllIn(
+        content,
+        { m: Regex.Match =>
+          {
+            val breakReplaced = BREAK_PATTERN.replaceAllIn(m.matched, PROTECT_CHAR)
+            if (breakReplaced == m.matched)
+              exceptionsWithoutBreak.getOrElse({
+                exceptionsWithoutBreak = Some(new mutable.HashSet[String])
+                exceptionsWithoutBreak.get
+              }) += m.matched
+            breakReplaced
+          }
+        })
+    } else {
+      content
+    }
+
+    val protectedText = BREAK_PATTERN.replaceAllIn(textContent, BREAK_CHAR)
+
+    SPLIT_PATTERN.findAllMatchIn(protectedText).map { candidate =>
+      /** If exceptions are defined, check for candidate whether PROTECT_CHAR present or in
+        * exception list.
+        */
+      val isProtected = exceptionsDefined &&
+        (candidate.matched.contains(PROTECT_CHAR) ||
+          (exceptionsWithoutBreak.isDefined && exceptionsWithoutBreak.get.contains(
+            candidate.matched)))
+      TokenCandidate(candidate.matched, candidate.start, candidate.end, isProtected)
+    }
+  }
+
+  /** Finds the same token candidates as [[regexCandidates]] in a single pass over the characters
+    * of a sentence, using a precomputed table of the characters BREAK_PATTERN matches. Only the
+    * exceptions, if any, still go through a regex.
+    *
+    * The table covers single UTF-16 chars, so sentences with surrogate pairs must use
+    * [[regexCandidates]] instead.
+    */
+  private def scanCandidates(
+      content: String,
+      exceptionsDefined: Boolean): Iterator[TokenCandidate] = {
+    val breaks = TokenizerModel.breakTable(BREAK_PATTERN)
+    val protectChar = PROTECT_CHAR.charAt(0)
+    val breakChar = BREAK_CHAR.charAt(0)
+    val chars = content.toCharArray
+    var exceptionsWithoutBreak: Option[mutable.HashSet[String]] = None
+
+    if (exceptionsDefined) {
+      val matcher = getOrCompileExceptionPattern().pattern.matcher(content)
+      while (matcher.find()) {
+        var protectedBreak = false
+        var i = matcher.start()
+        while (i < matcher.end()) {
+          if (breaks(chars(i))) {
+            chars(i) = protectChar
+            protectedBreak = true
+          }
+          i += 1
+        }
+        if (!protectedBreak)
+          exceptionsWithoutBreak.getOrElse({
+            exceptionsWithoutBreak = Some(new mutable.HashSet[String])
+            exceptionsWithoutBreak.get
+          }) += matcher.group()
+      }
+    }
+
+    val candidates = mutable.ArrayBuffer.empty[TokenCandidate]
+    var start = -1
+    var hasProtectChar = false
+    var i = 0
+    while (i <= chars.length) {
+      val isBreak = i == chars.length || breaks(chars(i)) || chars(i) == breakChar
+      if (isBreak) {
+        if (start != -1) {
+          val matched = content.substring(start, i)
+          val isProtected = exceptionsDefined &&
+            (hasProtectChar ||
+              (exceptionsWithoutBreak.isDefined && exceptionsWithoutBreak.get.contains(matched)))
+          candidates += TokenCandidate(matched, start, i, isProtected)
+          start = -1
+        }
+      } else {
+        if (start == -1) {
+          start = i
+          hasProtectChar = false
+        }
+        if (chars(i) == protectChar) hasProtectChar = true
+      }
+      i += 1
+    }
+    candidates.iterator
+  }
+
   /** one to many annotation */
   override def annotate(annotations: Seq[Annotation]): Seq[Annotation] = {
     val sentences = SentenceSplit.unpack(annotations)
@@ -430,4 +570,34 @@ trait ReadablePretrainedTokenizer
 /** This is the companion object of [[TokenizerModel]]. Please refer to that class for the
   * documentation.
   */
-object TokenizerModel extends ReadablePretrainedTokenizer
+object TokenizerModel extends ReadablePretrainedTokenizer {
+
+  /** Token candidate of a sentence, before rules are applied
+    *
+    * @param matched
+    *   Text of the candidate
+    * @param start
+    *   Index of the first character of the candidate in the sentence
+    * @param end
+    *   Index after the last character of the candidate in the sentence
+    * @param isProtected
+    *   Whether the candidate is an exception, which rules must not split
+    */
+  private[annotators] case class TokenCandidate(
+      matched: String,
+      start: Int,
+      end: Int,
+      isProtected: Boolean)
+
+  private val breakTables = new ConcurrentHashMap[String, Array[Boolean]]()
+
+  /** Whether each UTF-16 char is matched by a break pattern, computed once per JVM */
+  private[annotators] def breakTable(breakPattern: Regex): Array[Boolean] =
+    breakTables.computeIfAbsent(
+      breakPattern.regex,
+      _ => {
+        val matcher = breakPattern.pattern.matcher("")
+        Array.tabulate(Char.MaxValue + 1)(char => matcher.reset(char.toChar.toString).matches())
+      })
+
+}
@@ -290,6 +290,8 @@ class BertForSequenceClassification(override val uid: String)
     caseSensitive -> true,
     coalesceSentences -> false)
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -313,7 +315,8 @@ class BertForSequenceClassification(override val uid: String)
           $(caseSensitive),
           $(coalesceSentences),
           $$(labels),
-          $(activation))
+          $(activation),
+          $(maxTokensPerBatch))
 
       } else {
         Seq.empty[Annotation]
@@ -250,6 +250,8 @@ class CamemBertForTokenClassification(override val uid: String)
 
   setDefault(batchSize -> 8, maxSentenceLength -> 128, caseSensitive -> true)
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -271,7 +273,8 @@ class CamemBertForTokenClassification(override val uid: String)
         $(batchSize),
         $(maxSentenceLength),
         $(caseSensitive),
-        $$(labels))
+        $$(labels),
+        $(maxTokensPerBatch))
     })
     else {
       Seq(Seq.empty[Annotation])
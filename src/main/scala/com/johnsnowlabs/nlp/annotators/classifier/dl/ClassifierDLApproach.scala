@@ -17,8 +17,10 @@
 package com.johnsnowlabs.nlp.annotators.classifier.dl
 
 import com.johnsnowlabs.ml.tensorflow._
+import com.johnsnowlabs.ml.util.TrainingShards
 import com.johnsnowlabs.nlp.AnnotatorType.{CATEGORY, SENTENCE_EMBEDDINGS}
 import com.johnsnowlabs.nlp.annotators.ner.Verbose
+import com.johnsnowlabs.nlp.annotators.param.TrainingShardsParams
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
 import com.johnsnowlabs.nlp.{AnnotatorApproach, AnnotatorType, ParamsAndFeaturesWritable}
 import com.johnsnowlabs.storage.HasStorageRef
@@ -28,6 +30,7 @@ import org.apache.spark.ml.util.{DefaultParamsReadable, Identifiable}
 import org.apache.spark.sql.Dataset
 import org.apache.spark.sql.types._
 
+import java.io.File
 import scala.util.Random
 
 /** Trains a ClassifierDL for generic Multi-class Text Classification.
@@ -77,6 +80,10 @@ import scala.util.Random
   *   .setTestDataset("test_data")
   * }}}
   *
+  * Training sets too large to be collected to the driver can be spilled to local shards with
+  * `setSpillTrainingData(true)`. Sentence embeddings are then encoded once, stored as half
+  * precision floats and read from the shards in a new random order on every epoch.
+  *
   * For extended examples of usage, see the Examples
   * [[https://github.com/JohnSnowLabs/spark-nlp/blob/master/examples/scala/training/Train%20Multi-Class%20Text%20Classification%20on%20News%20Articles.scala [1]]]
   * [[https://github.com/JohnSnowLabs/spark-nlp/blob/master/examples/python/training/english/classification/ClassifierDL_Train_multi_class_news_category_classifier.ipynb [2]]]
@@ -153,7 +160,8 @@ import scala.util.Random
 class ClassifierDLApproach(override val uid: String)
     extends AnnotatorApproach[ClassifierDLModel]
     with ParamsAndFeaturesWritable
-    with ClassifierEncoder {
+    with ClassifierEncoder
+    with TrainingShardsParams {
 
   def this() = this(Identifiable.randomUID("ClassifierDL"))
 
@@ -205,51 +213,84 @@ class ClassifierDLApproach(override val uid: String)
     val (trainDataset, trainLabels) = buildDatasetWithLabels(dataset, getInputCols(0))
     val settings = ClassifierDatasetEncoderParams(tags = trainLabels)
     val encoder = new ClassifierDatasetEncoder(settings)
-    val trainInputs = extractInputs(encoder, trainDataset)
 
-    var testEncoder: Option[ClassifierDatasetEncoder] = None
-    val testInputs =
+    val test =
       if (!isDefined(testDataset)) None
       else {
         val testDataFrame = ResourceHelper.readSparkDataFrame($(testDataset))
         val (test, testLabels) = buildDatasetWithLabels(testDataFrame, getInputCols(0))
         val settings = ClassifierDatasetEncoderParams(tags = testLabels)
-        testEncoder = Some(new ClassifierDatasetEncoder(settings))
-        Option(extractInputs(testEncoder.get, test))
+        Some((test, new ClassifierDatasetEncoder(settings)))
       }
+    val testEncoder = test.map(_._2)
 
     val tfWrapper: TensorflowWrapper = loadSavedModel()
 
-    val classifier =
-      try {
-        val model = new TensorflowClassifier(
-          tensorflow = tfWrapper,
-          encoder,
-          testEncoder,
-          Verbose($(verbose)))
-        if (isDefined(randomSeed)) {
-          Random.setSeed($(randomSeed))
-        }
+    val classifier = withShardsFolder { shardsFolder =>
+      val model = new TensorflowClassifier(
+        tensorflow = tfWrapper,
+        encoder,
+        testEncoder,
+        Verbose($(verbose)))
+      if (isDefined(randomSeed)) {
+        Random.setSeed($(randomSeed))
+      }
+
+      shardsFolder match {
+        case Some(folder) =>
+          checkEmbeddingsDim(encoder, trainDataset)
+          val (trainSet, validationSet) = TrainingShards.split(
+            encoder.streamTrainingInstances(trainDataset, getLabelColumn),
+            new File(folder, "train"),
+            encoder.trainingShardCodec,
+            holdout = $(validationSplit),
+            shardSize = $(shardSize))
+          val testSet = test.map { case (testDataFrame, testEncoder) =>
+            TrainingShards.write(
+              testEncoder.streamTrainingInstances(testDataFrame, getLabelColumn),
+              new File(folder, "test"),
+              testEncoder.trainingShardCodec,
+              shardSize = $(shardSize))
+          }
+
+          model.trainFromShards(
+            trainSet,
+            Some(validationSet),
+            testSet,
+            trainLabels.length,
+            lr = $(lr),
+            batchSize = $(batchSize),
+            dropout = $(dropout),
+            endEpoch = $(maxEpochs),
+            configProtoBytes = getConfigProtoBytes,
+            validationSplit = $(validationSplit),
+            evaluationLogExtended = $(evaluationLogExtended),
+            enableOutputLogs = $(enableOutputLogs),
+            outputLogsPath = $(outputLogsPath),
+            uuid = this.uid)
+        case None =>
+          val trainInputs = extractInputs(encoder, trainDataset)
+          val testInputs = test.map { case (testDataFrame, testEncoder) =>
+            extractInputs(testEncoder, testDataFrame)
+          }
 
-        model.train(
-          trainInputs,
-          testInputs,
-          trainLabels.length,
-          lr = $(lr),
-          batchSize = $(batchSize),
-          dropout = $(dropout),
-          endEpoch = $(maxEpochs),
-          configProtoBytes = getConfigProtoBytes,
-          validationSplit = $(validationSplit),
-          evaluationLogExtended = $(evaluationLogExtended),
-          enableOutputLogs = $(enableOutputLogs),
-          outputLogsPath = $(outputLogsPath),
-          uuid = this.uid)
-        model
-      } catch {
-        case e: Exception =>
-          throw e
+          model.train(
+            trainInputs,
+            testInputs,
+            trainLabels.length,
+            lr = $(lr),
+            batchSize = $(batchSize),
+            dropout = $(dropout),
+            endEpoch = $(maxEpochs),
+            configProtoBytes = getConfigProtoBytes,
+            validationSplit = $(validationSplit),
+            evaluationLogExtended = $(evaluationLogExtended),
+            enableOutputLogs = $(enableOutputLogs),
+            outputLogsPath = $(outputLogsPath),
+            uuid = this.uid)
       }
+      model
+    }
 
     val newWrapper = new TensorflowWrapper(
       TensorflowWrapper.extractVariablesSavedModel(
@@ -159,12 +159,7 @@ trait ClassifierEncoder extends EvaluationDLParams {
       encoder: ClassifierDatasetEncoder,
       dataframe: DataFrame): (Array[Array[Float]], Array[String]) = {
 
-    val embeddingsDim = encoder.calculateEmbeddingsDim(dataframe)
-    val myClassName = this.getClass.getName.split("\\.").last
-    require(
-      embeddingsDim <= 1024,
-      s"The $myClassName only accepts embeddings less than 1024 dimensions. Current dimension is $embeddingsDim. Please use embeddings" +
-        s" with less than ")
+    checkEmbeddingsDim(encoder, dataframe)
 
     val dataset = encoder.collectTrainingInstances(dataframe, getLabelColumn)
     val inputEmbeddings = encoder.extractSentenceEmbeddings(dataset)
@@ -173,4 +168,15 @@ trait ClassifierEncoder extends EvaluationDLParams {
     (inputEmbeddings, inputLabels)
   }
 
+  protected def checkEmbeddingsDim(
+      encoder: ClassifierDatasetEncoder,
+      dataframe: DataFrame): Unit = {
+    val embeddingsDim = encoder.calculateEmbeddingsDim(dataframe)
+    val myClassName = this.getClass.getName.split("\\.").last
+    require(
+      embeddingsDim <= 1024,
+      s"The $myClassName only accepts embeddings less than 1024 dimensions. Current dimension is $embeddingsDim. Please use embeddings" +
+        s" with less than ")
+  }
+
 }
@@ -302,6 +302,8 @@ class LongformerForSequenceClassification(override val uid: String)
     caseSensitive -> true,
     coalesceSentences -> false)
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -325,7 +327,8 @@ class LongformerForSequenceClassification(override val uid: String)
           $(caseSensitive),
           $(coalesceSentences),
           $$(labels),
-          $(activation))
+          $(activation),
+          $(maxTokensPerBatch))
       } else {
         Seq.empty[Annotation]
       }
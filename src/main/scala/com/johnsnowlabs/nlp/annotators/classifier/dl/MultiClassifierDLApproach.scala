@@ -17,8 +17,10 @@
 package com.johnsnowlabs.nlp.annotators.classifier.dl
 
 import com.johnsnowlabs.ml.tensorflow._
+import com.johnsnowlabs.ml.util.TrainingShards
 import com.johnsnowlabs.nlp.AnnotatorType.{CATEGORY, SENTENCE_EMBEDDINGS}
 import com.johnsnowlabs.nlp.annotators.ner.Verbose
+import com.johnsnowlabs.nlp.annotators.param.TrainingShardsParams
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
 import com.johnsnowlabs.nlp.{AnnotatorApproach, ParamsAndFeaturesWritable}
 import com.johnsnowlabs.storage.HasStorageRef
@@ -29,6 +31,7 @@ import org.apache.spark.sql.functions.explode
 import org.apache.spark.sql.types.{ArrayType, StringType}
 import org.apache.spark.sql.{DataFrame, Dataset}
 
+import java.io.File
 import scala.util.Random
 
 /** Trains a MultiClassifierDL for Multi-label Text Classification.
@@ -90,6 +93,10 @@ import scala.util.Random
   *   .setTestDataset("test_data")
   * }}}
   *
+  * Training sets too large to be collected to the driver can be spilled to local shards with
+  * `setSpillTrainingData(true)`. Sentence embeddings are then encoded once, stored as half
+  * precision floats and read from the shards on every epoch.
+  *
   * For extended examples of usage, see the
   * [[https://github.com/JohnSnowLabs/spark-nlp/blob/master/examples/python/training/english/classification/MultiClassifierDL_train_multi_label_E2E_challenge_classifier.ipynb Examples]]
   * and the
@@ -191,7 +198,8 @@ import scala.util.Random
 class MultiClassifierDLApproach(override val uid: String)
     extends AnnotatorApproach[MultiClassifierDLModel]
     with ParamsAndFeaturesWritable
-    with ClassifierEncoder {
+    with ClassifierEncoder
+    with TrainingShardsParams {
 
   def this() = this(Identifiable.randomUID("MultiClassifierDLApproach"))
 
@@ -274,53 +282,86 @@ class MultiClassifierDLApproach(override val uid: String)
     val (trainDataset, trainLabels) = buildDatasetWithLabels(dataset, getInputCols(0))
     val settings = ClassifierDatasetEncoderParams(tags = trainLabels)
     val encoder = new ClassifierDatasetEncoder(settings)
-    val trainInputs = extractInputsMultilabel(encoder, trainDataset)
 
-    var testEncoder: Option[ClassifierDatasetEncoder] = None
-    val testInputs =
+    val test =
       if (!isDefined(testDataset)) None
       else {
         val testDataFrame = ResourceHelper.readSparkDataFrame($(testDataset))
         val (test, testLabels) = buildDatasetWithLabels(testDataFrame, getInputCols(0))
 
         val settings = ClassifierDatasetEncoderParams(tags = testLabels)
-        testEncoder = Some(new ClassifierDatasetEncoder(settings))
-        Option(extractInputsMultilabel(testEncoder.get, test))
+        Some((test, new ClassifierDatasetEncoder(settings)))
       }
+    val testEncoder = test.map(_._2)
 
     val tfWrapper: TensorflowWrapper = loadSavedModel()
 
-    val classifier =
-      try {
-        val model =
-          new TensorflowMultiClassifier(
-            tensorflow = tfWrapper,
-            encoder,
-            testEncoder,
-            Verbose($(verbose)))
-        if (isDefined(randomSeed)) {
-          Random.setSeed($(randomSeed))
-        }
-
-        model.train(
-          trainInputs,
-          testInputs,
-          trainLabels.length,
-          lr = $(lr),
-          batchSize = $(batchSize),
-          endEpoch = $(maxEpochs),
-          configProtoBytes = getConfigProtoBytes,
-          validationSplit = $(validationSplit),
-          evaluationLogExtended = $(evaluationLogExtended),
-          enableOutputLogs = $(enableOutputLogs),
-          outputLogsPath = $(outputLogsPath),
-          shuffleEpoch = $(shufflePerEpoch),
-          uuid = this.uid)
-        model
-      } catch {
-        case e: Exception =>
-          throw e
+    val classifier = withShardsFolder { shardsFolder =>
+      val model =
+        new TensorflowMultiClassifier(
+          tensorflow = tfWrapper,
+          encoder,
+          testEncoder,
+          Verbose($(verbose)))
+      if (isDefined(randomSeed)) {
+        Random.setSeed($(randomSeed))
+      }
+
+      shardsFolder match {
+        case Some(folder) =>
+          checkMultiLabelEmbeddingsDim(encoder, trainDataset)
+          val (trainSet, validationSet) = TrainingShards.split(
+            encoder.streamTrainingInstancesMultiLabel(trainDataset, getLabelColumn),
+            new File(folder, "train"),
+            encoder.trainingShardCodecMultiLabel,
+            holdout = $(validationSplit),
+            shardSize = $(shardSize))
+          val testSet = test.map { case (testDataFrame, testEncoder) =>
+            TrainingShards.write(
+              testEncoder.streamTrainingInstancesMultiLabel(testDataFrame, getLabelColumn),
+              new File(folder, "test"),
+              testEncoder.trainingShardCodecMultiLabel,
+              shardSize = $(shardSize))
+          }
+
+          model.trainFromShards(
+            trainSet,
+            Some(validationSet),
+            testSet,
+            trainLabels.length,
+            lr = $(lr),
+            batchSize = $(batchSize),
+            endEpoch = $(maxEpochs),
+            configProtoBytes = getConfigProtoBytes,
+            validationSplit = $(validationSplit),
+            evaluationLogExtended = $(evaluationLogExtended),
+            enableOutputLogs = $(enableOutputLogs),
+            outputLogsPath = $(outputLogsPath),
+            shuffleEpoch = $(shufflePerEpoch),
+            uuid = this.uid)
+        case None =>
+          val trainInputs = extractInputsMultilabel(encoder, trainDataset)
+          val testInputs = test.map { case (testDataFrame, testEncoder) =>
+            extractInputsMultilabel(testEncoder, testDataFrame)
+          }
+
+          model.train(
+            trainInputs,
+            testInputs,
+            trainLabels.length,
+            lr = $(lr),
+            batchSize = $(batchSize),
+            endEpoch = $(maxEpochs),
+            configProtoBytes = getConfigProtoBytes,
+            validationSplit = $(validationSplit),
+            evaluationLogExtended = $(evaluationLogExtended),
+            enableOutputLogs = $(enableOutputLogs),
+            outputLogsPath = $(outputLogsPath),
+            shuffleEpoch = $(shufflePerEpoch),
+            uuid = this.uid)
       }
+      model
+    }
 
     val newWrapper = new TensorflowWrapper(
       TensorflowWrapper.extractVariablesSavedModel(
@@ -367,11 +408,7 @@ class MultiClassifierDLApproach(override val uid: String)
       encoder: ClassifierDatasetEncoder,
       dataset: DataFrame): (Array[Array[Array[Float]]], Array[Array[String]]) = {
 
-    val embeddingsDim = encoder.calculateEmbeddingsDim(dataset)
-    require(
-      embeddingsDim > 1 && embeddingsDim <= 1024,
-      s"The MultiClassifierDL only accepts embeddings larger than 1 and less than 1024 dimensions. Current dimension is ${embeddingsDim}. Please use embeddings" +
-        s" with at max 1024 dimensions")
+    checkMultiLabelEmbeddingsDim(encoder, dataset)
 
     val trainSet = encoder.collectTrainingInstancesMultiLabel(dataset, getLabelColumn)
     val inputEmbeddings = encoder.extractSentenceEmbeddingsMultiLabel(trainSet)
@@ -380,6 +417,16 @@ class MultiClassifierDLApproach(override val uid: String)
     (inputEmbeddings, inputLabels)
   }
 
+  private def checkMultiLabelEmbeddingsDim(
+      encoder: ClassifierDatasetEncoder,
+      dataset: DataFrame): Unit = {
+    val embeddingsDim = encoder.calculateEmbeddingsDim(dataset)
+    require(
+      embeddingsDim > 1 && embeddingsDim <= 1024,
+      s"The MultiClassifierDL only accepts embeddings larger than 1 and less than 1024 dimensions. Current dimension is ${embeddingsDim}. Please use embeddings" +
+        s" with at max 1024 dimensions")
+  }
+
   def loadSavedModel(): TensorflowWrapper = {
 
     val wrapper =
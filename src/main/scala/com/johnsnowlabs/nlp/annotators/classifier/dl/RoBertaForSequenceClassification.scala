@@ -17,7 +17,7 @@
 package com.johnsnowlabs.nlp.annotators.classifier.dl
 
 import com.johnsnowlabs.ml.ai.RoBertaClassification
-import com.johnsnowlabs.ml.onnx.{OnnxWrapper, ReadOnnxModel, WriteOnnxModel}
+import com.johnsnowlabs.ml.onnx.{OnnxQuantization, OnnxWrapper, ReadOnnxModel, WriteOnnxModel}
 import com.johnsnowlabs.ml.tensorflow._
 import com.johnsnowlabs.ml.util.LoadExternalModel.{
   loadTextAsset,
@@ -303,6 +303,8 @@ class RoBertaForSequenceClassification(override val uid: String)
     caseSensitive -> true,
     coalesceSentences -> false)
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -326,7 +328,8 @@ class RoBertaForSequenceClassification(override val uid: String)
           $(caseSensitive),
           $(coalesceSentences),
           $$(labels),
-          $(activation))
+          $(activation),
+          $(maxTokensPerBatch))
       } else {
         Seq.empty[Annotation]
       }
@@ -411,8 +414,23 @@ trait ReadRoBertaForSequenceDLModel extends ReadTensorflowModel with ReadOnnxMod
 
   addReader(readModel)
 
-  def loadSavedModel(modelPath: String, spark: SparkSession): RoBertaForSequenceClassification = {
+  def loadSavedModel(modelPath: String, spark: SparkSession): RoBertaForSequenceClassification =
+    loadSavedModel(modelPath, spark, OnnxQuantization.NONE)
+
+  /** Loads an exported model, quantizing its graph if it is an ONNX model.
+    *
+    * @param quantization
+    *   Quantization of the ONNX graph, one of `none` or `dynamic_int8`. The quantized graph is
+    *   the one saved with the model.
+    */
+  def loadSavedModel(
+      modelPath: String,
+      spark: SparkSession,
+      quantization: String): RoBertaForSequenceClassification = {
     val (localModelPath, detectedEngine) = modelSanityCheck(modelPath)
+    require(
+      quantization == OnnxQuantization.NONE || detectedEngine == ONNX.name,
+      s"Only ONNX models can be quantized, this model uses $detectedEngine")
 
     val vocabs = loadTextAsset(localModelPath, "vocab.txt").zipWithIndex.toMap
     val bytePairs = loadTextAsset(localModelPath, "merges.txt")
@@ -447,7 +465,11 @@ trait ReadRoBertaForSequenceDLModel extends ReadTensorflowModel with ReadOnnxMod
           .setSignatures(_signatures)
           .setModelIfNotSet(spark, Some(tfWrapper), None)
       case ONNX.name =>
-        val onnxWrapper = OnnxWrapper.read(localModelPath, zipped = false, useBundle = true)
+        val onnxWrapper = OnnxWrapper.read(
+          localModelPath,
+          zipped = false,
+          useBundle = true,
+          quantization = quantization)
         annotatorModel
           .setModelIfNotSet(spark, None, Some(onnxWrapper))
 
@@ -18,7 +18,9 @@ package com.johnsnowlabs.nlp.annotators.er
 import com.johnsnowlabs.nlp.Annotation
 import com.johnsnowlabs.nlp.AnnotatorType.CHUNK
 import com.johnsnowlabs.nlp.annotators.common.Sentence
+import com.johnsnowlabs.nlp.annotators.er.AhoCorasickAutomaton.KeywordTrie
 
+import scala.collection.mutable
 import scala.collection.mutable.ArrayBuffer
 
 /** Aho-Corasick Algorithm: https://dl.acm.org/doi/10.1145/360825.360855 A simple, efficient
@@ -27,6 +29,26 @@ import scala.collection.mutable.ArrayBuffer
   * keywords and then using the pattern matching machine to process the text string in a single
   * pass. The complexity of constructing a pattern matching machine and searching the text is
   * linear to the total length of given patterns and the length of a text, respectively.
+  *
+  * The machine is stored in a few flat primitive arrays, so its size grows with the number of
+  * trie edges rather than with the number of states times the size of the alphabet:
+  *   - `edges`: the transitions of every state, sorted by state and then by character, each one
+  *     packed as `character << 32 | target state`
+  *   - `edgeOffsets`: the first edge of each state, with one extra entry for the end
+  *   - `failureLinks`: the state of the longest proper suffix of each state that is also a state
+  *   - `outputs`: the entity of each state that ends a keyword, or -1
+  *
+  * Transitions of a state are found with a binary search, failure links are computed once when
+  * the machine is built, and searching never mutates it, so one instance can be broadcast and
+  * shared by every task of an executor. Characters of a text that are not part of any keyword
+  * simply do not match.
+  *
+  * @param alphabet
+  *   Characters keywords can be made of
+  * @param patterns
+  *   Entities and their keywords
+  * @param caseSensitive
+  *   Whether to match keywords case sensitively
   */
 class AhoCorasickAutomaton(
     var alphabet: String,
@@ -35,73 +57,33 @@ class AhoCorasickAutomaton(
     extends Serializable {
 
   alphabet = if (alphabet.contains(" ")) alphabet else alphabet + " "
-  private val flattenEntityPatterns: Array[FlattenEntityPattern] = patterns.flatMap {
-    entityPattern =>
-      entityPattern.patterns.map { pattern =>
-        val keyword = if (caseSensitive) pattern else pattern.toLowerCase
-        FlattenEntityPattern(entityPattern.label, keyword, entityPattern.id)
-      }
-  }
-
-  private val ALPHABET_SIZE = alphabet.length
-  private val MAX_NODES = flattenEntityPatterns.map(value => value.keyword.length).sum + 1
-
-  var nodes: Array[Option[Node]] = Array.fill(MAX_NODES)(None)
-  var nodeCount: Int = 1
-
-  class Node extends Serializable {
 
-    var parentState: Int = -1
-    var charFromParent: Option[Char] = None
-    var suffixLink: Int = -1
-    var children: Array[Int] = Array.fill(ALPHABET_SIZE)(-1)
-    var transitions: Array[Int] =
-      Array.fill(ALPHABET_SIZE)(-1) // Transition Table aka Goto function
-    var isLeaf: Boolean = false
-    var entity: String = ""
-    var id: String = ""
-  }
-
-  private val edges: Map[Char, Int] = alphabet.toCharArray.zipWithIndex.map {
-    case (char, index) => (char, index)
-  }.toMap
-
-  initializeTrie()
+  private val trie: KeywordTrie =
+    AhoCorasickAutomaton.buildTrie(alphabet, patterns, caseSensitive)
 
-  private def initializeTrie(): Unit = {
-    nodes(0) = Some(new Node())
-    nodes(0).get.suffixLink = 0
-    nodes(0).get.parentState = -1
+  private val failureLinks: Array[Int] = buildFailureLinks()
 
-    flattenEntityPatterns.foreach(pattern => addPattern(pattern))
-  }
+  /** Number of states of the matching machine */
+  def stateCount: Int = trie.outputs.length
 
-  /** First step of Aho-Corasick algorithm: Build a Finite State Automaton as a keyword trie in
-    * which the nodes represent the state and the edges between nodes are labeled by characters
-    * that cause the transitions between nodes. The trie is an efficient implementation of a
-    * dictionary of strings.
+  /** Computes the failure link of every state in breadth first order, so that the failure link
+    * of the parent of a state is always known before the state itself.
     */
-  private def addPattern(pattern: FlattenEntityPattern): Unit = {
-    var state = 0
-    pattern.keyword.toCharArray.foreach { char =>
-      val edgeIndex = edges.getOrElse(
-        char, {
-          val errorMessage = getAlphabetErrorMessage(char)
-          throw new UnsupportedOperationException(errorMessage)
-        })
-
-      if (nodes(state).get.children(edgeIndex) == -1) {
-        nodes(nodeCount) = Some(new Node())
-        nodes(nodeCount).get.parentState = state
-        nodes(nodeCount).get.charFromParent = Some(char)
-        nodes(state).get.children(edgeIndex) = nodeCount
-        nodeCount = nodeCount + 1
+  private def buildFailureLinks(): Array[Int] = {
+    val links = new Array[Int](stateCount)
+    val queue = new mutable.Queue[Int]()
+
+    for (edge <- trie.edgeOffsets(0) until trie.edgeOffsets(1)) queue.enqueue(target(edge))
+
+    while (queue.nonEmpty) {
+      val state = queue.dequeue()
+      for (edge <- trie.edgeOffsets(state) until trie.edgeOffsets(state + 1)) {
+        val child = target(edge)
+        links(child) = if (state == 0) 0 else nextState(links(state), label(edge), links)
+        queue.enqueue(child)
       }
-      state = nodes(state).get.children(edgeIndex)
     }
-    nodes(state).get.isLeaf = true
-    nodes(state).get.entity = pattern.entity
-    if (pattern.id.isDefined) nodes(state).get.id = pattern.id.get
+    links
   }
 
   /** Second step of Aho-Corasick algorithm: The algorithm starts at the input text’s beginning
@@ -109,95 +91,173 @@ class AhoCorasickAutomaton(
     * single pass, and all occurrences of keywords are found, even if they overlap each other.
     */
   def searchPatternsInText(sentence: Sentence): Seq[Annotation] = {
-    var previousState = 0
-    val chunk: ArrayBuffer[(Char, Int)] = ArrayBuffer.empty
+    val content = sentence.content
     val chunkAnnotations: ArrayBuffer[Annotation] = ArrayBuffer.empty
+    val newLine = System.getProperty("line.separator")
+    var previousState = 0
+    var chunkStart = -1
 
-    sentence.content.zipWithIndex.foreach { case (char, index) =>
+    var index = 0
+    while (index < content.length) {
+      val char = content.charAt(index)
       val currentChar = if (caseSensitive) char else char.toLower
-      val state = findNextState(previousState, currentChar)
+      val state =
+        if (newLine == char.toString) 0 else nextState(previousState, currentChar, failureLinks)
 
-      if (state > 0) {
-        chunk.append((char, index))
-      }
+      if (state > 0 && chunkStart == -1) chunkStart = index
 
       if (state == 0 && previousState > 0) {
-        val node = nodes(previousState).get
-        if (node.isLeaf && node.entity.nonEmpty) {
-          val chunkAnnotation = buildAnnotation(chunk, node.entity, node.id, sentence)
-          chunkAnnotations.append(chunkAnnotation)
-          chunk.clear()
-        } else chunk.clear()
+        val output = trie.outputs(previousState)
+        if (output >= 0 && trie.entities(output).nonEmpty) {
+          chunkAnnotations.append(buildAnnotation(chunkStart, index - 1, output, sentence))
+        }
+        chunkStart = -1
       }
 
       previousState = state
+      index += 1
     }
 
-    if (chunk.nonEmpty) {
-      val node = nodes(previousState).get
-      if (node.entity.nonEmpty) {
-        val chunkAnnotation = buildAnnotation(chunk, node.entity, node.id, sentence)
-        chunkAnnotations.append(chunkAnnotation)
+    if (chunkStart != -1) {
+      val output = trie.outputs(previousState)
+      if (output >= 0 && trie.entities(output).nonEmpty) {
+        val end = content.length - 1
+        chunkAnnotations.append(buildAnnotation(chunkStart, end, output, sentence))
       }
-      chunk.clear()
     }
 
     chunkAnnotations
   }
 
-  private def findNextState(state: Int, char: Char): Int = {
-
-    val newLine = System.getProperty("line.separator")
-    if (newLine == char.toString) return 0
-
-    val edgeIndex: Int = edges.getOrElse(char, -1)
-    if (edgeIndex == -1) {
-      val errorMessage = getAlphabetErrorMessage(char)
-      throw new UnsupportedOperationException(errorMessage)
-    }
-
-    val node = nodes(state)
-    if (node.get.transitions(edgeIndex) == -1) {
-      buildFailureLink(node.get, state, edgeIndex, char)
+  /** Follows failure links until a state has a transition for the character */
+  private def nextState(state: Int, char: Char, links: Array[Int]): Int = {
+    var current = state
+    var next = child(current, char)
+    while (next == -1 && current > 0) {
+      current = links(current)
+      next = child(current, char)
     }
-    node.get.transitions(edgeIndex)
+    if (next == -1) 0 else next
   }
 
-  private def buildFailureLink(node: Node, state: Int, edgeIndex: Int, char: Char): Unit = {
-    if (node.children(edgeIndex) != -1) {
-      node.transitions(edgeIndex) = node.children(edgeIndex)
-    } else {
-      node.transitions(edgeIndex) =
-        if (state == 0) 0 else findNextState(findSuffixLink(state), char)
+  private def child(state: Int, char: Char): Int = {
+    var low = trie.edgeOffsets(state)
+    var high = trie.edgeOffsets(state + 1) - 1
+    while (low <= high) {
+      val middle = (low + high) >>> 1
+      val middleLabel = label(middle)
+      if (middleLabel < char) low = middle + 1
+      else if (middleLabel > char) high = middle - 1
+      else return target(middle)
     }
+    -1
   }
 
-  private def findSuffixLink(state: Int): Int = {
-    val node = nodes(state)
-    if (node.get.suffixLink == -1) {
-      node.get.suffixLink =
-        if (node.get.parentState == 0) 0
-        else findNextState(findSuffixLink(node.get.parentState), node.get.charFromParent.get)
-    }
-    node.get.suffixLink
-  }
+  private def label(edge: Int): Char = (trie.edges(edge) >>> 32).toChar
 
-  def buildAnnotation(
-      chunk: ArrayBuffer[(Char, Int)],
-      entity: String,
-      id: String,
+  private def target(edge: Int): Int = trie.edges(edge).toInt
+
+  private def buildAnnotation(
+      begin: Int,
+      end: Int,
+      output: Int,
       sentence: Sentence): Annotation = {
-    val begin = chunk.head._2 + sentence.start
-    val end = chunk.last._2 + sentence.start
-    val result = chunk.map(_._1).mkString("")
-    val metadata = Map("entity" -> entity, "sentence" -> sentence.index.toString)
+    val result = sentence.content.substring(begin, end + 1)
+    val metadata = Map("entity" -> trie.entities(output), "sentence" -> sentence.index.toString)
+    val id = trie.ids(output)
 
     if (id.isEmpty) {
-      Annotation(CHUNK, begin, end, result, metadata)
+      Annotation(CHUNK, begin + sentence.start, end + sentence.start, result, metadata)
     } else {
-      Annotation(CHUNK, begin, end, result, metadata ++ Map("id" -> id))
+      Annotation(
+        CHUNK,
+        begin + sentence.start,
+        end + sentence.start,
+        result,
+        metadata ++ Map("id" -> id))
+    }
+
+  }
+
+}
+
+object AhoCorasickAutomaton {
+
+  /** Flat keyword trie of an [[AhoCorasickAutomaton]]
+    *
+    * @param edges
+    *   Transitions sorted by state and character, packed as `character << 32 | target state`
+    * @param edgeOffsets
+    *   Index of the first edge of each state, followed by the number of edges
+    * @param outputs
+    *   Index of the entity of each state that ends a keyword, or -1
+    * @param entities
+    *   Distinct entity labels
+    * @param ids
+    *   Pattern id of each entity label, empty if none
+    */
+  private[er] case class KeywordTrie(
+      edges: Array[Long],
+      edgeOffsets: Array[Int],
+      outputs: Array[Int],
+      entities: Array[String],
+      ids: Array[String])
+
+  /** First step of Aho-Corasick algorithm: Build a Finite State Automaton as a keyword trie in
+    * which the nodes represent the state and the edges between nodes are labeled by characters
+    * that cause the transitions between nodes. The trie is an efficient implementation of a
+    * dictionary of strings.
+    *
+    * Edges are collected in a hash map keyed by `state << 16 | character` and then sorted, which
+    * lays them out grouped by state and ordered by character.
+    */
+  private[er] def buildTrie(
+      alphabet: String,
+      patterns: Array[EntityPattern],
+      caseSensitive: Boolean): KeywordTrie = {
+    val alphabetChars = alphabet.toSet
+    val children = new mutable.LongMap[Int]()
+    val leaves = new mutable.LongMap[Int]()
+    val outputIndex = mutable.LinkedHashMap.empty[(String, String), Int]
+    var stateCount = 1
+
+    patterns.foreach { entityPattern =>
+      val output = outputIndex.getOrElseUpdate(
+        (entityPattern.label, entityPattern.id.getOrElse("")),
+        outputIndex.size)
+      entityPattern.patterns.foreach { pattern =>
+        val keyword = if (caseSensitive) pattern else pattern.toLowerCase
+        var state = 0
+        keyword.foreach { char =>
+          if (!alphabetChars.contains(char)) {
+            throw new UnsupportedOperationException(getAlphabetErrorMessage(char))
+          }
+          val key = (state.toLong << 16) | char
+          state = children.getOrElseUpdate(key, { stateCount += 1; stateCount - 1 })
+        }
+        leaves(state) = output
+      }
     }
 
+    val keys = children.keys.toArray
+    java.util.Arrays.sort(keys)
+    val edges = new Array[Long](keys.length)
+    val edgeOffsets = new Array[Int](stateCount + 1)
+    keys.zipWithIndex.foreach { case (key, edge) =>
+      edges(edge) = ((key & 0xffff) << 32) | children(key)
+      edgeOffsets((key >>> 16).toInt + 1) += 1
+    }
+    for (state <- 1 to stateCount) edgeOffsets(state) += edgeOffsets(state - 1)
+
+    val outputs = Array.fill(stateCount)(-1)
+    leaves.foreach { case (state, output) => outputs(state.toInt) = output }
+
+    KeywordTrie(
+      edges,
+      edgeOffsets,
+      outputs,
+      outputIndex.keys.map(_._1).toArray,
+      outputIndex.keys.map(_._2).toArray)
   }
 
   private def getAlphabetErrorMessage(char: Char): String = {
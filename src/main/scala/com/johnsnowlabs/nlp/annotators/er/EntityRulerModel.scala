@@ -114,6 +114,40 @@ class EntityRulerModel(override val uid: String)
     }
   }
 
+  private var regexMatcherModel: Option[Broadcast[RegexEntityMatcher]] = None
+
+  @transient private lazy val localRegexMatcher: RegexEntityMatcher = buildRegexMatcher()
+
+  /** Compiles the regex patterns once and broadcasts them, so executors do not compile them or
+    * look them up in storage for every token
+    */
+  def setRegexMatcherIfNotSet(spark: SparkSession): this.type = {
+    if (regexMatcherModel.isEmpty && $(regexEntities).nonEmpty) {
+      regexMatcherModel = Some(spark.sparkContext.broadcast(buildRegexMatcher()))
+    }
+    this
+  }
+
+  private def getRegexMatcher: RegexEntityMatcher =
+    if (regexMatcherModel.isDefined) regexMatcherModel.get.value else localRegexMatcher
+
+  private def buildRegexMatcher(): RegexEntityMatcher = {
+    val regexPatternsReader =
+      if ($(useStorage))
+        Some(getReader(Database.ENTITY_REGEX_PATTERNS).asInstanceOf[RegexPatternsReader])
+      else None
+
+    val patternsByEntity = $(regexEntities).toSeq.map { regexEntity =>
+      val regexPatterns: Option[Seq[String]] = regexPatternsReader match {
+        case Some(rpr) => rpr.lookup(regexEntity)
+        case None => $$(entityRulerFeatures).regexPatterns.get(regexEntity)
+      }
+      (regexEntity, regexPatterns.getOrElse(Seq.empty))
+    }
+
+    new RegexEntityMatcher(patternsByEntity)
+  }
+
   setDefault(useStorage -> false, caseSensitive -> true, enablePatternRegex -> false)
 
   /** Annotator reference id. Used to identify elements in metadata or to refer to this annotator
@@ -143,6 +177,7 @@ class EntityRulerModel(override val uid: String)
 
   override def beforeAnnotate(dataset: Dataset[_]): Dataset[_] = {
     this.setAutomatonModelIfNotSet(dataset.sparkSession, $$(ahoCorasickAutomaton))
+    this.setRegexMatcherIfNotSet(dataset.sparkSession)
     dataset
   }
 
@@ -173,27 +208,24 @@ class EntityRulerModel(override val uid: String)
       annotations: Seq[Annotation],
       sentences: Seq[Sentence]): Seq[Annotation] = {
     if ($(regexEntities).nonEmpty) {
-      val regexPatternsReader =
-        if ($(useStorage))
-          Some(getReader(Database.ENTITY_REGEX_PATTERNS).asInstanceOf[RegexPatternsReader])
-        else None
+      val regexMatcher = getRegexMatcher
 
       if ($(sentenceMatch)) {
-        annotateEntitiesFromRegexPatternsBySentence(sentences, regexPatternsReader)
+        annotateEntitiesFromRegexPatternsBySentence(sentences, regexMatcher)
       } else {
         val tokenizedWithSentences = TokenizedWithSentence.unpack(annotations)
-        annotateEntitiesFromRegexPatterns(tokenizedWithSentences, regexPatternsReader)
+        annotateEntitiesFromRegexPatterns(tokenizedWithSentences, regexMatcher)
       }
     } else Seq()
   }
 
   private def annotateEntitiesFromRegexPatterns(
       tokenizedWithSentences: Seq[TokenizedSentence],
-      regexPatternsReader: Option[RegexPatternsReader]): Seq[Annotation] = {
+      regexMatcher: RegexEntityMatcher): Seq[Annotation] = {
 
     val annotatedEntities = tokenizedWithSentences.flatMap { tokenizedWithSentence =>
       tokenizedWithSentence.indexedTokens.flatMap { indexedToken =>
-        val entity = getMatchedEntity(indexedToken.token, regexPatternsReader)
+        val entity = getMatchedEntity(indexedToken.token, regexMatcher)
         if (entity.isDefined) {
           val entityMetadata = getEntityMetadata(entity)
           Some(
@@ -212,18 +244,10 @@ class EntityRulerModel(override val uid: String)
 
   private def getMatchedEntity(
       token: String,
-      regexPatternsReader: Option[RegexPatternsReader]): Option[String] = {
+      regexMatcher: RegexEntityMatcher): Option[String] = {
 
-    val matchesByEntity = $(regexEntities).flatMap { regexEntity =>
-      val regexPatterns: Option[Seq[String]] = regexPatternsReader match {
-        case Some(rpr) => rpr.lookup(regexEntity)
-        case None => $$(entityRulerFeatures).regexPatterns.get(regexEntity)
-      }
-      if (regexPatterns.isDefined) {
-        val matches = regexPatterns.get.flatMap(regexPattern => regexPattern.r.findFirstIn(token))
-        if (matches.nonEmpty) Some(regexEntity) else None
-      } else None
-    }.toSeq
+    // Two matches are enough to know the token is ambiguous
+    val matchesByEntity = regexMatcher.matchingEntities(token, limit = 2)
 
     if (matchesByEntity.size > 1) {
       logger.warn("More than one entity found. Sending the first element of the array")
@@ -232,48 +256,12 @@ class EntityRulerModel(override val uid: String)
     matchesByEntity.headOption
   }
 
-  private def getMatchedEntityBySentence(
-      sentence: Sentence,
-      regexPatternsReader: Option[RegexPatternsReader]): Array[(IndexedToken, String)] = {
-
-    val matchesByEntity = $(regexEntities)
-      .flatMap { regexEntity =>
-        val regexPatterns: Option[Seq[String]] = regexPatternsReader match {
-          case Some(rpr) => rpr.lookup(regexEntity)
-          case None => $$(entityRulerFeatures).regexPatterns.get(regexEntity)
-        }
-        if (regexPatterns.isDefined) {
-
-          val resultMatches = regexPatterns.get.flatMap { regexPattern =>
-            val matchedResult = regexPattern.r.findFirstMatchIn(sentence.content)
-            if (matchedResult.isDefined) {
-              val begin = matchedResult.get.start + sentence.start
-              val end = matchedResult.get.end + sentence.start - 1
-              Some(matchedResult.get.toString(), begin, end, regexEntity)
-            } else None
-          }
-
-          val intervals =
-            resultMatches.map(resultMatch => List(resultMatch._2, resultMatch._3)).toList
-          val mergedIntervals = EntityRulerUtil.mergeIntervals(intervals)
-          val filteredMatches =
-            resultMatches.filter(x => mergedIntervals.contains(List(x._2, x._3)))
-
-          if (filteredMatches.nonEmpty) Some(filteredMatches) else None
-        } else None
-      }
-      .flatten
-      .sortBy(_._2)
-
-    matchesByEntity.map(matches => (IndexedToken(matches._1, matches._2, matches._3), matches._4))
-  }
-
   private def annotateEntitiesFromRegexPatternsBySentence(
       sentences: Seq[Sentence],
-      patternsReader: Option[RegexPatternsReader]): Seq[Annotation] = {
+      regexMatcher: RegexEntityMatcher): Seq[Annotation] = {
 
     val annotatedEntities = sentences.flatMap { sentence =>
-      val matchedEntities = getMatchedEntityBySentence(sentence, patternsReader)
+      val matchedEntities = regexMatcher.findFirstMatches(sentence)
       matchedEntities.map { case (indexedToken, label) =>
         val entityMetadata = getEntityMetadata(Some(label))
         Annotation(
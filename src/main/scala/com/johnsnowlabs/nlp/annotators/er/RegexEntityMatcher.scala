@@ -0,0 +1,97 @@
+/*
+ * Copyright 2017-2022 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.annotators.er
+
+import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, Sentence}
+
+import java.util.regex.Pattern
+
+/** Regex patterns of an [[EntityRulerModel]], compiled once and grouped by entity.
+  *
+  * Compiled patterns are serializable, so a matcher can be broadcast and every executor compiles
+  * the patterns a single time when it deserializes it, instead of compiling them for every token.
+  *
+  * @param patternsByEntity
+  *   Regex patterns of each entity label, in the order entities are matched
+  */
+class RegexEntityMatcher(patternsByEntity: Seq[(String, Seq[String])]) extends Serializable {
+
+  private val entities: Array[String] = patternsByEntity.map(_._1).toArray
+
+  private val patterns: Array[Array[Pattern]] =
+    patternsByEntity.map { case (_, regexPatterns) =>
+      regexPatterns.map(regexPattern => Pattern.compile(regexPattern)).toArray
+    }.toArray
+
+  /** Number of compiled patterns over all entities */
+  def size: Int = patterns.map(_.length).sum
+
+  /** Finds the entities with at least one pattern matching part of a token.
+    *
+    * @param token
+    *   Token to match
+    * @param limit
+    *   Number of entities after which to stop matching
+    * @return
+    *   Matching entities, in the order of the entities
+    */
+  def matchingEntities(token: String, limit: Int = Int.MaxValue): Seq[String] = {
+    val matches = Seq.newBuilder[String]
+    var found = 0
+    var entity = 0
+    while (entity < entities.length && found < limit) {
+      if (patterns(entity).exists(pattern => pattern.matcher(token).find())) {
+        matches += entities(entity)
+        found += 1
+      }
+      entity += 1
+    }
+    matches.result()
+  }
+
+  /** Finds the first match of every pattern in a sentence. Overlapping matches of the same entity
+    * are merged, keeping only the matches that span a whole merged interval.
+    *
+    * @param sentence
+    *   Sentence to match
+    * @return
+    *   Matched chunks and their entity, sorted by begin
+    */
+  def findFirstMatches(sentence: Sentence): Seq[(IndexedToken, String)] = {
+    entities.indices
+      .flatMap { entity =>
+        val resultMatches = patterns(entity).flatMap { pattern =>
+          val matcher = pattern.matcher(sentence.content)
+          if (matcher.find()) {
+            val begin = matcher.start() + sentence.start
+            val end = matcher.end() + sentence.start - 1
+            Some(IndexedToken(matcher.group(), begin, end))
+          } else None
+        }
+
+        val intervals = resultMatches.map(matched => List(matched.begin, matched.end)).toList
+        val mergedIntervals =
+          if (intervals.isEmpty) Nil else EntityRulerUtil.mergeIntervals(intervals)
+
+        resultMatches
+          .filter(matched => mergedIntervals.contains(List(matched.begin, matched.end)))
+          .map(matched => (matched, entities(entity)))
+      }
+      .sortBy(_._1.begin)
+  }
+
+}
@@ -20,10 +20,15 @@ import com.johnsnowlabs.client.CloudResources
 import com.johnsnowlabs.client.util.CloudHelper
 import com.johnsnowlabs.ml.crf.TextSentenceLabels
 import com.johnsnowlabs.ml.tensorflow._
+import com.johnsnowlabs.ml.util.{ShardCodec, TrainingShards}
 import com.johnsnowlabs.nlp.AnnotatorType.{DOCUMENT, NAMED_ENTITY, TOKEN, WORD_EMBEDDINGS}
-import com.johnsnowlabs.nlp.annotators.common.{NerTagged, WordpieceEmbeddingsSentence}
+import com.johnsnowlabs.nlp.annotators.common.{
+  NerTagged,
+  TokenPieceEmbeddings,
+  WordpieceEmbeddingsSentence
+}
 import com.johnsnowlabs.nlp.annotators.ner.{ModelMetrics, NerApproach, Verbose}
-import com.johnsnowlabs.nlp.annotators.param.EvaluationDLParams
+import com.johnsnowlabs.nlp.annotators.param.{EvaluationDLParams, TrainingShardsParams}
 import com.johnsnowlabs.nlp.util.io.{OutputHelper, ResourceHelper}
 import com.johnsnowlabs.nlp.{AnnotatorApproach, AnnotatorType, ParamsAndFeaturesWritable}
 import com.johnsnowlabs.storage.HasStorageRef
@@ -32,13 +37,15 @@ import org.apache.commons.lang3.SystemUtils
 import org.apache.spark.ml.PipelineModel
 import org.apache.spark.ml.param._
 import org.apache.spark.ml.util.{DefaultParamsReadable, Identifiable}
+import org.apache.spark.network.util.JavaUtils
 import org.apache.spark.sql.{Dataset, Row, SparkSession}
-import org.tensorflow.Graph
+import org.tensorflow.{Graph, Session}
 import org.tensorflow.proto.framework.GraphDef
 
-import java.io.File
+import java.io.{DataOutputStream, File}
+import java.nio.ByteBuffer
 import scala.collection.mutable
-import scala.util.Random
+import scala.util.{Random, Try}
 
 /** This Named Entity recognition annotator allows to train generic NER model based on Neural
   * Networks.
@@ -97,6 +104,21 @@ import scala.util.Random
   *   .setTestDataset("test_data")
   * }}}
   *
+  * Training sets too large to be collected to the driver can be spilled to local shards with
+  * `setSpillTrainingData(true)`. Sentences and their embeddings are then read from the dataset
+  * once, stored with half precision floats and read from the shards in a new random order on
+  * every epoch, instead of being read again from the dataset like with `enableMemoryOptimizer`.
+  *
+  * Trainings repeated on the same data, e.g. to search for the best hyperparameters, can share
+  * a cache of the encoded training data with `setTrainingCachePath`. The first training reads
+  * and encodes the sentences into a local folder named after a fingerprint of the datasets, and
+  * later trainings with the same datasets, columns and `validationSplit` read them from there,
+  * with the same validation split. The least recently used caches are deleted once the folder
+  * grows larger than `trainingCacheMaxSize`. Datasets read from files, e.g. embeddings saved to
+  * parquet, can be cached across sessions and Pipeline fits. Datasets computed by annotators,
+  * e.g. by the stages before NerDL in a Pipeline, are only cached for the same DataFrame, since
+  * their user defined functions change with every transformation.
+  *
   * For extended examples of usage, see the
   * [[https://github.com/JohnSnowLabs/spark-nlp/blob/master/examples/python/training/english/dl-ner Examples]]
   * and the
@@ -183,7 +205,8 @@ class NerDLApproach(override val uid: String)
     with NerApproach[NerDLApproach]
     with Logging
     with ParamsAndFeaturesWritable
-    with EvaluationDLParams {
+    with EvaluationDLParams
+    with TrainingShardsParams {
 
   def this() = this(Identifiable.randomUID("NerDL"))
 
@@ -287,6 +310,27 @@ class NerDLApproach(override val uid: String)
     "enableMemoryOptimizer",
     "Whether to optimize for large datasets or not. Enabling this option can slow down training.")
 
+  /** Local folder in which the encoded training data is cached and shared by the trainings on
+    * the same data, or empty not to cache it (Default: `""`)
+    *
+    * @group param
+    */
+  val trainingCachePath = new Param[String](
+    this,
+    "trainingCachePath",
+    "Local folder in which the encoded training data is cached and shared by the trainings on the same data, or empty not to cache it")
+
+  /** Maximum size of the `trainingCachePath` folder, in bytes or with a unit such as `10g`,
+    * after which the least recently used caches are deleted, or `0` for no limit (Default:
+    * `"10g"`)
+    *
+    * @group param
+    */
+  val trainingCacheMaxSize = new Param[String](
+    this,
+    "trainingCacheMaxSize",
+    "Maximum size of the trainingCachePath folder, in bytes or with a unit such as 10g, after which the least recently used caches are deleted, or 0 for no limit")
+
   /** Whether to restore and use the model that has achieved the best performance at the end of
     * the training. The metric that is being monitored is F1 for testDataset and if it's not set
     * it will be validationSplit, and if it's not set finally looks for loss.
@@ -352,6 +396,12 @@ class NerDLApproach(override val uid: String)
     */
   def getEnableMemoryOptimizer: Boolean = $(this.enableMemoryOptimizer)
 
+  /** @group getParam */
+  def getTrainingCachePath: String = $(this.trainingCachePath)
+
+  /** @group getParam */
+  def getTrainingCacheMaxSize: String = $(this.trainingCacheMaxSize)
+
   /** useBestModel
     *
     * @group getParam
@@ -416,6 +466,26 @@ class NerDLApproach(override val uid: String)
   def setEnableMemoryOptimizer(value: Boolean): NerDLApproach.this.type =
     set(this.enableMemoryOptimizer, value)
 
+  /** Local folder in which the encoded training data is cached and shared by the trainings on
+    * the same data, or empty not to cache it
+    *
+    * @group setParam
+    */
+  def setTrainingCachePath(path: String): NerDLApproach.this.type =
+    set(this.trainingCachePath, path)
+
+  /** Maximum size of the `trainingCachePath` folder, in bytes or with a unit such as `10g`,
+    * after which the least recently used caches are deleted, or `0` for no limit
+    *
+    * @group setParam
+    */
+  def setTrainingCacheMaxSize(size: String): NerDLApproach.this.type = {
+    require(
+      Try(JavaUtils.byteStringAsBytes(size.trim)).isSuccess,
+      s"trainingCacheMaxSize $size is not a size in bytes or with a unit such as 10g")
+    set(this.trainingCacheMaxSize, size)
+  }
+
   /** Whether to include confidence scores in annotation metadata
     *
     * @group setParam
@@ -454,6 +524,8 @@ class NerDLApproach(override val uid: String)
     includeConfidence -> false,
     includeAllConfidenceScores -> false,
     enableMemoryOptimizer -> false,
+    trainingCachePath -> "",
+    trainingCacheMaxSize -> "10g",
     useBestModel -> false,
     bestModelMetric -> ModelMetrics.loss)
 
@@ -493,53 +565,52 @@ class NerDLApproach(override val uid: String)
     val Array(validSplit, trainSplit) =
       train.randomSplit(Array($(validationSplit), 1.0f - $(validationSplit)))
 
-    val trainIteratorFunc = NerDLApproach.getIteratorFunc(
-      trainSplit,
-      inputColumns = getInputCols,
-      labelColumn = $(labelColumn),
-      batchSize = $(batchSize),
-      enableMemoryOptimizer = $(enableMemoryOptimizer))
-
-    val validIteratorFunc = NerDLApproach.getIteratorFunc(
-      validSplit,
-      inputColumns = getInputCols,
-      labelColumn = $(labelColumn),
-      batchSize = $(batchSize),
-      enableMemoryOptimizer = $(enableMemoryOptimizer))
-
-    val testIteratorFunc = NerDLApproach.getIteratorFunc(
-      test,
-      inputColumns = getInputCols,
-      labelColumn = $(labelColumn),
-      batchSize = $(batchSize),
-      enableMemoryOptimizer = $(enableMemoryOptimizer))
-
-    val (labels, chars, embeddingsDim, dsLen) =
-      NerDLApproach.getDataSetParams(trainIteratorFunc())
-
-    val settings = DatasetEncoderParams(
-      labels.toList,
-      chars.toList,
-      Array.fill(embeddingsDim)(0f).toList,
-      embeddingsDim)
-    val encoder = new NerDatasetEncoder(settings)
-
-    val graphFile = NerDLApproach.searchForSuitableGraph(
-      labels.size,
-      embeddingsDim,
-      chars.size + 1,
-      get(graphFolder))
-
-    val graph = new Graph()
-    val graphStream = ResourceHelper.getResourceStream(graphFile)
-    val graphBytesDef = IOUtils.toByteArray(graphStream)
-    graph.importGraphDef(GraphDef.parseFrom(graphBytesDef))
-
-    val tfWrapper = new TensorflowWrapper(
-      Variables(Array.empty[Array[Byte]], Array.empty[Byte]),
-      graph.toGraphDef.toByteArray)
-
-    val (ner, trainedTf) =
+    def iteratorFunc(data: Dataset[Row], shardsFolder: Option[File])
+        : () => Iterator[Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]] =
+      shardsFolder match {
+        case Some(folder) =>
+          NerDLApproach.getShardedIteratorFunc(
+            data,
+            inputColumns = getInputCols,
+            labelColumn = $(labelColumn),
+            batchSize = $(batchSize),
+            folder = folder,
+            shardSize = $(shardSize))
+        case None =>
+          NerDLApproach.getIteratorFunc(
+            data,
+            inputColumns = getInputCols,
+            labelColumn = $(labelColumn),
+            batchSize = $(batchSize),
+            enableMemoryOptimizer = $(enableMemoryOptimizer))
+      }
+
+    def trainModel(
+        encoder: NerDatasetEncoder,
+        trainBatches: TensorflowNer => Iterator[(NerBatch, Array[Array[Int]])],
+        trainLength: Long,
+        validIteratorFunc: () => Iterator[
+          Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]],
+        validLength: Long,
+        testIteratorFunc: () => Iterator[
+          Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]])
+        : (TensorflowNer, Session, TensorflowWrapper) = {
+
+      val graphFile = NerDLApproach.searchForSuitableGraph(
+        encoder.params.tags.length,
+        encoder.params.embeddingsDim,
+        encoder.params.chars.length + 1,
+        get(graphFolder))
+
+      val graph = new Graph()
+      val graphStream = ResourceHelper.getResourceStream(graphFile)
+      val graphBytesDef = IOUtils.toByteArray(graphStream)
+      graph.importGraphDef(GraphDef.parseFrom(graphBytesDef))
+
+      val tfWrapper = new TensorflowWrapper(
+        Variables(Array.empty[Array[Byte]], Array.empty[Byte]),
+        graph.toGraphDef.toByteArray)
+
       try {
         val model = new TensorflowNer(tfWrapper, encoder, Verbose($(verbose)))
         if (isDefined(randomSeed)) {
@@ -547,33 +618,89 @@ class NerDLApproach(override val uid: String)
         }
 
         // start the iterator here once again
-        val trainedTf = model.train(
-          trainIteratorFunc(),
-          dsLen,
+        val trainedTf = model.trainOnBatches(
+          trainBatches(model),
+          trainLength,
           validIteratorFunc(),
-          (dsLen * $(validationSplit)).toLong,
-          $(lr),
-          $(po),
-          $(dropout),
-          $(batchSize),
-          $(useBestModel),
-          $(bestModelMetric),
-          graphFileName = graphFile,
-          test = testIteratorFunc(),
+          validLength,
+          lr = $(lr),
+          po = $(po),
+          dropout = $(dropout),
+          batchSize = $(batchSize),
+          useBestModel = $(useBestModel),
+          bestModelMetric = $(bestModelMetric),
           startEpoch = 0,
           endEpoch = $(maxEpochs),
+          graphFileName = graphFile,
+          test = testIteratorFunc(),
           configProtoBytes = getConfigProtoBytes,
           validationSplit = $(validationSplit),
           evaluationLogExtended = $(evaluationLogExtended),
+          includeConfidence = false,
           enableOutputLogs = $(enableOutputLogs),
           outputLogsPath = $(outputLogsPath),
           uuid = this.uid)
-        (model, trainedTf)
+        (model, trainedTf, tfWrapper)
       } catch {
         case e: Exception =>
           graph.close()
           throw e
       }
+    }
+
+    val (ner, trainedTf, tfWrapper) =
+      if ($(trainingCachePath).nonEmpty) {
+        val cache = NerDLTrainingCache.getOrCreate(
+          $(trainingCachePath),
+          NerDLTrainingCache.fingerprint(
+            Seq(train, test),
+            getInputCols.toSeq ++ Seq($(labelColumn), $(validationSplit).toString)),
+          trainSplit,
+          validSplit,
+          test,
+          inputColumns = getInputCols,
+          labelColumn = $(labelColumn),
+          batchSize = $(batchSize),
+          shardSize = $(shardSize),
+          maxSize = JavaUtils.byteStringAsBytes($(trainingCacheMaxSize).trim))
+
+        try {
+          trainModel(
+            cache.encoder,
+            model => cache.train.batches($(batchSize)).map(model.encoder.encodeBatch),
+            cache.train.count,
+            () => cache.valid.batches($(batchSize), shuffle = false),
+            cache.valid.count,
+            () => cache.test.batches($(batchSize), shuffle = false))
+        } finally {
+          cache.close()
+        }
+      } else
+        withShardsFolder { shardsFolder =>
+          val trainIteratorFunc =
+            iteratorFunc(trainSplit, shardsFolder.map(new File(_, "train")))
+          val validIteratorFunc =
+            iteratorFunc(validSplit, shardsFolder.map(new File(_, "valid")))
+          val testIteratorFunc = iteratorFunc(test, shardsFolder.map(new File(_, "test")))
+
+          val (labels, chars, embeddingsDim, dsLen) =
+            NerDLApproach.getDataSetParams(trainIteratorFunc())
+
+          val settings = DatasetEncoderParams(
+            labels.toList,
+            chars.toList,
+            Array.fill(embeddingsDim)(0f).toList,
+            embeddingsDim)
+          val encoder = new NerDatasetEncoder(settings)
+
+          trainModel(
+            encoder,
+            model => trainIteratorFunc().map(model.encodeBatch),
+            dsLen,
+            validIteratorFunc,
+            (dsLen * $(validationSplit)).toLong,
+            testIteratorFunc)
+        }
 
     val newWrapper =
       new TensorflowWrapper(
@@ -721,6 +848,81 @@ object NerDLApproach extends DefaultParamsReadable[NerDLApproach] with WithGraph
     }
   }
 
+  /** Reads the sentences of a dataset once and spills them to training shards in `folder`.
+    *
+    * @return
+    *   function returning batches of the spilled sentences, in a new random order on every call
+    */
+  def getShardedIteratorFunc(
+      dataset: Dataset[Row],
+      inputColumns: Array[String],
+      labelColumn: String,
+      batchSize: Int,
+      folder: File,
+      shardSize: Int = TrainingShards.defaultShardSize)
+      : () => Iterator[Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]] = {
+
+    val shards = TrainingShards.write(
+      NerTagged
+        .iterateOnDataframe(dataset, inputColumns, labelColumn, math.max(batchSize, 1))
+        .flatMap(_.iterator),
+      folder,
+      trainingShardCodec,
+      shardSize)
+
+    () => shards.batches(batchSize)
+  }
+
+  /** Codec of labeled sentences in training shards, with embeddings as half precision floats */
+  val trainingShardCodec: ShardCodec[(TextSentenceLabels, WordpieceEmbeddingsSentence)] =
+    new ShardCodec[(TextSentenceLabels, WordpieceEmbeddingsSentence)] {
+
+      override def write(
+          record: (TextSentenceLabels, WordpieceEmbeddingsSentence),
+          output: DataOutputStream): Unit = {
+        val (labels, sentence) = record
+        output.writeInt(labels.labels.length)
+        labels.labels.foreach(ShardCodec.writeString(_, output))
+        output.writeInt(sentence.sentenceId)
+        output.writeInt(sentence.tokens.length)
+        sentence.tokens.foreach { token =>
+          ShardCodec.writeString(token.wordpiece, output)
+          ShardCodec.writeString(token.token, output)
+          output.writeInt(token.pieceId)
+          output.writeBoolean(token.isWordStart)
+          output.writeBoolean(token.isOOV)
+          output.writeInt(token.begin)
+          output.writeInt(token.end)
+          ShardCodec.writeHalfs(token.embeddings, output)
+        }
+      }
+
+      override def read(input: ByteBuffer): (TextSentenceLabels, WordpieceEmbeddingsSentence) = {
+        val labels = Seq.fill(input.getInt())(ShardCodec.readString(input))
+        val sentenceId = input.getInt()
+        val tokens = Array.fill(input.getInt()) {
+          val wordpiece = ShardCodec.readString(input)
+          val token = ShardCodec.readString(input)
+          val pieceId = input.getInt()
+          val isWordStart = input.get() != 0
+          val isOOV = input.get() != 0
+          val begin = input.getInt()
+          val end = input.getInt()
+          val embeddings = ShardCodec.readHalfs(input)
+          new TokenPieceEmbeddings(
+            wordpiece,
+            token,
+            pieceId,
+            isWordStart,
+            isOOV,
+            embeddings,
+            begin,
+            end)
+        }
+        (TextSentenceLabels(labels), WordpieceEmbeddingsSentence(tokens, sentenceId))
+      }
+    }
+
   def getDataSetParams(dsIt: Iterator[Array[(TextSentenceLabels, WordpieceEmbeddingsSentence)]])
       : (mutable.Set[String], mutable.Set[Char], Int, Long) = {
 
@@ -0,0 +1,408 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.annotators.ner.dl
+
+import com.johnsnowlabs.ml.crf.TextSentenceLabels
+import com.johnsnowlabs.ml.tensorflow.{
+  DatasetEncoderParams,
+  EncodedNerSentence,
+  NerDatasetEncoder
+}
+import com.johnsnowlabs.ml.util.{ShardCodec, TrainingShards}
+import com.johnsnowlabs.nlp.annotators.common.{NerTagged, WordpieceEmbeddingsSentence}
+import com.johnsnowlabs.util.FileHelper
+import org.apache.commons.io.FileUtils
+import org.apache.hadoop.fs.Path
+import org.apache.spark.sql.catalyst.expressions.ScalaUDF
+import org.apache.spark.sql.{Dataset, Row}
+import org.slf4j.{Logger, LoggerFactory}
+
+import java.io.{BufferedOutputStream, DataOutputStream, File, FileOutputStream}
+import java.nio.ByteBuffer
+import java.nio.channels.{FileChannel, FileLock, OverlappingFileLockException}
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.{
+  FileSystemException,
+  Files,
+  Paths,
+  StandardCopyOption,
+  StandardOpenOption
+}
+import java.security.MessageDigest
+import java.util.concurrent.atomic.AtomicBoolean
+import scala.collection.mutable
+import scala.util.Try
+
+/** Training data of [[NerDLApproach]] encoded once and kept on local disk, so that every epoch
+  * and every later training on the same data reads the encoded sentences instead of reading and
+  * encoding the dataset again.
+  *
+  * Training sentences are stored with their char ids, tag ids and half precision embeddings.
+  * Validation and test sentences are stored as they are, since they are measured by predicting
+  * their tags. The labels and chars the sentences were encoded with are stored with them.
+  *
+  * A cache is in use until it is closed. JVMs hold a shared lock on `<folder>/.locks/<key>.lock`
+  * for the caches they use, so that no JVM sharing the folder evicts them meanwhile.
+  *
+  * @param folder
+  *   Folder of the cache
+  * @param encoder
+  *   Encoder of the training sentences
+  * @param train
+  *   Encoded training sentences
+  * @param valid
+  *   Sentences held out for validation
+  * @param test
+  *   Test sentences
+  */
+private[dl] class NerDLTrainingCache(
+    val folder: File,
+    val encoder: NerDatasetEncoder,
+    val train: TrainingShards[EncodedNerSentence],
+    val valid: TrainingShards[(TextSentenceLabels, WordpieceEmbeddingsSentence)],
+    val test: TrainingShards[(TextSentenceLabels, WordpieceEmbeddingsSentence)]) {
+
+  private val closed = new AtomicBoolean(false)
+
+  /** Releases the cache once the training finished, so that it can be evicted */
+  def close(): Unit =
+    if (closed.compareAndSet(false, true)) NerDLTrainingCache.release(folder)
+
+}
+
+private[dl] object NerDLTrainingCache {
+
+  private val logger: Logger = LoggerFactory.getLogger("NerDLTrainingCache")
+
+  // Changed whenever the files of a cache change, so older caches are not read
+  private val formatVersion = 1
+
+  private val paramsFile = "params"
+  private val locksFolder = ".locks"
+
+  /** Shared lock of a cache used by this JVM, with the number of trainings using it */
+  private class InUse(val channel: FileChannel, val lock: FileLock, var trainings: Int)
+
+  // Caches in use by this JVM, by their folder. Guards the lock files of the caches, since a JVM
+  // can not hold overlapping locks of the same file.
+  private val inUse = mutable.Map.empty[String, InUse]
+
+  /** Key of the cache of a training, from the query plans and input files of its datasets and
+    * from the settings changing what is cached. Plans are compared by their semantic hash, which
+    * does not change when the same dataset is trained on again. Input files are compared by
+    * their path, size and modification time.
+    *
+    * Plans with user defined functions, such as the DataFrames annotated by the stages before
+    * NerDL in a Pipeline, get a new hash with every transformation, since every transformation
+    * creates new functions. A warning is logged for them.
+    */
+  def fingerprint(datasets: Seq[Dataset[_]], settings: Seq[String]): String = {
+    val digest = MessageDigest.getInstance("SHA-256")
+    def update(value: String): Unit = {
+      digest.update(value.getBytes(UTF_8))
+      digest.update(0.toByte)
+    }
+
+    update(formatVersion.toString)
+    datasets.foreach { dataset =>
+      val plan = dataset.queryExecution.analyzed
+      if (plan.find(_.expressions.exists(_.find(_.isInstanceOf[ScalaUDF]).isDefined)).isDefined)
+        logger.warn(
+          "The NerDL training data is computed by user defined functions, e.g. by the " +
+            "annotators before NerDL in a Pipeline. Its training cache is only reused for the " +
+            "same DataFrame. Save the annotated training data, e.g. to parquet, and train on " +
+            "it to reuse the cache across Pipeline fits and sessions.")
+      update(plan.semanticHash().toString)
+
+      val hadoopConf = dataset.sparkSession.sparkContext.hadoopConfiguration
+      dataset.inputFiles.sorted.foreach { file =>
+        update(file)
+        Try {
+          val path = new Path(file)
+          path.getFileSystem(hadoopConf).getFileStatus(path)
+        }.foreach { status =>
+          update(status.getLen.toString)
+          update(status.getModificationTime.toString)
+        }
+      }
+    }
+    settings.foreach(update)
+    digest.digest().map(byte => f"${byte & 0xff}%02x").mkString
+  }
+
+  /** Opens the cache with key `key` in `cachePath`, or creates it by reading the datasets once.
+    *
+    * A cache is created in a temporary folder and moved into place once complete, so trainings
+    * running at the same time never read an incomplete cache. Creating a cache evicts the least
+    * recently used caches of `cachePath` until it is not larger than `maxSize`, if positive.
+    *
+    * The cache is in use until it is closed.
+    */
+  def getOrCreate(
+      cachePath: String,
+      key: String,
+      trainSplit: Dataset[Row],
+      validSplit: Dataset[Row],
+      test: Dataset[Row],
+      inputColumns: Array[String],
+      labelColumn: String,
+      batchSize: Int,
+      shardSize: Int,
+      maxSize: Long = 0L): NerDLTrainingCache = {
+
+    val folder = new File(cachePath, key)
+    // acquired before the cache is opened, so that no other JVM evicts it meanwhile
+    acquire(folder)
+    try {
+      openOrCreate(
+        folder,
+        trainSplit,
+        validSplit,
+        test,
+        inputColumns,
+        labelColumn,
+        batchSize,
+        shardSize,
+        maxSize)
+    } catch {
+      case e: Throwable =>
+        release(folder)
+        throw e
+    }
+  }
+
+  private def openOrCreate(
+      folder: File,
+      trainSplit: Dataset[Row],
+      validSplit: Dataset[Row],
+      test: Dataset[Row],
+      inputColumns: Array[String],
+      labelColumn: String,
+      batchSize: Int,
+      shardSize: Int,
+      maxSize: Long): NerDLTrainingCache = {
+    val cachePath = folder.getParent
+    val key = folder.getName
+    open(folder).getOrElse {
+      val parent = Files.createDirectories(Paths.get(cachePath))
+      val building = Files.createTempDirectory(parent, s".$key").toFile
+
+      try {
+        def spill(data: Dataset[Row], name: String) =
+          TrainingShards.write(
+            NerTagged
+              .iterateOnDataframe(data, inputColumns, labelColumn, math.max(batchSize, 1))
+              .flatMap(_.iterator),
+            new File(building, name),
+            NerDLApproach.trainingShardCodec,
+            shardSize)
+
+        val sentences = spill(trainSplit, "sentences")
+        spill(validSplit, "valid")
+        spill(test, "test")
+
+        val (labels, chars, embeddingsDim, _) =
+          NerDLApproach.getDataSetParams(sentences.batches(batchSize, shuffle = false))
+        val encoder = new NerDatasetEncoder(
+          DatasetEncoderParams(
+            labels.toList,
+            chars.toList,
+            Array.fill(embeddingsDim)(0f).toList,
+            embeddingsDim))
+
+        TrainingShards.write(
+          sentences.iterator.map { case (tags, sentence) =>
+            encoder.encodeSentence(sentence, sentence.tokens.indices.map(tags.labels).toArray)
+          },
+          new File(building, "train"),
+          encodedSentenceCodec,
+          shardSize)
+        sentences.delete()
+        writeParams(encoder.params, new File(building, paramsFile))
+
+        Files.move(building.toPath, folder.toPath, StandardCopyOption.ATOMIC_MOVE)
+      } catch {
+        // the same cache was created by another training in the meantime
+        case _: FileSystemException if new File(folder, paramsFile).isFile =>
+      } finally {
+        if (building.exists()) FileHelper.delete(building.getPath)
+      }
+
+      if (maxSize > 0) evictToSize(new File(cachePath), maxSize)
+      open(folder).getOrElse(
+        throw new IllegalStateException(s"Could not create the training cache in $folder"))
+    }
+  }
+
+  /** Deletes the least recently used caches of a folder until it is not larger than `maxSize`.
+    * Caches in use by this or another JVM are kept.
+    *
+    * @return
+    *   Keys of the evicted caches
+    */
+  def evictToSize(cachePath: File, maxSize: Long): Seq[String] = {
+    val caches = Option(cachePath.listFiles())
+      .getOrElse(Array.empty[File])
+      .filter(file => file.isDirectory && !file.getName.startsWith("."))
+      .map(folder => (folder, FileUtils.sizeOf(folder)))
+      .sortBy { case (folder, _) => folder.lastModified() }
+
+    var total = caches.map(_._2).sum
+    caches.collect {
+      case (folder, size)
+          if total > maxSize && ifNotInUse(folder)(FileHelper.delete(folder.getAbsolutePath)) =>
+        logger.info(s"Evicted the NerDL training cache $folder")
+        total -= size
+        folder.getName
+    }.toSeq
+  }
+
+  private def acquire(folder: File): Unit = inUse.synchronized {
+    inUse.get(folder.getAbsolutePath) match {
+      case Some(cache) => cache.trainings += 1
+      case None =>
+        val channel = lockChannel(folder)
+        try {
+          val lock = channel.lock(0L, Long.MaxValue, true)
+          inUse(folder.getAbsolutePath) = new InUse(channel, lock, 1)
+        } catch {
+          case e: Throwable =>
+            channel.close()
+            throw e
+        }
+    }
+  }
+
+  private def release(folder: File): Unit = inUse.synchronized {
+    inUse.get(folder.getAbsolutePath).foreach { cache =>
+      cache.trainings -= 1
+      if (cache.trainings == 0) {
+        inUse.remove(folder.getAbsolutePath)
+        cache.lock.release()
+        cache.channel.close()
+      }
+    }
+  }
+
+  // Runs a block holding the exclusive lock of a cache, unless a JVM has it in use. The lock files
+  // of caches in use by this JVM are not opened, as closing another channel of the same file
+  // releases the locks of the whole process on some systems.
+  private def ifNotInUse(folder: File)(block: => Unit): Boolean = inUse.synchronized {
+    !inUse.contains(folder.getAbsolutePath) && {
+      val channel = lockChannel(folder)
+      try {
+        val lock =
+          try channel.tryLock()
+          catch { case _: OverlappingFileLockException => null }
+        lock != null && {
+          try block
+          finally lock.release()
+          true
+        }
+      } finally {
+        channel.close()
+      }
+    }
+  }
+
+  private def lockChannel(folder: File): FileChannel = {
+    val locks = new File(folder.getParentFile, locksFolder)
+    locks.mkdirs()
+    FileChannel.open(
+      new File(locks, s"${folder.getName}.lock").toPath,
+      StandardOpenOption.CREATE,
+      StandardOpenOption.READ,
+      StandardOpenOption.WRITE)
+  }
+
+  private def open(folder: File): Option[NerDLTrainingCache] = {
+    val params = new File(folder, paramsFile)
+    if (!params.isFile) None
+    else {
+      // the modification time of a cache folder records its last use
+      folder.setLastModified(System.currentTimeMillis())
+      val encoder = new NerDatasetEncoder(readParams(params))
+      Some(
+        new NerDLTrainingCache(
+          folder,
+          encoder,
+          TrainingShards.open(new File(folder, "train"), encodedSentenceCodec),
+          TrainingShards.open(new File(folder, "valid"), NerDLApproach.trainingShardCodec),
+          TrainingShards.open(new File(folder, "test"), NerDLApproach.trainingShardCodec)))
+    }
+  }
+
+  private def writeParams(params: DatasetEncoderParams, file: File): Unit = {
+    val output = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(file)))
+    try {
+      output.writeInt(params.tags.length)
+      params.tags.foreach(ShardCodec.writeString(_, output))
+      ShardCodec.writeInts(params.chars.map(_.toInt).toArray, output)
+      output.writeInt(params.embeddingsDim)
+      ShardCodec.writeString(params.defaultTag, output)
+    } finally output.close()
+  }
+
+  private def readParams(file: File): DatasetEncoderParams = {
+    val input = ByteBuffer.wrap(Files.readAllBytes(file.toPath))
+    val tags = List.fill(input.getInt())(ShardCodec.readString(input))
+    val chars = ShardCodec.readInts(input).map(_.toChar).toList
+    val embeddingsDim = input.getInt()
+    val defaultTag = ShardCodec.readString(input)
+    DatasetEncoderParams(
+      tags,
+      chars,
+      Array.fill(embeddingsDim)(0f).toList,
+      embeddingsDim,
+      defaultTag)
+  }
+
+  /** Codec of encoded training sentences, with embeddings as half precision floats */
+  val encodedSentenceCodec: ShardCodec[EncodedNerSentence] =
+    new ShardCodec[EncodedNerSentence] {
+
+      override def write(sentence: EncodedNerSentence, output: DataOutputStream): Unit = {
+        output.writeInt(sentence.length)
+        var i = 0
+        while (i < sentence.length) {
+          ShardCodec.writeInts(sentence.charIds(i), output)
+          ShardCodec.writeHalfs(sentence.wordEmbeddings(i), output)
+          output.writeBoolean(sentence.isWordStart(i))
+          output.writeInt(sentence.tagIds(i))
+          i += 1
+        }
+      }
+
+      override def read(input: ByteBuffer): EncodedNerSentence = {
+        val length = input.getInt()
+        val charIds = new Array[Array[Int]](length)
+        val wordEmbeddings = new Array[Array[Float]](length)
+        val isWordStart = new Array[Boolean](length)
+        val tagIds = new Array[Int](length)
+        var i = 0
+        while (i < length) {
+          charIds(i) = ShardCodec.readInts(input)
+          wordEmbeddings(i) = ShardCodec.readHalfs(input)
+          isWordStart(i) = input.get() != 0
+          tagIds(i) = input.getInt()
+          i += 1
+        }
+        new EncodedNerSentence(charIds, wordEmbeddings, isWordStart, tagIds)
+      }
+    }
+
+}
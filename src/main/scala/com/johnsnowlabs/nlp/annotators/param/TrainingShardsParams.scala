@@ -0,0 +1,98 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.annotators.param
+
+import com.johnsnowlabs.ml.util.TrainingShards
+import com.johnsnowlabs.util.FileHelper
+import org.apache.spark.ml.param._
+
+import java.io.File
+import java.nio.file.{Files, Paths}
+
+/** Parameters of the annotators that can spill their training data to local
+  * [[com.johnsnowlabs.ml.util.TrainingShards]] instead of collecting it to the driver.
+  */
+trait TrainingShardsParams extends Params {
+
+  /** Whether to spill the encoded training data to local shards once and read them on every
+    * epoch, instead of collecting the training data to the driver (Default: `false`)
+    *
+    * @group param
+    */
+  val spillTrainingData = new BooleanParam(
+    this,
+    "spillTrainingData",
+    "Whether to spill the encoded training data to local shards once and read them on every epoch, instead of collecting the training data to the driver")
+
+  /** Local folder the training shards are written into, a temporary folder by default. Shards
+    * are deleted once the training is finished.
+    *
+    * @group param
+    */
+  val shardsPath = new Param[String](
+    this,
+    "shardsPath",
+    "Local folder the training shards are written into, a temporary folder by default")
+
+  /** Maximum number of training records in a shard (Default: `10000`)
+    *
+    * @group param
+    */
+  val shardSize =
+    new IntParam(this, "shardSize", "Maximum number of training records in a shard")
+
+  /** @group setParam */
+  def setSpillTrainingData(value: Boolean): this.type = set(spillTrainingData, value)
+
+  /** @group setParam */
+  def setShardsPath(path: String): this.type = set(shardsPath, path)
+
+  /** @group setParam */
+  def setShardSize(value: Int): this.type = {
+    require(value > 0, "shardSize must be greater than 0")
+    set(shardSize, value)
+  }
+
+  /** @group getParam */
+  def getSpillTrainingData: Boolean = $(spillTrainingData)
+
+  /** @group getParam */
+  def getShardsPath: String = $(shardsPath)
+
+  /** @group getParam */
+  def getShardSize: Int = $(shardSize)
+
+  setDefault(
+    spillTrainingData -> false,
+    shardsPath -> "",
+    shardSize -> TrainingShards.defaultShardSize)
+
+  /** Runs a training with a new folder for its shards if the training data is spilled, and
+    * deletes the folder afterwards.
+    */
+  protected def withShardsFolder[T](training: Option[File] => T): T =
+    if (!$(spillTrainingData)) training(None)
+    else {
+      val parent =
+        if ($(shardsPath).isEmpty) Paths.get(System.getProperty("java.io.tmpdir"))
+        else Files.createDirectories(Paths.get($(shardsPath)))
+      val folder = Files.createTempDirectory(parent, "sparknlp_shards").toFile
+      try training(Some(folder))
+      finally FileHelper.delete(folder.getPath)
+    }
+
+}
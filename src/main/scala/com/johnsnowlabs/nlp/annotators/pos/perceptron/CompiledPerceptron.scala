@@ -0,0 +1,150 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.annotators.pos.perceptron
+
+/** [[AveragedPerceptron]] compiled for inference.
+  *
+  * Features are identified by a 64 bit hash of their key, which is computed from the parts of
+  * the key without building it, see [[CompiledPerceptron.hash]]. Their weights are kept in a
+  * dense matrix with a row per feature and a column per tag, so the scores of a word are the sum
+  * of the rows of its features. Weights and scores are kept as doubles, like in
+  * `AveragedPerceptron.predict`, so close scores are compared the same way.
+  *
+  * @param tags
+  *   Tags of the model in ascending order, ties are resolved in favour of the last one
+  * @param taggedWordBook
+  *   Non ambiguous words and their tags
+  * @param slots
+  *   Hashes of the features, in an open addressing table
+  * @param rows
+  *   Row of the weights of each slot, or -1 for empty slots
+  * @param weights
+  *   Weights of the features, row by row
+  */
+class CompiledPerceptron private (
+    val tags: Array[String],
+    val taggedWordBook: Map[String, String],
+    slots: Array[Long],
+    rows: Array[Int],
+    weights: Array[Double])
+    extends Serializable {
+
+  val numTags: Int = tags.length
+
+  private val mask = slots.length - 1
+
+  /** Row of the weights of a feature, or -1 if the model has no weights for it */
+  def row(featureHash: Long): Int = {
+    var slot = CompiledPerceptron.spread(featureHash) & mask
+    while (rows(slot) != -1 && slots(slot) != featureHash) slot = (slot + 1) & mask
+    rows(slot)
+  }
+
+  /** Adds the weights of a feature to the scores of a word, starting at `offset` */
+  def addWeights(featureHash: Long, scores: Array[Double], offset: Int): Unit = {
+    val featureRow = row(featureHash)
+    if (featureRow != -1) {
+      val start = featureRow * numTags
+      var tag = 0
+      while (tag < numTags) {
+        scores(offset + tag) += weights(start + tag)
+        tag += 1
+      }
+    }
+  }
+
+  /** Tag with the highest score among the scores of a word starting at `offset` */
+  def bestTag(scores: Array[Double], offset: Int): String = {
+    var best = 0
+    var tag = 1
+    while (tag < numTags) {
+      if (scores(offset + tag) >= scores(offset + best)) best = tag
+      tag += 1
+    }
+    tags(best)
+  }
+
+}
+
+object CompiledPerceptron {
+
+  private val offsetBasis = 0xcbf29ce484222325L
+  private val prime = 0x100000001b3L
+
+  /** Hash of the empty key, to be extended with [[hash]] */
+  val emptyHash: Long = offsetBasis
+
+  /** Extends the FNV-1a hash of a key with the characters of `value` in `[from, until)` */
+  def hash(keyHash: Long, value: String, from: Int, until: Int): Long = {
+    var h = keyHash
+    var i = from
+    while (i < until) {
+      h = (h ^ value.charAt(i)) * prime
+      i += 1
+    }
+    h
+  }
+
+  def hash(keyHash: Long, value: String): Long = hash(keyHash, value, 0, value.length)
+
+  def hash(keyHash: Long, value: Char): Long = (keyHash ^ value) * prime
+
+  def hash(key: String): Long = hash(emptyHash, key)
+
+  private def spread(featureHash: Long): Int = (featureHash ^ (featureHash >>> 32)).toInt
+
+  /** Compiles the weights of a model.
+    *
+    * @return
+    *   the compiled model, or None in the unlikely case two features of the model have the same
+    *   hash, for which the model has to be used as it is
+    */
+  def compile(model: AveragedPerceptron): Option[CompiledPerceptron] = {
+    val tags = model.tags.distinct.sorted
+    val tagIndex = tags.zipWithIndex.toMap
+    val features = model.featuresWeight.toArray
+
+    val capacity = Integer.highestOneBit(math.max(features.length, 1) * 2) * 2
+    val slots = new Array[Long](capacity)
+    val rows = Array.fill(capacity)(-1)
+    val weights = new Array[Double](features.length * tags.length)
+
+    var unique = true
+    var featureRow = 0
+    while (unique && featureRow < features.length) {
+      val (feature, featureWeights) = features(featureRow)
+      val featureHash = hash(feature)
+      var slot = spread(featureHash) & (capacity - 1)
+      while (rows(slot) != -1 && slots(slot) != featureHash) slot = (slot + 1) & (capacity - 1)
+      if (rows(slot) != -1) unique = false
+      else {
+        slots(slot) = featureHash
+        rows(slot) = featureRow
+        featureWeights.foreach { case (tag, weight) =>
+          tagIndex.get(tag).foreach { index =>
+            weights(featureRow * tags.length + index) = weight
+          }
+        }
+      }
+      featureRow += 1
+    }
+
+    if (unique) Some(new CompiledPerceptron(tags, model.taggedWordBook, slots, rows, weights))
+    else None
+  }
+
+}
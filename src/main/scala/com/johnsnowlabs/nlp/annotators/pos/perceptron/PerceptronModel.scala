@@ -19,7 +19,9 @@ package com.johnsnowlabs.nlp.annotators.pos.perceptron
 import com.johnsnowlabs.nlp.annotators.common._
 import com.johnsnowlabs.nlp.serialization.StructFeature
 import com.johnsnowlabs.nlp._
+import org.apache.spark.broadcast.Broadcast
 import org.apache.spark.ml.util.Identifiable
+import org.apache.spark.sql.Dataset
 
 /** Averaged Perceptron model to tag words part-of-speech. Sets a POS tag to each word within a
   * sentence.
@@ -28,6 +30,9 @@ import org.apache.spark.ml.util.Identifiable
   * [[com.johnsnowlabs.nlp.annotators.pos.perceptron.PerceptronApproach PerceptronApproach]]. For
   * training your own model, please see the documentation of that class.
   *
+  * The weights of the model are compiled for inference into a dense matrix indexed by hashed
+  * feature keys, see [[CompiledPerceptron]]. The saved model keeps its format.
+  *
   * Pretrained models can be loaded with `pretrained` of the companion object:
   * {{{
   * val posTagger = PerceptronModel.pretrained()
@@ -140,14 +145,51 @@ class PerceptronModel(override val uid: String)
   def getModel: AveragedPerceptron = $$(model)
 
   /** @group setParam */
-  def setModel(targetModel: AveragedPerceptron): this.type = set(model, targetModel)
+  def setModel(targetModel: AveragedPerceptron): this.type = {
+    compiledModel = None
+    localCompiledModel = null
+    set(model, targetModel)
+  }
+
+  /** Model compiled for inference, see [[CompiledPerceptron]], shipped once to the executors.
+    * Kept with the id of the application that broadcast it, as the broadcast can not be used
+    * once its SparkContext is stopped.
+    */
+  private var compiledModel: Option[(String, Broadcast[Option[CompiledPerceptron]])] = None
+
+  /** Model compiled for inference when annotating outside of a transformation, e.g. in a
+    * LightPipeline
+    */
+  @transient private var localCompiledModel: Option[CompiledPerceptron] = _
+
+  private def getCompiledModel: Option[CompiledPerceptron] =
+    compiledModel.map(_._2.value).getOrElse {
+      synchronized {
+        if (localCompiledModel == null)
+          localCompiledModel = CompiledPerceptron.compile($$(model))
+        localCompiledModel
+      }
+    }
+
+  override def beforeAnnotate(dataset: Dataset[_]): Dataset[_] = {
+    val sparkContext = dataset.sparkSession.sparkContext
+    if (!compiledModel.exists(_._1 == sparkContext.applicationId))
+      compiledModel = Some(
+        (
+          sparkContext.applicationId,
+          sparkContext.broadcast(CompiledPerceptron.compile($$(model)))))
+    dataset
+  }
 
   /** One to one annotation standing from the Tokens perspective, to give each word a
     * corresponding Tag
     */
   override def annotate(annotations: Seq[Annotation]): Seq[Annotation] = {
     val tokenizedSentences = TokenizedWithSentence.unpack(annotations)
-    val tagged = tag($$(model), tokenizedSentences.toArray)
+    val tagged = getCompiledModel match {
+      case Some(compiled) => tag(compiled, tokenizedSentences.toArray)
+      case None => tag($$(model), tokenizedSentences.toArray)
+    }
     PosTagged.pack(tagged)
   }
 }
@@ -59,4 +59,77 @@ trait PerceptronPredictionUtils extends PerceptronUtils {
       .map(TaggedSentence(_))
   }
 
+  /** Tags a group of sentences with a compiled model, giving the same tags as [[tag]]. The
+    * features of every word that do not depend on the previous tags are scored for the whole
+    * sentence first, the other ones while tagging it. Feature keys are hashed without building
+    * them and the scores of all the words share one buffer.
+    *
+    * @param tokenizedSentences
+    *   Sentence in the form of single word tokens
+    * @return
+    *   A list of sentences which have every word tagged
+    */
+  def tag(
+      model: CompiledPerceptron,
+      tokenizedSentences: Array[TokenizedSentence]): Array[TaggedSentence] = {
+    import CompiledPerceptron.hash
+
+    val numTags = model.numTags
+    val maxLength =
+      if (tokenizedSentences.isEmpty) 0 else tokenizedSentences.map(_.indexedTokens.length).max
+    val scores = new Array[Double](maxLength * numTags)
+
+    def suffixHash(keyHash: Long, word: String): Long =
+      hash(keyHash, word, math.max(0, word.length - 3), word.length)
+
+    var prev = START(0)
+    var prev2 = START(1)
+    tokenizedSentences
+      .map(sentence => {
+        val context: Array[String] = START ++: sentence.tokens.map(normalized) ++: END
+        val ambiguous = sentence.indexedTokens.map { token =>
+          model.taggedWordBook.get(token.token.toLowerCase).isEmpty
+        }
+        java.util.Arrays.fill(scores, 0, sentence.indexedTokens.length * numTags, 0.0)
+
+        // scores of the features that do not depend on the previous tags
+        sentence.indexedTokens.zipWithIndex.foreach { case (IndexedToken(word, _, _), i) =>
+          if (ambiguous(i)) {
+            val c = i + START.length
+            val offset = i * numTags
+            model.addWeights(biasKey, scores, offset)
+            model.addWeights(suffixHash(suffixKey, word), scores, offset)
+            model.addWeights(hash(pref1Key, word.head), scores, offset)
+            model.addWeights(hash(wordKey, context(c)), scores, offset)
+            model.addWeights(hash(prevWordKey, context(c - 1)), scores, offset)
+            model.addWeights(suffixHash(prevSuffixKey, context(c - 1)), scores, offset)
+            model.addWeights(hash(prev2WordKey, context(c - 2)), scores, offset)
+            model.addWeights(hash(nextWordKey, context(c + 1)), scores, offset)
+            model.addWeights(suffixHash(nextSuffixKey, context(c + 1)), scores, offset)
+            model.addWeights(hash(next2WordKey, context(c + 2)), scores, offset)
+          }
+        }
+
+        sentence.indexedTokens.zipWithIndex.map { case (IndexedToken(word, begin, end), i) =>
+          val tag =
+            if (!ambiguous(i)) model.taggedWordBook(word.toLowerCase)
+            else {
+              val offset = i * numTags
+              model.addWeights(hash(prevTagKey, prev), scores, offset)
+              model.addWeights(hash(prev2TagKey, prev2), scores, offset)
+              model.addWeights(hash(hash(hash(tagPairKey, prev), ' '), prev2), scores, offset)
+              model.addWeights(
+                hash(hash(hash(prevTagWordKey, prev), ' '), context(i + START.length)),
+                scores,
+                offset)
+              model.bestTag(scores, offset)
+            }
+          prev2 = prev
+          prev = tag
+          IndexedTaggedWord(word, tag, begin, end, None, Map("index" -> i.toString))
+        }
+      })
+      .map(TaggedSentence(_))
+  }
+
 }
@@ -23,6 +23,22 @@ trait PerceptronUtils {
   private[perceptron] val START = Array("-START-", "-START2-")
   private[perceptron] val END = Array("-END-", "-END2-")
 
+  // Hashes of the prefixes of the feature keys of getFeatures, for CompiledPerceptron
+  private[perceptron] val biasKey = CompiledPerceptron.hash("bias")
+  private[perceptron] val suffixKey = CompiledPerceptron.hash("i suffix ")
+  private[perceptron] val pref1Key = CompiledPerceptron.hash("i pref1 ")
+  private[perceptron] val prevTagKey = CompiledPerceptron.hash("i-1 tag ")
+  private[perceptron] val prev2TagKey = CompiledPerceptron.hash("i-2 tag ")
+  private[perceptron] val tagPairKey = CompiledPerceptron.hash("i tag+i-2 tag ")
+  private[perceptron] val wordKey = CompiledPerceptron.hash("i word ")
+  private[perceptron] val prevTagWordKey = CompiledPerceptron.hash("i-1 tag+i word ")
+  private[perceptron] val prevWordKey = CompiledPerceptron.hash("i-1 word ")
+  private[perceptron] val prevSuffixKey = CompiledPerceptron.hash("i-1 suffix ")
+  private[perceptron] val prev2WordKey = CompiledPerceptron.hash("i-2 word ")
+  private[perceptron] val nextWordKey = CompiledPerceptron.hash("i+1 word ")
+  private[perceptron] val nextSuffixKey = CompiledPerceptron.hash("i+1 suffix ")
+  private[perceptron] val next2WordKey = CompiledPerceptron.hash("i+2 word ")
+
   /** Specific normalization rules for this POS Tagger to avoid unnecessary tagging
     * @return
     */
@@ -22,6 +22,7 @@ import com.johnsnowlabs.ml.tensorflow.{
   TensorflowWrapper,
   WriteTensorflowModel
 }
+import com.johnsnowlabs.ml.tensorflow.sign.ModelSignatureManager
 import com.johnsnowlabs.ml.util.LoadExternalModel.{
   loadTextAsset,
   modelSanityCheck,
@@ -323,6 +324,25 @@ class GPT2Transformer(override val uid: String)
   /** @group getParam */
   def getNoRepeatNgramSize: Int = $(this.noRepeatNgramSize)
 
+  /** Whether to cache the keys and values of previous steps, so that every generated token only
+    * runs the last token through the model instead of the whole prefix (Default: `false`). Only
+    * models exported with a `past_key_values` input and a `present_key_values` output in their
+    * signatures support it, others log a warning and decode the whole prefix.
+    *
+    * @group param
+    */
+  val useCache =
+    new BooleanParam(parent = this, name = "useCache", doc = "Cache internal state of the model")
+
+  /** @group setParam */
+  def setUseCache(value: Boolean): GPT2Transformer.this.type = {
+    set(useCache, value)
+    this
+  }
+
+  /** @group getParam */
+  def getUseCache: Boolean = $(useCache)
+
   /** Optional Random seed for the model. Needs to be of type `Long`.
     *
     * @group param
@@ -394,6 +414,22 @@ class GPT2Transformer(override val uid: String)
   /** @group setParam */
   def setMerges(value: Map[(String, String), Int]): this.type = set(merges, value)
 
+  /** It contains TF model signatures for the loaded saved model
+    *
+    * @group param
+    */
+  val signatures =
+    new MapFeature[String, String](model = this, name = "signatures").setProtected()
+
+  /** @group setParam */
+  def setSignatures(value: Map[String, String]): this.type = {
+    set(signatures, value)
+    this
+  }
+
+  /** @group getParam */
+  def getSignatures: Option[Map[String, String]] = get(this.signatures)
+
   /** @group setParam */
   def setModelIfNotSet(spark: SparkSession, tfWrapper: TensorflowWrapper): this.type = {
     if (_tfModel.isEmpty) {
@@ -404,7 +440,11 @@ class GPT2Transformer(override val uid: String)
 
       _tfModel = Some(
         spark.sparkContext.broadcast(
-          new GPT2(tfWrapper, bpeTokenizer, configProtoBytes = getConfigProtoBytes)))
+          new GPT2(
+            tfWrapper,
+            bpeTokenizer,
+            configProtoBytes = getConfigProtoBytes,
+            signatures = getSignatures)))
     }
     this
   }
@@ -423,7 +463,8 @@ class GPT2Transformer(override val uid: String)
     repetitionPenalty -> 1.0,
     noRepeatNgramSize -> 3,
     ignoreTokenIds -> Array(),
-    batchSize -> 4)
+    batchSize -> 4,
+    useCache -> false)
 
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
@@ -456,7 +497,8 @@ class GPT2Transformer(override val uid: String)
         noRepeatNgramSize = $(noRepeatNgramSize),
         task = $(task),
         randomSeed = this.randomSeed,
-        ignoreTokenIds = $(ignoreTokenIds))
+        ignoreTokenIds = $(ignoreTokenIds),
+        useCache = $(useCache))
     } else {
       Seq()
     }
@@ -541,12 +583,15 @@ trait ReadGPT2TransformerDLModel extends ReadTensorflowModel {
 
     detectedEngine match {
       case TensorFlow.name =>
-        val (wrapper, _) =
+        val (wrapper, signatures) =
           TensorflowWrapper.read(
             localModelPath,
             zipped = false,
             useBundle = true,
-            tags = Array("serve"))
+            tags = Array("serve"),
+            signatureDefName = Some(ModelSignatureManager.DefaultSignatureDef))
+
+        signatures.foreach(annotatorModel.setSignatures)
 
         /** the order of setSignatures is important if we use getSignatures inside
           * setModelIfNotSet
@@ -0,0 +1,589 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.annotators.similarity
+
+import com.johnsnowlabs.util.FileHelper
+import org.apache.spark.scheduler.{SparkListener, SparkListenerApplicationEnd}
+import org.apache.spark.{SparkContext, SparkFiles}
+
+import java.io.{
+  BufferedOutputStream,
+  DataOutputStream,
+  File,
+  FileOutputStream,
+  IOException,
+  RandomAccessFile
+}
+import java.nio.channels.FileChannel
+import java.nio.file.{Files, StandardCopyOption}
+import java.nio.{ByteOrder, FloatBuffer, IntBuffer, MappedByteBuffer}
+import java.util.UUID
+import java.util.concurrent.ConcurrentHashMap
+import scala.collection.mutable
+import scala.util.Try
+
+/** Search of a hierarchical navigable small world (HNSW) graph, shared by the
+  * [[DocumentSimilarityIndex]] and the builder of its file.
+  *
+  * Nodes are the rows of the vectors. Each node is linked to its neighbours on every level up to
+  * its own, and upper levels hold exponentially fewer nodes, so a search walks greedily down the
+  * upper levels to the closest node it finds and then explores the neighbourhood of that node on
+  * the bottom level.
+  */
+private[similarity] trait HnswGraph {
+
+  def metric: String
+
+  def dimension: Int
+
+  protected def isEuclidean: Boolean = metric == DocumentSimilarityIndex.EUCLIDEAN
+
+  /** Value of a dimension of the vector of a node */
+  protected def value(node: Int, i: Int): Float
+
+  /** Nodes linked to a node on a level */
+  protected def neighbors(node: Int, level: Int): Array[Int]
+
+  /** Squared euclidean distance, or jaccard distance of the non-zero dimensions */
+  protected def distance(query: Array[Float], node: Int): Double = {
+    var i = 0
+    if (isEuclidean) {
+      var sum = 0.0
+      while (i < dimension) {
+        val diff = query(i) - value(node, i)
+        sum += diff * diff
+        i += 1
+      }
+      sum
+    } else {
+      var intersection = 0
+      var union = 0
+      while (i < dimension) {
+        val inQuery = query(i) != 0f
+        val inNode = value(node, i) != 0f
+        if (inQuery && inNode) intersection += 1
+        if (inQuery || inNode) union += 1
+        i += 1
+      }
+      if (union == 0) 0.0 else 1.0 - intersection.toDouble / union
+    }
+  }
+
+  /** Closest node to the query on a level, walking greedily from an entry node */
+  protected def greedyClosest(query: Array[Float], entry: Int, level: Int): Int = {
+    var closest = entry
+    var closestDistance = distance(query, entry)
+    var improved = true
+    while (improved) {
+      improved = false
+      neighbors(closest, level).foreach { neighbor =>
+        val neighborDistance = distance(query, neighbor)
+        if (neighborDistance < closestDistance) {
+          closest = neighbor
+          closestDistance = neighborDistance
+          improved = true
+        }
+      }
+    }
+    closest
+  }
+
+  /** The `ef` closest nodes to the query reachable on a level from the entry nodes.
+    *
+    * @return
+    *   Distances and nodes, sorted by distance
+    */
+  protected def searchLevel(
+      query: Array[Float],
+      entries: Seq[Int],
+      ef: Int,
+      level: Int): Array[(Double, Int)] = {
+    val visited = mutable.HashSet(entries: _*)
+    // min-heap of the nodes to explore, the closest one first
+    val candidates =
+      mutable.PriorityQueue.empty[(Double, Int)](Ordering.by[(Double, Int), Double](_._1).reverse)
+    // max-heap of the closest nodes found, so the farthest of them is evicted first
+    val results = mutable.PriorityQueue.empty[(Double, Int)](Ordering.by[(Double, Int), Double](_._1))
+
+    def offer(node: Int, nodeDistance: Double): Unit = {
+      candidates.enqueue((nodeDistance, node))
+      results.enqueue((nodeDistance, node))
+      if (results.size > ef) results.dequeue()
+    }
+
+    entries.foreach(entry => offer(entry, distance(query, entry)))
+    // stops when the closest node left to explore is farther than every node found
+    while (candidates.nonEmpty && candidates.head._1 <= results.head._1) {
+      val (_, node) = candidates.dequeue()
+      neighbors(node, level).foreach { neighbor =>
+        if (visited.add(neighbor)) {
+          val neighborDistance = distance(query, neighbor)
+          if (results.size < ef || neighborDistance < results.head._1)
+            offer(neighbor, neighborDistance)
+        }
+      }
+    }
+
+    results.dequeueAll.reverse.toArray
+  }
+
+}
+
+/** Approximate nearest neighbour index of the documents a [[DocumentSimilarityRankerModel]] was
+  * trained on, used to search the neighbours of documents the model has not seen.
+  *
+  * The index is an HNSW graph stored in a single little-endian file, which is memory mapped
+  * rather than loaded: opening it does not read the vectors, every task of a JVM shares the same
+  * pages through the OS page cache and a search only touches the nodes it visits. The file is
+  * kept next to the model when the model is saved, see [[DocumentSimilarityIndex.fileName]].
+  *
+  * The file has a header of `int` values `magic`, `version`, `metric` (`0` for euclidean, `1`
+  * for jaccard), `dimension`, `count`, `m`, `maxLevel`, `entryPoint` and `graphSize`, followed
+  * by:
+  *   - `int[count]` index of the document of each node
+  *   - `int[count]` the same indices, sorted
+  *   - `int[count]` offset of each node in the graph
+  *   - `int[graphSize]` graph: for each node its top level, then for each level from 0 up to it
+  *     the number of neighbours and the neighbours
+  *   - `float[count * dimension]` row-major matrix of the vectors
+  *
+  * @param path
+  *   File of the index
+  */
+class DocumentSimilarityIndex(val path: String) extends HnswGraph {
+
+  import DocumentSimilarityIndex._
+
+  private val file = new File(path)
+
+  private val header: MappedByteBuffer = map(file, 0L, HeaderBytes)
+
+  require(
+    header.getInt(0) == Magic && header.getInt(4) == FormatVersion,
+    s"$path is not a document similarity index")
+
+  val metric: String = if (header.getInt(8) == 0) EUCLIDEAN else JACCARD
+  val dimension: Int = header.getInt(12)
+  val size: Int = header.getInt(16)
+  private val maxLevel: Int = header.getInt(24)
+  private val entryPoint: Int = header.getInt(28)
+  private val graphSize: Int = header.getInt(32)
+
+  /** Ids, sorted ids, graph offsets and graph */
+  private val nodes: IntBuffer = {
+    val bytes = 4L * (3L * size + graphSize)
+    require(bytes <= Int.MaxValue, s"Graph of the document similarity index $path is too large")
+    map(file, HeaderBytes, bytes).asIntBuffer()
+  }
+
+  private val vectorsStart: Long = HeaderBytes + 4L * (3L * size + graphSize)
+  private val rowBytes: Long = 4L * dimension
+  private val rowsPerSegment: Int = math.max(1L, Int.MaxValue / math.max(rowBytes, 1L)).toInt
+
+  private val segments: Array[FloatBuffer] = {
+    require(
+      file.length() == vectorsStart + size * rowBytes,
+      s"Document similarity index $path is truncated")
+    (0 until size by rowsPerSegment).map { firstRow =>
+      val rows = math.min(rowsPerSegment, size - firstRow)
+      map(file, vectorsStart + firstRow * rowBytes, rows * rowBytes).asFloatBuffer()
+    }.toArray
+  }
+
+  /** Index of the document of a node */
+  private def id(node: Int): Int = nodes.get(node)
+
+  override protected def value(node: Int, i: Int): Float =
+    segments(node / rowsPerSegment).get((node % rowsPerSegment) * dimension + i)
+
+  override protected def neighbors(node: Int, level: Int): Array[Int] = {
+    var position = 3 * size + nodes.get(2 * size + node)
+    if (level > nodes.get(position)) Array.empty
+    else {
+      position += 1
+      var l = 0
+      while (l < level) {
+        position += 1 + nodes.get(position)
+        l += 1
+      }
+      val result = new Array[Int](nodes.get(position))
+      var i = 0
+      while (i < result.length) {
+        result(i) = nodes.get(position + 1 + i)
+        i += 1
+      }
+      result
+    }
+  }
+
+  /** Whether a document with this index is in the similarity index */
+  def contains(id: Int): Boolean = {
+    var low = 0
+    var high = size - 1
+    while (low <= high) {
+      val middle = (low + high) >>> 1
+      val sortedId = nodes.get(size + middle)
+      if (sortedId < id) low = middle + 1
+      else if (sortedId > id) high = middle - 1
+      else return true
+    }
+    false
+  }
+
+  /** Finds the closest documents to a vector.
+    *
+    * @param query
+    *   Vector to search the neighbours of
+    * @param k
+    *   Maximum number of neighbours to return
+    * @param excludeId
+    *   Index of a document to leave out of the results, such as the query itself
+    * @param ef
+    *   Number of candidates explored on the bottom level of the graph, raised to `k` if lower.
+    *   Higher values find the exact neighbours more often but visit more nodes
+    * @return
+    *   Indices and distances of the neighbours, sorted by distance
+    */
+  def search(
+      query: Array[Float],
+      k: Int,
+      excludeId: Option[Int] = None,
+      ef: Int = DefaultEfSearch): Array[(Int, Double)] = {
+    require(
+      query.length == dimension,
+      s"Query has ${query.length} dimensions but the similarity index has $dimension")
+
+    if (size == 0 || k <= 0) Array.empty
+    else {
+      var entry = entryPoint
+      var level = maxLevel
+      while (level > 0) {
+        entry = greedyClosest(query, entry, level)
+        level -= 1
+      }
+      searchLevel(query, Seq(entry), math.max(ef, k + excludeId.size), 0).iterator
+        .filterNot { case (_, node) => excludeId.contains(id(node)) }
+        .take(k)
+        .map { case (nodeDistance, node) =>
+          (id(node), if (isEuclidean) math.sqrt(nodeDistance) else nodeDistance)
+        }
+        .toArray
+    }
+  }
+
+}
+
+/** Builds the HNSW graph of a [[DocumentSimilarityIndex]] in memory, inserting the vectors one
+  * by one as in Malkov and Yashunin, "Efficient and robust approximate nearest neighbor search
+  * using Hierarchical Navigable Small World graphs".
+  */
+private[similarity] class HnswBuilder(
+    vectors: Array[Float],
+    count: Int,
+    val dimension: Int,
+    val metric: String,
+    m: Int,
+    efConstruction: Int,
+    seed: Long)
+    extends HnswGraph {
+
+  private val random = new scala.util.Random(seed)
+  private val levelFactor = 1.0 / math.log(math.max(m, 2))
+
+  /** Neighbours of each node on each of its levels */
+  val links: Array[Array[mutable.ArrayBuffer[Int]]] = new Array(count)
+  var entryPoint: Int = -1
+  var maxLevel: Int = -1
+
+  override protected def value(node: Int, i: Int): Float = vectors(node * dimension + i)
+
+  override protected def neighbors(node: Int, level: Int): Array[Int] =
+    if (level < links(node).length) links(node)(level).toArray else Array.empty
+
+  private def vector(node: Int): Array[Float] =
+    java.util.Arrays.copyOfRange(vectors, node * dimension, (node + 1) * dimension)
+
+  /** Bottom level nodes keep twice as many links, as recommended by the paper */
+  private def maxLinks(level: Int): Int = if (level == 0) 2 * m else m
+
+  def build(): this.type = {
+    (0 until count).foreach(insert)
+    this
+  }
+
+  private def insert(node: Int): Unit = {
+    val level = (-math.log(1.0 - random.nextDouble()) * levelFactor).toInt
+    links(node) = Array.fill(level + 1)(mutable.ArrayBuffer.empty[Int])
+
+    if (entryPoint == -1) {
+      entryPoint = node
+      maxLevel = level
+    } else {
+      val query = vector(node)
+      var entry = entryPoint
+      var l = maxLevel
+      while (l > level) {
+        entry = greedyClosest(query, entry, l)
+        l -= 1
+      }
+
+      var entries: Seq[Int] = Seq(entry)
+      l = math.min(level, maxLevel)
+      while (l >= 0) {
+        val found = searchLevel(query, entries, efConstruction, l)
+        val selected = selectNeighbors(found, m)
+        links(node)(l) ++= selected
+        selected.foreach(neighbor => link(neighbor, node, l))
+        entries = found.map(_._2)
+        l -= 1
+      }
+
+      if (level > maxLevel) {
+        entryPoint = node
+        maxLevel = level
+      }
+    }
+  }
+
+  /** Links a node back to a new neighbour, pruning its links if it has too many */
+  private def link(node: Int, neighbor: Int, level: Int): Unit = {
+    val nodeLinks = links(node)(level)
+    nodeLinks += neighbor
+    if (nodeLinks.length > maxLinks(level)) {
+      val nodeVector = vector(node)
+      val candidates = nodeLinks.map(other => (distance(nodeVector, other), other)).sortBy(_._1)
+      nodeLinks.clear()
+      nodeLinks ++= selectNeighbors(candidates.toArray, maxLinks(level))
+    }
+  }
+
+  /** Heuristic of the paper: keeps the candidates closer to the node than to every neighbour
+    * kept so far, so links spread in every direction rather than into a single cluster, then
+    * fills up with the closest of the pruned candidates.
+    *
+    * @param candidates
+    *   Distances to the node and candidates, sorted by distance
+    */
+  private def selectNeighbors(candidates: Array[(Double, Int)], wanted: Int): Array[Int] = {
+    val selected = mutable.ArrayBuffer.empty[Int]
+    val pruned = mutable.ArrayBuffer.empty[Int]
+    candidates.foreach { case (candidateDistance, candidate) =>
+      if (selected.length < wanted) {
+        val candidateVector = vector(candidate)
+        if (selected.forall(kept => distance(candidateVector, kept) > candidateDistance))
+          selected += candidate
+        else pruned += candidate
+      }
+    }
+    (selected ++ pruned.take(wanted - selected.length)).toArray
+  }
+
+}
+
+object DocumentSimilarityIndex {
+
+  val EUCLIDEAN = "euclidean"
+  val JACCARD = "jaccard"
+
+  /** Name of the index file in the folder of a saved model */
+  val fileName = "similarity_index.bin"
+
+  val DefaultM = 16
+  val DefaultEfConstruction = 100
+  val DefaultEfSearch = 64
+
+  private val Magic = 0x534e4857 // "WHNS", read little-endian
+  private val FormatVersion = 1
+  private val HeaderBytes = 4L * 9
+
+  private val indexes = new ConcurrentHashMap[String, DocumentSimilarityIndex]()
+  private val distributed = new ConcurrentHashMap[String, String]()
+
+  /** Distance used by the LSH family of a similarity method */
+  def metricFor(similarityMethod: String): String = similarityMethod match {
+    case "brp" => EUCLIDEAN
+    case "mh" => JACCARD
+    case other => throw new IllegalArgumentException(s"$other is not a valid value.")
+  }
+
+  /** Builds the HNSW graph of document vectors and writes it to an index file.
+    *
+    * @param rows
+    *   Index and vector of each document
+    * @param dimension
+    *   Number of dimensions of each vector
+    * @param metric
+    *   `"euclidean"` or `"jaccard"`
+    * @param destination
+    *   File to write the index to
+    * @param m
+    *   Number of neighbours each node is linked to on the upper levels, twice as many on the
+    *   bottom level
+    * @param efConstruction
+    *   Number of candidates explored to link each inserted node
+    * @param seed
+    *   Seed of the random levels of the nodes
+    */
+  def write(
+      rows: Seq[(Int, Array[Float])],
+      dimension: Int,
+      metric: String,
+      destination: String,
+      m: Int = DefaultM,
+      efConstruction: Int = DefaultEfConstruction,
+      seed: Long = 0L): Unit = {
+    require(Seq(EUCLIDEAN, JACCARD).contains(metric), s"$metric is not a valid value.")
+    val vectors = new Array[Float](rows.length * dimension)
+    rows.zipWithIndex.foreach { case ((_, vector), row) =>
+      require(
+        vector.length == dimension,
+        "Vectors of the similarity index must all have the index dimension")
+      System.arraycopy(vector, 0, vectors, row * dimension, dimension)
+    }
+    val ids = rows.map(_._1).toArray
+    val graph = new HnswBuilder(vectors, ids.length, dimension, metric, m, efConstruction, seed).build()
+
+    val offsets = new Array[Int](ids.length)
+    var graphSize = 0L
+    ids.indices.foreach { node =>
+      offsets(node) = graphSize.toInt
+      graphSize += 1 + graph.links(node).map(1 + _.length).sum
+    }
+    require(graphSize <= Int.MaxValue, "Graph of the document similarity index is too large")
+
+    val target = new File(destination)
+    Option(target.getAbsoluteFile.getParentFile).foreach(_.mkdirs())
+    val tmp = File.createTempFile("similarity_index", ".tmp", target.getAbsoluteFile.getParentFile)
+    val output = new DataOutputStream(new BufferedOutputStream(new FileOutputStream(tmp), 1 << 20))
+    def writeInt(value: Int): Unit = output.writeInt(Integer.reverseBytes(value))
+
+    try {
+      Seq(
+        Magic,
+        FormatVersion,
+        if (metric == EUCLIDEAN) 0 else 1,
+        dimension,
+        ids.length,
+        m,
+        graph.maxLevel,
+        graph.entryPoint,
+        graphSize.toInt).foreach(writeInt)
+      ids.foreach(writeInt)
+      ids.sorted.foreach(writeInt)
+      offsets.foreach(writeInt)
+      graph.links.foreach { levels =>
+        writeInt(levels.length - 1)
+        levels.foreach { neighbors =>
+          writeInt(neighbors.length)
+          neighbors.foreach(writeInt)
+        }
+      }
+      vectors.foreach(value => writeInt(java.lang.Float.floatToRawIntBits(value)))
+    } finally {
+      output.close()
+    }
+
+    Files.move(
+      tmp.toPath,
+      target.toPath,
+      StandardCopyOption.REPLACE_EXISTING,
+      StandardCopyOption.ATOMIC_MOVE)
+  }
+
+  /** Writes the index of document vectors to a temporary file, deleted when the JVM exits, and
+    * opens it. See [[write]] for the parameters.
+    */
+  def build(
+      rows: Seq[(Int, Array[Float])],
+      dimension: Int,
+      metric: String,
+      m: Int = DefaultM,
+      efConstruction: Int = DefaultEfConstruction,
+      seed: Long = 0L): DocumentSimilarityIndex = {
+    val folder = Files.createTempDirectory("sparknlp_similarity_index_").toFile
+    folder.deleteOnExit()
+    val file = new File(folder, fileName)
+    write(rows, dimension, metric, file.getAbsolutePath, m, efConstruction, seed)
+    file.deleteOnExit()
+    open(file.getAbsolutePath)
+  }
+
+  /** Opens an index file once per JVM, and again if the file was replaced */
+  def open(path: String): DocumentSimilarityIndex = {
+    val file = new File(path).getAbsoluteFile
+    indexes.computeIfAbsent(
+      s"${file.getPath}/${file.length()}/${file.lastModified()}",
+      _ => new DocumentSimilarityIndex(file.getPath))
+  }
+
+  /** Ships an index file to every executor of a cluster, once per SparkContext. Nothing is
+    * shipped in local mode, where the file is opened where it is.
+    *
+    * The file is shipped under a unique name from a staging folder, which is deleted when the
+    * application ends.
+    *
+    * @return
+    *   Name of the shipped file, to be passed to [[getOrOpen]] on the executors
+    */
+  def distribute(path: String, sparkContext: SparkContext): Option[String] =
+    if (sparkContext.isLocal) None
+    else {
+      val file = new File(path).getAbsoluteFile
+      val key = s"${sparkContext.applicationId}/${file.getPath}/${file.lastModified()}"
+      val name = distributed.computeIfAbsent(
+        key,
+        _ => {
+          val staging = Files.createTempDirectory("sparknlp_similarity_index_").toFile
+          sparkContext.addSparkListener(new SparkListener {
+            override def onApplicationEnd(applicationEnd: SparkListenerApplicationEnd): Unit =
+              FileHelper.delete(staging.getAbsolutePath)
+          })
+          val shipped = new File(staging, s"similarity_index_${UUID.randomUUID()}.bin")
+          try Files.createLink(shipped.toPath, file.toPath)
+          catch {
+            case _: IOException | _: UnsupportedOperationException =>
+              Files.copy(file.toPath, shipped.toPath, StandardCopyOption.REPLACE_EXISTING)
+          }
+          sparkContext.addFile(shipped.getAbsolutePath)
+          shipped.getName
+        })
+      Some(name)
+    }
+
+  /** Opens the index file shipped to this JVM under `shippedName` if it was shipped, otherwise
+    * the local file at `path` if it exists.
+    */
+  def getOrOpen(shippedName: Option[String], path: Option[String]): Option[DocumentSimilarityIndex] =
+    shippedName
+      .flatMap(name => Try(new File(SparkFiles.get(name))).toOption)
+      .filter(_.exists())
+      .map(_.getAbsolutePath)
+      .orElse(path.filter(new File(_).exists()))
+      .map(open)
+
+  private def map(file: File, position: Long, size: Long): MappedByteBuffer = {
+    val randomAccessFile = new RandomAccessFile(file, "r")
+    try {
+      val buffer = randomAccessFile.getChannel.map(FileChannel.MapMode.READ_ONLY, position, size)
+      buffer.order(ByteOrder.LITTLE_ENDIAN)
+      buffer
+    } finally {
+      randomAccessFile.close()
+    }
+  }
+
+}
@@ -8,8 +8,9 @@ import org.apache.spark.ml.functions.array_to_vector
 import org.apache.spark.ml.linalg.Vector
 import org.apache.spark.ml.param.{BooleanParam, Param}
 import org.apache.spark.ml.util.{DefaultParamsReadable, Identifiable}
-import org.apache.spark.sql.functions.{col, flatten, udf}
-import org.apache.spark.sql.{DataFrame, Dataset}
+import org.apache.spark.sql.expressions.Window
+import org.apache.spark.sql.functions.{col, collect_list, flatten, row_number, struct, udf}
+import org.apache.spark.sql.{DataFrame, Dataset, Row}
 
 import scala.util.hashing.MurmurHash3
 
@@ -233,6 +234,30 @@ class DocumentSimilarityRankerApproach(override val uid: String)
 
   def getAsRetrieverQuery: String = $(asRetrieverQuery)
 
+  /** Whether to build an approximate nearest neighbour index of the training documents, so that
+    * the model can rank documents it was not trained on and be searched with
+    * [[DocumentSimilarityRankerModel.search]] or [[com.johnsnowlabs.nlp.LightPipeline.search]]
+    * (Default: `false`).
+    *
+    * The index is an HNSW graph built on the driver from the vectors of all documents, which are
+    * collected there once. It is written to a file rather than to the params of the model: the
+    * file is saved as `similarity_index.bin` next to the model, memory mapped wherever the model
+    * is used and shipped to the executors of a cluster once per application. Distances are those
+    * of `similarityMethod`: euclidean for `brp` and jaccard for `mh`.
+    *
+    * @group param
+    */
+  val buildSearchIndex = new BooleanParam(
+    this,
+    "buildSearchIndex",
+    "Whether to build an HNSW index of the training documents to search them (Default: `false`)")
+
+  /** @group setParam */
+  def setBuildSearchIndex(value: Boolean): this.type = set(buildSearchIndex, value)
+
+  /** @group getParam */
+  def getBuildSearchIndex: Boolean = $(buildSearchIndex)
+
   setDefault(
     similarityMethod -> "brp",
     numberOfNeighbours -> 10,
@@ -240,12 +265,14 @@ class DocumentSimilarityRankerApproach(override val uid: String)
     numHashTables -> 3,
     visibleDistances -> false,
     identityRanking -> false,
-    asRetrieverQuery -> "")
+    asRetrieverQuery -> "",
+    buildSearchIndex -> false)
 
-  def getNeighborsResultSet(
-      query: (Int, Vector),
-      similarityDataset: DataFrame): NeighborsResultSet = {
+  private val QUERY_INDEX_COL_NAME = "queryIndex"
+
+  private val RANK_COL_NAME = "rank"
 
+  private def fitLsh(similarityDataset: DataFrame) = {
     val lsh = $(similarityMethod) match {
       case "brp" =>
         new BucketedRandomProjectionLSH()
@@ -262,7 +289,14 @@ class DocumentSimilarityRankerApproach(override val uid: String)
         throw new IllegalArgumentException(s"${$(similarityMethod)} is not a valid value.")
     }
 
-    val model = lsh.fit(similarityDataset)
+    lsh.fit(similarityDataset)
+  }
+
+  def getNeighborsResultSet(
+      query: (Int, Vector),
+      similarityDataset: DataFrame): NeighborsResultSet = {
+
+    val model = fitLsh(similarityDataset)
 
     query match {
       case (index, queryVector) =>
@@ -296,6 +330,78 @@ class DocumentSimilarityRankerApproach(override val uid: String)
     }
   }
 
+  /** Ranks the neighbours of all queries with a single distributed LSH self-join, keeping the
+    * `numberOfNeighbours` closest candidates of each query.
+    *
+    * @param queries
+    *   Indices and vectors of the documents to rank neighbours for
+    * @param similarityDataset
+    *   Indices and vectors of all documents
+    * @return
+    *   Neighbours of each query, sorted by distance. Queries without any candidate sharing a hash
+    *   bucket are left out
+    */
+  def getNeighborsMappings(
+      queries: DataFrame,
+      similarityDataset: DataFrame): Map[Int, NeighborAnnotation] = {
+
+    val model = fitLsh(similarityDataset)
+
+    val candidates = model
+      .approxSimilarityJoin(queries, similarityDataset, Double.MaxValue, DISTANCE)
+      .select(
+        col(s"datasetA.$INDEX_COL_NAME").as(QUERY_INDEX_COL_NAME),
+        col(s"datasetB.$INDEX_COL_NAME").as(INDEX_COL_NAME),
+        col(DISTANCE))
+
+    val rankedCandidates =
+      if (getIdentityRanking) candidates
+      else candidates.where(col(QUERY_INDEX_COL_NAME) =!= col(INDEX_COL_NAME))
+
+    val byDistance =
+      Window.partitionBy(QUERY_INDEX_COL_NAME).orderBy(col(DISTANCE), col(INDEX_COL_NAME))
+
+    rankedCandidates
+      .withColumn(RANK_COL_NAME, row_number().over(byDistance))
+      .where(col(RANK_COL_NAME) <= getNumberOfNeighbours)
+      .groupBy(QUERY_INDEX_COL_NAME)
+      .agg(collect_list(struct(RANK_COL_NAME, INDEX_COL_NAME, DISTANCE)).as("neighbors"))
+      .collect()
+      .map { row =>
+        val neighbors = row
+          .getSeq[Row](1)
+          .sortBy(_.getInt(0))
+          .map(neighbor => (neighbor.getInt(1), neighbor.getDouble(2)))
+          .toArray
+
+        val annotation: NeighborAnnotation =
+          if (getVisibleDistances) IndexedNeighborsWithDistance(neighbors)
+          else IndexedNeighbors(neighbors.map(_._1))
+
+        row.getInt(0) -> annotation
+      }
+      .toMap
+  }
+
+  /** Collects the vectors of all documents and writes them into an index file the model can
+    * search at query time
+    */
+  private def buildSimilarityIndex(indexedVectors: DataFrame): DocumentSimilarityIndex = {
+    val rows = indexedVectors.rdd
+      .map { x =>
+        val vector = x.getAs[Vector](LSH_INPUT_COL_NAME).toArray.map(_.toFloat)
+        (x.getAs[Int](INDEX_COL_NAME), vector)
+      }
+      .collect()
+      .toSeq
+    val dimension = rows.headOption.map(_._2.length).getOrElse(0)
+
+    DocumentSimilarityIndex.build(
+      rows,
+      dimension,
+      DocumentSimilarityIndex.metricFor($(similarityMethod)))
+  }
+
   override def train(
       embeddingsDataset: Dataset[_],
       recursivePipeline: Option[PipelineModel]): DocumentSimilarityRankerModel = {
@@ -309,34 +415,27 @@ class DocumentSimilarityRankerApproach(override val uid: String)
     val similarityDatasetWithHashIndex =
       similarityDataset.withColumn(INDEX_COL_NAME, mh3UDF(col(TEXT)))
 
-    val indexedVectorTuples = similarityDatasetWithHashIndex
+    val indexedVectors = similarityDatasetWithHashIndex
       .select(INDEX_COL_NAME, LSH_INPUT_COL_NAME)
-      .rdd
-      .map(x => (x.getAs[Int](INDEX_COL_NAME), x.getAs[Vector](LSH_INPUT_COL_NAME)))
-      .collect()
 
     val asRetrieverQuery = getAsRetrieverQuery
 
-    val similarityMappings: Map[Int, NeighborAnnotation] =
-      if (asRetrieverQuery.isEmpty)
-        indexedVectorTuples
-          .map(query => getNeighborsResultSet(query, similarityDatasetWithHashIndex))
-          .map(_.result)
-          .toMap
+    val queries =
+      if (asRetrieverQuery.isEmpty) indexedVectors
       else
         similarityDatasetWithHashIndex
-          .where(col("text") === asRetrieverQuery)
+          .where(col(TEXT) === asRetrieverQuery)
           .select(INDEX_COL_NAME, LSH_INPUT_COL_NAME)
-          .rdd
-          .map(x => (x.getAs[Int](INDEX_COL_NAME), x.getAs[Vector](LSH_INPUT_COL_NAME)))
-          .collect()
-          .map(asRetrieverQuery =>
-            getNeighborsResultSet(asRetrieverQuery, similarityDatasetWithHashIndex))
-          .map(_.result)
-          .toMap
-
-    new DocumentSimilarityRankerModel()
+
+    val similarityMappings = getNeighborsMappings(queries, indexedVectors)
+
+    val model = new DocumentSimilarityRankerModel()
       .setSimilarityMappings(Map("similarityMappings" -> similarityMappings))
+      .setNumberOfNeighbours(getNumberOfNeighbours)
+      .setVisibleDistances(getVisibleDistances)
+
+    if (getBuildSearchIndex) model.setSimilarityIndexPath(buildSimilarityIndex(indexedVectors).path)
+    else model
   }
 }
 
@@ -4,7 +4,14 @@ import com.johnsnowlabs.nlp.AnnotatorType.{DOC_SIMILARITY_RANKINGS, SENTENCE_EMB
 import com.johnsnowlabs.nlp.embeddings.HasEmbeddingsProperties
 import com.johnsnowlabs.nlp.serialization.MapFeature
 import com.johnsnowlabs.nlp._
+import org.apache.hadoop.fs.{FileSystem, Path}
+import org.apache.spark.ml.param.{BooleanParam, IntParam, ParamMap}
 import org.apache.spark.ml.util.Identifiable
+import org.apache.spark.sql.{Dataset, SparkSession}
+
+import java.io.File
+import java.nio.file.Files
+import scala.collection.JavaConverters._
 
 import scala.util.hashing.MurmurHash3
 
@@ -40,7 +47,123 @@ class DocumentSimilarityRankerModel(override val uid: String)
   def getSimilarityMappings: Map[Int, NeighborAnnotation] =
     $$(similarityMappings).getOrElse("similarityMappings", Map.empty)
 
-  setDefault(inputCols -> Array(SENTENCE_EMBEDDINGS), outputCol -> DOC_SIMILARITY_RANKINGS)
+  /** Local file of the [[DocumentSimilarityIndex]] of the documents the model was trained on,
+    * used to rank neighbours of documents that are not in [[similarityMappings]]. Only set for
+    * models trained with `buildSearchIndex`. The file is not a param: it is saved next to the
+    * model and memory mapped where the model is used.
+    */
+  private var similarityIndexPath: Option[String] = None
+
+  /** Name of the index file shipped to the executors of a cluster, see
+    * [[DocumentSimilarityIndex.distribute]]
+    */
+  private var shippedSimilarityIndex: Option[String] = None
+
+  /** Sets the file of the [[DocumentSimilarityIndex]] searched by this model
+    *
+    * @group setParam
+    */
+  def setSimilarityIndexPath(path: String): this.type = {
+    similarityIndexPath = Some(new File(path).getAbsolutePath)
+    shippedSimilarityIndex = None
+    this
+  }
+
+  /** @group getParam */
+  def getSimilarityIndexPath: Option[String] = similarityIndexPath
+
+  /** The similarity index of the model, opened once per JVM, if it has one
+    *
+    * @group getParam
+    */
+  def getSimilarityIndex: Option[DocumentSimilarityIndex] =
+    DocumentSimilarityIndex.getOrOpen(shippedSimilarityIndex, similarityIndexPath)
+
+  /** The number of neighbours returned for documents the model was not trained on (Default:
+    * `10`)
+    *
+    * @group param
+    */
+  val numberOfNeighbours = new IntParam(
+    this,
+    "numberOfNeighbours",
+    "The number of neighbours returned for documents the model was not trained on")
+
+  /** @group setParam */
+  def setNumberOfNeighbours(value: Int): this.type = set(numberOfNeighbours, value)
+
+  /** @group getParam */
+  def getNumberOfNeighbours: Int = $(numberOfNeighbours)
+
+  /** Whether to include distances in the rankings of documents the model was not trained on
+    * (Default: `false`)
+    *
+    * @group param
+    */
+  val visibleDistances = new BooleanParam(
+    this,
+    "visibleDistances",
+    "Whether to set visibleDistances in ranking output (Default: `false`)")
+
+  /** @group setParam */
+  def setVisibleDistances(value: Boolean): this.type = set(visibleDistances, value)
+
+  /** @group getParam */
+  def getVisibleDistances: Boolean = $(visibleDistances)
+
+  setDefault(
+    inputCols -> Array(SENTENCE_EMBEDDINGS),
+    outputCol -> DOC_SIMILARITY_RANKINGS,
+    numberOfNeighbours -> 10,
+    visibleDistances -> false)
+
+  override def copy(extra: ParamMap): DocumentSimilarityRankerModel = {
+    val copied = super.copy(extra)
+    copied.similarityIndexPath = similarityIndexPath
+    copied.shippedSimilarityIndex = shippedSimilarityIndex
+    copied
+  }
+
+  override def beforeAnnotate(dataset: Dataset[_]): Dataset[_] = {
+    similarityIndexPath.foreach { path =>
+      shippedSimilarityIndex =
+        DocumentSimilarityIndex.distribute(path, dataset.sparkSession.sparkContext)
+    }
+    dataset
+  }
+
+  override def onWrite(path: String, spark: SparkSession): Unit = {
+    super.onWrite(path, spark)
+    similarityIndexPath.foreach { indexPath =>
+      val fs = FileSystem.get(new Path(path).toUri, spark.sparkContext.hadoopConfiguration)
+      fs.copyFromLocalFile(
+        new Path(new File(indexPath).toURI),
+        new Path(path, DocumentSimilarityIndex.fileName))
+    }
+  }
+
+  /** Searches the documents the model was trained on for the closest ones to an embedding.
+    *
+    * @param embedding
+    *   Sentence embedding of the query
+    * @param k
+    *   Maximum number of neighbours to return
+    * @return
+    *   Indices and distances of the neighbours, sorted by distance
+    */
+  def search(embedding: Array[Float], k: Int): Array[(Int, Double)] = {
+    val index = getSimilarityIndex.getOrElse(
+      throw new IllegalStateException(
+        "This DocumentSimilarityRankerModel has no similarity index." +
+          " Train it with buildSearchIndex set to true to search it"))
+    index.search(embedding, k)
+  }
+
+  /** Java compliant version of [[search]], returning pairs of index and distance */
+  def searchJava(embedding: java.util.List[java.lang.Double], k: Int): Array[Array[Double]] =
+    search(embedding.asScala.map(_.floatValue()).toArray, k).map { case (index, distance) =>
+      Array(index.toDouble, distance)
+    }
 
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
@@ -56,7 +179,7 @@ class DocumentSimilarityRankerModel(override val uid: String)
       val inputResult = annotation.result
       val targetIndex = MurmurHash3.stringHash(inputResult, MurmurHash3.stringSeed)
       val neighborsAnnotation: NeighborAnnotation =
-        getSimilarityMappings.getOrElse(targetIndex, IndexedNeighbors(Array.empty)) // index NA
+        getSimilarityMappings.getOrElse(targetIndex, searchNeighbors(annotation, targetIndex))
 
       Annotation(
         annotatorType = outputAnnotatorType,
@@ -68,9 +191,47 @@ class DocumentSimilarityRankerModel(override val uid: String)
           + ("lshNeighbors" -> neighborsAnnotation.neighbors.mkString("[", ",", "]")),
         embeddings = annotation.embeddings)
     })
+
+  /** Ranks neighbours of a document the model was not trained on with the similarity index */
+  private def searchNeighbors(annotation: Annotation, targetIndex: Int): NeighborAnnotation =
+    getSimilarityIndex match {
+      case Some(index)
+          if !index.contains(targetIndex) && annotation.embeddings.length == index.dimension =>
+        val neighbors = index.search(annotation.embeddings, $(numberOfNeighbours))
+        if ($(visibleDistances)) IndexedNeighborsWithDistance(neighbors)
+        else IndexedNeighbors(neighbors.map(_._1))
+      case _ => IndexedNeighbors(Array.empty) // index NA
+    }
 }
 
 trait ReadableDocumentSimilarityRanker
-    extends ParamsAndFeaturesReadable[DocumentSimilarityRankerModel]
+    extends ParamsAndFeaturesReadable[DocumentSimilarityRankerModel] {
+
+  /** Opens the similarity index saved next to the model. Indices on the local file system are
+    * memory mapped where they are, other ones are copied to a local temporary folder first.
+    */
+  def readSimilarityIndex(
+      instance: DocumentSimilarityRankerModel,
+      path: String,
+      spark: SparkSession): Unit = {
+    val fs = FileSystem.get(new Path(path).toUri, spark.sparkContext.hadoopConfiguration)
+    val indexFile = fs.makeQualified(new Path(path, DocumentSimilarityIndex.fileName))
+    if (fs.exists(indexFile)) {
+      val localFile =
+        if (fs.getScheme == "file") new File(indexFile.toUri)
+        else {
+          val folder = Files.createTempDirectory("sparknlp_similarity_index_").toFile
+          folder.deleteOnExit()
+          val copied = new File(folder, DocumentSimilarityIndex.fileName)
+          fs.copyToLocalFile(indexFile, new Path(copied.toURI))
+          copied.deleteOnExit()
+          copied
+        }
+      instance.setSimilarityIndexPath(localFile.getAbsolutePath)
+    }
+  }
+
+  addReader(readSimilarityIndex)
+}
 
 object DocumentSimilarityRankerModel extends ReadableDocumentSimilarityRanker
@@ -49,6 +49,9 @@ import scala.collection.mutable
   * This is the instantiated model of the [[ContextSpellCheckerApproach]]. For training your own
   * model, please see the documentation of that class.
   *
+  * The sentences of `batchSize` rows are decoded together: every step of the Viterbi search
+  * scores the transitions of all of them with a single call to the language model.
+  *
   * Pretrained models can be loaded with `pretrained` of the companion object:
   * {{{
   * val spellChecker = ContextSpellCheckerModel.pretrained()
@@ -127,7 +130,7 @@ import scala.collection.mutable
   */
 class ContextSpellCheckerModel(override val uid: String)
     extends AnnotatorModel[ContextSpellCheckerModel]
-    with HasSimpleAnnotate[ContextSpellCheckerModel]
+    with HasBatchedAnnotate[ContextSpellCheckerModel]
     with WeightedLevenshtein
     with WriteTensorflowModel
     with ParamsAndFeaturesWritable
@@ -400,7 +403,8 @@ class ContextSpellCheckerModel(override val uid: String)
     useNewLines -> false,
     maxCandidates -> 6,
     maxWindowLen -> 5,
-    caseStrategy -> CandidateStrategy.ALL)
+    caseStrategy -> CandidateStrategy.ALL,
+    batchSize -> 16)
 
   // the scores for the EOS (end of sentence), and BOS (beginning of sentence)
   private val eosScore = .01
@@ -418,99 +422,117 @@ class ContextSpellCheckerModel(override val uid: String)
   }
 
   /* trellis goes like (label, weight, candidate)*/
-  def decodeViterbi(trellis: Array[Array[(String, Double, String)]]): (Array[String], Double) = {
-
-    // encode words with ids
-    val encTrellis = Array(Array(($$(vocabIds)("_BOS_"), bosScore, "_BOS_"))) ++
-      trellis.map(_.map { case (label, weight, cand) =>
-        // at this point we keep only those candidates that are in the vocabulary
-        ($$(vocabIds).get(label), weight, cand)
-      }.filter(_._1.isDefined).map { case (x, y, z) => (x.get, y, z) }) ++
-      Array(Array(($$(vocabIds)("_EOS_"), eosScore, "_EOS_")))
-
-    // init
-    var pathsIds = Array(Array($$(vocabIds)("_BOS_")))
-    var pathWords = Array(Array("_BOS_"))
-    var costs = Array(bosScore) // cost for each of the paths
-
-    for (i <- 1 until encTrellis.length if pathsIds.forall(_.nonEmpty)) {
-
-      var newPaths: Array[Array[Int]] = Array()
-      var newWords: Array[Array[String]] = Array()
-      var newCosts = Array[Double]()
-
-      /* compute all the costs for all transitions in current step */
-      val expPaths = pathsIds
-        .map { p =>
-          p :+ p.head
-        }
-        . // we need a placeholder, put the head.
-        map(_.takeRight($(maxWindowLen)))
-      val cids = expPaths.map(_.map { id =>
-        $$(classes).apply(id)._1
-      })
-      val cwids = expPaths.map(_.map { id =>
-        $$(classes).apply(id)._2
-      })
+  def decodeViterbi(trellis: Array[Array[(String, Double, String)]]): (Array[String], Double) =
+    decodeViterbi(Seq(trellis)).head
 
-      val candCids = encTrellis(i).map(_._1).map { id =>
-        $$(classes).apply(id)._1
-      }
-      val candWids = encTrellis(i).map(_._1).map { id =>
-        $$(classes).apply(id)._2
+  /** Decodes several trellises at once. They are advanced in lockstep, so every step scores the
+    * transitions of all the trellises with a single call to the language model, and the score of
+    * a candidate after a window of context is computed once per call to this method.
+    *
+    * @param trellises
+    *   candidates of each position of each trellis, as (label, weight, candidate)
+    * @return
+    *   the path with the lowest cost of each trellis, and its cost
+    */
+  def decodeViterbi(
+      trellises: Seq[Array[Array[(String, Double, String)]]]): Seq[(Array[String], Double)] = {
+    val vocab = $$(vocabIds)
+    val windowLen = $(maxWindowLen)
+    val tradeoffValue = getOrDefault(tradeoff)
+
+    // encode words with ids, at this point we keep only candidates that are in the vocabulary
+    val encTrellises = trellises.map { trellis =>
+      Array(Array((vocab("_BOS_"), bosScore, "_BOS_"))) ++
+        trellis.map(_.flatMap { case (label, weight, cand) =>
+          vocab.get(label).map(id => (id, weight, cand))
+        }) ++
+        Array(Array((vocab("_EOS_"), eosScore, "_EOS_")))
+    }.toArray
+
+    // a position without candidates leaves no path through the trellis
+    val decodable = encTrellises.map(_.forall(_.nonEmpty))
+    val costs = encTrellises.map(trellis => new Array[Array[Double]](trellis.length))
+    val backPointers = encTrellises.map(trellis => new Array[Array[Int]](trellis.length))
+    encTrellises.indices.foreach(t => costs(t)(0) = Array(bosScore))
+
+    // ids of the last words of the path ending in a state of a position
+    def window(t: Int, position: Int, state: Int): Array[Int] = {
+      val ids = new Array[Int](math.min(position + 1, windowLen))
+      var (pos, st) = (position, state)
+      for (k <- ids.indices.reverse) {
+        ids(k) = encTrellises(t)(pos)(st)._1
+        if (pos > 0) st = backPointers(t)(pos)(st)
+        pos -= 1
       }
-      val expPathsCosts_ = getModelIfNotSet
-        .predict_(
-          pathsIds.map(_.takeRight($(maxWindowLen))),
-          cids,
-          cwids,
-          candCids,
-          candWids,
-          configProtoBytes = getConfigProtoBytes)
-        .toArray
-
-      for { ((state, wcost, cand), idx) <- encTrellis(i).zipWithIndex } {
-        var minCost = Double.MaxValue
-        var minPath = Array[Int]()
-        var minWords = Array[String]()
-
-        val z = (pathsIds, costs, pathWords).zipped.toList
-
-        for (((path, pathCost, cands), pi) <- z.zipWithIndex) {
-          // compute cost to arrive to this 'state' coming from that 'path'
-          val mult = if (i > 1) costs.length else 0
-          val ppl_ = expPathsCosts_(encTrellis(i).size * pi + idx)
+      ids
+    }
 
-          val cost = pathCost + ppl_
-          logger.debug(s"${$$(idsVocab).apply(path.last)} -> $cand, $ppl_, $cost")
+    val scores = mutable.HashMap[Seq[Int], Float]()
+    val maxLength = if (encTrellises.isEmpty) 0 else encTrellises.map(_.length).max
+
+    for (i <- 1 until maxLength) {
+      val active = encTrellises.indices.filter(t => decodable(t) && encTrellises(t).length > i)
+      val windows = active.map { t =>
+        t -> costs(t)(i - 1).indices.map(state => window(t, i - 1, state)).toArray
+      }.toMap
+
+      /* compute the costs of all the transitions of this step not scored yet */
+      val pending = (for {
+        t <- active
+        path <- windows(t)
+        (cand, _, _) <- encTrellises(t)(i)
+      } yield (path :+ cand).toSeq).distinct.filterNot(scores.contains)
+
+      pending.groupBy(_.length).values.foreach { sequences =>
+        val dataset = sequences.map(_.toArray).toArray
+        val losses = getModelIfNotSet.predictLastWord(
+          dataset,
+          dataset.map(_.map(id => $$(classes).apply(id)._1)),
+          dataset.map(_.map(id => $$(classes).apply(id)._2)),
+          configProtoBytes = getConfigProtoBytes)
+        sequences.zip(losses).foreach { case (sequence, loss) => scores(sequence) = loss }
+      }
 
-          if (cost < minCost) {
-            minCost = cost
-            minPath = path :+ state
-            minWords = cands :+ cand
+      for (t <- active) {
+        val pathCosts = costs(t)(i - 1)
+        val stepCosts = new Array[Double](encTrellises(t)(i).length)
+        val stepPointers = new Array[Int](encTrellises(t)(i).length)
+
+        for (((state, wcost, _), idx) <- encTrellises(t)(i).zipWithIndex) {
+          // compute cost to arrive to this 'state' coming from each path, keep the cheapest
+          var minCost = Double.MaxValue
+          var minPath = 0
+          for (pi <- pathCosts.indices) {
+            val cost = pathCosts(pi) + scores((windows(t)(pi) :+ state).toSeq)
+            if (cost < minCost) {
+              minCost = cost
+              minPath = pi
+            }
           }
+          stepCosts(idx) = minCost + wcost * tradeoffValue
+          stepPointers(idx) = minPath
         }
-        newPaths = newPaths :+ minPath
-        newWords = newWords :+ minWords
-        newCosts = newCosts :+ minCost + wcost * getOrDefault(tradeoff)
+        costs(t)(i) = stepCosts
+        backPointers(t)(i) = stepPointers
       }
-      pathsIds = newPaths
-      pathWords = newWords
-      costs = newCosts
+    }
 
-      // log paths and costs
-      pathWords.zip(costs).foreach { case (path, cost) =>
-        logger.debug(s"${path.toList}, $cost")
+    // return the path with the lowest cost, and the cost
+    encTrellises.indices.map { t =>
+      if (!decodable(t)) (Array.empty[String], Double.MaxValue)
+      else {
+        val last = encTrellises(t).length - 1
+        val (minCost, minState) = costs(t)(last).zipWithIndex.minBy(_._1)
+        val words = new Array[String](encTrellises(t).length)
+        var state = minState
+        for (pos <- last to 0 by -1) {
+          words(pos) = encTrellises(t)(pos)(state)._3
+          if (pos > 0) state = backPointers(t)(pos)(state)
+        }
+        logger.debug(s"${words.toList}, $minCost")
+        (words.tail.dropRight(1), minCost)
       }
-
     }
-    // return the path with the lowest cost, and the cost
-    val (minPath, minCost) = pathWords.zip(costs).minBy(_._2)
-
-    if (minPath.nonEmpty)
-      (minPath.tail.dropRight(1), minCost)
-    else
-      (minPath, minCost)
   }
 
   def getClassCandidates(
@@ -590,48 +612,58 @@ class ContextSpellCheckerModel(override val uid: String)
     dataset
   }
 
-  /** takes a document and annotations and produces new annotations of this annotator's annotation
-    * type
+  /** Corrects the tokens of a batch of rows. The sentences of all the rows are decoded together,
+    * see [[decodeViterbi]].
     *
-    * @param annotations
-    *   Annotations that correspond to inputAnnotationCols generated by previous annotators if any
+    * @param batchedAnnotations
+    *   Annotations in batches that correspond to inputAnnotationCols generated by previous
+    *   annotators if any
     * @return
-    *   any number of annotations processed for every input annotation. Not necessary one to one
-    *   relationship
+    *   the corrected tokens of every row of the batch
     */
-  override def annotate(annotations: Seq[Annotation]): Seq[Annotation] = {
-    val decodedSentPaths =
-      annotations.groupBy(_.metadata.getOrElse("sentence", "0").toInt).mapValues { sentTokens =>
-        val (decodedPath, cost) = toOption(getOrDefault(useNewLines))
-          .map { _ =>
-            val idxs = Seq(-1) ++ sentTokens.zipWithIndex
-              .filter { case (a, _) =>
-                a.result.equals(System.lineSeparator) || a.result.equals(System.lineSeparator * 2)
-              }
-              .map(_._2) ++ Seq(annotations.length)
-            idxs
-              .zip(idxs.tail)
-              .map { case (s, e) =>
-                decodeViterbi(
-                  computeTrellis(
-                    sentTokens.slice(s + 1, e),
-                    computeMask(sentTokens.slice(s + 1, e))))
-              }
-              .reduceLeft[(Array[String], Double)]({ case ((dPathA, pCostA), (dPathB, pCostB)) =>
-                (dPathA ++ Seq(System.lineSeparator) ++ dPathB, pCostA + pCostB)
-              })
-          }
-          .getOrElse(decodeViterbi(computeTrellis(sentTokens, computeMask(sentTokens))))
-        // ToDo: This is a backup plan for empty DecodedPath -- fix me!!
-        if (decodedPath.nonEmpty)
-          sentTokens.zip(decodedPath).map { case (orig, correct) =>
-            orig.copy(result = correct, metadata = orig.metadata.updated("cost", cost.toString))
-          }
-        else
-          sentTokens.map(orig => orig.copy(metadata = orig.metadata.updated("cost", "0")))
-      }
+  override def batchAnnotate(batchedAnnotations: Seq[Array[Annotation]]): Seq[Seq[Annotation]] = {
+    // sentences of each row, split into segments at new lines if requested
+    val rows = batchedAnnotations.map { annotations =>
+      annotations.toSeq
+        .groupBy(_.metadata.getOrElse("sentence", "0").toInt)
+        .toList
+        .reverse
+        .map { case (_, sentTokens) =>
+          val segments = toOption(getOrDefault(useNewLines))
+            .map { _ =>
+              val idxs = Seq(-1) ++ sentTokens.zipWithIndex
+                .filter { case (a, _) =>
+                  a.result.equals(System.lineSeparator) ||
+                  a.result.equals(System.lineSeparator * 2)
+                }
+                .map(_._2) ++ Seq(annotations.length)
+              idxs.zip(idxs.tail).map { case (s, e) => sentTokens.slice(s + 1, e) }
+            }
+            .getOrElse(Seq(sentTokens))
+          (sentTokens, segments)
+        }
+    }
 
-    decodedSentPaths.values.toList.reverse.flatten
+    val segments = rows.flatMap(_.flatMap(_._2))
+    val decoded = decodeViterbi(
+      segments.zip(computeMask(segments)).map { case (segment, mask) =>
+        computeTrellis(segment, mask)
+      }).iterator
+
+    rows.map(_.flatMap { case (sentTokens, sentSegments) =>
+      val (decodedPath, cost) = sentSegments
+        .map(_ => decoded.next())
+        .reduceLeft[(Array[String], Double)]({ case ((dPathA, pCostA), (dPathB, pCostB)) =>
+          (dPathA ++ Seq(System.lineSeparator) ++ dPathB, pCostA + pCostB)
+        })
+      // ToDo: This is a backup plan for empty DecodedPath -- fix me!!
+      if (decodedPath.nonEmpty)
+        sentTokens.zip(decodedPath).map { case (orig, correct) =>
+          orig.copy(result = correct, metadata = orig.metadata.updated("cost", cost.toString))
+        }
+      else
+        sentTokens.map(orig => orig.copy(metadata = orig.metadata.updated("cost", "0")))
+    })
   }
 
   def toOption(boolean: Boolean): Option[Boolean] = {
@@ -647,40 +679,55 @@ class ContextSpellCheckerModel(override val uid: String)
    *
    * two causes for a word to need correction, 1. high perplexity or 2. out of vocabulary
    * */
-  def computeMask(annotations: Seq[Annotation]): Array[Boolean] = {
+  def computeMask(annotations: Seq[Annotation]): Array[Boolean] =
+    computeMask(Seq(annotations)).head
+
+  /* computes the masks of several sentences, scoring sentences of the same length together */
+  def computeMask(sentences: Seq[Seq[Annotation]]): Seq[Array[Boolean]] = {
     val threshold = getOrDefault(errorThreshold)
     val unkCode = $$(vocabIds).get("_UNK_").get
 
     /* try to decide whether words need correction or not */
     // first pass - perplexities
-    val encodedSent = Array($$(vocabIds)("_BOS_")) ++ annotations.map { ann =>
-      if ($(compareLowcase))
-        $$(vocabIds)
-          .get(ann.result)
-          .getOrElse($$(vocabIds).get(ann.result.toLowerCase).getOrElse(unkCode))
-      else
-        $$(vocabIds).get(ann.result).getOrElse(unkCode)
-    } ++ Array($$(vocabIds)("_EOS_"))
-
-    val cids = encodedSent.map { id =>
-      $$(classes).apply(id)._1
-    }
-    val cwids = encodedSent.map { id =>
-      $$(classes).apply(id)._2
+    val encodedSents = sentences.map { annotations =>
+      Array($$(vocabIds)("_BOS_")) ++ annotations.map { ann =>
+        if ($(compareLowcase))
+          $$(vocabIds)
+            .get(ann.result)
+            .getOrElse($$(vocabIds).get(ann.result.toLowerCase).getOrElse(unkCode))
+        else
+          $$(vocabIds).get(ann.result).getOrElse(unkCode)
+      } ++ Array($$(vocabIds)("_EOS_"))
     }
 
-    val perplexities = getModelIfNotSet
-      .pplEachWord(Array(encodedSent), Array(cids), Array(cwids))
-      .map(_ > threshold)
+    val perplexities = new Array[Array[Boolean]](encodedSents.length)
+    encodedSents.indices.groupBy(encodedSents(_).length).values.foreach { group =>
+      val dataset = group.map(encodedSents).toArray
+      val cids = dataset.map(_.map { id =>
+        $$(classes).apply(id)._1
+      })
+      val cwids = dataset.map(_.map { id =>
+        $$(classes).apply(id)._2
+      })
+      val width = dataset.head.length
+      getModelIfNotSet
+        .pplEachWord(dataset, cids, cwids, configProtoBytes = getConfigProtoBytes)
+        .grouped(width - 1)
+        .zip(group.iterator)
+        .foreach { case (sentPerplexities, index) =>
+          perplexities(index) = sentPerplexities.map(_ > threshold)
+        }
+    }
 
-    perplexities
-      .zip(perplexities.tail)
-      .zip(encodedSent.tail)
-      .
+    encodedSents.zip(perplexities).map { case (encodedSent, sentPerplexities) =>
       // if the word to the right needs correction, this word needs it too and is word in vocabulary ?
-      map { case ((needCorrection, nextNeedCorrection), code) =>
-        if (nextNeedCorrection) true else needCorrection || code == unkCode
-      }
+      sentPerplexities
+        .zip(sentPerplexities.tail)
+        .zip(encodedSent.tail)
+        .map { case ((needCorrection, nextNeedCorrection), code) =>
+          if (nextNeedCorrection) true else needCorrection || code == unkCode
+        }
+    }
   }
 
   def computeTrellis(annotations: Seq[Annotation], mask: Seq[Boolean]) = {
@@ -17,6 +17,7 @@
 package com.johnsnowlabs.nlp.annotators.tokenizer.bpe
 
 import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, Sentence, TokenPiece}
+import com.johnsnowlabs.nlp.util.{LruMap, WeakKeyRegistry}
 import org.apache.commons.lang3.StringUtils
 
 import scala.collection.mutable
@@ -56,8 +57,41 @@ private[nlp] abstract class BpeTokenizer(
   protected def getBpeRanking: ((String, String)) => Int =
     (bytePair: (String, String)) => bpeRanks.getOrElse(bytePair, Integer.MAX_VALUE)
 
-  /** cache for already encoded tokens */
-  protected val cache: mutable.Map[String, Array[String]] = mutable.Map()
+  /** Maximum number of words whose merges are cached */
+  protected def cacheSize: Int = BpeTokenizer.defaultCacheSize
+
+  /** Thread safe cache of the merged subwords of already encoded words. It is shared by all
+    * tokenizers of the same type and merges in the JVM, so it survives tokenizers created per
+    * batch.
+    */
+  protected val cache: LruMap[String, Array[String]] =
+    BpeTokenizer.sharedCache(getClass.getName, merges, cacheSize)
+
+  /** Encodes words so that their merges are cached before tokenizing, e.g. the most frequent
+    * words of a vocabulary.
+    *
+    * @param words
+    *   Words sorted by decreasing frequency. Only as many as fit in the cache are encoded
+    */
+  def warmCache(words: Seq[String]): Unit = {
+    // Encoding the least frequent words first leaves the most frequent ones as the most recent
+    words.take(cacheSize).reverseIterator.foreach { word =>
+      if (!specialTokens.contains(word)) bpe(IndexedToken(word, 0, word.length - 1))
+    }
+  }
+
+  /** Number of encoded words whose merges were found in the cache */
+  def getCacheHits: Long = cache.getHits
+
+  /** Number of encoded words whose merges had to be computed */
+  def getCacheMisses: Long = cache.getMisses
+
+  /** Fraction of encoded words whose merges were found in the cache */
+  def getCacheHitRate: Double = {
+    val hits = cache.getHits
+    val lookups = hits + cache.getMisses
+    if (lookups == 0) 0.0 else hits.toDouble / lookups
+  }
 
   /** Create a sequence of byte-pairs of the word */
   protected def getBytePairs(word: Array[String]): Array[(String, String)] = {
@@ -163,17 +197,7 @@ private[nlp] abstract class BpeTokenizer(
     var processedToken = ""
     try {
       processedToken = preProcessTokenForBpe(indToken.token)
-      // TODO: Caching
-      var word: Array[String] = Array[String]()
-      // split the word into characters, to be combined into subwords
-      word = processedToken.map(_.toString).toArray
-      val pairs: Array[(String, String)] = getBytePairs(word)
-
-      if (pairs.isEmpty)
-        word = Array(processedToken)
-      else
-        word = performMerges(word, pairs)
-
+      val word = cache.getOrElseUpdate(processedToken, mergeWord(processedToken))
       getTokenPieces(indToken, word)
     } catch {
       case _: java.util.NoSuchElementException =>
@@ -188,6 +212,18 @@ private[nlp] abstract class BpeTokenizer(
     }
   }
 
+  /** Splits a preprocessed token into subwords of the vocabulary. The result is cached, so it
+    * must only depend on the token and the merges.
+    */
+  protected def mergeWord(processedToken: String): Array[String] = {
+    // split the word into characters, to be combined into subwords
+    val word = processedToken.map(_.toString).toArray
+    val pairs: Array[(String, String)] = getBytePairs(word)
+
+    if (pairs.isEmpty) Array(processedToken)
+    else performMerges(word, pairs)
+  }
+
   /** Split the the individual sub texts on special tokens, e.g. masking etc. */
   protected def splitOnSpecialToken(
       specialToken: SpecialToken,
@@ -312,6 +348,24 @@ private[nlp] abstract class BpeTokenizer(
 }
 
 object BpeTokenizer {
+
+  /** Default maximum number of words whose merges are cached per tokenizer type and merges */
+  val defaultCacheSize: Int = 50000
+
+  // Caches by tokenizer type, released with the merges of unloaded models
+  private val cachesByMerges =
+    new WeakKeyRegistry[Map[(String, String), Int], LruMap[String, Array[String]]]()
+
+  /** Cache of merged subwords shared by the tokenizers of a type that use the same merges */
+  private[bpe] def sharedCache(
+      tokenizerType: String,
+      merges: Map[(String, String), Int],
+      cacheSize: Int): LruMap[String, Array[String]] =
+    cachesByMerges.getOrElseUpdate(
+      merges,
+      tokenizerType,
+      new LruMap[String, Array[String]](cacheSize))
+
   def forModel(
       modelType: String,
       merges: Map[(String, String), Int],
@@ -16,7 +16,7 @@
 
 package com.johnsnowlabs.nlp.annotators.tokenizer.bpe
 
-import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, TokenPiece}
+import com.johnsnowlabs.nlp.annotators.common.IndexedToken
 
 import scala.util.matching.Regex
 
@@ -42,37 +42,19 @@ class CLIPTokenizer(
   /** CLIP Specific tokenization. We append "<\w>" to word ends.
     *
     * @return
-    *   Array of TokenPieces, corresponding to encoded token
+    *   Subwords of the token
     */
-  override protected def bpe(indToken: IndexedToken): Array[TokenPiece] = {
-    var processedToken = ""
-    try {
-      processedToken = preProcessTokenForBpe(indToken.token)
+  override protected def mergeWord(processedToken: String): Array[String] = {
+    // split the word into characters, to be combined into subwords
+    val word = processedToken.map(_.toString).toArray
+    val pairs: Array[(String, String)] = getBytePairs(word)
 
-      var word: Array[String] = Array[String]()
-      // split the word into characters, to be combined into subwords
-      word = processedToken.map(_.toString).toArray
-      val pairs: Array[(String, String)] = getBytePairs(word)
-
-      if (pairs.isEmpty)
-        word = Array(processedToken + wordEnding)
-      else {
-        word.update(word.length - 1, word.last + wordEnding)
-        pairs.update(pairs.length - 1, (pairs.last._1, pairs.last._2 + wordEnding))
-        word = performMerges(word, pairs)
-      }
-
-      getTokenPieces(indToken, word)
-    } catch {
-      case _: java.util.NoSuchElementException =>
-        Array(
-          TokenPiece(
-            indToken.token,
-            indToken.token,
-            specialTokens.unk.id,
-            isWordStart = true,
-            indToken.begin,
-            indToken.end))
+    if (pairs.isEmpty)
+      Array(processedToken + wordEnding)
+    else {
+      word.update(word.length - 1, word.last + wordEnding)
+      pairs.update(pairs.length - 1, (pairs.last._1, pairs.last._2 + wordEnding))
+      performMerges(word, pairs)
     }
   }
 
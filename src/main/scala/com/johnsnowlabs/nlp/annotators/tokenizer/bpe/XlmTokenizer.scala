@@ -16,7 +16,7 @@
 
 package com.johnsnowlabs.nlp.annotators.tokenizer.bpe
 
-import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, TokenPiece}
+import com.johnsnowlabs.nlp.annotators.common.IndexedToken
 import com.johnsnowlabs.nlp.annotators.tokenizer.moses.MosesTokenizer
 import com.johnsnowlabs.nlp.annotators.tokenizer.normalizer.MosesPunctNormalizer
 
@@ -96,12 +96,9 @@ private[nlp] class XlmTokenizer(
 
   override val suffixForPieceId: Option[String] = Some("</w>")
 
-  override def bpe(indToken: IndexedToken): Array[TokenPiece] = {
-    val processedToken = preProcessTokenForBpe(indToken.token)
-
-    var word: Array[String] = Array[String]()
+  override protected def mergeWord(processedToken: String): Array[String] = {
     // split the word into characters, to be combined into subwords
-    word = processedToken.map(_.toString).toArray
+    var word = processedToken.map(_.toString).toArray
     val pairs: Array[(String, String)] = getBytePairs(word)
 
     // XLM Specific: append word end indicator
@@ -118,6 +115,6 @@ private[nlp] class XlmTokenizer(
       word = word.map(_.replace("</w>", ""))
     }
 
-    getTokenPieces(indToken, word)
+    word
   }
 }
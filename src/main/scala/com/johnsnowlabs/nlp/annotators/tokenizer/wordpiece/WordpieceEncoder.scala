@@ -17,9 +17,17 @@
 package com.johnsnowlabs.nlp.annotators.tokenizer.wordpiece
 
 import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, TokenPiece}
+import com.johnsnowlabs.nlp.util.{LruMap, WeakKeyRegistry}
 
-import scala.collection.mutable.ArrayBuffer
+import scala.collection.mutable
 
+/** Greedy longest-match-first WordPiece encoder.
+  *
+  * Pieces are matched by walking a trie of the vocabulary over the characters of the word, so
+  * each piece is found in a single pass instead of probing the vocabulary with every shorter
+  * substring. The trie and a cache of the pieces of frequent words are built once per vocabulary
+  * and shared by every encoder using it.
+  */
 private[johnsnowlabs] class WordpieceEncoder(
     vocabulary: Map[String, Int],
     unkToken: String = "[UNK]",
@@ -28,46 +36,169 @@ private[johnsnowlabs] class WordpieceEncoder(
 
   require(vocabulary.contains(unkToken), "token " + unkToken + " not found in vocabulary")
 
+  private val unkId: Int = vocabulary(unkToken)
+
+  private val trie: WordpieceEncoder.WordpieceTrie =
+    WordpieceEncoder.sharedTrie(vocabulary, partPrefix)
+
   def encode(token: IndexedToken): Array[TokenPiece] = {
-    val unkId = vocabulary(unkToken)
+    val text = token.token
 
-    if (token.token.length > maxInputCharsPerWord)
-      return Array(
-        TokenPiece(unkToken, token.token, unkId, isWordStart = true, token.begin, token.end))
+    val matches =
+      if (text.length > maxInputCharsPerWord) None
+      else trie.cache.getOrElseUpdate(text, trie.matchPieces(text))
 
-    val result = ArrayBuffer[TokenPiece]()
+    matches match {
+      case Some(pieces) =>
+        val result = new Array[TokenPiece](pieces.length / 2)
+        var start = 0
+        var i = 0
+        while (i < result.length) {
+          val node = pieces(2 * i)
+          val end = pieces(2 * i + 1)
+          result(i) = TokenPiece(
+            trie.pieces(node),
+            text,
+            trie.ids(node),
+            start == 0,
+            token.begin + start,
+            token.begin + end - 1)
+          start = end
+          i += 1
+        }
+        result
+      case None =>
+        Array(TokenPiece(unkToken, text, unkId, isWordStart = true, token.begin, token.end))
+    }
+  }
+}
 
-    val text = token.token
-    var start = 0
-    var end = text.length
-
-    // Greedy search for next largest substring
-    while (end > start && start < text.length) {
-      val toFind = (if (start > 0) partPrefix else "") + text.substring(start, end)
-
-      val found = vocabulary.get(toFind)
-      if (found.nonEmpty) {
-        val subToken = TokenPiece(
-          toFind,
-          token.token,
-          found.get,
-          start == 0,
-          token.begin + start,
-          token.begin + end - 1)
-        result.append(subToken)
-        start = end
-        end = text.length
-      } else {
-        end = end - 1
-
-        if (end == start) {
-          // Not Found anything in vocabulary
-          return Array(
-            TokenPiece(unkToken, token.token, unkId, isWordStart = true, token.begin, token.end))
+private[johnsnowlabs] object WordpieceEncoder {
+
+  /** Maximum number of words whose pieces are cached per vocabulary */
+  val defaultCacheSize: Int = 50000
+
+  // Tries by part prefix, released with the vocabularies of unloaded models
+  private val triesByVocabulary = new WeakKeyRegistry[Map[String, Int], WordpieceTrie]()
+
+  /** Trie of a vocabulary, shared by the encoders that use the same vocabulary and prefix */
+  private[wordpiece] def sharedTrie(
+      vocabulary: Map[String, Int],
+      partPrefix: String): WordpieceTrie =
+    triesByVocabulary.getOrElseUpdate(
+      vocabulary,
+      partPrefix,
+      WordpieceTrie(vocabulary, partPrefix))
+
+  /** Trie of the pieces of a vocabulary, with two roots: node 0 starts the pieces beginning a
+    * word and node 1 starts the pieces continuing one, whose part prefix is left out of the trie.
+    *
+    * Edges are stored as `char << 32 | child` in a single array sorted by parent node and
+    * character, so the children of a node are a contiguous range found with a binary search.
+    *
+    * @param edges
+    *   Packed edges of all nodes
+    * @param edgeOffsets
+    *   Start of the edges of each node, plus the end of the last one
+    * @param pieces
+    *   Vocabulary piece ending at each node, or null
+    * @param ids
+    *   Vocabulary id of the piece ending at each node, or -1
+    */
+  private[wordpiece] case class WordpieceTrie(
+      edges: Array[Long],
+      edgeOffsets: Array[Int],
+      pieces: Array[String],
+      ids: Array[Int]) {
+
+    /** Pieces of frequent words, as returned by [[matchPieces]] */
+    val cache = new LruMap[String, Option[Array[Int]]](defaultCacheSize)
+
+    def nodeCount: Int = ids.length
+
+    /** Splits a word greedily into the longest pieces of the vocabulary.
+      *
+      * @return
+      *   Node and end offset of each piece, flattened, or None if part of the word can not be
+      *   matched
+      */
+    def matchPieces(word: String): Option[Array[Int]] = {
+      val result = mutable.ArrayBuilder.make[Int]
+      var start = 0
+      while (start < word.length) {
+        var node = if (start == 0) 0 else 1
+        var matchedNode = -1
+        var matchedEnd = -1
+        var i = start
+        while (node >= 0 && i < word.length) {
+          node = child(node, word.charAt(i))
+          i += 1
+          if (node >= 0 && ids(node) >= 0) {
+            matchedNode = node
+            matchedEnd = i
+          }
         }
+
+        if (matchedNode < 0) return None
+        result += matchedNode
+        result += matchedEnd
+        start = matchedEnd
+      }
+      Some(result.result())
+    }
+
+    private def child(node: Int, char: Char): Int = {
+      var low = edgeOffsets(node)
+      var high = edgeOffsets(node + 1) - 1
+      while (low <= high) {
+        val middle = (low + high) >>> 1
+        val edgeChar = (edges(middle) >>> 32).toInt
+        if (edgeChar < char) low = middle + 1
+        else if (edgeChar > char) high = middle - 1
+        else return edges(middle).toInt
       }
+      -1
     }
+  }
+
+  private[wordpiece] object WordpieceTrie {
 
-    result.toArray
+    def apply(vocabulary: Map[String, Int], partPrefix: String): WordpieceTrie = {
+      // children keyed by parent << 16 | char while the trie is built
+      val children = mutable.LongMap.empty[Int]
+      val pieces = mutable.ArrayBuffer[String](null, null)
+      val ids = mutable.ArrayBuffer[Int](-1, -1)
+
+      def insert(root: Int, chars: String, piece: String, id: Int): Unit = {
+        var node = root
+        chars.foreach { char =>
+          val key = node.toLong << 16 | char
+          node = children.getOrElseUpdate(
+            key, {
+              pieces += null
+              ids += -1
+              ids.length - 1
+            })
+        }
+        pieces(node) = piece
+        ids(node) = id
+      }
+
+      vocabulary.foreach { case (piece, id) =>
+        if (piece.nonEmpty) insert(0, piece, piece, id)
+        if (piece.length > partPrefix.length && piece.startsWith(partPrefix))
+          insert(1, piece.substring(partPrefix.length), piece, id)
+      }
+
+      val keys = children.keys.toArray
+      java.util.Arrays.sort(keys)
+      val edges = keys.map(key => (key & 0xffff) << 32 | children(key))
+
+      val edgeOffsets = new Array[Int](ids.length + 1)
+      keys.foreach(key => edgeOffsets((key >>> 16).toInt + 1) += 1)
+      for (node <- 1 until edgeOffsets.length) edgeOffsets(node) += edgeOffsets(node - 1)
+
+      WordpieceTrie(edges, edgeOffsets, pieces.toArray, ids.toArray)
+    }
   }
 }
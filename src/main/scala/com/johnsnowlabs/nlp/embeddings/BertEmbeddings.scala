@@ -17,7 +17,7 @@
 package com.johnsnowlabs.nlp.embeddings
 
 import com.johnsnowlabs.ml.ai.Bert
-import com.johnsnowlabs.ml.onnx.{OnnxWrapper, ReadOnnxModel, WriteOnnxModel}
+import com.johnsnowlabs.ml.onnx.{OnnxQuantization, OnnxWrapper, ReadOnnxModel, WriteOnnxModel}
 import com.johnsnowlabs.ml.tensorflow._
 import com.johnsnowlabs.ml.util.LoadExternalModel.{
   loadTextAsset,
@@ -321,6 +321,8 @@ class BertEmbeddings(override val uid: String)
     }
   }
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -347,7 +349,8 @@ class BertEmbeddings(override val uid: String)
       sentencesWithRow.map(_._1),
       $(batchSize),
       $(maxSentenceLength),
-      $(caseSensitive))
+      $(caseSensitive),
+      $(maxTokensPerBatch))
 
     // Group resulting annotations by rows. If there are not sentences in a given row, return empty sequence
     batchedAnnotations.indices.map(rowIndex => {
@@ -443,9 +446,24 @@ trait ReadBertDLModel extends ReadTensorflowModel with ReadOnnxModel {
 
   addReader(readModel)
 
-  def loadSavedModel(modelPath: String, spark: SparkSession): BertEmbeddings = {
+  def loadSavedModel(modelPath: String, spark: SparkSession): BertEmbeddings =
+    loadSavedModel(modelPath, spark, OnnxQuantization.NONE)
+
+  /** Loads an exported model, quantizing its graph if it is an ONNX model.
+    *
+    * @param quantization
+    *   Quantization of the ONNX graph, one of `none` or `dynamic_int8`. The quantized graph is
+    *   the one saved with the model.
+    */
+  def loadSavedModel(
+      modelPath: String,
+      spark: SparkSession,
+      quantization: String): BertEmbeddings = {
 
     val (localModelPath, detectedEngine) = modelSanityCheck(modelPath)
+    require(
+      quantization == OnnxQuantization.NONE || detectedEngine == ONNX.name,
+      s"Only ONNX models can be quantized, this model uses $detectedEngine")
 
     val vocabs = loadTextAsset(localModelPath, "vocab.txt").zipWithIndex.toMap
 
@@ -473,7 +491,11 @@ trait ReadBertDLModel extends ReadTensorflowModel with ReadOnnxModel {
           .setModelIfNotSet(spark, Some(tfWrapper), None)
 
       case ONNX.name =>
-        val onnxWrapper = OnnxWrapper.read(localModelPath, zipped = false, useBundle = true)
+        val onnxWrapper = OnnxWrapper.read(
+          localModelPath,
+          zipped = false,
+          useBundle = true,
+          quantization = quantization)
         annotatorModel
           .setModelIfNotSet(spark, None, Some(onnxWrapper))
 
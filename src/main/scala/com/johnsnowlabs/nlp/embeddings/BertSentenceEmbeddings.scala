@@ -336,6 +336,8 @@ class BertSentenceEmbeddings(override val uid: String)
     }
   }
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -360,7 +362,8 @@ class BertSentenceEmbeddings(override val uid: String)
       sentencesWithRow.map(_._1),
       $(batchSize),
       $(maxSentenceLength),
-      getIsLong)
+      getIsLong,
+      $(maxTokensPerBatch))
 
     // Group resulting annotations by rows. If there are not sentences in a given row, return empty sequence
     batchedAnnotations.indices.map(rowIndex => {
@@ -324,6 +324,8 @@ class DistilBertEmbeddings(override val uid: String)
     }
   }
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -349,7 +351,8 @@ class DistilBertEmbeddings(override val uid: String)
       sentencesWithRow.map(_._1),
       $(batchSize),
       $(maxSentenceLength),
-      $(caseSensitive))
+      $(caseSensitive),
+      $(maxTokensPerBatch))
 
     // Group resulting annotations by rows. If there are not sentences in a given row, return empty sequence
     batchedAnnotations.indices.map(rowIndex => {
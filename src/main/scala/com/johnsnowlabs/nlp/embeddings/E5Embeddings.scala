@@ -17,7 +17,7 @@
 package com.johnsnowlabs.nlp.embeddings
 
 import com.johnsnowlabs.ml.ai.E5
-import com.johnsnowlabs.ml.onnx.{OnnxWrapper, ReadOnnxModel, WriteOnnxModel}
+import com.johnsnowlabs.ml.onnx.{OnnxQuantization, OnnxWrapper, ReadOnnxModel, WriteOnnxModel}
 import com.johnsnowlabs.ml.tensorflow._
 import com.johnsnowlabs.ml.util.LoadExternalModel.{
   loadTextAsset,
@@ -286,6 +286,8 @@ class E5Embeddings(override val uid: String)
     }
   }
 
+  override protected def supportsMaxTokensPerBatch: Boolean = true
+
   /** takes a document and annotations and produces new annotations of this annotator's annotation
     * type
     *
@@ -311,7 +313,8 @@ class E5Embeddings(override val uid: String)
         sentences = allAnnotations.map(_._1),
         tokenizedSentences = tokenizedSentences,
         batchSize = $(batchSize),
-        maxSentenceLength = $(maxSentenceLength))
+        maxSentenceLength = $(maxSentenceLength),
+        maxTokensPerBatch = $(maxTokensPerBatch))
     } else {
       Seq()
     }
@@ -424,9 +427,24 @@ trait ReadE5DLModel extends ReadTensorflowModel with ReadOnnxModel {
 
   addReader(readModel)
 
-  def loadSavedModel(modelPath: String, spark: SparkSession): E5Embeddings = {
+  def loadSavedModel(modelPath: String, spark: SparkSession): E5Embeddings =
+    loadSavedModel(modelPath, spark, OnnxQuantization.NONE)
+
+  /** Loads an exported model, quantizing its graph if it is an ONNX model.
+    *
+    * @param quantization
+    *   Quantization of the ONNX graph, one of `none` or `dynamic_int8`. The quantized graph is
+    *   the one saved with the model.
+    */
+  def loadSavedModel(
+      modelPath: String,
+      spark: SparkSession,
+      quantization: String): E5Embeddings = {
 
     val (localModelPath, detectedEngine) = modelSanityCheck(modelPath)
+    require(
+      quantization == OnnxQuantization.NONE || detectedEngine == ONNX.name,
+      s"Only ONNX models can be quantized, this model uses $detectedEngine")
 
     val vocabs = loadTextAsset(localModelPath, "vocab.txt").zipWithIndex.toMap
 
@@ -459,7 +477,11 @@ trait ReadE5DLModel extends ReadTensorflowModel with ReadOnnxModel {
           .setModelIfNotSet(spark, Some(wrapper), None)
 
       case ONNX.name =>
-        val onnxWrapper = OnnxWrapper.read(localModelPath, zipped = false, useBundle = true)
+        val onnxWrapper = OnnxWrapper.read(
+          localModelPath,
+          zipped = false,
+          useBundle = true,
+          quantization = quantization)
         annotatorModel
           .setModelIfNotSet(spark, None, Some(onnxWrapper))
 
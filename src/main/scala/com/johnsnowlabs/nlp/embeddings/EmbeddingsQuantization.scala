@@ -0,0 +1,152 @@
+/*
+ * Copyright 2017-2022 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.embeddings
+
+import java.nio.{ByteBuffer, ByteOrder}
+
+/** Encodings of word embedding vectors in storage. All of them are little-endian.
+  *
+  *   - `none`: `float32[dimension]`, 4 bytes per value
+  *   - `fp16`: IEEE 754 half precision `float16[dimension]`, 2 bytes per value
+  *   - `int8`: a `float32` scale followed by `int8[dimension]`, where each value is
+  *     `scale * byte` and the scale is the largest absolute value of the vector divided by 127
+  */
+object EmbeddingsQuantization {
+
+  val NONE = "none"
+  val FP16 = "fp16"
+  val INT8 = "int8"
+
+  val quantizations: Seq[String] = Seq(NONE, FP16, INT8)
+
+  def encode(content: Array[Float], quantization: String): Array[Byte] = quantization match {
+    case NONE =>
+      val buffer = ByteBuffer.allocate(content.length * 4).order(ByteOrder.LITTLE_ENDIAN)
+      content.foreach(value => buffer.putFloat(value))
+      buffer.array()
+    case FP16 =>
+      val buffer = ByteBuffer.allocate(content.length * 2).order(ByteOrder.LITTLE_ENDIAN)
+      content.foreach(value => buffer.putShort(floatToHalf(value)))
+      buffer.array()
+    case INT8 =>
+      val maxAbs = content.foldLeft(0f)((max, value) => math.max(max, math.abs(value)))
+      val scale = if (maxAbs == 0f) 0f else maxAbs / 127f
+      val buffer = ByteBuffer.allocate(4 + content.length).order(ByteOrder.LITTLE_ENDIAN)
+      buffer.putFloat(scale)
+      content.foreach { value =>
+        val quantized = if (scale == 0f) 0 else math.round(value / scale)
+        buffer.put(math.max(-127, math.min(127, quantized)).toByte)
+      }
+      buffer.array()
+    case other => throw new IllegalArgumentException(unknownQuantization(other))
+  }
+
+  def decode(source: Array[Byte], quantization: String): Array[Float] = {
+    val wrapper = ByteBuffer.wrap(source).order(ByteOrder.LITTLE_ENDIAN)
+    quantization match {
+      case NONE =>
+        val result = new Array[Float](source.length / 4)
+        for (i <- result.indices) result(i) = wrapper.getFloat(i * 4)
+        result
+      case FP16 =>
+        val result = new Array[Float](source.length / 2)
+        for (i <- result.indices) result(i) = halfToFloat(wrapper.getShort(i * 2))
+        result
+      case INT8 =>
+        val scale = wrapper.getFloat(0)
+        val result = new Array[Float](source.length - 4)
+        for (i <- result.indices) result(i) = scale * source(i + 4)
+        result
+      case other => throw new IllegalArgumentException(unknownQuantization(other))
+    }
+  }
+
+  /** Number of bytes a vector of the given dimension takes in storage */
+  def encodedSize(dimension: Int, quantization: String): Int = quantization match {
+    case NONE => 4 * dimension
+    case FP16 => 2 * dimension
+    case INT8 => 4 + dimension
+    case other => throw new IllegalArgumentException(unknownQuantization(other))
+  }
+
+  /** Rounds to the nearest half precision value, saturating to infinity on overflow */
+  private[embeddings] def floatToHalf(value: Float): Short = {
+    val bits = java.lang.Float.floatToIntBits(value)
+    val sign = (bits >>> 16) & 0x8000
+    val magnitude = bits & 0x7fffffff
+
+    val half =
+      if (magnitude >= 0x7f800000) {
+        // Infinity or NaN, keeping NaN payloads non-zero
+        sign | 0x7c00 | (if (magnitude > 0x7f800000) 0x200 else 0)
+      } else if (magnitude >= 0x477ff000) {
+        // Rounds past the largest half, 65504
+        sign | 0x7c00
+      } else if (magnitude >= 0x38800000) {
+        // Normal half: rebias the exponent and round the mantissa to nearest even
+        val rebiased = magnitude - 0x38000000
+        val rounded = rebiased + 0xfff + ((rebiased >>> 13) & 1)
+        sign | (rounded >>> 13)
+      } else if (magnitude >= 0x33000000) {
+        // Subnormal half
+        val exponent = magnitude >>> 23
+        val mantissa = (magnitude & 0x7fffff) | 0x800000
+        val shift = 126 - exponent
+        val halfway = 1 << (shift - 1)
+        val remainder = mantissa & ((1 << shift) - 1)
+        val truncated = mantissa >>> shift
+        val roundUp = remainder > halfway || (remainder == halfway && (truncated & 1) == 1)
+        sign | (truncated + (if (roundUp) 1 else 0))
+      } else {
+        sign
+      }
+
+    half.toShort
+  }
+
+  private[embeddings] def halfToFloat(half: Short): Float = {
+    val bits = half & 0xffff
+    val sign = (bits & 0x8000) << 16
+    val exponent = (bits >>> 10) & 0x1f
+    val mantissa = bits & 0x3ff
+
+    val floatBits =
+      if (exponent == 0x1f) {
+        sign | 0x7f800000 | (mantissa << 13)
+      } else if (exponent != 0) {
+        sign | ((exponent + 112) << 23) | (mantissa << 13)
+      } else if (mantissa == 0) {
+        sign
+      } else {
+        // Subnormal half, normalized into a float
+        var normalized = mantissa
+        var unbiased = -14
+        while ((normalized & 0x400) == 0) {
+          normalized <<= 1
+          unbiased -= 1
+        }
+        sign | ((unbiased + 127) << 23) | ((normalized & 0x3ff) << 13)
+      }
+
+    java.lang.Float.intBitsToFloat(floatBits)
+  }
+
+  private def unknownQuantization(quantization: String): String =
+    s"Unknown embeddings quantization $quantization." +
+      s" Must be one of ${quantizations.mkString(", ")}"
+
+}
@@ -0,0 +1,380 @@
+/*
+ * Copyright 2017-2022 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.embeddings
+
+import com.johnsnowlabs.storage.RocksDBConnection
+import com.johnsnowlabs.util.FileHelper
+import org.apache.spark.scheduler.{SparkListener, SparkListenerApplicationEnd}
+import org.apache.spark.{SparkContext, SparkFiles}
+
+import java.io.{
+  BufferedOutputStream,
+  DataOutputStream,
+  File,
+  FileOutputStream,
+  IOException,
+  RandomAccessFile
+}
+import java.nio.channels.FileChannel
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.{Files, Paths, StandardCopyOption, StandardOpenOption}
+import java.nio.{ByteOrder, MappedByteBuffer}
+import java.security.MessageDigest
+import java.util.concurrent.ConcurrentHashMap
+
+/** Read-only word embeddings storage made of a sorted vocabulary and one contiguous matrix, both
+  * memory mapped.
+  *
+  * Opening it does not copy or unpack anything, every task of a JVM shares the same pages through
+  * the OS page cache, and a lookup is a binary search over the vocabulary followed by a single
+  * read of the vector.
+  *
+  * The storage is a directory with two little-endian files:
+  *   - `keys.bin`: `int count`, `int[count + 1]` offsets, then the UTF-8 bytes of the keys,
+  *     sorted in unsigned byte order
+  *   - `vectors.bin`: one row per key, encoded with the quantization of the embeddings as in
+  *     [[EmbeddingsQuantization]], e.g. `float16[count * dimension]` for `fp16`
+  *
+  * Rows of quantized storage are dequantized when they are looked up.
+  *
+  * @param path
+  *   Directory of the storage
+  * @param dimension
+  *   Number of embedding dimensions
+  * @param caseSensitiveIndex
+  *   Whether to skip the lower and upper case fallbacks of lookups
+  * @param quantization
+  *   Encoding of the vectors, one of [[EmbeddingsQuantization.quantizations]]
+  */
+class FlatEmbeddingsReader(
+    path: String,
+    dimension: Int,
+    caseSensitiveIndex: Boolean,
+    quantization: String = EmbeddingsQuantization.NONE) {
+
+  private val keys: MappedByteBuffer = {
+    val keysFile = new File(path, FlatEmbeddingsStorage.keysFile)
+    require(
+      keysFile.length() <= Int.MaxValue,
+      s"Vocabulary of flat embeddings storage in $path is too large")
+    FlatEmbeddingsStorage.map(keysFile, 0L, keysFile.length())
+  }
+
+  private val count: Int = keys.getInt(0)
+  private val keysStart: Int = 4 * (count + 2)
+
+  private val rowBytes: Long = EmbeddingsQuantization.encodedSize(dimension, quantization).toLong
+  private val rowsPerSegment: Int = math.max(1L, Int.MaxValue / rowBytes).toInt
+
+  private val segments: Array[MappedByteBuffer] = {
+    val vectorsFile = new File(path, FlatEmbeddingsStorage.vectorsFile)
+    require(
+      vectorsFile.length() == count * rowBytes,
+      s"Flat embeddings storage in $path does not match dimension $dimension")
+    (0 until count by rowsPerSegment).map { firstRow =>
+      val rows = math.min(rowsPerSegment, count - firstRow)
+      FlatEmbeddingsStorage.map(vectorsFile, firstRow * rowBytes, rows * rowBytes)
+    }.toArray
+  }
+
+  def getSize: Int = count
+
+  def emptyValue: Array[Float] = Array.fill[Float](dimension)(0f)
+
+  def lookup(index: String): Option[Array[Float]] = {
+    val exact = index.trim
+    lazy val lower = exact.toLowerCase
+    lazy val upper = exact.toUpperCase
+
+    val row = find(exact) match {
+      case -1 if !caseSensitiveIndex =>
+        val lowerRow = if (lower == exact) -1 else find(lower)
+        if (lowerRow >= 0 || upper == exact || upper == lower) lowerRow else find(upper)
+      case found => found
+    }
+
+    if (row >= 0) Some(vector(row)) else None
+  }
+
+  private def vector(row: Int): Array[Float] = {
+    val segment = segments(row / rowsPerSegment).duplicate().order(ByteOrder.LITTLE_ENDIAN)
+    segment.position(((row % rowsPerSegment) * rowBytes).toInt)
+    if (quantization == EmbeddingsQuantization.NONE) {
+      val result = new Array[Float](dimension)
+      segment.asFloatBuffer().get(result)
+      result
+    } else {
+      val encoded = new Array[Byte](rowBytes.toInt)
+      segment.get(encoded)
+      EmbeddingsQuantization.decode(encoded, quantization)
+    }
+  }
+
+  private def find(key: String): Int = {
+    val target = key.getBytes("UTF-8")
+    var low = 0
+    var high = count - 1
+    while (low <= high) {
+      val middle = (low + high) >>> 1
+      val comparison = compareKey(middle, target)
+      if (comparison < 0) low = middle + 1
+      else if (comparison > 0) high = middle - 1
+      else return middle
+    }
+    -1
+  }
+
+  private def compareKey(row: Int, target: Array[Byte]): Int = {
+    val start = keysStart + keys.getInt(4 * (row + 1))
+    val length = keysStart + keys.getInt(4 * (row + 2)) - start
+    val common = math.min(length, target.length)
+    var i = 0
+    while (i < common) {
+      val comparison = (keys.get(start + i) & 0xff) - (target(i) & 0xff)
+      if (comparison != 0) return comparison
+      i += 1
+    }
+    length - target.length
+  }
+
+}
+
+object FlatEmbeddingsStorage {
+
+  val keysFile = "keys.bin"
+  val vectorsFile = "vectors.bin"
+
+  // Changed whenever the files of a storage change, so older storages are not read
+  private val formatVersion = 2
+
+  private val readers = new ConcurrentHashMap[String, FlatEmbeddingsReader]()
+  private val distributed = ConcurrentHashMap.newKeySet[String]()
+  // Threads of this JVM converting the same storage wait on these, other processes on a lock file
+  private val conversionLocks = new ConcurrentHashMap[String, Object]()
+
+  /** Name under which the flat storage of a version of an embeddings reference is shipped to
+    * the cluster
+    */
+  def resolveStorageName(storageRef: String, version: String): String =
+    s"flat_EMBEDDINGS_${storageRef}_$version"
+
+  /** Version of the RocksDB index of a connection, from the names, sizes and modification times
+    * of its files and from its identity, which RocksDB generates when an index is created.
+    * Embeddings indexed again under the same reference get a new version, so the flat storage
+    * of the previous ones is never served for them.
+    */
+  def version(connection: RocksDBConnection, dimension: Int, quantization: String): String = {
+    val digest = MessageDigest.getInstance("SHA-256")
+    def update(value: String): Unit = {
+      digest.update(value.getBytes(UTF_8))
+      digest.update(0.toByte)
+    }
+
+    update(formatVersion.toString)
+    update(dimension.toString)
+    update(quantization)
+    val index = new File(connection.findLocalIndex)
+    Option(index.listFiles()).getOrElse(Array.empty[File]).sortBy(_.getName).foreach { file =>
+      update(file.getName)
+      update(file.length().toString)
+      update(file.lastModified().toString)
+      if (file.getName == "IDENTITY") digest.update(Files.readAllBytes(file.toPath))
+    }
+    digest.digest().take(8).map(byte => f"${byte & 0xff}%02x").mkString
+  }
+
+  /** Converts a RocksDB embeddings index into a flat storage directory. Vectors are stored as
+    * they are encoded in the index, so quantized vectors keep their size on disk.
+    *
+    * RocksDB iterates keys in unsigned byte order, which is the order lookups rely on.
+    */
+  def write(
+      connection: RocksDBConnection,
+      dimension: Int,
+      destination: String,
+      quantization: String = EmbeddingsQuantization.NONE): Unit = {
+    val directory = new File(destination)
+    directory.mkdirs()
+    val tmpKeys = File.createTempFile("keys", ".tmp", directory)
+    val tmpVectors = File.createTempFile("vectors", ".tmp", directory)
+
+    val keyBytes = new java.io.ByteArrayOutputStream()
+    val offsets = scala.collection.mutable.ArrayBuffer(0)
+    val vectorsOutput = new DataOutputStream(
+      new BufferedOutputStream(new FileOutputStream(tmpVectors), 1 << 20))
+
+    val iterator = connection.getDb.newIterator()
+    try {
+      iterator.seekToFirst()
+      while (iterator.isValid) {
+        val value = iterator.value()
+        require(
+          value.length == EmbeddingsQuantization.encodedSize(dimension, quantization),
+          s"Embeddings of ${new String(iterator.key(), "UTF-8")} do not match" +
+            s" dimension $dimension")
+        keyBytes.write(iterator.key())
+        offsets += keyBytes.size()
+        vectorsOutput.write(value)
+        iterator.next()
+      }
+    } finally {
+      iterator.close()
+      vectorsOutput.close()
+    }
+
+    val keysOutput = new DataOutputStream(
+      new BufferedOutputStream(new FileOutputStream(tmpKeys), 1 << 20))
+    try {
+      keysOutput.writeInt(Integer.reverseBytes(offsets.length - 1))
+      offsets.foreach(offset => keysOutput.writeInt(Integer.reverseBytes(offset)))
+      keyBytes.writeTo(keysOutput)
+    } finally {
+      keysOutput.close()
+    }
+
+    Files.move(
+      tmpVectors.toPath,
+      new File(directory, vectorsFile).toPath,
+      StandardCopyOption.REPLACE_EXISTING,
+      StandardCopyOption.ATOMIC_MOVE)
+    Files.move(
+      tmpKeys.toPath,
+      new File(directory, keysFile).toPath,
+      StandardCopyOption.REPLACE_EXISTING,
+      StandardCopyOption.ATOMIC_MOVE)
+  }
+
+  /** Converts a RocksDB embeddings index into a flat storage and ships it to every executor of
+    * a cluster. Shipping is skipped when the same version was already shipped to this
+    * SparkContext, and in local mode, where the storage is converted next to the index.
+    *
+    * `addFile` only ships single files to a cluster, so the files of the storage are shipped
+    * under unique names from a staging folder, which is deleted when the application ends.
+    *
+    * @return
+    *   Name of the shipped storage, to be passed to [[getOrOpen]] on the executors
+    */
+  def distribute(
+      connection: RocksDBConnection,
+      dimension: Int,
+      storageRef: String,
+      sparkContext: SparkContext,
+      quantization: String): String = {
+    val name = resolveStorageName(storageRef, version(connection, dimension, quantization))
+    val key = s"${sparkContext.applicationId}/$name"
+    if (!sparkContext.isLocal) distributed.synchronized {
+      if (!distributed.contains(key)) {
+        val staging = Files.createTempDirectory("sparknlp_flat_").toFile
+        sparkContext.addSparkListener(new SparkListener {
+          override def onApplicationEnd(applicationEnd: SparkListenerApplicationEnd): Unit =
+            FileHelper.delete(staging.getAbsolutePath)
+        })
+        val storage = new File(staging, name)
+        write(connection, dimension, storage.getAbsolutePath, quantization)
+        Seq(keysFile, vectorsFile).foreach { file =>
+          val shipped = new File(staging, shippedFileName(name, file))
+          Files.move(new File(storage, file).toPath, shipped.toPath)
+          sparkContext.addFile(shipped.getAbsolutePath)
+        }
+        distributed.add(key)
+      }
+    }
+    name
+  }
+
+  private def shippedFileName(storageName: String, file: String): String =
+    s"${storageName}_$file"
+
+  /** Folder of the storage shipped to this executor under `storageName`, with its files linked
+    * under their original names, if it was shipped.
+    */
+  private def linkShippedFiles(storageName: String): Option[String] = synchronized {
+    val shipped = Seq(keysFile, vectorsFile).map { file =>
+      file -> new File(SparkFiles.get(shippedFileName(storageName, file)))
+    }
+    if (!shipped.forall(_._2.exists())) None
+    else {
+      val folder = new File(SparkFiles.getRootDirectory(), storageName)
+      folder.mkdirs()
+      shipped.foreach { case (file, source) =>
+        val target = new File(folder, file)
+        if (!target.exists()) {
+          try Files.createLink(target.toPath, source.toPath)
+          catch {
+            case _: IOException | _: UnsupportedOperationException =>
+              Files.copy(source.toPath, target.toPath, StandardCopyOption.REPLACE_EXISTING)
+          }
+        }
+      }
+      Some(folder.getAbsolutePath)
+    }
+  }
+
+  /** Opens a flat storage once per JVM. The storage shipped under `storageName` is opened if it
+    * was shipped to this JVM, otherwise the given RocksDB index is converted next to it. Tasks
+    * and processes opening the same storage at the same time convert it once.
+    */
+  def getOrOpen(
+      storageName: Option[String],
+      dimension: Int,
+      caseSensitiveIndex: Boolean,
+      quantization: String,
+      connection: => RocksDBConnection): FlatEmbeddingsReader = {
+    val path = storageName.flatMap(linkShippedFiles).getOrElse {
+      val version = FlatEmbeddingsStorage.version(connection, dimension, quantization)
+      val local = new File(s"${connection.findLocalIndex}_flat_$version").getAbsolutePath
+      if (!exists(local)) withConversionLock(local) {
+        if (!exists(local)) write(connection, dimension, local, quantization)
+      }
+      local
+    }
+    readers.computeIfAbsent(
+      s"$path/$caseSensitiveIndex",
+      _ => new FlatEmbeddingsReader(path, dimension, caseSensitiveIndex, quantization))
+  }
+
+  /** Runs a block holding the lock of a storage path, in this process and across processes */
+  private def withConversionLock[T](path: String)(block: => T): T =
+    conversionLocks.computeIfAbsent(path, _ => new Object).synchronized {
+      val channel = FileChannel.open(
+        Paths.get(s"$path.lock"),
+        StandardOpenOption.CREATE,
+        StandardOpenOption.WRITE)
+      try {
+        val lock = channel.lock()
+        try block
+        finally lock.release()
+      } finally {
+        channel.close()
+      }
+    }
+
+  private def exists(path: String): Boolean =
+    new File(path, keysFile).exists() && new File(path, vectorsFile).exists()
+
+  private[embeddings] def map(file: File, position: Long, size: Long): MappedByteBuffer = {
+    val randomAccessFile = new RandomAccessFile(file, "r")
+    try {
+      val buffer = randomAccessFile.getChannel.map(FileChannel.MapMode.READ_ONLY, position, size)
+      buffer.order(ByteOrder.LITTLE_ENDIAN)
+      buffer
+    } finally {
+      randomAccessFile.close()
+    }
+  }
+
+}
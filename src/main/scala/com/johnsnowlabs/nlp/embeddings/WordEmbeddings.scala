@@ -22,7 +22,7 @@ import com.johnsnowlabs.nlp.util.io.ReadAs
 import com.johnsnowlabs.storage.Database.Name
 import com.johnsnowlabs.storage.{Database, HasStorage, RocksDBConnection, StorageWriter}
 import org.apache.spark.ml.PipelineModel
-import org.apache.spark.ml.param.IntParam
+import org.apache.spark.ml.param.{IntParam, Param}
 import org.apache.spark.ml.util.{DefaultParamsReadable, Identifiable}
 import org.apache.spark.sql.Dataset
 
@@ -196,6 +196,54 @@ class WordEmbeddings(override val uid: String)
     */
   def setReadCacheSize(value: Int): this.type = set(readCacheSize, value)
 
+  /** Format the trained model uses to look up embeddings: `"rocksdb"` or `"mmap"` (Default:
+    * `"rocksdb"`). See [[WordEmbeddingsModel.storageFormat]].
+    *
+    * @group param
+    */
+  val storageFormat = new Param[String](
+    this,
+    "storageFormat",
+    "Format used to look up embeddings: rocksdb (default) or mmap")
+
+  setDefault(storageFormat, WordEmbeddingsModel.ROCKSDB_FORMAT)
+
+  /** Format the trained model uses to look up embeddings: `"rocksdb"` or `"mmap"`.
+    *
+    * @group setParam
+    */
+  def setStorageFormat(value: String): this.type = {
+    require(
+      WordEmbeddingsModel.storageFormats.contains(value),
+      s"storageFormat must be one of ${WordEmbeddingsModel.storageFormats.mkString(", ")}")
+    set(storageFormat, value)
+  }
+
+  /** Encoding of the vectors in storage: `"none"` for float32, `"fp16"` for half precision or
+    * `"int8"` for 8-bit integers with one scale per vector (Default: `"none"`). Quantized
+    * vectors take 2 to 4 times less space on disk and in memory and are dequantized on lookup.
+    *
+    * @group param
+    */
+  val storageQuantization = new Param[String](
+    this,
+    "storageQuantization",
+    "Encoding of the vectors in storage: none (float32), fp16 or int8")
+
+  setDefault(storageQuantization, EmbeddingsQuantization.NONE)
+
+  /** Encoding of the vectors in storage: `"none"`, `"fp16"` or `"int8"`.
+    *
+    * @group setParam
+    */
+  def setStorageQuantization(value: String): this.type = {
+    require(
+      EmbeddingsQuantization.quantizations.contains(value),
+      "storageQuantization must be one of " +
+        EmbeddingsQuantization.quantizations.mkString(", "))
+    set(storageQuantization, value)
+  }
+
   override def train(
       dataset: Dataset[_],
       recursivePipeline: Option[PipelineModel]): WordEmbeddingsModel = {
@@ -206,6 +254,8 @@ class WordEmbeddings(override val uid: String)
       .setDimension($(dimension))
       .setCaseSensitive($(caseSensitive))
       .setEnableInMemoryStorage($(enableInMemoryStorage))
+      .setStorageFormat($(storageFormat))
+      .setStorageQuantization($(storageQuantization))
 
     if (isSet(readCacheSize))
       model.setReadCacheSize($(readCacheSize))
@@ -243,7 +293,8 @@ class WordEmbeddings(override val uid: String)
       $(caseSensitive),
       $(dimension),
       get(readCacheSize).getOrElse(5000),
-      $(writeBufferSize))
+      $(writeBufferSize),
+      $(storageQuantization))
   }
 }
 
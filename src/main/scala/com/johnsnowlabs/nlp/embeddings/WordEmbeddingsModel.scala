@@ -27,11 +27,13 @@ import com.johnsnowlabs.nlp.util.io.ResourceHelper.spark.implicits._
 import com.johnsnowlabs.storage.Database.Name
 import com.johnsnowlabs.storage._
 import org.apache.spark.broadcast.Broadcast
-import org.apache.spark.ml.param.IntParam
+import org.apache.spark.ml.param.{IntParam, Param}
 import org.apache.spark.ml.util.Identifiable
 import org.apache.spark.sql.functions.{col, udf}
 import org.apache.spark.sql.{DataFrame, Dataset, Row}
 
+import scala.collection.JavaConverters._
+
 /** Word Embeddings lookup annotator that maps tokens to vectors
   *
   * This is the instantiated model of [[WordEmbeddings]].
@@ -186,8 +188,86 @@ class WordEmbeddingsModel(override val uid: String)
     */
   def setReadCacheSize(value: Int): this.type = set(readCacheSize, value)
 
+  /** Hits, misses, evictions and size of the read cache of the storage reader in this JVM. All
+    * counters are zero until the model has read from storage.
+    */
+  def getReadCacheStats: Map[String, Long] = {
+    Option(readers)
+      .flatMap(_.get(Database.EMBEDDINGS))
+      .map(_.getCacheStats)
+      .getOrElse(Map("hits" -> 0L, "misses" -> 0L, "evictions" -> 0L, "size" -> 0L))
+  }
+
+  /** Java compliant version of [[getReadCacheStats]] */
+  def getReadCacheStatsJava: java.util.Map[String, java.lang.Long] = {
+    getReadCacheStats.mapValues(Long.box).asJava
+  }
+
+  /** Format used to look up embeddings on executors: `"rocksdb"` reads the RocksDB index, while
+    * `"mmap"` converts it once into a read-only vocabulary and float matrix that is shipped to
+    * every executor and memory mapped there, so it opens instantly and is shared by all tasks of
+    * a JVM (Default: `"rocksdb"`).
+    *
+    * @group param
+    */
+  val storageFormat = new Param[String](
+    this,
+    "storageFormat",
+    "Format used to look up embeddings: rocksdb (default) or mmap")
+
+  setDefault(storageFormat, WordEmbeddingsModel.ROCKSDB_FORMAT)
+
+  /** @group setParam */
+  def setStorageFormat(value: String): this.type = {
+    require(
+      WordEmbeddingsModel.storageFormats.contains(value),
+      s"storageFormat must be one of ${WordEmbeddingsModel.storageFormats.mkString(", ")}")
+    set(storageFormat, value)
+  }
+
+  /** @group getParam */
+  def getStorageFormat: String = $(storageFormat)
+
+  /** Encoding of the vectors in storage: `"none"` for float32, `"fp16"` or `"int8"`. It is set
+    * from [[WordEmbeddings.storageQuantization]] and must match the index the model reads from
+    * (Default: `"none"`).
+    *
+    * @group param
+    */
+  val storageQuantization = new Param[String](
+    this,
+    "storageQuantization",
+    "Encoding of the vectors in storage: none (float32), fp16 or int8")
+
+  setDefault(storageQuantization, EmbeddingsQuantization.NONE)
+
+  /** @group setParam */
+  def setStorageQuantization(value: String): this.type = {
+    require(
+      EmbeddingsQuantization.quantizations.contains(value),
+      "storageQuantization must be one of " +
+        EmbeddingsQuantization.quantizations.mkString(", "))
+    set(storageQuantization, value)
+  }
+
+  /** @group getParam */
+  def getStorageQuantization: String = $(storageQuantization)
+
+  override protected def quantization: String = $(storageQuantization)
+
   private var memoryStorage: Option[Broadcast[Map[BytesKey, Array[Byte]]]] = None
 
+  // Name of the flat storage shipped to the cluster, if it was shipped
+  private var flatStorageName: Option[String] = None
+
+  @transient private lazy val flatReader: FlatEmbeddingsReader =
+    FlatEmbeddingsStorage.getOrOpen(
+      flatStorageName,
+      $(dimension),
+      $(caseSensitive),
+      $(storageQuantization),
+      getReader(Database.EMBEDDINGS).getConnection)
+
   private def getInMemoryStorage: Map[BytesKey, Array[Byte]] = {
     memoryStorage.map(_.value).getOrElse {
       if ($(enableInMemoryStorage)) {
@@ -203,6 +283,14 @@ class WordEmbeddingsModel(override val uid: String)
       val storageReader = getReader(Database.EMBEDDINGS)
       val memoryStorage = storageReader.exportStorageToMap()
       this.memoryStorage = Some(dataset.sparkSession.sparkContext.broadcast(memoryStorage))
+    } else if ($(storageFormat) == WordEmbeddingsModel.MMAP_FORMAT) {
+      flatStorageName = Some(
+        FlatEmbeddingsStorage.distribute(
+          getReader(Database.EMBEDDINGS).getConnection,
+          $(dimension),
+          $(storageRef),
+          dataset.sparkSession.sparkContext,
+          $(storageQuantization)))
     }
     dataset
   }
@@ -259,6 +347,8 @@ class WordEmbeddingsModel(override val uid: String)
 
       (embeddings, zeroArray)
 
+    } else if ($(storageFormat) == WordEmbeddingsModel.MMAP_FORMAT) {
+      (flatReader.lookup(token), flatReader.emptyValue)
     } else {
       val storageReader = getReader(Database.EMBEDDINGS)
       val embeddings = storageReader.lookup(token)
@@ -288,7 +378,8 @@ class WordEmbeddingsModel(override val uid: String)
       connection,
       $(caseSensitive),
       $(dimension),
-      get(readCacheSize).getOrElse(bufferSizeFormula))
+      get(readCacheSize).getOrElse(bufferSizeFormula),
+      $(storageQuantization))
   }
 
   override val databases: Array[Database.Name] = WordEmbeddingsModel.databases
@@ -354,4 +445,10 @@ trait EmbeddingsCoverage {
 /** This is the companion object of [[WordEmbeddingsModel]]. Please refer to that class for the
   * documentation.
   */
-object WordEmbeddingsModel extends ReadablePretrainedWordEmbeddings with EmbeddingsCoverage
+object WordEmbeddingsModel extends ReadablePretrainedWordEmbeddings with EmbeddingsCoverage {
+
+  val ROCKSDB_FORMAT = "rocksdb"
+  val MMAP_FORMAT = "mmap"
+
+  val storageFormats: Seq[String] = Seq(ROCKSDB_FORMAT, MMAP_FORMAT)
+}
@@ -22,11 +22,14 @@ class WordEmbeddingsReader(
     override val connection: RocksDBConnection,
     override val caseSensitiveIndex: Boolean,
     dimension: Int,
-    maxCacheSize: Int)
+    maxCacheSize: Int,
+    storageQuantization: String = EmbeddingsQuantization.NONE)
     extends StorageReader[Array[Float]]
     with ReadsFromBytes {
 
   override def emptyValue: Array[Float] = Array.fill[Float](dimension)(0f)
 
   override protected def readCacheSize: Int = maxCacheSize
+
+  override protected def quantization: String = storageQuantization
 }
@@ -18,26 +18,21 @@ package com.johnsnowlabs.nlp.embeddings
 
 import com.johnsnowlabs.storage.{RocksDBConnection, StorageBatchWriter}
 
-import java.nio.{ByteBuffer, ByteOrder}
-
 class WordEmbeddingsWriter(
     override val connection: RocksDBConnection,
     caseSensitiveIndex: Boolean,
     dimension: Int,
     maxCacheSize: Int,
-    writeBuffer: Int)
+    writeBuffer: Int,
+    storageQuantization: String = EmbeddingsQuantization.NONE)
     extends StorageBatchWriter[Array[Float]]
     with ReadsFromBytes {
 
   override protected def writeBufferSize: Int = writeBuffer
 
-  override def toBytes(content: Array[Float]): Array[Byte] = {
-    val buffer = ByteBuffer.allocate(content.length * 4)
-    buffer.order(ByteOrder.LITTLE_ENDIAN)
-    for (value <- content) {
-      buffer.putFloat(value)
-    }
-    buffer.array()
-  }
+  override protected def quantization: String = storageQuantization
+
+  override def toBytes(content: Array[Float]): Array[Byte] =
+    EmbeddingsQuantization.encode(content, quantization)
 
 }
@@ -0,0 +1,179 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.pretrained
+
+import com.johnsnowlabs.nlp.util.io.{OutputHelper, ResourceHelper}
+import com.johnsnowlabs.util.{FileHelper, JsonParser, ZipArchiveUtil}
+import org.apache.hadoop.fs.{FileUtil, Path}
+import org.json4s.jackson.Serialization
+import org.json4s.jackson.Serialization.write
+import org.json4s.{Formats, NoTypeHints}
+import org.slf4j.{Logger, LoggerFactory}
+
+import java.io.File
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.Files
+import scala.io.Source
+
+/** Model or pipeline of a [[ResourceBundle]]
+  *
+  * @param name
+  *   Name of the resource, as given to `pretrained`
+  * @param language
+  *   Language of the resource
+  * @param folder
+  *   Remote location the resource was downloaded from
+  * @param path
+  *   Path of the resource, relative to the bundle
+  * @param size
+  *   Size of the resource in bytes
+  */
+case class BundledResource(
+    name: String,
+    language: Option[String],
+    folder: String,
+    path: String,
+    size: Long) {
+
+  def matches(request: ResourceRequest): Boolean =
+    name == request.name && folder.stripPrefix("@") == request.folder.stripPrefix("@") &&
+      (request.language.isEmpty || language.isEmpty || request.language == language)
+
+}
+
+/** Models and pipelines downloaded once into a folder, from which they are loaded without any
+  * lookup of the remote repository, for example on clusters without internet access.
+  *
+  * The folder holds a copy of each resource and a `manifest.json` listing them, one JSON object
+  * per line like the metadata of the repository. A bundle can also be shipped as a zip archive of
+  * that folder.
+  *
+  * @param location
+  *   Folder of the bundle
+  * @param resources
+  *   Resources of the bundle
+  */
+class ResourceBundle(val location: String, val resources: Seq[BundledResource]) {
+
+  /** Path of the resource of the bundle answering a request, if any */
+  def resolve(request: ResourceRequest): Option[String] =
+    resources.find(_.matches(request)).map(resource => new Path(location, resource.path).toString)
+
+  /** Size of the resource of the bundle answering a request, if any */
+  def size(request: ResourceRequest): Option[Long] =
+    resources.find(_.matches(request)).map(_.size)
+
+}
+
+object ResourceBundle {
+
+  private val logger: Logger = LoggerFactory.getLogger("ResourceBundle")
+
+  val manifestFile = "manifest.json"
+
+  implicit val formats: Formats = Serialization.formats(NoTypeHints)
+
+  /** Downloads resources and copies them into a bundle.
+    *
+    * @param requests
+    *   Models and pipelines of the bundle
+    * @param destination
+    *   Folder of the bundle, or a local `.zip` file to archive it into
+    */
+  def build(requests: Seq[ResourceRequest], destination: String): ResourceBundle = {
+    val archived = destination.endsWith(".zip")
+    val folder =
+      if (archived) Files.createTempDirectory("sparknlp_bundle").toAbsolutePath.toString
+      else destination
+    val fileSystem = OutputHelper.getFileSystem(folder)
+    val hadoopConfiguration = ResourceHelper.spark.sparkContext.hadoopConfiguration
+
+    val resources = requests.map { request =>
+      val downloaded = new Path(ResourceDownloader.downloadResource(request))
+      val sourceFileSystem = downloaded.getFileSystem(hadoopConfiguration)
+      val target = new Path(folder, downloaded.getName)
+      if (!fileSystem.exists(target))
+        FileUtil.copy(
+          sourceFileSystem,
+          downloaded,
+          fileSystem,
+          target,
+          false,
+          hadoopConfiguration)
+      BundledResource(
+        name = request.name,
+        language = request.language,
+        folder = request.folder,
+        path = downloaded.getName,
+        size = fileSystem.getContentSummary(target).getLength)
+    }
+
+    val output = fileSystem.create(new Path(folder, manifestFile), true)
+    try output.write(resources.map(resource => write(resource)).mkString("\n").getBytes(UTF_8))
+    finally output.close()
+
+    if (archived) {
+      ZipArchiveUtil.zip(folder, destination)
+      FileHelper.delete(folder)
+    }
+    logger.info(s"Bundled ${resources.length} resources into $destination")
+    new ResourceBundle(destination, resources)
+  }
+
+  /** Reads a bundle and checks that all its resources are complete. Archives are unzipped into a
+    * temporary folder.
+    *
+    * @param location
+    *   Folder of the bundle, or a local `.zip` archive of it
+    */
+  def load(location: String): ResourceBundle = {
+    val folder =
+      if (location.endsWith(".zip") && new File(location).isFile) {
+        val unzipped = Files.createTempDirectory("sparknlp_bundle").toFile
+        ResourceCache.unzip(new File(location), unzipped)
+        unzipped.getAbsolutePath
+      } else location
+    val fileSystem = OutputHelper.getFileSystem(folder)
+    val manifest = new Path(folder, manifestFile)
+    require(fileSystem.exists(manifest), s"$location is not a bundle, it has no $manifestFile")
+
+    val input = fileSystem.open(manifest)
+    val resources =
+      try {
+        JsonParser.formats = formats
+        Source
+          .fromInputStream(input, "UTF-8")
+          .getLines()
+          .collect {
+            case line if line.trim.nonEmpty => JsonParser.parseObject[BundledResource](line)
+          }
+          .toList
+      } finally input.close()
+
+    val invalid = resources.filterNot { resource =>
+      val path = new Path(folder, resource.path)
+      fileSystem.exists(path) && fileSystem.getContentSummary(path).getLength == resource.size
+    }
+    require(
+      invalid.isEmpty,
+      s"Resources of the bundle $location are missing or incomplete: " +
+        invalid.map(_.path).mkString(", "))
+
+    new ResourceBundle(folder, resources)
+  }
+
+}
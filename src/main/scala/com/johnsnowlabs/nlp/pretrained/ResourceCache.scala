@@ -0,0 +1,321 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.pretrained
+
+import com.johnsnowlabs.client.util.CloudHelper
+import com.johnsnowlabs.util.FileHelper
+import org.apache.commons.io.FileUtils
+import org.apache.hadoop.fs.Path
+import org.slf4j.{Logger, LoggerFactory}
+
+import java.io.{File, FileInputStream, FileOutputStream, IOException}
+import java.nio.channels.{FileChannel, FileLock}
+import java.nio.file.{Files, StandardCopyOption, StandardOpenOption}
+import java.util.Properties
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.locks.ReentrantLock
+import java.util.zip.ZipInputStream
+
+/** Resource installed in a [[ResourceCache]]
+  *
+  * @param name
+  *   Name of the resource in the cache, the name of its archive without `.zip`
+  * @param path
+  *   Local path of the resource
+  * @param size
+  *   Size of the installed resource in bytes
+  * @param checksum
+  *   Checksum of the downloaded archive, or empty if it was not published
+  * @param lastAccessed
+  *   Time the resource was last installed or loaded, in milliseconds
+  */
+case class CachedResource(
+    name: String,
+    path: String,
+    size: Long,
+    checksum: String,
+    lastAccessed: Long)
+
+/** Local cache of pretrained models and pipelines, shared by the processes of a machine.
+  *
+  * Each resource is installed in `<folder>/<name>`. Published archives are named after the
+  * resource, its versions and upload time, so a name always refers to the same content, which is
+  * checked against the published checksum before the resource is installed. Resources are
+  * downloaded and unzipped into a staging folder and moved in place once complete, while holding
+  * a file lock of the resource, so concurrent processes never see partial resources and download
+  * each resource once.
+  *
+  * The checksum, size and access time of each resource are kept in `<folder>/.cache`. When the
+  * cache grows over its maximum size, the least recently used resources are evicted.
+  *
+  * @param folder
+  *   Local folder of the cache
+  * @param maxSize
+  *   Maximum size of the cache in bytes, or 0 for no limit
+  */
+class ResourceCache(val folder: String, maxSize: Long = 0L) {
+
+  import ResourceCache._
+
+  private val root = new File(folder).getAbsoluteFile
+  private val bookkeeping = new File(root, bookkeepingFolder)
+
+  /** Returns an installed resource and records the access, for least recently used eviction */
+  def get(name: String): Option[CachedResource] = {
+    val installed = entry(name)
+    installed.foreach(_ => touch(name))
+    installed
+  }
+
+  /** Returns an installed resource, or downloads and installs it first.
+    *
+    * @param name
+    *   Name of the resource in the cache
+    * @param checksum
+    *   MD5 checksum of the archive, not validated if empty
+    * @param unzip
+    *   Whether the archive is unzipped into a folder or installed as is
+    * @param download
+    *   Downloads the archive into the given file
+    */
+  def getOrInstall(name: String, checksum: String, unzip: Boolean)(
+      download: File => Unit): CachedResource = {
+    val installed = withLock(name) {
+      get(name).getOrElse {
+        val staging = Files.createTempDirectory(stagingFolder.toPath, name).toFile
+        try {
+          val archive = new File(staging, archiveFile)
+          download(archive)
+          if (checksum.nonEmpty)
+            require(
+              FileHelper.generateChecksum(archive.getPath).equalsIgnoreCase(checksum),
+              s"Checksum validation failed for $name!")
+
+          val source =
+            if (unzip) {
+              val unzipped = new File(staging, name)
+              ResourceCache.unzip(archive, unzipped)
+              unzipped
+            } else archive
+          val size = FileUtils.sizeOf(source)
+          writeProperties(name, checksum, size)
+          Files.move(
+            source.toPath,
+            new File(root, name).toPath,
+            StandardCopyOption.ATOMIC_MOVE)
+          logger.info(s"Installed $name in the cache of pretrained resources")
+          CachedResource(name, new File(root, name).getPath, size, checksum, now)
+        } finally {
+          FileHelper.delete(staging.getPath)
+        }
+      }
+    }
+    if (maxSize > 0) evictToSize(maxSize, keep = Set(name))
+    installed
+  }
+
+  /** Installed resources, including resources installed before the cache kept their checksum */
+  def entries: Seq[CachedResource] =
+    Option(root.listFiles()).toSeq.flatten
+      .filterNot(_.getName.startsWith("."))
+      .flatMap(file => entry(file.getName))
+      .sortBy(_.lastAccessed)
+
+  /** Total size of the installed resources in bytes */
+  def size: Long = entries.map(_.size).sum
+
+  /** Removes a resource from the cache. Waits for other processes installing it.
+    *
+    * @return
+    *   Whether the resource was installed
+    */
+  def evict(name: String): Boolean = withLock(name)(remove(name))
+
+  /** Evicts the least recently used resources until the cache fits in a size. Resources locked
+    * by other processes are skipped.
+    *
+    * @param maxSize
+    *   Size to fit in, in bytes
+    * @param keep
+    *   Names of the resources to keep
+    * @return
+    *   Evicted resources
+    */
+  def evictToSize(maxSize: Long, keep: Set[String] = Set.empty): Seq[CachedResource] = {
+    val installed = entries
+    var total = installed.map(_.size).sum
+    val evicted = Seq.newBuilder[CachedResource]
+    installed.filterNot(resource => keep.contains(resource.name)).foreach { resource =>
+      if (total > maxSize && tryWithLock(resource.name)(remove(resource.name)).contains(true)) {
+        logger.info(s"Evicted ${resource.name} from the cache of pretrained resources")
+        total -= resource.size
+        evicted += resource
+      }
+    }
+    evicted.result()
+  }
+
+  private def entry(name: String): Option[CachedResource] = {
+    val file = new File(root, name)
+    if (!file.exists()) None
+    else {
+      val propertiesFile = new File(bookkeeping, name + propertiesSuffix)
+      if (propertiesFile.exists()) {
+        val properties = readProperties(propertiesFile)
+        Some(
+          CachedResource(
+            name,
+            file.getPath,
+            properties.getProperty("size", "0").toLong,
+            properties.getProperty("checksum", ""),
+            propertiesFile.lastModified()))
+      } else
+        Some(CachedResource(name, file.getPath, FileUtils.sizeOf(file), "", file.lastModified))
+    }
+  }
+
+  private def remove(name: String): Boolean = {
+    val file = new File(root, name)
+    val existed = file.exists()
+    FileHelper.delete(file.getPath)
+    FileHelper.delete(new File(bookkeeping, name + propertiesSuffix).getPath)
+    existed
+  }
+
+  private def touch(name: String): Unit = {
+    val propertiesFile = new File(bookkeeping, name + propertiesSuffix)
+    if (propertiesFile.exists()) propertiesFile.setLastModified(now)
+  }
+
+  private def stagingFolder: File = {
+    val staging = new File(bookkeeping, "staging")
+    staging.mkdirs()
+    staging
+  }
+
+  private def writeProperties(name: String, checksum: String, size: Long): Unit = {
+    val properties = new Properties()
+    properties.setProperty("checksum", checksum)
+    properties.setProperty("size", size.toString)
+    val output = new FileOutputStream(new File(bookkeeping, name + propertiesSuffix))
+    try properties.store(output, name)
+    finally output.close()
+  }
+
+  private def readProperties(file: File): Properties = {
+    val properties = new Properties()
+    val input = new FileInputStream(file)
+    try properties.load(input)
+    finally input.close()
+    properties
+  }
+
+  /** Runs a block holding the lock of a resource, in this process and across processes */
+  private def withLock[T](name: String)(block: => T): T = {
+    val (threadLock, lockFile) = locks(name)
+    threadLock.lock()
+    try {
+      val channel = openLock(lockFile)
+      try {
+        val fileLock = channel.lock()
+        try block
+        finally fileLock.release()
+      } finally {
+        channel.close()
+      }
+    } finally {
+      threadLock.unlock()
+    }
+  }
+
+  private def tryWithLock[T](name: String)(block: => T): Option[T] = {
+    val (threadLock, lockFile) = locks(name)
+    if (!threadLock.tryLock()) None
+    else
+      try {
+        val channel = openLock(lockFile)
+        try {
+          val fileLock: FileLock = channel.tryLock()
+          if (fileLock == null) None
+          else
+            try Some(block)
+            finally fileLock.release()
+        } finally {
+          channel.close()
+        }
+      } finally {
+        threadLock.unlock()
+      }
+  }
+
+  private def locks(name: String): (ReentrantLock, File) = {
+    bookkeeping.mkdirs()
+    val lockFile = new File(bookkeeping, name + lockSuffix)
+    (threadLocks.computeIfAbsent(lockFile.getPath, _ => new ReentrantLock()), lockFile)
+  }
+
+  private def openLock(lockFile: File): FileChannel =
+    FileChannel.open(lockFile.toPath, StandardOpenOption.CREATE, StandardOpenOption.WRITE)
+
+  private def now: Long = System.currentTimeMillis()
+
+}
+
+object ResourceCache {
+
+  private val logger: Logger = LoggerFactory.getLogger("ResourceCache")
+
+  private val bookkeepingFolder = ".cache"
+  private val archiveFile = "archive"
+  private val propertiesSuffix = ".properties"
+  private val lockSuffix = ".lock"
+
+  // File locks are held by the whole process, threads of this process wait on these instead
+  private val threadLocks = new ConcurrentHashMap[String, ReentrantLock]()
+
+  /** Unzips an archive, keeping the paths of its entries */
+  private[pretrained] def unzip(archive: File, destination: File): Unit = {
+    val zis = new ZipInputStream(new FileInputStream(archive))
+    try {
+      var entry = zis.getNextEntry
+      while (entry != null) {
+        val target = new File(destination, entry.getName)
+        if (!target.getCanonicalPath.startsWith(destination.getCanonicalPath))
+          throw new IOException(s"Entry ${entry.getName} is outside of the archive")
+        if (!entry.isDirectory) {
+          target.getParentFile.mkdirs()
+          Files.copy(zis, target.toPath)
+        }
+        zis.closeEntry()
+        entry = zis.getNextEntry
+      }
+    } finally {
+      zis.close()
+    }
+  }
+
+  /** Cache in a folder of the local file system, or None for folders of distributed or cloud
+    * file systems, which are managed by the downloaders as they are.
+    */
+  def local(folder: String, maxSize: Long = 0L): Option[ResourceCache] = {
+    val path = new Path(folder)
+    val scheme = Option(path.toUri.getScheme).getOrElse(ResourceDownloader.fileSystem.getScheme)
+    if (CloudHelper.isCloudPath(folder) || scheme != "file") None
+    else Some(new ResourceCache(path.toUri.getPath, maxSize))
+  }
+
+}
@@ -50,10 +50,12 @@ import com.johnsnowlabs.nlp.util.io.{OutputHelper, ResourceHelper}
 import com.johnsnowlabs.nlp.{DocumentAssembler, TableAssembler, pretrained}
 import com.johnsnowlabs.util._
 import org.apache.hadoop.fs.FileSystem
+import org.apache.spark.network.util.JavaUtils
 import org.apache.spark.ml.util.DefaultParamsReadable
 import org.apache.spark.ml.{PipelineModel, PipelineStage}
 import org.slf4j.{Logger, LoggerFactory}
 
+import scala.collection.JavaConverters._
 import scala.collection.mutable
 import scala.collection.mutable.ListBuffer
 import scala.concurrent.ExecutionContext.Implicits.global
@@ -98,11 +100,47 @@ object ResourceDownloader {
 
   def cacheFolder: String = ConfigLoader.getConfigStringValue(ConfigHelper.pretrainedCacheFolder)
 
+  /** Maximum size of the local cache in bytes, or 0 for no limit */
+  def cacheMaxSize: Long = {
+    val maxSize = ConfigLoader.getConfigStringValue(ConfigHelper.pretrainedCacheMaxSize)
+    if (maxSize.trim.isEmpty) 0L else JavaUtils.byteStringAsBytes(maxSize.trim)
+  }
+
+  /** Cache of the downloaded resources, if the cache folder is on the local file system */
+  def resourceCache: Option[ResourceCache] = ResourceCache.local(cacheFolder, cacheMaxSize)
+
   val publicLoc = "public/models"
 
   private val cache: mutable.Map[ResourceRequest, PipelineStage] =
     mutable.Map[ResourceRequest, PipelineStage]()
 
+  @volatile private var activeBundle: Option[ResourceBundle] = None
+
+  private lazy val configuredBundle: Option[ResourceBundle] =
+    Some(ConfigLoader.getConfigStringValue(ConfigHelper.pretrainedBundle))
+      .filter(_.nonEmpty)
+      .map(ResourceBundle.load)
+
+  /** Bundle resolving requests without downloading them, set with [[useBundle]] or the
+    * `spark.jsl.settings.pretrained.bundle` configuration
+    */
+  def bundle: Option[ResourceBundle] = activeBundle.orElse(configuredBundle)
+
+  /** Loads models and pipelines from a bundle, built with [[ResourceBundle.build]], instead of
+    * downloading them. The bundle is validated before it is used.
+    *
+    * @param location
+    *   Folder of the bundle or local `.zip` archive of it
+    */
+  def useBundle(location: String): ResourceBundle = {
+    val loaded = ResourceBundle.load(location)
+    activeBundle = Some(loaded)
+    loaded
+  }
+
+  /** Stops loading models and pipelines from the bundle set with [[useBundle]] */
+  def clearBundle(): Unit = activeBundle = None
+
   lazy val sparkVersion: Version = {
     val spark_version = ResourceHelper.spark.version
     Version.parse(spark_version)
@@ -446,6 +484,15 @@ object ResourceDownloader {
     *   path of downloaded resource
     */
   def downloadResource(request: ResourceRequest): String = {
+    bundle.flatMap(_.resolve(request)) match {
+      case Some(path) =>
+        logger.info(s"Loading ${request.name} from the bundle ${bundle.get.location}")
+        path
+      case None => downloadRemoteResource(request)
+    }
+  }
+
+  private def downloadRemoteResource(request: ResourceRequest): String = {
     val future = Future {
       val updatedRequest: ResourceRequest = if (request.folder.startsWith("@")) {
         request.copy(folder = request.folder.replace("@", ""))
@@ -552,7 +599,50 @@ object ResourceDownloader {
     cache.remove(request)
   }
 
+  /** Lists the resources in the local cache, least recently used first */
+  def listCache(): Seq[CachedResource] = resourceCache.map(_.entries).getOrElse(Seq.empty)
+
+  /** Downloads a model or pipeline into the cache without loading it, so that loading it later
+    * does not download it again.
+    *
+    * @return
+    *   path of the downloaded resource
+    */
+  def prefetch(
+      name: String,
+      language: Option[String] = None,
+      folder: String = publicLoc): String =
+    downloadResource(ResourceRequest(name, language, folder))
+
+  /** Removes a resource from the local cache
+    *
+    * @param name
+    *   Name of the resource in the cache, as listed by [[listCache]]
+    * @return
+    *   whether the resource was in the cache
+    */
+  def evictCache(name: String): Boolean = resourceCache.exists(_.evict(name))
+
+  /** Evicts the least recently used resources until the local cache fits in a size
+    *
+    * @param maxSize
+    *   Size in bytes, or with a unit such as `500m` or `10g`
+    * @return
+    *   evicted resources
+    */
+  def pruneCache(maxSize: String): Seq[CachedResource] =
+    resourceCache
+      .map(_.evictToSize(JavaUtils.byteStringAsBytes(maxSize)))
+      .getOrElse(Seq.empty)
+
   def getDownloadSize(resourceRequest: ResourceRequest): String = {
+    bundle.flatMap(_.size(resourceRequest)) match {
+      case Some(bundledBytes) => FileHelper.getHumanReadableFileSize(bundledBytes)
+      case None => getRemoteDownloadSize(resourceRequest)
+    }
+  }
+
+  private def getRemoteDownloadSize(resourceRequest: ResourceRequest): String = {
 
     val updatedResourceRequest: ResourceRequest = if (resourceRequest.folder.startsWith("@")) {
       resourceRequest.copy(folder = resourceRequest.folder.replace("@", ""))
@@ -777,6 +867,48 @@ object PythonResourceDownloader {
     ResourceDownloader.listAvailableAnnotators().mkString("\n")
   }
 
+  def listCache(): java.util.List[java.util.Map[String, Any]] =
+    ResourceDownloader
+      .listCache()
+      .map { resource =>
+        Map[String, Any](
+          "name" -> resource.name,
+          "path" -> resource.path,
+          "size" -> resource.size,
+          "checksum" -> resource.checksum,
+          "lastAccessed" -> resource.lastAccessed).asJava
+      }
+      .asJava
+
+  def prefetch(name: String, language: String = null, remoteLoc: String = null): String = {
+    val correctedFolder = Option(remoteLoc).getOrElse(ResourceDownloader.publicLoc)
+    ResourceDownloader.prefetch(name, Option(language), correctedFolder)
+  }
+
+  def evictCache(name: String): Boolean = ResourceDownloader.evictCache(name)
+
+  def pruneCache(maxSize: String): java.util.List[String] =
+    ResourceDownloader.pruneCache(maxSize).map(_.name).asJava
+
+  def buildBundle(
+      names: java.util.List[String],
+      languages: java.util.List[String],
+      remoteLocs: java.util.List[String],
+      destination: String): String = {
+    val requests = names.asScala.indices.map { i =>
+      ResourceRequest(
+        names.get(i),
+        Option(languages.get(i)),
+        Option(remoteLocs.get(i)).getOrElse(ResourceDownloader.publicLoc))
+    }
+    ResourceBundle.build(requests, destination).location
+  }
+
+  def useBundle(location: String): java.util.List[String] =
+    ResourceDownloader.useBundle(location).resources.map(_.name).asJava
+
+  def clearBundle(): Unit = ResourceDownloader.clearBundle()
+
   def getDownloadSize(name: String, language: String = "en", remoteLoc: String = null): String = {
     val correctedFolder = Option(remoteLoc).getOrElse(ResourceDownloader.publicLoc)
     ResourceDownloader.getDownloadSize(ResourceRequest(name, Option(language), correctedFolder))
@@ -45,6 +45,13 @@ class S3ResourceDownloader(
 
   lazy val awsGateway = new AWSGateway(region = region, credentialsType = credentialsType)
 
+  /** Cache managing the downloads, if the cache folder is on the local file system */
+  def resourceCache: Option[ResourceCache] =
+    ResourceCache.local(cacheFolder, ResourceDownloader.cacheMaxSize)
+
+  private def cacheName(resource: ResourceMetadata): String =
+    if (resource.isZipped) resource.key else resource.fileName
+
   def downloadMetadataIfNeed(folder: String): List[ResourceMetadata] = {
     val lastMetadataState = repoFolder2Metadata.get(folder)
     val metadataFilePath = awsGateway.getS3File(s3Path, folder, "metadata.json")
@@ -107,6 +114,18 @@ class S3ResourceDownloader(
   }
 
   def downloadAndUnzipFile(
+      destinationFile: Path,
+      resource: ResourceMetadata,
+      s3FilePath: String): Option[String] = resourceCache match {
+    case Some(cache) =>
+      val cached = cache.getOrInstall(cacheName(resource), resource.checksum, resource.isZipped) {
+        archive => awsGateway.getS3Object(bucket, s3FilePath, archive)
+      }
+      Some(cached.path)
+    case None => downloadAndUnzipToFileSystem(destinationFile, resource, s3FilePath)
+  }
+
+  private def downloadAndUnzipToFileSystem(
       destinationFile: Path,
       resource: ResourceMetadata,
       s3FilePath: String): Option[String] = {
@@ -176,6 +195,21 @@ class S3ResourceDownloader(
 
     val s3File = newS3FilePath.split("/").last
 
+    resourceCache match {
+      case Some(cache) =>
+        val name = if (unzip) s3File.stripSuffix(".zip") else s3File
+        val cached = cache.getOrInstall(name, checksum = "", unzip = unzip) { archive =>
+          awsGateway.getS3Object(bucket, newS3FilePath, archive)
+        }
+        Some(cached.path)
+      case None => downloadAndUnzipToFileSystem(newS3FilePath, s3File, unzip)
+    }
+  }
+
+  private def downloadAndUnzipToFileSystem(
+      newS3FilePath: String,
+      s3File: String,
+      unzip: Boolean): Option[String] = {
     val destinationFile = new Path(cachePath.toString + "/" + s3File)
     val splitPath = destinationFile.toString.substring(0, destinationFile.toString.length - 4)
 
@@ -236,6 +270,8 @@ class S3ResourceDownloader(
 
     val resources = ResourceMetadata.resolveResource(metadata, request)
     for (resource <- resources) {
+      resourceCache.foreach(_.evict(cacheName(resource)))
+
       val fileName = new Path(cachePath.toString, resource.fileName)
       if (fileSystem.exists(fileName))
         fileSystem.delete(fileName, true)
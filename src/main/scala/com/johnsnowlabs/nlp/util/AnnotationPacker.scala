@@ -0,0 +1,188 @@
+/*
+ * Copyright 2017-2022 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.util
+
+import com.johnsnowlabs.nlp.{Annotation, IAnnotation}
+
+import java.io.{ByteArrayOutputStream, DataOutputStream}
+import java.nio.charset.StandardCharsets
+
+/** Packs LightPipeline results into a single little-endian byte buffer, so that the python side
+  * can decode a whole batch with one gateway call instead of several calls per annotation.
+  *
+  * Annotations layout:
+  * {{{
+  * int numDocuments
+  *   int numColumns
+  *     string column, int numAnnotations
+  *       string annotatorType, int begin, int end, string result,
+  *       int numMetadata, (string key, string value)*,
+  *       int numEmbeddings, float*
+  * }}}
+  *
+  * Embeddings layout, with each column's embeddings stored as one contiguous row-major matrix
+  * aligned to 4 bytes. Columns can have different dimensions, but the annotations of a column
+  * must all have the same dimension:
+  * {{{
+  * int numDocuments
+  *   int numColumns
+  *     string column, int numAnnotations
+  *       string annotatorType, int begin, int end, string result,
+  *       int numMetadata, (string key, string value)*
+  *     int rows, int dimension, padding, float[rows * dimension]
+  * }}}
+  *
+  * Results layout:
+  * {{{
+  * int numDocuments
+  *   int numColumns
+  *     string column, int numResults, string*
+  * }}}
+  *
+  * Strings are written as an int byte length followed by their UTF-8 bytes.
+  */
+object AnnotationPacker {
+
+  def packAnnotations(
+      documents: Seq[Map[String, Seq[IAnnotation]]],
+      withEmbeddings: Boolean): Array[Byte] = {
+    val buffer = new ByteArrayOutputStream()
+    val output = new DataOutputStream(buffer)
+
+    writeInt(output, documents.length)
+    documents.foreach { columns =>
+      writeInt(output, columns.size)
+      columns.foreach { case (column, annotations) =>
+        writeString(output, column)
+        writeInt(output, annotations.length)
+        annotations.foreach {
+          case annotation: Annotation => writeAnnotation(output, annotation, withEmbeddings)
+          case other =>
+            throw new UnsupportedOperationException(
+              s"Annotation of type ${other.getClass.getSimpleName} can not be packed." +
+                " Only text annotations are supported")
+        }
+      }
+    }
+
+    output.flush()
+    buffer.toByteArray
+  }
+
+  def packAnnotationsWithEmbeddings(
+      documents: Seq[Map[String, Seq[IAnnotation]]]): Array[Byte] = {
+    val buffer = new ByteArrayOutputStream()
+    val output = new DataOutputStream(buffer)
+
+    writeInt(output, documents.length)
+    documents.foreach { columns =>
+      writeInt(output, columns.size)
+      columns.foreach { case (column, iAnnotations) =>
+        val annotations = iAnnotations.map {
+          case annotation: Annotation => annotation
+          case other =>
+            throw new UnsupportedOperationException(
+              s"Annotation of type ${other.getClass.getSimpleName} can not be packed." +
+                " Only text annotations are supported")
+        }
+        writeString(output, column)
+        writeInt(output, annotations.length)
+        annotations.foreach(annotation => writeAnnotationFields(output, annotation))
+        writeEmbeddingsMatrix(output, column, annotations)
+      }
+    }
+
+    output.flush()
+    buffer.toByteArray
+  }
+
+  def packResults(documents: Seq[Map[String, Seq[String]]]): Array[Byte] = {
+    val buffer = new ByteArrayOutputStream()
+    val output = new DataOutputStream(buffer)
+
+    writeInt(output, documents.length)
+    documents.foreach { columns =>
+      writeInt(output, columns.size)
+      columns.foreach { case (column, results) =>
+        writeString(output, column)
+        writeInt(output, results.length)
+        results.foreach(result => writeString(output, result))
+      }
+    }
+
+    output.flush()
+    buffer.toByteArray
+  }
+
+  private def writeAnnotation(
+      output: DataOutputStream,
+      annotation: Annotation,
+      withEmbeddings: Boolean): Unit = {
+    writeAnnotationFields(output, annotation)
+
+    val embeddings =
+      if (withEmbeddings && annotation.embeddings != null) annotation.embeddings
+      else Array.emptyFloatArray
+    writeInt(output, embeddings.length)
+    embeddings.foreach(value => writeInt(output, java.lang.Float.floatToRawIntBits(value)))
+  }
+
+  private def writeAnnotationFields(output: DataOutputStream, annotation: Annotation): Unit = {
+    writeString(output, annotation.annotatorType)
+    writeInt(output, annotation.begin)
+    writeInt(output, annotation.end)
+    writeString(output, annotation.result)
+
+    writeInt(output, annotation.metadata.size)
+    annotation.metadata.foreach { case (key, value) =>
+      writeString(output, key)
+      writeString(output, value)
+    }
+  }
+
+  private def writeEmbeddingsMatrix(
+      output: DataOutputStream,
+      column: String,
+      annotations: Seq[Annotation]): Unit = {
+    val rows = annotations.map(annotation =>
+      if (annotation.embeddings == null) Array.emptyFloatArray else annotation.embeddings)
+    val dimension = rows.headOption.map(_.length).getOrElse(0)
+    if (!rows.forall(_.length == dimension))
+      throw new IllegalArgumentException(
+        s"Embeddings of column '$column' can not be packed as a matrix, its annotations have" +
+          s" embeddings of dimensions ${rows.map(_.length).distinct.sorted.mkString(", ")}." +
+          " Use fullAnnotate for columns with embeddings of different dimensions")
+
+    val numRows = if (dimension == 0) 0 else rows.length
+    writeInt(output, numRows)
+    writeInt(output, dimension)
+    while (output.size() % 4 != 0) output.writeByte(0)
+    if (numRows > 0)
+      rows.foreach(_.foreach(value => writeInt(output, java.lang.Float.floatToRawIntBits(value))))
+  }
+
+  private def writeInt(output: DataOutputStream, value: Int): Unit =
+    output.writeInt(Integer.reverseBytes(value))
+
+  private def writeString(output: DataOutputStream, value: String): Unit = {
+    val bytes =
+      if (value == null) Array.emptyByteArray else value.getBytes(StandardCharsets.UTF_8)
+    writeInt(output, bytes.length)
+    output.write(bytes)
+  }
+
+}
@@ -16,64 +16,85 @@
 
 package com.johnsnowlabs.nlp.util
 
-import scala.collection.mutable
+import java.util
 
+import scala.collection.JavaConverters._
+
+/** Thread safe least recently used cache with O(1) lookups, updates and evictions.
+  *
+  * Both updates and successful lookups refresh the recency of a key. Values computed by
+  * [[getOrElseUpdate]] are evaluated outside of the lock, so slow lookups (e.g. disk reads) of
+  * different keys do not block each other.
+  *
+  * @param maxCacheSize
+  *   Maximum number of entries before the least recently used one is evicted
+  */
 @specialized
 class LruMap[TKey, TValue](maxCacheSize: Int) {
-  private val cache = mutable.Map.empty[TKey, TValue]
-  private val lru = mutable.PriorityQueue.empty[KeyPriority](KeyPriorityOrdering)
 
-  private var priorityCounter = 0
-  private var size = 0
+  private var hits = 0L
+  private var misses = 0L
+  private var evictions = 0L
 
-  private def deleteOne(): Unit = {
-    val oldest = lru.dequeue().key
-    cache.remove(oldest)
+  private val cache = new util.LinkedHashMap[TKey, TValue](16, 0.75f, true) {
+    override def removeEldestEntry(eldest: util.Map.Entry[TKey, TValue]): Boolean = {
+      val evict = size() > maxCacheSize
+      if (evict) evictions += 1
+      evict
+    }
   }
 
-  def clear(): Unit = {
+  def clear(): Unit = synchronized {
     cache.clear()
-    lru.clear()
-    priorityCounter = 0
-    size = 0
+    hits = 0L
+    misses = 0L
+    evictions = 0L
   }
 
-  def getSize: Int = {
-    size
+  def getSize: Int = synchronized {
+    cache.size()
   }
 
-  def foreach: (((TKey, TValue)) => Any) => Unit = cache.foreach
-
-  def update(key: TKey, value: => TValue): TValue = synchronized {
-    val isNewKey = !cache.contains(key)
-    if (isNewKey && getSize >= maxCacheSize)
-      deleteOne()
-    else if (isNewKey)
-      size += 1
+  def foreach: (((TKey, TValue)) => Any) => Unit = {
+    val entries = synchronized { cache.asScala.toList }
+    entries.foreach
+  }
 
+  def update(key: TKey, value: => TValue): TValue = {
     val content = value
-    cache(key) = content
-    priorityCounter += 1
-    lru.enqueue(KeyPriority(key, priorityCounter))
+    synchronized {
+      cache.put(key, content)
+    }
     content
   }
 
   def getOrElseUpdate(key: TKey, valueCreator: => TValue): TValue = {
-    val oldValue = cache.get(key)
-    if (oldValue.isDefined) {
-      oldValue.get
-    } else {
-      update(key, valueCreator)
+    val oldValue = synchronized {
+      val found = lookup(key)
+      if (found.isDefined) hits += 1 else misses += 1
+      found
     }
+
+    if (oldValue.isDefined) oldValue.get
+    else update(key, valueCreator)
   }
 
-  def get(key: TKey): Option[TValue] = {
-    cache.get(key)
+  def get(key: TKey): Option[TValue] = synchronized {
+    lookup(key)
   }
 
-  case class KeyPriority(key: TKey, priority: Int)
+  /** Number of [[getOrElseUpdate]] calls answered from the cache */
+  def getHits: Long = synchronized { hits }
+
+  /** Number of [[getOrElseUpdate]] calls that had to compute their value */
+  def getMisses: Long = synchronized { misses }
 
-  object KeyPriorityOrdering extends Ordering[KeyPriority] {
-    override def compare(x: KeyPriority, y: KeyPriority): Int = y.priority.compareTo(x.priority)
+  /** Number of entries evicted to respect the maximum cache size */
+  def getEvictions: Long = synchronized { evictions }
+
+  private def lookup(key: TKey): Option[TValue] = {
+    // get, unlike containsKey, moves the key to the most recently used position
+    if (cache.containsKey(key)) Some(cache.get(key)) else None
   }
+
 }
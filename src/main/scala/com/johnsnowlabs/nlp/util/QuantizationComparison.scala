@@ -0,0 +1,120 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.util
+
+import com.johnsnowlabs.nlp.{Annotation, HasOutputAnnotationCol}
+import org.apache.spark.ml.Transformer
+import org.apache.spark.sql.{Dataset, Row}
+
+/** Accuracy and latency of a quantized model compared to the model it was quantized from.
+  *
+  * @param referenceSeconds
+  *   Average time of the reference model to annotate the sample
+  * @param quantizedSeconds
+  *   Average time of the quantized model to annotate the sample
+  * @param annotations
+  *   Number of annotations compared
+  * @param resultAgreement
+  *   Fraction of annotations with the same result, such as the same label
+  * @param meanCosineSimilarity
+  *   Mean cosine similarity of the embeddings of the annotations, or 1 if they have none
+  * @param minCosineSimilarity
+  *   Lowest cosine similarity of the embeddings of the annotations, or 1 if they have none
+  */
+case class QuantizationReport(
+    referenceSeconds: Double,
+    quantizedSeconds: Double,
+    annotations: Long,
+    resultAgreement: Double,
+    meanCosineSimilarity: Double,
+    minCosineSimilarity: Double) {
+
+  def speedup: Double = if (quantizedSeconds == 0) 0.0 else referenceSeconds / quantizedSeconds
+
+}
+
+object QuantizationComparison {
+
+  /** Annotates a sample with a model and its quantized version, such as the models loaded with
+    * `loadSavedModel` with and without `dynamic_int8` quantization, and compares their output.
+    *
+    * @param reference
+    *   Model before quantization
+    * @param quantized
+    *   Quantized model, writing the same output column
+    * @param dataset
+    *   Sample with the input columns of both models
+    * @param iterations
+    *   Number of times each model annotates the sample to measure its latency, after annotating
+    *   it once untimed to warm it up
+    */
+  def compare(
+      reference: Transformer with HasOutputAnnotationCol,
+      quantized: Transformer,
+      dataset: Dataset[_],
+      iterations: Int = 3): QuantizationReport = {
+    require(iterations > 0, "iterations must be greater than 0")
+    val outputCol = reference.getOutputCol
+
+    def annotate(model: Transformer): (Double, Array[Seq[Annotation]]) = {
+      // the first run creates the sessions of the model, which would skew its latency
+      var rows: Array[Row] = model.transform(dataset).select(outputCol).collect()
+      val start = System.nanoTime()
+      (0 until iterations).foreach { _ =>
+        rows = model.transform(dataset).select(outputCol).collect()
+      }
+      val seconds = (System.nanoTime() - start) / 1e9 / iterations
+      (seconds, rows.map(_.getSeq[Row](0).map(Annotation(_))))
+    }
+
+    val (referenceSeconds, referenceAnnotations) = annotate(reference)
+    val (quantizedSeconds, quantizedAnnotations) = annotate(quantized)
+
+    val pairs = referenceAnnotations.zip(quantizedAnnotations).flatMap { case (left, right) =>
+      left.zip(right)
+    }
+    val agreement = pairs.count { case (left, right) => left.result == right.result }
+    val similarities = pairs.collect {
+      case (left, right) if left.embeddings.nonEmpty && right.embeddings.nonEmpty =>
+        cosineSimilarity(left.embeddings, right.embeddings)
+    }
+
+    QuantizationReport(
+      referenceSeconds = referenceSeconds,
+      quantizedSeconds = quantizedSeconds,
+      annotations = pairs.length,
+      resultAgreement = if (pairs.isEmpty) 1.0 else agreement.toDouble / pairs.length,
+      meanCosineSimilarity =
+        if (similarities.isEmpty) 1.0 else similarities.sum / similarities.length,
+      minCosineSimilarity = if (similarities.isEmpty) 1.0 else similarities.min)
+  }
+
+  private[util] def cosineSimilarity(left: Array[Float], right: Array[Float]): Double = {
+    var dot = 0.0
+    var leftNorm = 0.0
+    var rightNorm = 0.0
+    var i = 0
+    while (i < math.min(left.length, right.length)) {
+      dot += left(i) * right(i)
+      leftNorm += left(i) * left(i)
+      rightNorm += right(i) * right(i)
+      i += 1
+    }
+    if (leftNorm == 0 || rightNorm == 0) 0.0 else dot / math.sqrt(leftNorm * rightNorm)
+  }
+
+}
@@ -0,0 +1,63 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.util
+
+import java.lang.ref.WeakReference
+import java.util
+
+import scala.collection.mutable
+
+/** Thread safe registry of values shared by everything using the same large immutable key, such
+  * as the vocabulary or merges of a model, and released together with the key.
+  *
+  * Keys are held weakly and compared by equality, so models loaded twice share their values.
+  * Hashing such a key is linear in its size, so repeated lookups of the most recent key compare
+  * it by reference instead.
+  *
+  * @tparam TKey
+  *   Type of the shared keys
+  * @tparam TValue
+  *   Type of the values, several of which can be registered per key under different names
+  */
+private[johnsnowlabs] class WeakKeyRegistry[TKey <: AnyRef, TValue] {
+
+  private type Values = mutable.Map[String, TValue]
+
+  private val valuesByKey = new util.WeakHashMap[TKey, Values]()
+
+  private var lastKey = new WeakReference[TKey](null.asInstanceOf[TKey])
+  private var lastValues: Values = mutable.Map.empty
+
+  /** Value registered for a key under a name, created with `create` if there is none yet */
+  def getOrElseUpdate(key: TKey, name: String, create: => TValue): TValue =
+    valuesByKey.synchronized {
+      val values =
+        if (lastKey.get() eq key) lastValues
+        else {
+          val keyValues = Option(valuesByKey.get(key)).getOrElse {
+            val created: Values = mutable.Map.empty
+            valuesByKey.put(key, created)
+            created
+          }
+          lastKey = new WeakReference(key)
+          lastValues = keyValues
+          keyValues
+        }
+      values.getOrElseUpdate(name, create)
+    }
+
+}
@@ -184,9 +184,24 @@ class RuleFactory(
     findMatchFunc(text)
   }
 
-  /** Specifically finds a first match within a group of matches */
+  /** Specifically finds a first match within a group of matches. With MATCH_FIRST, rules are
+    * tried in order and the remaining rules are skipped once one of them matches.
+    */
   def findMatchFirstOnly(text: String): Option[RuleMatch] = {
-    findMatch(text).headOption
+    matchStrategy match {
+      case MATCH_FIRST => findFirstRuleMatch(text)
+      case _ => findMatch(text).headOption
+    }
+  }
+
+  private def findFirstRuleMatch(text: String): Option[RuleMatch] = {
+    val ruleIterator = rules.iterator
+    while (ruleIterator.hasNext) {
+      val rule = ruleIterator.next()
+      val ruleMatch = rule.regex.findFirstMatchIn(text)
+      if (ruleMatch.isDefined) return ruleMatch.map(m => RuleMatch(m, rule.identifier))
+    }
+    None
   }
 
   /** Applies rule transform strategy and utilizing matching strategies Arguments are curried so
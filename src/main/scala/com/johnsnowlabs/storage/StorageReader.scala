@@ -32,9 +32,16 @@ trait StorageReader[A] extends HasConnection {
   def fromBytes(source: Array[Byte]): A
 
   protected def lookupDisk(index: String): Option[A] = {
-    lazy val resultLower = connection.getDb.get(index.trim.toLowerCase.getBytes())
-    lazy val resultUpper = connection.getDb.get(index.trim.toUpperCase.getBytes())
-    lazy val resultExact = connection.getDb.get(index.trim.getBytes())
+    val exact = index.trim
+    lazy val lower = exact.toLowerCase
+    lazy val upper = exact.toUpperCase
+
+    // Only query the case variants that differ from the keys already looked up
+    lazy val resultExact = connection.getDb.get(exact.getBytes())
+    lazy val resultLower =
+      if (lower == exact) null else connection.getDb.get(lower.getBytes())
+    lazy val resultUpper =
+      if (upper == exact || upper == lower) null else connection.getDb.get(upper.getBytes())
 
     if (resultExact != null)
       Some(fromBytes(resultExact))
@@ -46,6 +53,9 @@ trait StorageReader[A] extends HasConnection {
       None
   }
 
+  /** Missing indexes are cached as well, so repeated out of vocabulary lookups do not hit the
+    * disk again
+    */
   protected def _lookup(index: String): Option[A] = {
     lru.getOrElseUpdate(index, lookupDisk(index))
   }
@@ -62,6 +72,15 @@ trait StorageReader[A] extends HasConnection {
     lru.clear()
   }
 
+  /** Hits, misses, evictions and size of the read cache of this reader */
+  def getCacheStats: Map[String, Long] = {
+    Map(
+      "hits" -> lru.getHits,
+      "misses" -> lru.getMisses,
+      "evictions" -> lru.getEvictions,
+      "size" -> lru.getSize.toLong)
+  }
+
   def exportStorageToMap(): Map[BytesKey, Array[Byte]] = {
 
     val iterator = connection.getDb.newIterator()
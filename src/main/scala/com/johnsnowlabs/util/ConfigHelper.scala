@@ -17,6 +17,7 @@
 package com.johnsnowlabs.util
 
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
+import org.apache.spark.SparkEnv
 
 object ConfigHelper {
 
@@ -34,6 +35,12 @@ object ConfigHelper {
   // Configures cache folder where to cache pretrained models
   val pretrainedCacheFolder = "spark.jsl.settings.pretrained.cache_folder"
 
+  // Configures the maximum size of the local cache folder, least recently used models are evicted
+  val pretrainedCacheMaxSize = "spark.jsl.settings.pretrained.cache_max_size"
+
+  // Configures a bundle of pretrained models to load from instead of downloading them
+  val pretrainedBundle = "spark.jsl.settings.pretrained.bundle"
+
   // Configures log folder where to store annotator logs using OutputHelper
   val annotatorLogFolder = "spark.jsl.settings.annotator.log_folder"
 
@@ -72,8 +79,12 @@ object ConfigHelper {
   // Configs for ONNX session
   val onnxGpuDeviceId = "spark.jsl.settings.onnx.gpuDeviceId" // The GPU device ID to execute on
   val onnxIntraOpNumThreads = "spark.jsl.settings.onnx.intraOpNumThreads"
+  val onnxInterOpNumThreads = "spark.jsl.settings.onnx.interOpNumThreads"
   val onnxOptimizationLevel = "spark.jsl.settings.onnx.optimizationLevel"
   val onnxExecutionMode = "spark.jsl.settings.onnx.executionMode"
+  val onnxSessionPoolSize = "spark.jsl.settings.onnx.sessionPoolSize"
+  val onnxModelCacheFolder = "spark.jsl.settings.onnx.modelCacheFolder"
+  val onnxModelCacheMaxSize = "spark.jsl.settings.onnx.modelCacheMaxSize"
 
   def getConfigValueOrElse(property: String, defaultValue: String): String = {
     sparkSession.conf.get(property, defaultValue)
@@ -91,6 +102,19 @@ object ConfigHelper {
     (accessKey, secretKey, sessionToken)
   }
 
+  /** Number of tasks this executor runs at the same time, or the number of cores of this JVM
+    * outside of Spark.
+    */
+  def taskSlots: Int = {
+    val cores = Runtime.getRuntime.availableProcessors()
+    Option(SparkEnv.get)
+      .map { env =>
+        val executorCores = env.conf.getInt("spark.executor.cores", cores)
+        math.max(1, executorCores / env.conf.getInt("spark.task.cpus", 1))
+      }
+      .getOrElse(cores)
+  }
+
   def getHadoopAzureConfig(storageAccountName: String): String = {
     sparkSession.sparkContext.hadoopConfiguration.get(
       s"fs.azure.account.key.$storageAccountName.blob.core.windows.net")
@@ -37,6 +37,8 @@ object ConfigLoader {
       getConfigInfo(ConfigHelper.pretrainedCommunityS3BucketKey, "community.johnsnowlabs.com") ++
       getConfigInfo(ConfigHelper.pretrainedS3PathKey, "") ++
       getConfigInfo(ConfigHelper.pretrainedCacheFolder, homeDirectory + "/cache_pretrained") ++
+      getConfigInfo(ConfigHelper.pretrainedCacheMaxSize, "0") ++
+      getConfigInfo(ConfigHelper.pretrainedBundle, "") ++
       getConfigInfo(ConfigHelper.annotatorLogFolder, homeDirectory + "/annotator_logs") ++
       getConfigInfo(ConfigHelper.accessKeyId, "") ++
       getConfigInfo(ConfigHelper.secretAccessKey, "") ++
@@ -57,8 +59,14 @@ object ConfigLoader {
       getConfigInfo(ConfigHelper.openAIAPIKey, sys.env.getOrElse("OPENAI_API_KEY", "")) ++
       getConfigInfo(ConfigHelper.onnxGpuDeviceId, "0") ++
       getConfigInfo(ConfigHelper.onnxIntraOpNumThreads, "6") ++
+      getConfigInfo(ConfigHelper.onnxInterOpNumThreads, "0") ++
       getConfigInfo(ConfigHelper.onnxOptimizationLevel, "ALL_OPT") ++
-      getConfigInfo(ConfigHelper.onnxExecutionMode, "SEQUENTIAL")
+      getConfigInfo(ConfigHelper.onnxExecutionMode, "SEQUENTIAL") ++
+      getConfigInfo(ConfigHelper.onnxSessionPoolSize, "1") ++
+      getConfigInfo(
+        ConfigHelper.onnxModelCacheFolder,
+        System.getProperty("java.io.tmpdir") + "/sparknlp_onnx_models") ++
+      getConfigInfo(ConfigHelper.onnxModelCacheMaxSize, "10g")
   }
 
   private def getConfigInfo(property: String, defaultValue: String): Map[String, String] = {
@@ -21,7 +21,7 @@ import org.apache.commons.io.FileUtils
 import java.io.{File, IOException}
 import java.nio.charset.Charset
 import java.nio.file.{Files, Paths}
-import java.security.MessageDigest
+import java.security.{DigestInputStream, MessageDigest}
 import java.text.DecimalFormat
 
 object FileHelper {
@@ -61,9 +61,15 @@ object FileHelper {
   }
 
   def generateChecksum(path: String): String = {
-    val arr = Files readAllBytes (Paths get path)
-    val checksum = MessageDigest.getInstance("MD5") digest arr
-    checksum.map("%02X" format _).mkString
+    val digest = MessageDigest.getInstance("MD5")
+    val input = new DigestInputStream(Files.newInputStream(Paths.get(path)), digest)
+    try {
+      val buffer = new Array[Byte](1 << 16)
+      while (input.read(buffer) != -1) {}
+    } finally {
+      input.close()
+    }
+    digest.digest().map("%02X" format _).mkString
   }
 
   def getHumanReadableFileSize(size: Long): String = {
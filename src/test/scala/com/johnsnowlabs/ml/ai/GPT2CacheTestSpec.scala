@@ -0,0 +1,166 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.ai
+
+import com.johnsnowlabs.ml.tensorflow.sign.ModelSignatureConstants
+import com.johnsnowlabs.ml.tensorflow.{TensorflowWrapper, Variables}
+import com.johnsnowlabs.nlp.annotators.tokenizer.bpe.{BpeTokenizer, Gpt2Tokenizer}
+import com.johnsnowlabs.tags.FastTest
+import org.scalatest.flatspec.AnyFlatSpec
+import org.tensorflow.ndarray.Shape
+import org.tensorflow.op.Ops
+import org.tensorflow.op.core.Placeholder
+import org.tensorflow.types.{TFloat32, TInt32}
+import org.tensorflow.{Graph, Operand, Session}
+
+import java.util.Arrays
+
+class GPT2CacheTestSpec extends AnyFlatSpec {
+
+  private val vocabSize = 50257
+
+  /** Serves a graph built in memory instead of restoring a saved model */
+  private class InMemoryTensorflowWrapper(graph: Graph, session: Session)
+      extends TensorflowWrapper(
+        Variables(Array.empty, Array.empty),
+        graph.toGraphDef.toByteArray) {
+
+    override def getTFSessionWithSignature(
+        configProtoBytes: Option[Array[Byte]],
+        initAllTables: Boolean,
+        loadSP: Boolean,
+        savedSignatures: Option[Map[String, String]]): Session = session
+  }
+
+  /** Builds a tiny model with the signature of a GPT2 export with past keys and values. The ids
+    * of the tokens are its keys and values and the next token is the sum of all previous ones
+    * modulo 100 plus one, so it only generates the right tokens if it sees the whole prefix,
+    * either as input ids or as past keys and values.
+    *
+    * With a dynamic number of layers, the past can not be built empty. The next token is then
+    * computed from the input ids only, like an export whose past input is optional.
+    */
+  private def buildCachedModel(graph: Graph, staticPast: Boolean = true): Map[String, String] = {
+    val tf = Ops.create(graph)
+    val inputIds = tf
+      .withName("input_ids")
+      .placeholder(classOf[TInt32], Placeholder.shape(Shape.of(-1, -1)))
+    tf.withName("attention_mask")
+      .placeholder(classOf[TInt32], Placeholder.shape(Shape.of(-1, -1)))
+    val past = tf
+      .withName("past_key_values")
+      .placeholder(
+        classOf[TFloat32],
+        Placeholder.shape(Shape.of(if (staticPast) 1 else -1, 1, -1, 1, -1, 1)))
+
+    // (batch, length) to (layers, 2, batch, heads, length, head size)
+    val ids = tf.dtypes.cast(inputIds, classOf[TFloat32])
+    val current = Seq(0, 0, 3, 5).foldLeft[Operand[TFloat32]](ids) { (operand, axis) =>
+      tf.expandDims(operand, tf.constant(axis))
+    }
+    val present = tf
+      .withName("present_key_values")
+      .concat(Arrays.asList[Operand[TFloat32]](past, current), tf.constant(4))
+
+    val sum: Operand[TInt32] =
+      if (staticPast)
+        tf.dtypes
+          .cast(tf.reduceSum(present, tf.constant(Array(0, 1, 3, 4, 5))), classOf[TInt32])
+      else tf.reduceSum(inputIds, tf.constant(Array(1)))
+    val nextToken = tf.math.add(tf.math.floorMod(sum, tf.constant(100)), tf.constant(1))
+    val nextTokenLogits =
+      tf.oneHot(nextToken, tf.constant(vocabSize), tf.constant(1f), tf.constant(0f))
+    tf.withName("logits")
+      .math
+      .add(
+        tf.expandDims(nextTokenLogits, tf.constant(1)),
+        tf.expandDims(tf.zerosLike(ids), tf.constant(2)))
+
+    Map(
+      ModelSignatureConstants.InputIds.key -> "input_ids:0",
+      ModelSignatureConstants.AttentionMask.key -> "attention_mask:0",
+      ModelSignatureConstants.LogitsOutput.key -> "logits:0",
+      ModelSignatureConstants.PastKeyValues.key -> "past_key_values:0",
+      ModelSignatureConstants.PresentKeyValues.key -> "present_key_values:0")
+  }
+
+  private val tokenizer = BpeTokenizer
+    .forModel("gpt2", Map.empty, Map("<|endoftext|>" -> 50256))
+    .asInstanceOf[Gpt2Tokenizer]
+
+  private val expected =
+    Seq(Seq(5, 3, 2, 11, 22, 44, 88, 76, 52), Seq(1, 4, 7, 13, 26, 52, 4, 8, 16))
+
+  private def generate(gpt2: GPT2, useCache: Boolean): Seq[Seq[Int]] =
+    gpt2
+      .tag(
+        Seq(Array(5, 3, 2), Array(1, 4, 7)),
+        minOutputLength = 0,
+        maxOutputLength = 8,
+        doSample = false,
+        temperature = 1.0,
+        topK = 0,
+        topP = 1.0,
+        repetitionPenalty = 1.0,
+        noRepeatNgramSize = 0,
+        randomSeed = None,
+        useCache = useCache)
+      .map(_.toSeq)
+      .toSeq
+
+  "GPT2" should "generate the same greedy output with and without cache" taggedAs FastTest in {
+    val graph = new Graph()
+    val signatures = buildCachedModel(graph)
+    val session = new Session(graph)
+
+    try {
+      val gpt2 = new GPT2(
+        new InMemoryTensorflowWrapper(graph, session),
+        tokenizer,
+        signatures = Some(signatures))
+
+      assert(gpt2.supportsCache)
+      assert(generate(gpt2, useCache = false) == expected)
+      assert(generate(gpt2, useCache = true) == expected)
+    } finally {
+      session.close()
+      graph.close()
+    }
+  }
+
+  it should "generate without cache from models with a dynamic past shape" taggedAs FastTest in {
+    val graph = new Graph()
+    val signatures = buildCachedModel(graph, staticPast = false)
+    val session = new Session(graph)
+
+    try {
+      val gpt2 = new GPT2(
+        new InMemoryTensorflowWrapper(graph, session),
+        tokenizer,
+        signatures = Some(signatures))
+
+      assert(!gpt2.supportsCache)
+      assert(generate(gpt2, useCache = false) == expected)
+      // falls back to decoding the whole prefix
+      assert(generate(gpt2, useCache = true) == expected)
+    } finally {
+      session.close()
+      graph.close()
+    }
+  }
+
+}
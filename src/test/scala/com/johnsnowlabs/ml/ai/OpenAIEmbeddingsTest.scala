@@ -1,7 +1,9 @@
 package com.johnsnowlabs.ml.ai
 
+import com.johnsnowlabs.ml.ai.util.MockOpenAIServer
 import com.johnsnowlabs.nlp.annotators.SparkSessionTest
-import com.johnsnowlabs.tags.SlowTest
+import com.johnsnowlabs.tags.{FastTest, SlowTest}
+import com.johnsnowlabs.util.JsonParser
 import org.apache.spark.ml.Pipeline
 import org.scalatest.flatspec.AnyFlatSpec
 
@@ -25,4 +27,45 @@ class OpenAIEmbeddingsTest extends AnyFlatSpec with SparkSessionTest {
     completionDF.select("embeddings").show(false)
   }
 
+  it should "embed documents in batches with an OpenAI compatible server" taggedAs FastTest in {
+    // Answers with the length of every input and its position in the request
+    val server = new MockOpenAIServer((body, _) => {
+      val inputs = JsonParser.parseObject[Map[String, Any]](body)("input").asInstanceOf[List[_]]
+      val data = inputs.zipWithIndex.map { case (input, index) =>
+        s"""{"object": "embedding", "embedding": [${input.toString.length}, $index], "index": $index}"""
+      }
+      (
+        200,
+        s"""{"object": "list", "data": [${data.mkString(",")}], "model": "mock",
+           |"usage": {"prompt_tokens": 1, "total_tokens": 1}}""".stripMargin)
+    })
+    try {
+      val texts = (1 to 10).map(index => Seq.fill(index)("text").mkString(" "))
+      val textDF = texts.toDS.toDF("text").repartition(1)
+
+      val openAIEmbeddings = new OpenAIEmbeddings()
+        .setInputCols("document")
+        .setOutputCol("embeddings")
+        .setModel("text-embedding-ada-002")
+        .setBaseUrl(server.baseUrl)
+        .setInputsPerRequest(4)
+        .setConcurrency(2)
+
+      val pipeline = new Pipeline().setStages(Array(documentAssembler, openAIEmbeddings))
+      val embeddings = pipeline
+        .fit(textDF)
+        .transform(textDF)
+        .selectExpr("text", "embeddings[0].embeddings")
+        .as[(String, Array[Float])]
+        .collect()
+
+      assert(server.requests.get() == 3)
+      embeddings.foreach { case (text, embedding) =>
+        assert(embedding.head == text.length)
+      }
+    } finally {
+      server.stop()
+    }
+  }
+
 }
@@ -0,0 +1,186 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.ai.util
+
+import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.util.ConfigHelper
+import com.sun.net.httpserver.{HttpExchange, HttpServer}
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.net.InetSocketAddress
+import java.nio.charset.StandardCharsets.UTF_8
+import java.util.concurrent.Executors
+import java.util.concurrent.atomic.AtomicInteger
+import scala.concurrent.ExecutionContext.Implicits.global
+import scala.concurrent.duration.Duration
+import scala.concurrent.{Await, Future}
+import scala.io.Source
+
+/** OpenAI compatible server answering every request with `respond(body, count)`, where count is
+  * the number of requests received so far
+  */
+class MockOpenAIServer(respond: (String, Int) => (Int, String)) {
+
+  val requests = new AtomicInteger()
+  val maxInFlight = new AtomicInteger()
+  private val inFlight = new AtomicInteger()
+
+  private val server = HttpServer.create(new InetSocketAddress("localhost", 0), 0)
+  server.setExecutor(Executors.newCachedThreadPool())
+  server.createContext(
+    "/",
+    (exchange: HttpExchange) => {
+      maxInFlight.accumulateAndGet(inFlight.incrementAndGet(), (a, b) => math.max(a, b))
+      val body = Source.fromInputStream(exchange.getRequestBody, "UTF-8").mkString
+      val (status, response) = respond(body, requests.incrementAndGet())
+      Thread.sleep(20)
+      val bytes = response.getBytes(UTF_8)
+      exchange.getResponseHeaders.set("Content-Type", "application/json")
+      exchange.sendResponseHeaders(status, bytes.length)
+      exchange.getResponseBody.write(bytes)
+      exchange.close()
+      inFlight.decrementAndGet()
+    })
+  server.start()
+
+  def baseUrl: String = s"http://localhost:${server.getAddress.getPort}/v1"
+
+  def stop(): Unit = server.stop(0)
+
+}
+
+class OpenAIClientTest extends AnyFlatSpec {
+
+  private def settings(
+      concurrency: Int = 1,
+      responseCacheSize: Int = 0,
+      bearerToken: String = "") =
+    OpenAIClientSettings(
+      bearerToken = bearerToken,
+      concurrency = concurrency,
+      maxRetries = 3,
+      retryBackoff = 10L,
+      responseCacheSize = responseCacheSize)
+
+  "OpenAIClient" should "retry requests throttled or failed by the server" taggedAs FastTest in {
+    val server = new MockOpenAIServer((body, count) =>
+      if (count == 1) (429, "{}") else if (count == 2) (503, "{}") else (200, body))
+    try {
+      val request = OpenAIRequest(server.baseUrl + "/completions", """{"prompt": "retry"}""")
+      assert(OpenAIClient.post(request, settings()) == request.body)
+      assert(server.requests.get() == 3)
+    } finally {
+      server.stop()
+    }
+  }
+
+  it should "fail once the retries are exhausted" taggedAs FastTest in {
+    val server = new MockOpenAIServer((_, _) => (500, """{"error": "unavailable"}"""))
+    try {
+      val request = OpenAIRequest(server.baseUrl + "/completions", """{"prompt": "fail"}""")
+      val exception = intercept[Exception](OpenAIClient.post(request, settings()))
+      assert(exception.getMessage.contains("unavailable"))
+      assert(server.requests.get() == 4)
+    } finally {
+      server.stop()
+    }
+  }
+
+  it should "send requests concurrently and keep their order" taggedAs FastTest in {
+    val server = new MockOpenAIServer((body, _) => (200, body))
+    try {
+      val requests = (1 to 16).map(index =>
+        OpenAIRequest(server.baseUrl + "/completions", s"""{"prompt": "$index"}"""))
+      val responses = OpenAIClient.postAll(requests, settings(concurrency = 4))
+
+      assert(responses == requests.map(_.body))
+      assert(server.maxInFlight.get() > 1)
+      assert(server.maxInFlight.get() <= 4)
+    } finally {
+      server.stop()
+    }
+  }
+
+  it should "cache responses by the content of their request" taggedAs FastTest in {
+    val server = new MockOpenAIServer((body, _) => (200, body))
+    try {
+      val request = OpenAIRequest(server.baseUrl + "/embeddings", """{"input": ["cached"]}""")
+      val cached = settings(responseCacheSize = 10)
+      OpenAIClient.clearResponseCache()
+
+      assert(OpenAIClient.post(request, cached) == request.body)
+      assert(OpenAIClient.post(request, cached) == request.body)
+      assert(server.requests.get() == 1)
+
+      OpenAIClient.post(request, settings())
+      assert(server.requests.get() == 2)
+    } finally {
+      server.stop()
+    }
+  }
+
+  it should "not share cached responses between API keys" taggedAs FastTest in {
+    val server = new MockOpenAIServer((body, _) => (200, body))
+    try {
+      val request = OpenAIRequest(server.baseUrl + "/embeddings", """{"input": ["keyed"]}""")
+      OpenAIClient.clearResponseCache()
+
+      OpenAIClient.post(request, settings(responseCacheSize = 10, bearerToken = "first-key"))
+      OpenAIClient.post(request, settings(responseCacheSize = 10, bearerToken = "second-key"))
+      assert(server.requests.get() == 2)
+
+      OpenAIClient.post(request, settings(responseCacheSize = 10, bearerToken = "first-key"))
+      assert(server.requests.get() == 2)
+    } finally {
+      server.stop()
+    }
+  }
+
+  it should "let every task of an executor send its concurrent requests" taggedAs FastTest in {
+    val server = new MockOpenAIServer((body, _) => (200, body))
+    try {
+      val tasks = (1 to 3).map { task =>
+        Future {
+          val requests = (1 to 6).map(index =>
+            OpenAIRequest(server.baseUrl + "/completions", s"""{"prompt": "$task-$index"}"""))
+          OpenAIClient.postAll(requests, settings(concurrency = 2)) == requests.map(_.body)
+        }
+      }
+
+      assert(Await.result(Future.sequence(tasks), Duration.Inf).forall(identity))
+      assert(server.maxInFlight.get() <= 6)
+      assert(ConfigHelper.taskSlots == 1 || server.maxInFlight.get() > 2)
+    } finally {
+      server.stop()
+    }
+  }
+
+  it should "keep cached responses when a larger cache is requested" taggedAs FastTest in {
+    val server = new MockOpenAIServer((body, _) => (200, body))
+    try {
+      val request = OpenAIRequest(server.baseUrl + "/embeddings", """{"input": ["resized"]}""")
+      OpenAIClient.clearResponseCache()
+
+      OpenAIClient.post(request, settings(responseCacheSize = 1))
+      assert(OpenAIClient.post(request, settings(responseCacheSize = 1000)) == request.body)
+      assert(server.requests.get() == 1)
+    } finally {
+      server.stop()
+    }
+  }
+
+}
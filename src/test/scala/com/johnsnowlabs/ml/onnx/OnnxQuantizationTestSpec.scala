@@ -0,0 +1,216 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.onnx
+
+import ai.onnxruntime.{OnnxTensor, OrtEnvironment}
+import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.util.FileHelper
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.io.ByteArrayOutputStream
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.{Files, Paths}
+import java.nio.{ByteBuffer, ByteOrder}
+import scala.util.Random
+
+class OnnxQuantizationTestSpec extends AnyFlatSpec {
+
+  // Single Gemm with transB, see OnnxWrapperTestSpec
+  private val modelBytes: Array[Byte] =
+    Files.readAllBytes(Paths.get("src/test/resources/onnx/models/dummy_model.onnx"))
+
+  private def run(model: Array[Byte], input: Array[Array[Float]]): Array[Array[Float]] = {
+    val env = OrtEnvironment.getEnvironment()
+    val session = env.createSession(model)
+    val tensor = OnnxTensor.createTensor(env, input)
+    try {
+      val result = session.run(java.util.Collections.singletonMap("onnx::Gemm_0", tensor))
+      try result.get(0).getValue.asInstanceOf[Array[Array[Float]]]
+      finally result.close()
+    } finally {
+      tensor.close()
+      session.close()
+    }
+  }
+
+  private def contains(model: Array[Byte], text: String): Boolean =
+    new String(model, UTF_8).contains(text)
+
+  // Minimal onnx.proto encoding, to build models with subgraphs
+  private def varint(value: Long): Array[Byte] = {
+    val output = new ByteArrayOutputStream()
+    var remaining = value
+    while ((remaining & ~0x7fL) != 0) {
+      output.write(((remaining & 0x7f) | 0x80).toInt)
+      remaining >>>= 7
+    }
+    output.write(remaining.toInt)
+    output.toByteArray
+  }
+
+  private def intField(number: Int, value: Long): Array[Byte] =
+    varint(number << 3) ++ varint(value)
+
+  private def bytesField(number: Int, bytes: Array[Byte]): Array[Byte] =
+    varint((number << 3) | 2) ++ varint(bytes.length) ++ bytes
+
+  private def stringField(number: Int, value: String): Array[Byte] =
+    bytesField(number, value.getBytes(UTF_8))
+
+  private def node(opType: String, inputs: Seq[String], outputs: Seq[String]): Array[Byte] =
+    (inputs.map(stringField(1, _)) ++ outputs.map(stringField(2, _)) ++
+      Seq(stringField(3, opType + "_" + outputs.head), stringField(4, opType))).flatten.toArray
+
+  private def graphAttribute(name: String, graph: Array[Byte]): Array[Byte] =
+    stringField(1, name) ++ bytesField(6, graph) ++ intField(20, 5)
+
+  // Tensor value with an optional static shape
+  private def valueInfo(name: String, elementType: Int, dims: Option[Seq[Int]]): Array[Byte] = {
+    val shape = dims.map(_.map(dim => bytesField(1, intField(1, dim))).flatten.toArray)
+    val tensorType = intField(1, elementType) ++ shape.map(bytesField(2, _)).getOrElse(Array.emptyByteArray)
+    stringField(1, name) ++ bytesField(2, bytesField(1, tensorType))
+  }
+
+  private def graph(name: String, fields: Seq[Array[Byte]]): Array[Byte] =
+    stringField(2, name) ++ fields.flatten
+
+  /** `if (condition) x * weight else quantizable(x * weight)`, the branch captures the weight */
+  private def modelWithSubgraph(weight: Array[Array[Float]]): Array[Byte] = {
+    val weightBytes = ByteBuffer
+      .allocate(weight.length * weight.head.length * 4)
+      .order(ByteOrder.LITTLE_ENDIAN)
+    weight.flatten.foreach(weightBytes.putFloat)
+    val initializer = intField(1, weight.length) ++ intField(1, weight.head.length) ++
+      intField(2, 1) ++ stringField(8, "weight") ++ bytesField(9, weightBytes.array())
+
+    val thenBranch = graph(
+      "then_branch",
+      Seq(
+        bytesField(1, node("MatMul", Seq("x", "weight"), Seq("then_output"))),
+        bytesField(12, valueInfo("then_output", 1, None))))
+    val elseBranch = graph(
+      "else_branch",
+      Seq(
+        bytesField(1, node("Identity", Seq("product"), Seq("else_output"))),
+        bytesField(12, valueInfo("else_output", 1, None))))
+    val ifNode = node("If", Seq("condition"), Seq("output")) ++
+      bytesField(5, graphAttribute("then_branch", thenBranch)) ++
+      bytesField(5, graphAttribute("else_branch", elseBranch))
+
+    val main = graph(
+      "main",
+      Seq(
+        bytesField(1, node("MatMul", Seq("x", "weight"), Seq("product"))),
+        bytesField(1, ifNode),
+        bytesField(5, initializer),
+        bytesField(11, valueInfo("x", 1, Some(Seq(2, weight.length)))),
+        bytesField(11, valueInfo("condition", 9, Some(Seq.empty))),
+        bytesField(12, valueInfo("output", 1, Some(Seq(2, weight.head.length))))))
+
+    intField(1, 8) ++ bytesField(8, intField(2, 13)) ++ bytesField(7, main)
+  }
+
+  "OnnxQuantization" should "keep the model as is without quantization" taggedAs FastTest in {
+    assert(OnnxQuantization.quantize(modelBytes, OnnxQuantization.NONE) eq modelBytes)
+    assertThrows[IllegalArgumentException] {
+      OnnxQuantization.quantize(modelBytes, "int4")
+    }
+  }
+
+  it should "replace float products with integer products" taggedAs FastTest in {
+    val quantized = OnnxQuantization.quantize(modelBytes, OnnxQuantization.DYNAMIC_INT8)
+
+    assert(contains(quantized, "DynamicQuantizeLinear"))
+    assert(contains(quantized, "MatMulInteger"))
+    // op_type field of the Gemm node: tag 0x22, then the length of the name
+    assert(contains(modelBytes, "\"\u0004Gemm"))
+    assert(!contains(quantized, "\"\u0004Gemm"))
+    assert(contains(quantized, "linear.weight_transposed_quantized"))
+    assert(contains(quantized, "linear.bias"))
+  }
+
+  it should "give outputs close to the float model" taggedAs FastTest in {
+    val quantized = OnnxQuantization.quantize(modelBytes, OnnxQuantization.DYNAMIC_INT8)
+    val random = new Random(42)
+    val input = Array.fill(8)(Array.fill(10)(random.nextGaussian().toFloat))
+
+    val expected = run(modelBytes, input)
+    val actual = run(quantized, input)
+
+    expected.flatten.zip(actual.flatten).foreach { case (expectedValue, actualValue) =>
+      assert(math.abs(expectedValue - actualValue) < 0.05, s"$expectedValue != $actualValue")
+    }
+  }
+
+  it should "keep the weights used by subgraphs" taggedAs FastTest in {
+    val random = new Random(42)
+    val weight = Array.fill(10)(Array.fill(3)(random.nextGaussian().toFloat))
+    val input = Array.fill(2)(Array.fill(10)(random.nextGaussian().toFloat))
+    val quantized =
+      OnnxQuantization.quantize(modelWithSubgraph(weight), OnnxQuantization.DYNAMIC_INT8)
+    assert(contains(quantized, "MatMulInteger"))
+
+    val env = OrtEnvironment.getEnvironment()
+    val session = env.createSession(quantized)
+    def output(condition: Boolean): Array[Array[Float]] = {
+      val x = OnnxTensor.createTensor(env, input)
+      val conditionTensor = OnnxTensor.createTensor(env, condition)
+      try {
+        val inputs = new java.util.HashMap[String, OnnxTensor]()
+        inputs.put("x", x)
+        inputs.put("condition", conditionTensor)
+        val result = session.run(inputs)
+        try result.get(0).getValue.asInstanceOf[Array[Array[Float]]]
+        finally result.close()
+      } finally {
+        x.close()
+        conditionTensor.close()
+      }
+    }
+
+    try {
+      val expected = input.map(row =>
+        weight.transpose.map(column => row.zip(column).map { case (a, b) => a * b }.sum))
+      Seq(true, false).foreach { condition =>
+        expected.flatten.zip(output(condition).flatten).foreach {
+          case (expectedValue, actualValue) =>
+            assert(math.abs(expectedValue - actualValue) < 0.05, s"$expectedValue != $actualValue")
+        }
+      }
+    } finally {
+      session.close()
+    }
+  }
+
+  it should "be applied when reading an exported model" taggedAs FastTest in {
+    val folder = Files.createTempDirectory("onnx_quantization").toFile
+    Files.copy(
+      Paths.get("src/test/resources/onnx/models/dummy_model.onnx"),
+      Paths.get(folder.getAbsolutePath, "model.onnx"))
+
+    val wrapper = OnnxWrapper.read(
+      folder.getAbsolutePath,
+      zipped = false,
+      useBundle = true,
+      quantization = OnnxQuantization.DYNAMIC_INT8)
+
+    assert(contains(Files.readAllBytes(Paths.get(wrapper.onnxModelPath.get)), "MatMulInteger"))
+    assert(wrapper.getSession(new OnnxSession().getSessionOptions)._1.getNumOutputs == 1)
+    FileHelper.delete(folder.getAbsolutePath)
+  }
+
+}
@@ -16,10 +16,17 @@
 
 package com.johnsnowlabs.ml.onnx
 
+import com.johnsnowlabs.nlp.util.io.ResourceHelper
 import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.util.ConfigHelper
+import org.apache.hadoop.fs.{FileSystem, Path}
+import org.apache.spark.SparkFiles
 import org.scalatest.flatspec.AnyFlatSpec
-import java.nio.file.{Files, Paths, Path}
-import java.io.File
+import java.nio.channels.FileChannel
+import java.nio.file.{Files, Paths, StandardOpenOption}
+import java.io.{ByteArrayInputStream, ByteArrayOutputStream, File}
+import java.io.{ObjectInputStream, ObjectOutputStream}
+import java.nio.charset.StandardCharsets.UTF_8
 import com.johnsnowlabs.util.FileHelper
 import org.scalatest.BeforeAndAfter
 import java.util.UUID
@@ -80,4 +87,266 @@ class OnnxWrapperTestSpec extends AnyFlatSpec with BeforeAndAfter {
     // verify file existence
     assert(new File(tmpFolder, "modelFromTest.zip").exists())
   }
+
+  "a dummy onnx wrapper" should "hand out pooled sessions in turns" taggedAs FastTest in {
+    val modelBytes: Array[Byte] = Files.readAllBytes(Paths.get(modelPath))
+    val dummyOnnxWrapper = new OnnxWrapper(modelBytes)
+    val pooledOptions = onnxSessionOptions + (ConfigHelper.onnxSessionPoolSize -> "2")
+
+    val (first, _) = dummyOnnxWrapper.getSession(pooledOptions)
+    val (second, _) = dummyOnnxWrapper.getSession(pooledOptions)
+    val (third, _) = dummyOnnxWrapper.getSession(pooledOptions)
+
+    assert(first ne second)
+    assert(third eq first)
+  }
+
+  "a dummy onnx wrapper" should "use the session options of the running annotator" taggedAs FastTest in {
+    val modelBytes: Array[Byte] = Files.readAllBytes(Paths.get(modelPath))
+    val dummyOnnxWrapper = new OnnxWrapper(modelBytes)
+    val annotatorOptions =
+      OnnxSession.normalizeOptions(Map("intraOpNumThreads" -> "1", "sessionPoolSize" -> "1"))
+
+    val (defaultSession, _) = dummyOnnxWrapper.getSession(onnxSessionOptions)
+    val (annotatorSession, _) = OnnxSession.withOptions(annotatorOptions) {
+      dummyOnnxWrapper.getSession(onnxSessionOptions)
+    }
+
+    assert(annotatorSession ne defaultSession)
+    assert(dummyOnnxWrapper.getSession(onnxSessionOptions)._1 eq defaultSession)
+  }
+
+  "a dummy onnx wrapper" should "close the least recently used idle session pool" taggedAs FastTest in {
+    val modelBytes: Array[Byte] = Files.readAllBytes(Paths.get(modelPath))
+    val dummyOnnxWrapper = new OnnxWrapper(modelBytes)
+    def options(threads: Int) =
+      onnxSessionOptions + (ConfigHelper.onnxIntraOpNumThreads -> threads.toString)
+    def leasedSession(threads: Int) =
+      OnnxSession.withOptions(Map.empty)(dummyOnnxWrapper.getSession(options(threads))._1)
+
+    val firstSession = leasedSession(1)
+    val secondSession = leasedSession(2)
+    (3 to OnnxWrapper.maxSessionPools).foreach(leasedSession)
+    assert(leasedSession(1) eq firstSession)
+
+    // the least recently used pool is now the one of 2 threads
+    leasedSession(OnnxWrapper.maxSessionPools + 1)
+
+    assert(leasedSession(1) eq firstSession)
+    assert(leasedSession(2) ne secondSession)
+  }
+
+  "a dummy onnx wrapper" should "keep the session pools in use open" taggedAs FastTest in {
+    val modelBytes: Array[Byte] = Files.readAllBytes(Paths.get(modelPath))
+    val dummyOnnxWrapper = new OnnxWrapper(modelBytes)
+    def options(threads: Int) =
+      onnxSessionOptions + (ConfigHelper.onnxIntraOpNumThreads -> threads.toString)
+
+    // a pool used outside of a block is kept, the pool leased by the block while it runs
+    val pinnedSession = dummyOnnxWrapper.getSession(options(1))._1
+    OnnxSession.withOptions(Map.empty) {
+      val leasedSession = dummyOnnxWrapper.getSession(options(2))._1
+      (3 to OnnxWrapper.maxSessionPools + 1).foreach(threads =>
+        OnnxSession.withOptions(Map.empty)(dummyOnnxWrapper.getSession(options(threads))))
+
+      assert(dummyOnnxWrapper.getSession(options(2))._1 eq leasedSession)
+    }
+
+    assert(dummyOnnxWrapper.getSession(options(1))._1 eq pinnedSession)
+  }
+
+  "the onnx session pool size" should "be capped for auto" taggedAs FastTest in {
+    val autoOptions = Map(ConfigHelper.onnxSessionPoolSize -> "auto")
+    assert(OnnxSession.poolSize(autoOptions) <= OnnxSession.maxAutoPoolSize)
+    assert(OnnxSession.poolSize(Map(ConfigHelper.onnxSessionPoolSize -> "16")) == 16)
+  }
+
+  "a dummy onnx wrapper" should "create new sessions once closed" taggedAs FastTest in {
+    val modelBytes: Array[Byte] = Files.readAllBytes(Paths.get(modelPath))
+    val dummyOnnxWrapper = new OnnxWrapper(modelBytes)
+
+    val (session, _) = dummyOnnxWrapper.getSession(onnxSessionOptions)
+    dummyOnnxWrapper.close()
+
+    assert(dummyOnnxWrapper.getSession(onnxSessionOptions)._1 ne session)
+  }
+
+  "a dummy onnx wrapper" should "be read once into the model cache" taggedAs FastTest in {
+    Files.copy(Paths.get(modelPath), Paths.get(tmpFolder, "model.onnx"))
+
+    val first = OnnxWrapper.read(tmpFolder, zipped = false, useBundle = true)
+    val second = OnnxWrapper.read(tmpFolder, zipped = false, useBundle = true)
+
+    assert(first.onnxModel == null)
+    assert(first.cachedModel.isDefined)
+    assert(first.cachedModel == second.cachedModel)
+    assert(
+      new File(first.onnxModelPath.get).getParentFile.getParentFile ==
+        new File(OnnxModelCache.cacheFolder).getAbsoluteFile)
+    assert(first.cachedModel.get.dataFileName.isEmpty)
+    assert(
+      Files.readAllBytes(Paths.get(first.onnxModelPath.get)) sameElements
+        Files.readAllBytes(Paths.get(modelPath)))
+  }
+
+  "a dummy onnx wrapper" should "only serialize the reference to a cached model" taggedAs FastTest in {
+    Files.copy(Paths.get(modelPath), Paths.get(tmpFolder, "model.onnx"))
+    val onnxWrapper = OnnxWrapper.read(tmpFolder, zipped = false, useBundle = true)
+
+    val bytes = new ByteArrayOutputStream()
+    val output = new ObjectOutputStream(bytes)
+    output.writeObject(onnxWrapper)
+    output.close()
+    assert(bytes.size() < new File(modelPath).length())
+
+    val input = new ObjectInputStream(new ByteArrayInputStream(bytes.toByteArray))
+    val deserialized = input.readObject().asInstanceOf[OnnxWrapper]
+    assert(deserialized.cachedModel == onnxWrapper.cachedModel)
+    assert(deserialized.getSession(onnxSessionOptions)._1.getNumOutputs == 1)
+
+    deserialized.saveToFile(Paths.get(tmpFolder, "modelFromCache.zip").toString)
+    assert(new File(tmpFolder, "modelFromCache.zip").exists())
+  }
+
+  "a dummy onnx wrapper" should "open the model files shipped to an executor" taggedAs FastTest in {
+    Files.copy(Paths.get(modelPath), Paths.get(tmpFolder, "model.onnx"))
+    val cachedModel =
+      OnnxWrapper.read(tmpFolder, zipped = false, useBundle = true).cachedModel.get
+
+    OnnxModelCache.distribute(cachedModel, ResourceHelper.spark.sparkContext)
+    OnnxModelCache.distribute(cachedModel, ResourceHelper.spark.sparkContext)
+
+    // the cache folder of the driver does not exist on an executor
+    val onExecutor = cachedModel.copy(folder = Paths.get(tmpFolder, "driver").toString)
+    val executorPath = OnnxModelCache.localModelPath(onExecutor)
+
+    assert(
+      new File(executorPath).getParentFile.getParentFile ==
+        new File(SparkFiles.getRootDirectory()).getAbsoluteFile)
+    assert(
+      Files.readAllBytes(Paths.get(executorPath)) sameElements
+        Files.readAllBytes(Paths.get(modelPath)))
+    assert(
+      new OnnxWrapper(null, None, Some(onExecutor))
+        .getSession(onnxSessionOptions)
+        ._1
+        .getNumOutputs == 1)
+  }
+
+  "a dummy onnx wrapper" should "not copy the saved files of a cached model again" taggedAs FastTest in {
+    val saved = Paths.get(tmpFolder, "saved", "model.onnx")
+    Files.createDirectories(saved)
+    val modelFile = saved.resolve("dummy_model.onnx")
+    Files.copy(Paths.get(modelPath), modelFile)
+    val reader = new ReadOnnxModel { override val onnxFile: String = "model.onnx" }
+    val fs = FileSystem.getLocal(ResourceHelper.spark.sparkContext.hadoopConfiguration)
+    def sourceKey =
+      OnnxModelCache.sourceKey(fs, Seq(new Path(saved.toString)), OnnxQuantization.NONE)
+
+    assert(OnnxWrapper.readCached(sourceKey).isEmpty)
+    val read = reader.readOnnxModel(
+      Paths.get(tmpFolder, "saved").toString,
+      ResourceHelper.spark,
+      "_onnx_test",
+      zipped = false)
+    assert(OnnxWrapper.readCached(sourceKey).map(_.cachedModel) == Some(read.cachedModel))
+
+    // changed files are copied and read again
+    modelFile.toFile.setLastModified(modelFile.toFile.lastModified() + 10000)
+    assert(OnnxWrapper.readCached(sourceKey).isEmpty)
+  }
+
+  "OnnxModelCache" should "not hash the contents of unchanged files again" taggedAs FastTest in {
+    val file = Paths.get(tmpFolder, "model.onnx")
+    Files.copy(Paths.get(modelPath), file)
+    val key = OnnxModelCache.key(Seq(file.toFile), OnnxQuantization.NONE)
+
+    // same size and modification time
+    val lastModified = file.toFile.lastModified()
+    val bytes = Files.readAllBytes(file)
+    bytes(0) = (bytes(0) + 1).toByte
+    Files.write(file, bytes)
+    file.toFile.setLastModified(lastModified)
+    assert(OnnxModelCache.key(Seq(file.toFile), OnnxQuantization.NONE) == key)
+
+    Files.write(file, bytes :+ 0.toByte)
+    assert(OnnxModelCache.key(Seq(file.toFile), OnnxQuantization.NONE) != key)
+  }
+
+  "OnnxModelCache" should "evict the least recently used models" taggedAs FastTest in {
+    Files.copy(Paths.get(modelPath), Paths.get(tmpFolder, "model.onnx"))
+    val opened = OnnxWrapper.read(tmpFolder, zipped = false, useBundle = true).cachedModel.get
+    val root = new File(tmpFolder, "cache")
+    val now = System.currentTimeMillis()
+
+    Seq("old" -> (now - 20000), opened.key -> (now - 10000), "new" -> now).foreach {
+      case (name, lastModified) =>
+        val folder = new File(root, name)
+        folder.mkdirs()
+        Files.write(new File(folder, "model.onnx").toPath, new Array[Byte](100))
+        folder.setLastModified(lastModified)
+    }
+    new File(root, ".sources").mkdirs()
+
+    assert(OnnxModelCache.evictToSize(root, 250) == Seq("old"))
+    assert(new File(root, opened.key).exists())
+    assert(new File(root, "new").exists())
+    assert(new File(root, ".sources").exists())
+  }
+
+  "OnnxModelCache" should "keep the models other processes have in use" taggedAs FastTest in {
+    val root = new File(tmpFolder, "cache")
+    val now = System.currentTimeMillis()
+    Seq("locked" -> (now - 20000), "old" -> (now - 10000), "new" -> now).foreach {
+      case (name, lastModified) =>
+        val folder = new File(root, name)
+        folder.mkdirs()
+        Files.write(new File(folder, "model.onnx").toPath, new Array[Byte](100))
+        folder.setLastModified(lastModified)
+    }
+
+    // the shared lock another JVM holds while it runs the model
+    val locks = new File(root, ".locks")
+    locks.mkdirs()
+    val channel = FileChannel.open(
+      new File(locks, "locked.lock").toPath,
+      StandardOpenOption.CREATE,
+      StandardOpenOption.READ,
+      StandardOpenOption.WRITE)
+    try {
+      channel.lock(0L, Long.MaxValue, true)
+      assert(OnnxModelCache.evictToSize(root, 250) == Seq("old"))
+    } finally {
+      channel.close()
+    }
+    assert(new File(root, "locked").exists())
+  }
+
+  "OnnxModelCache" should "prune the keys of evicted models" taggedAs FastTest in {
+    val root = new File(tmpFolder, "cache")
+    new File(root, "cached").mkdirs()
+    val sources = new File(root, ".sources")
+    sources.mkdirs()
+    Files.write(new File(sources, "kept").toPath, "cached".getBytes(UTF_8))
+    Files.write(new File(sources, "evicted").toPath, "missing".getBytes(UTF_8))
+
+    OnnxModelCache.pruneSources(root)
+
+    assert(sources.list().toSeq == Seq("kept"))
+  }
+
+  "OnnxSession" should "resolve the names of annotator session options" taggedAs FastTest in {
+    val options = OnnxSession.normalizeOptions(
+      Map("intraOpNumThreads" -> "4", ConfigHelper.onnxExecutionMode -> "PARALLEL"))
+
+    assert(
+      options == Map(
+        ConfigHelper.onnxIntraOpNumThreads -> "4",
+        ConfigHelper.onnxExecutionMode -> "PARALLEL"))
+    assertThrows[IllegalArgumentException] {
+      OnnxSession.normalizeOptions(Map("threads" -> "4"))
+    }
+    assert(OnnxSession.poolSize(Map(ConfigHelper.onnxSessionPoolSize -> "3")) == 3)
+    assert(OnnxSession.poolSize(Map(ConfigHelper.onnxSessionPoolSize -> "auto")) >= 1)
+  }
 }
@@ -0,0 +1,57 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.util
+
+import com.johnsnowlabs.tags.FastTest
+import org.scalatest.flatspec.AnyFlatSpec
+
+class DynamicBatchingTest extends AnyFlatSpec {
+
+  behavior of "DynamicBatching"
+
+  private val lengths = Seq(12, 3, 40, 5, 3, 11, 38)
+
+  it should "keep the original grouping when disabled" taggedAs FastTest in {
+    var batches = Seq.empty[Seq[Int]]
+    val results = DynamicBatching.predict(lengths, 3, 0)(identity) { batch =>
+      batches = batches :+ batch
+      batch.map(_ * 2)
+    }
+
+    assert(batches == lengths.grouped(3).toSeq)
+    assert(results == lengths.map(_ * 2))
+  }
+
+  it should "batch items of similar length under the token budget" taggedAs FastTest in {
+    val batches = DynamicBatching.bucketIndices(lengths, 3, 40)
+
+    assert(batches.flatten.sorted == lengths.indices)
+    batches.foreach { batch =>
+      assert(batch.length <= 3)
+      val paddedTokens = batch.length * batch.map(lengths).max
+      assert(batch.length == 1 || paddedTokens <= 40)
+    }
+    assert(batches.head.map(lengths).forall(_ <= 5))
+  }
+
+  it should "return results in the original order" taggedAs FastTest in {
+    val results = DynamicBatching.predict(lengths, 2, 30)(identity)(_.map(_.toString))
+
+    assert(results == lengths.map(_.toString))
+  }
+
+}
@@ -0,0 +1,137 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.ml.util
+
+import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.util.FileHelper
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.io.DataOutputStream
+import java.nio.ByteBuffer
+import java.nio.file.Files
+import scala.util.Random
+
+class TrainingShardsTest extends AnyFlatSpec {
+
+  behavior of "TrainingShards"
+
+  private val codec = new ShardCodec[(String, Array[Float])] {
+    override def write(record: (String, Array[Float]), output: DataOutputStream): Unit = {
+      ShardCodec.writeString(record._1, output)
+      ShardCodec.writeHalfs(record._2, output)
+    }
+
+    override def read(input: ByteBuffer): (String, Array[Float]) =
+      (ShardCodec.readString(input), ShardCodec.readHalfs(input))
+  }
+
+  private def records(count: Int): Seq[(String, Array[Float])] =
+    (0 until count).map(i => (s"record $i", Array(i.toFloat, -0.5f, 0.125f * i)))
+
+  private def newFolder() = Files.createTempDirectory("sparknlp_shards_test").toFile
+
+  it should "convert floats to the nearest half precision floats" taggedAs FastTest in {
+    Seq(0f, -0f, 1f, -2.5f, 0.1f, 65504f, 6.1035156e-5f, 5.9604645e-8f, 1e-3f, 3.14159f)
+      .foreach { value =>
+        val converted = ShardCodec.toFloat(ShardCodec.toHalf(value))
+        assert(math.abs(converted - value) <= math.abs(value) / 1024 + 3e-8f, s"for $value")
+      }
+
+    assert(ShardCodec.toFloat(ShardCodec.toHalf(1e6f)) == Float.PositiveInfinity)
+    assert(ShardCodec.toFloat(ShardCodec.toHalf(Float.NegativeInfinity)).isNegInfinity)
+    assert(ShardCodec.toFloat(ShardCodec.toHalf(Float.NaN)).isNaN)
+    assert(ShardCodec.toFloat(ShardCodec.toHalf(1e-9f)) == 0f)
+    // halfway between 1 and the next half, rounded to even
+    assert(ShardCodec.toFloat(ShardCodec.toHalf(1f + 1f / 2048)) == 1f)
+  }
+
+  it should "read back all the records it wrote" taggedAs FastTest in {
+    val folder = newFolder()
+    try {
+      val written = records(1000)
+      val shards = TrainingShards.write(written.iterator, folder, codec, shardSize = 64)
+
+      assert(shards.count == 1000)
+      assert(shards.shards.length > 1000 / 64)
+
+      val read = shards.iterator.toSeq
+      assert(read.map(_._1).sorted == written.map(_._1).sorted)
+      read.foreach { case (name, values) =>
+        val i = name.stripPrefix("record ").toInt
+        assert(values.toSeq == Seq(i.toFloat, -0.5f, 0.125f * i).map(v =>
+          ShardCodec.toFloat(ShardCodec.toHalf(v))))
+      }
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+  it should "shuffle the records on every epoch" taggedAs FastTest in {
+    val folder = newFolder()
+    try {
+      val shards = TrainingShards.write(records(500).iterator, folder, codec, shardSize = 50)
+
+      val first = shards.iterator(new Random(1)).map(_._1).toSeq
+      val second = shards.iterator(new Random(2)).map(_._1).toSeq
+      assert(first.sorted == second.sorted)
+      assert(first != second)
+
+      val batches = shards.batches(32).toSeq
+      assert(batches.map(_.length).sum == 500)
+      assert(batches.init.forall(_.length == 32))
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+  it should "open shards written before" taggedAs FastTest in {
+    val folder = newFolder()
+    try {
+      val written = TrainingShards.write(records(300).iterator, folder, codec, shardSize = 40)
+      val opened = TrainingShards.open(folder, codec)
+
+      assert(opened.count == 300)
+      assert(opened.shards.map(_.getName).sorted == written.shards.map(_.getName).sorted)
+      assert(opened.iterator.map(_._1).toSeq.sorted == written.iterator.map(_._1).toSeq.sorted)
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+  it should "hold out a fraction of the records" taggedAs FastTest in {
+    val folder = newFolder()
+    try {
+      val (kept, heldOut) = TrainingShards.split(
+        records(2000).iterator,
+        folder,
+        codec,
+        holdout = 0.2f,
+        random = new Random(42))
+
+      assert(kept.count + heldOut.count == 2000)
+      assert(heldOut.count > 300 && heldOut.count < 500)
+      assert(
+        (kept.iterator.map(_._1) ++ heldOut.iterator.map(_._1)).toSeq.distinct.length == 2000)
+
+      kept.delete()
+      assert(!kept.folder.exists())
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+}
@@ -220,6 +220,21 @@ class LightPipelineTestSpec extends AnyFlatSpec {
     }
   }
 
+  it should "pack annotations into a single buffer" taggedAs FastTest in {
+    val lightPipeline = new LightPipeline(fixtureWithNormalizer.model)
+    val targets = new java.util.ArrayList[String]()
+    targets.add(fixtureWithNormalizer.text)
+    targets.add(fixtureWithNormalizer.text)
+
+    val buffer = java.nio.ByteBuffer
+      .wrap(lightPipeline.fullAnnotatePackedJava(targets))
+      .order(java.nio.ByteOrder.LITTLE_ENDIAN)
+
+    assert(buffer.getInt == 2)
+    val expectedColumns = lightPipeline.fullAnnotate(fixtureWithNormalizer.text).size
+    assert(buffer.getInt == expectedColumns)
+  }
+
   it should "output embeddings for LightPipeline" taggedAs SlowTest in {
     val pipeline = new PretrainedPipeline("onto_recognize_entities_bert_tiny", "en")
     val lightPipeline = new LightPipeline(pipeline.model, parseEmbeddings = true)
@@ -19,6 +19,7 @@ package com.johnsnowlabs.nlp.annotators
 import com.johnsnowlabs.nlp.AnnotatorType.TOKEN
 import com.johnsnowlabs.nlp._
 import com.johnsnowlabs.nlp.annotator.SentenceDetector
+import com.johnsnowlabs.nlp.annotators.common.Sentence
 import com.johnsnowlabs.nlp.annotators.sbd.pragmatic.SentenceDetector
 import com.johnsnowlabs.tags.{FastTest, SlowTest}
 import com.johnsnowlabs.util.Benchmark
@@ -927,4 +928,79 @@ class TokenizerTestSpec extends AnyFlatSpec with TokenizerBehaviors {
     AssertAnnotations.assertFields(expectedEntitiesFromText1, actualEntities)
   }
 
+  it should "find the same tokens with the compiled scanner and with regex" taggedAs FastTest in {
+    val data = DataBuilder.basicDataBuild(targetText1)
+    val texts = Seq(
+      targetText0,
+      targetText1,
+      "Tabs\tand\nnew lines,\r\nno-break\u00a0spaces and  double  spaces.",
+      "Markers ↇ and ↈ in new york text, or emoji 😀 in New  York.",
+      "")
+    val sentences = Sentence.fromTexts(texts: _*)
+
+    val tokenizers = Seq(
+      new Tokenizer().setInputCols("document").setOutputCol("token"),
+      new Tokenizer()
+        .setInputCols("document")
+        .setOutputCol("token")
+        .setExceptions(Array("New York", "e.g."))
+        .setCaseSensitiveExceptions(false)
+        .addSplitChars("-"),
+      new Tokenizer()
+        .setInputCols("document")
+        .setOutputCol("token")
+        .setTargetPattern("\\w+")
+        .setSplitPattern("'"))
+
+    tokenizers.foreach { tokenizer =>
+      val tokenizerModel = tokenizer.fit(data)
+      val compiled = tokenizerModel.setUseCompiledScanner(true).tag(sentences)
+      val regex = tokenizerModel.setUseCompiledScanner(false).tag(sentences)
+      assert(compiled.map(_.indexedTokens.toSeq) == regex.map(_.indexedTokens.toSeq))
+    }
+  }
+
+  it should "split with the split pattern and chars set after tagging" taggedAs FastTest in {
+    val data = DataBuilder.basicDataBuild("big-city of ground#earth")
+    val sentences = Sentence.fromTexts("big-city of ground#earth")
+    val tokenizerModel = new Tokenizer()
+      .setInputCols("document")
+      .setOutputCol("token")
+      .setSplitPattern("-")
+      .fit(data)
+    def tokens: Seq[String] = tokenizerModel.tag(sentences).head.indexedTokens.map(_.token).toSeq
+
+    assert(tokens == Seq("big", "city", "of", "ground#earth"))
+    tokenizerModel.setSplitPattern("#")
+    assert(tokens == Seq("big-city", "of", "ground", "earth"))
+
+    tokenizerModel.clear(tokenizerModel.splitPattern).setSplitChars(Array("-"))
+    assert(tokens == Seq("big", "city", "of", "ground#earth"))
+    tokenizerModel.setSplitChars(Array("#"))
+    assert(tokens == Seq("big-city", "of", "ground", "earth"))
+  }
+
+  it should "benchmark the compiled scanner against regex" taggedAs SlowTest in {
+    val data = DataBuilder.basicDataBuild(targetText1)
+    val tokenizerModel = new Tokenizer()
+      .setInputCols("document")
+      .setOutputCol("token")
+      .setExceptions(Array("New York"))
+      .fit(data)
+    val sentences = Sentence.fromTexts(Seq.fill(20000)(targetText1): _*)
+
+    Benchmark.measure(
+      iterations = 5,
+      forcePrint = true,
+      description = "Tokenizer with compiled scanner") {
+      tokenizerModel.setUseCompiledScanner(true).tag(sentences)
+    }
+    Benchmark.measure(
+      iterations = 5,
+      forcePrint = true,
+      description = "Tokenizer with regex") {
+      tokenizerModel.setUseCompiledScanner(false).tag(sentences)
+    }
+  }
+
 }
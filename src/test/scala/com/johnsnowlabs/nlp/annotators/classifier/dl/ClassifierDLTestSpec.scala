@@ -16,14 +16,20 @@
 
 package com.johnsnowlabs.nlp.annotators.classifier.dl
 
+import com.johnsnowlabs.nlp.AnnotatorBuilder
 import com.johnsnowlabs.nlp.annotator._
 import com.johnsnowlabs.nlp.base._
 import com.johnsnowlabs.nlp.embeddings.UniversalSentenceEncoder
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
 import com.johnsnowlabs.tags.{FastTest, SlowTest}
+import com.johnsnowlabs.util.FileHelper
 import org.apache.spark.ml.Pipeline
 import org.scalatest.flatspec.AnyFlatSpec
 
+import java.io.File
+import java.nio.file.Files
+import scala.io.Source
+
 class ClassifierDLTestSpec extends AnyFlatSpec {
   import ResourceHelper.spark.implicits._
 
@@ -139,4 +145,76 @@ class ClassifierDLTestSpec extends AnyFlatSpec {
     pipelineModel.transform(data).select("document").show(1, truncate = false)
   }
 
+  "ClassifierDL" should "train from spilled training data" taggedAs FastTest in {
+    val data = (1 to 20)
+      .flatMap(i =>
+        Seq(
+          (s"The movie $i was good and the acting was great", "good"),
+          (s"The movie $i was bad and the acting was terrible", "bad")))
+      .toDF("text", "label")
+
+    val documentAssembler = new DocumentAssembler()
+      .setInputCol("text")
+      .setOutputCol("document")
+
+    val tokenizer = new Tokenizer()
+      .setInputCols("document")
+      .setOutputCol("token")
+
+    val embeddings = AnnotatorBuilder
+      .getGLoveEmbeddings(data)
+      .setInputCols("document", "token")
+      .setOutputCol("embeddings")
+
+    val sentenceEmbeddings = new SentenceEmbeddings()
+      .setInputCols("document", "embeddings")
+      .setOutputCol("sentence_embeddings")
+      .setPoolingStrategy("AVERAGE")
+
+    val trainData = new Pipeline()
+      .setStages(Array(documentAssembler, tokenizer, embeddings, sentenceEmbeddings))
+      .fit(data)
+      .transform(data)
+
+    val folder = Files.createTempDirectory("sparknlp_classifier_spill").toFile
+    try {
+      val testPath = new File(folder, "test").getPath
+      trainData.write.parquet(testPath)
+      val logsPath = new File(folder, "logs").getPath
+
+      val docClassifier = new ClassifierDLApproach()
+        .setInputCols("sentence_embeddings")
+        .setOutputCol("category")
+        .setLabelColumn("label")
+        .setBatchSize(8)
+        .setMaxEpochs(2)
+        .setRandomSeed(44)
+        .setValidationSplit(0.2f)
+        .setTestDataset(testPath)
+        .setEnableOutputLogs(true)
+        .setOutputLogsPath(logsPath)
+        .setSpillTrainingData(true)
+        .setShardsPath(new File(folder, "shards").getPath)
+        .setShardSize(8)
+
+      val model = docClassifier.fit(trainData)
+
+      assert(model.getClasses.sorted.toSeq == Seq("bad", "good"))
+      assert(model.transform(trainData).select("category").count() == 40)
+      // the shards are deleted once trained
+      assert(Option(new File(folder, "shards").list()).forall(_.isEmpty))
+
+      // the metrics are logged into files of their own
+      val log = new File(logsPath)
+        .listFiles()
+        .map(file => Source.fromFile(file).mkString)
+        .mkString("\n")
+      assert(log.contains("Quality on validation dataset"))
+      assert(log.contains("Quality on test dataset"))
+      assert("Micro-average".r.findAllIn(log).length == 4)
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
 }
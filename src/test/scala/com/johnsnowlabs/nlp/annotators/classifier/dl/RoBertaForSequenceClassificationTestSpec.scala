@@ -17,6 +17,7 @@
 package com.johnsnowlabs.nlp.annotators.classifier.dl
 
 import com.johnsnowlabs.nlp.annotators.Tokenizer
+import com.johnsnowlabs.nlp.annotators.sbd.pragmatic.SentenceDetector
 import com.johnsnowlabs.nlp.base.DocumentAssembler
 import com.johnsnowlabs.nlp.training.CoNLL
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
@@ -170,4 +171,47 @@ class RoBertaForSequenceClassificationTestSpec extends AnyFlatSpec {
 
     assert(totalDocs == totalLabels)
   }
+
+  "RoBertaForSequenceClassification" should "classify the same with maxTokensPerBatch" taggedAs SlowTest in {
+    val data = Seq(
+      "Paris is lovely. I hate waiting in long queues at the airport for hours. Great! " +
+        "The service was slow, the food was cold and nobody apologized. Fine.").toDF("text")
+
+    val document = new DocumentAssembler()
+      .setInputCol("text")
+      .setOutputCol("document")
+
+    val sentence = new SentenceDetector()
+      .setInputCols("document")
+      .setOutputCol("sentence")
+
+    val tokenizer = new Tokenizer()
+      .setInputCols("sentence")
+      .setOutputCol("token")
+
+    val classifier = RoBertaForSequenceClassification
+      .pretrained()
+      .setInputCols("token", "sentence")
+      .setOutputCol("label")
+      .setBatchSize(2)
+
+    val pipelineModel =
+      new Pipeline().setStages(Array(document, sentence, tokenizer, classifier)).fit(data)
+
+    def labels(maxTokensPerBatch: Int) = {
+      classifier.setMaxTokensPerBatch(maxTokensPerBatch)
+      pipelineModel
+        .transform(data)
+        .select(explode($"label"))
+        .select("col.begin", "col.result")
+        .collect()
+        .toSeq
+    }
+
+    val default = labels(0)
+    val bucketed = labels(16)
+
+    assert(default.length == 5)
+    assert(bucketed == default)
+  }
 }
@@ -72,29 +72,58 @@ class AhoCorasickAutomatonTest extends AnyFlatSpec {
     assert(actualOutput == expectedOutput)
   }
 
-  it should "raise error when searching a word with a character not found on alphabet" taggedAs FastTest in {
-    var englishAlphabet = "abcdefghijklmnopqrstuvwxyz"
-    var entityPatterns = Array(EntityPattern("Test", Seq("hello", "hi")))
-    var text = "Hello there"
-    var sentence = Sentence(text, 0, text.length, 0)
+  it should "raise error when a keyword has a character not found on alphabet" taggedAs FastTest in {
+    val englishAlphabet = "abcdefghijklmnopqrstuvwxyz"
+    val entityPatterns = Array(EntityPattern("LOC", Seq("Númenor")))
 
-    var automaton =
+    val errorMessage = intercept[UnsupportedOperationException] {
       new AhoCorasickAutomaton(englishAlphabet, entityPatterns, caseSensitive = true)
-
-    var errorMessage = intercept[UnsupportedOperationException] {
-      automaton.searchPatternsInText(sentence)
-    }
-    assert(errorMessage.getMessage.startsWith("Char H not found in the alphabet"))
-
-    englishAlphabet = englishAlphabet + englishAlphabet.toUpperCase()
-    entityPatterns = Array(EntityPattern("LOC", Seq("Gondor")))
-    text = "Elendil used to live in Númenor"
-    sentence = Sentence(text, 0, text.length, 0)
-    automaton = new AhoCorasickAutomaton(englishAlphabet, entityPatterns, caseSensitive = true)
-    errorMessage = intercept[UnsupportedOperationException] {
-      automaton.searchPatternsInText(sentence)
     }
-    assert(errorMessage.getMessage.startsWith("Char ú not found in the alphabet"))
+    assert(errorMessage.getMessage.startsWith("Char N not found in the alphabet"))
+  }
+
+  it should "skip characters of the text not found on alphabet" taggedAs FastTest in {
+    val englishAlphabet = "abcdefghijklmnopqrstuvwxyz"
+    val entityPatterns = Array(EntityPattern("LOC", Seq("gondor")))
+    val text = "Elendil used to live in Númenor, not in Gondor"
+    val sentence = Sentence(text, 0, text.length, 0)
+
+    val automaton = new AhoCorasickAutomaton(englishAlphabet, entityPatterns)
+    val actualOutput = automaton.searchPatternsInText(sentence)
+
+    val expectedOutput =
+      List(Annotation(CHUNK, 40, 45, "Gondor", Map("entity" -> "LOC", "sentence" -> "0")))
+    assert(actualOutput == expectedOutput)
+  }
+
+  it should "keep one state per distinct keyword prefix" taggedAs FastTest in {
+    val englishAlphabet = EntityRulerUtil.loadAlphabet("english")
+    val entityPatterns = Array(
+      EntityPattern("PER", Seq("John", "Jon", "John Snow"), Some("person")),
+      EntityPattern("LOC", Seq("Winterfell")))
+
+    val automaton = new AhoCorasickAutomaton(englishAlphabet, entityPatterns)
+
+    // root, "j", "jo", "joh", "john", "jon", " snow" after "john" and "winterfell"
+    assert(automaton.stateCount == 1 + 4 + 1 + 5 + 10)
+
+    val text = "Jon and John Snow left Winterfell"
+    val actualOutput = automaton.searchPatternsInText(Sentence(text, 10, text.length + 9, 1))
+    val expectedOutput = Seq(
+      Annotation(
+        CHUNK,
+        10,
+        12,
+        "Jon",
+        Map("entity" -> "PER", "sentence" -> "1", "id" -> "person")),
+      Annotation(
+        CHUNK,
+        18,
+        26,
+        "John Snow",
+        Map("entity" -> "PER", "sentence" -> "1", "id" -> "person")),
+      Annotation(CHUNK, 33, 42, "Winterfell", Map("entity" -> "LOC", "sentence" -> "1")))
+    assert(actualOutput == expectedOutput)
   }
 
   it should "build a case sensitive matching machine" taggedAs FastTest in {
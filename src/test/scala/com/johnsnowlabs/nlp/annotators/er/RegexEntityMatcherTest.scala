@@ -0,0 +1,66 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.annotators.er
+
+import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, Sentence}
+import com.johnsnowlabs.tags.FastTest
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.io.{ByteArrayInputStream, ByteArrayOutputStream, ObjectInputStream, ObjectOutputStream}
+
+class RegexEntityMatcherTest extends AnyFlatSpec {
+
+  private val regexMatcher = new RegexEntityMatcher(
+    Seq(
+      ("ID,id-code", Seq("[0-9]{3}-[0-9]{2}", "ID[0-9]+")),
+      ("NUMBER", Seq("[0-9]+")),
+      ("EMPTY", Seq())))
+
+  "RegexEntityMatcher" should "find the entities matching a token in entity order" taggedAs FastTest in {
+    assert(regexMatcher.size == 3)
+    assert(regexMatcher.matchingEntities("123-45") == Seq("ID,id-code", "NUMBER"))
+    assert(regexMatcher.matchingEntities("123-45", limit = 1) == Seq("ID,id-code"))
+    assert(regexMatcher.matchingEntities("2023") == Seq("NUMBER"))
+    assert(regexMatcher.matchingEntities("Winterfell").isEmpty)
+  }
+
+  it should "find the first match of each pattern in a sentence" taggedAs FastTest in {
+    val text = "Call 555-12 or ID42"
+    val sentence = Sentence(text, 10, text.length + 9, 0)
+
+    val actualMatches = regexMatcher.findFirstMatches(sentence)
+
+    val expectedMatches = Seq(
+      (IndexedToken("555-12", 15, 20), "ID,id-code"),
+      (IndexedToken("555", 15, 17), "NUMBER"),
+      (IndexedToken("ID42", 25, 28), "ID,id-code"))
+    assert(actualMatches == expectedMatches)
+  }
+
+  it should "match the same after serialization" taggedAs FastTest in {
+    val bytes = new ByteArrayOutputStream()
+    val output = new ObjectOutputStream(bytes)
+    output.writeObject(regexMatcher)
+    output.close()
+
+    val input = new ObjectInputStream(new ByteArrayInputStream(bytes.toByteArray))
+    val deserialized = input.readObject().asInstanceOf[RegexEntityMatcher]
+
+    assert(deserialized.matchingEntities("123-45") == Seq("ID,id-code", "NUMBER"))
+  }
+
+}
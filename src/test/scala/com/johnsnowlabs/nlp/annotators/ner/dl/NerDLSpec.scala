@@ -16,8 +16,14 @@
 
 package com.johnsnowlabs.nlp.annotators.ner.dl
 
+import com.johnsnowlabs.ml.crf.TextSentenceLabels
+import com.johnsnowlabs.ml.tensorflow.{DatasetEncoderParams, NerDatasetEncoder}
 import com.johnsnowlabs.nlp._
 import com.johnsnowlabs.nlp.annotator.{SentenceDetector, Tokenizer}
+import com.johnsnowlabs.nlp.annotators.common.{
+  TokenPieceEmbeddings,
+  WordpieceEmbeddingsSentence
+}
 import com.johnsnowlabs.nlp.embeddings.{BertEmbeddings, WordEmbeddingsModel}
 import com.johnsnowlabs.nlp.training.CoNLL
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
@@ -26,6 +32,10 @@ import com.johnsnowlabs.util.{Benchmark, FileHelper}
 import org.apache.spark.ml.Pipeline
 import org.scalatest.flatspec.AnyFlatSpec
 
+import java.io.{ByteArrayOutputStream, DataOutputStream, File}
+import java.nio.ByteBuffer
+import java.nio.channels.FileChannel
+import java.nio.file.{Files, StandardOpenOption}
 import scala.io.Source
 
 class NerDLSpec extends AnyFlatSpec {
@@ -223,6 +233,272 @@ class NerDLSpec extends AnyFlatSpec {
     ner.write.overwrite() save ("./tmp_ner_dl_tf115")
   }
 
+  "NerDatasetEncoder" should "batch encoded sentences like the sentences themselves" taggedAs FastTest in {
+    val encoder = new NerDatasetEncoder(
+      DatasetEncoderParams(List("O", "B-PER", "I-PER"), "abcde".toList, List(0f, 0f), 2))
+
+    def sentence(words: String*) = WordpieceEmbeddingsSentence(
+      words.zipWithIndex.map { case (word, i) =>
+        TokenPieceEmbeddings(word, word, i, i % 2 == 0, false, Array(i.toFloat, 1f), i, i)
+      }.toArray,
+      0)
+
+    val sentences = Array(sentence("ab", "cde", "xa"), sentence("e"), sentence())
+    val tags = Array(Array("B-PER", "I-PER", "O"), Array("B-LOC"), Array.empty[String])
+
+    val (batch, tagIds) = encoder.encodeBatch(sentences.zip(tags).map { case (s, t) =>
+      encoder.encodeSentence(s, t)
+    })
+    val expected = encoder.encodeInputData(sentences)
+
+    assert(tagIds.map(_.toSeq).toSeq == encoder.encodeTags(tags).map(_.toSeq).toSeq)
+    assert(batch.sentenceLengths.toSeq == expected.sentenceLengths.toSeq)
+    assert(batch.maxLength == expected.maxLength)
+    assert(batch.wordLengths.map(_.toSeq).toSeq == expected.wordLengths.map(_.toSeq).toSeq)
+    assert(batch.isWordStart.map(_.toSeq).toSeq == expected.isWordStart.map(_.toSeq).toSeq)
+    assert(
+      batch.charIds.map(_.map(_.toSeq).toSeq).toSeq ==
+        expected.charIds.map(_.map(_.toSeq).toSeq).toSeq)
+    assert(
+      batch.wordEmbeddings.map(_.map(_.toSeq).toSeq).toSeq ==
+        expected.wordEmbeddings.map(_.map(_.toSeq).toSeq).toSeq)
+  }
+
+  "NerDLApproach" should "share the encoded training data between trainings" taggedAs FastTest in {
+    val conll = CoNLL()
+    val trainingData = conll.readDataset(
+      ResourceHelper.spark,
+      "src/test/resources/ner-corpus/test_ner_dataset.txt")
+    val embeddings = AnnotatorBuilder.getGLoveEmbeddings(trainingData.toDF())
+    val trainData = embeddings.transform(trainingData)
+
+    val cachePath = Files.createTempDirectory("sparknlp_ner_cache").toString
+    def fit(lr: Float) = new NerDLApproach()
+      .setInputCols("sentence", "token", "embeddings")
+      .setOutputCol("ner")
+      .setLabelColumn("label")
+      .setLr(lr)
+      .setMaxEpochs(2)
+      .setValidationSplit(0.2f)
+      .setRandomSeed(0)
+      .setVerbose(0)
+      .setGraphFolder("src/test/resources/graph/")
+      .setTrainingCachePath(cachePath)
+      .fit(trainData)
+
+    try {
+      val first = fit(1e-1f)
+      val caches = listCaches(new File(cachePath))
+      assert(caches.length == 1)
+      val cached = new File(caches.head, "params").lastModified()
+
+      val second = fit(1e-2f)
+      assert(listCaches(new File(cachePath)).toSeq == caches.toSeq)
+      assert(new File(caches.head, "params").lastModified() == cached)
+      assert(second.datasetParams.get == first.datasetParams.get)
+
+      assert(second.transform(trainData).select("ner").count() == trainData.count())
+
+      // released once the trainings finished
+      assert(
+        NerDLTrainingCache.evictToSize(new File(cachePath), 0) == caches.toSeq.map(_.getName))
+    } finally {
+      FileHelper.delete(cachePath)
+    }
+  }
+
+  "NerDLApproach" should "share the training cache between Pipeline fits" taggedAs FastTest in {
+    val conll = CoNLL()
+    val trainingData = conll.readDataset(
+      ResourceHelper.spark,
+      "src/test/resources/ner-corpus/test_ner_dataset.txt")
+    val embeddings = AnnotatorBuilder.getGLoveEmbeddings(trainingData.toDF())
+
+    val folder = Files.createTempDirectory("sparknlp_ner_cache").toFile
+    try {
+      val dataPath = new File(folder, "data").getPath
+      embeddings.transform(trainingData).write.parquet(dataPath)
+      val cachePath = new File(folder, "cache")
+
+      val pipeline = new Pipeline().setStages(
+        Array(
+          new NerDLApproach()
+            .setInputCols("sentence", "token", "embeddings")
+            .setOutputCol("ner")
+            .setLabelColumn("label")
+            .setMaxEpochs(1)
+            .setRandomSeed(0)
+            .setVerbose(0)
+            .setGraphFolder("src/test/resources/graph/")
+            .setTrainingCachePath(cachePath.getPath)))
+
+      pipeline.fit(ResourceHelper.spark.read.parquet(dataPath))
+      val caches = listCaches(cachePath)
+      assert(caches.length == 1)
+      val cached = new File(caches.head, "params").lastModified()
+
+      val data = ResourceHelper.spark.read.parquet(dataPath)
+      val refitted = pipeline.fit(data)
+      assert(listCaches(cachePath).toSeq == caches.toSeq)
+      assert(new File(caches.head, "params").lastModified() == cached)
+      assert(refitted.transform(data).select("ner").count() == data.count())
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+  private def listCaches(cachePath: File): Array[File] =
+    cachePath.listFiles().filterNot(_.getName.startsWith("."))
+
+  "NerDLTrainingCache" should "change the key of changed input files" taggedAs FastTest in {
+    val folder = Files.createTempDirectory("sparknlp_ner_cache").toFile
+    try {
+      val file = new File(folder, "data.txt")
+      Files.write(file.toPath, "first".getBytes("UTF-8"))
+      def fingerprint() = NerDLTrainingCache.fingerprint(
+        Seq(ResourceHelper.spark.read.text(file.getPath)),
+        Seq("label"))
+
+      val key = fingerprint()
+      assert(fingerprint() == key)
+
+      Files.write(file.toPath, "second file".getBytes("UTF-8"))
+      assert(fingerprint() != key)
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+  "NerDLTrainingCache" should "evict the least recently used caches" taggedAs FastTest in {
+    val cachePath = Files.createTempDirectory("sparknlp_ner_cache").toFile
+    try {
+      val now = System.currentTimeMillis()
+      Seq("old" -> (now - 20000), "recent" -> (now - 10000), "new" -> now).foreach {
+        case (name, lastModified) =>
+          val cache = new File(cachePath, name)
+          cache.mkdirs()
+          Files.write(new File(cache, "params").toPath, new Array[Byte](100))
+          cache.setLastModified(lastModified)
+      }
+      // a cache being created
+      new File(cachePath, ".building").mkdirs()
+
+      assert(NerDLTrainingCache.evictToSize(cachePath, 250) == Seq("old"))
+      assert(cachePath.list().sorted.toSeq == Seq(".building", ".locks", "new", "recent"))
+      assert(NerDLTrainingCache.evictToSize(cachePath, 0) == Seq("recent", "new"))
+    } finally {
+      FileHelper.delete(cachePath.getPath)
+    }
+  }
+
+  "NerDLTrainingCache" should "keep the caches other processes use" taggedAs FastTest in {
+    val cachePath = Files.createTempDirectory("sparknlp_ner_cache").toFile
+    try {
+      Seq("used", "unused").foreach { name =>
+        val cache = new File(cachePath, name)
+        cache.mkdirs()
+        Files.write(new File(cache, "params").toPath, new Array[Byte](100))
+      }
+
+      // the shared lock another JVM holds while it trains from the cache
+      val locks = new File(cachePath, ".locks")
+      locks.mkdirs()
+      val channel = FileChannel.open(
+        new File(locks, "used.lock").toPath,
+        StandardOpenOption.CREATE,
+        StandardOpenOption.READ,
+        StandardOpenOption.WRITE)
+      try {
+        channel.lock(0L, Long.MaxValue, true)
+        assert(NerDLTrainingCache.evictToSize(cachePath, 0) == Seq("unused"))
+      } finally {
+        channel.close()
+      }
+      assert(new File(cachePath, "used").exists())
+    } finally {
+      FileHelper.delete(cachePath.getPath)
+    }
+  }
+
+  "NerDLApproach" should "train from spilled training data" taggedAs FastTest in {
+    val conll = CoNLL()
+    val trainingData = conll.readDataset(
+      ResourceHelper.spark,
+      "src/test/resources/ner-corpus/test_ner_dataset.txt")
+    val embeddings = AnnotatorBuilder.getGLoveEmbeddings(trainingData.toDF())
+    val trainData = embeddings.transform(trainingData)
+
+    val folder = Files.createTempDirectory("sparknlp_ner_spill").toFile
+    try {
+      val testPath = new File(folder, "test").getPath
+      trainData.write.parquet(testPath)
+      val logsPath = new File(folder, "logs").getPath
+
+      val ner = new NerDLApproach()
+        .setInputCols("sentence", "token", "embeddings")
+        .setOutputCol("ner")
+        .setLabelColumn("label")
+        .setLr(1e-1f)
+        .setMaxEpochs(2)
+        .setValidationSplit(0.2f)
+        .setTestDataset(testPath)
+        .setRandomSeed(0)
+        .setVerbose(0)
+        .setEnableOutputLogs(true)
+        .setOutputLogsPath(logsPath)
+        .setGraphFolder("src/test/resources/graph/")
+        .setSpillTrainingData(true)
+        .setShardsPath(new File(folder, "shards").getPath)
+        .setShardSize(4)
+
+      val model = ner.fit(trainData)
+
+      assert(model.getClasses.contains("O"))
+      assert(model.transform(trainData).select("ner").count() == trainData.count())
+      // the shards are deleted once trained
+      assert(Option(new File(folder, "shards").list()).forall(_.isEmpty))
+
+      val log = Source.fromFile(new File(logsPath, s"${ner.uid}.log")).mkString
+      assert("Quality on validation dataset".r.findAllIn(log).length == 2)
+      assert("Quality on test dataset".r.findAllIn(log).length == 2)
+      assert("Micro-average".r.findAllIn(log).length == 4)
+    } finally {
+      FileHelper.delete(folder.getPath)
+    }
+  }
+
+  "NerDLApproach" should "write and read training shard records" taggedAs FastTest in {
+    val labels = TextSentenceLabels(Seq("B-PER", "I-PER", "O"))
+    val sentence = WordpieceEmbeddingsSentence(
+      Array(
+        TokenPieceEmbeddings("Jo", "John", 3, true, false, Array(0.5f, -1f), 0, 3),
+        TokenPieceEmbeddings("##hn", "John", 7, false, true, Array(0.25f, 2f), 0, 3),
+        TokenPieceEmbeddings("Smith", "Smith", -1, true, false, Array(0f, 0f), 5, 9)),
+      4)
+
+    val bytes = new ByteArrayOutputStream()
+    val output = new DataOutputStream(bytes)
+    NerDLApproach.trainingShardCodec.write((labels, sentence), output)
+    output.close()
+    val (readLabels, readSentence) =
+      NerDLApproach.trainingShardCodec.read(ByteBuffer.wrap(bytes.toByteArray))
+
+    assert(readLabels == labels)
+    assert(readSentence.sentenceId == sentence.sentenceId)
+    assert(readSentence.tokens.length == sentence.tokens.length)
+    readSentence.tokens.zip(sentence.tokens).foreach { case (read, written) =>
+      assert(read.wordpiece == written.wordpiece)
+      assert(read.token == written.token)
+      assert(read.pieceId == written.pieceId)
+      assert(read.isWordStart == written.isWordStart)
+      assert(read.isOOV == written.isOOV)
+      assert(read.begin == written.begin)
+      assert(read.end == written.end)
+      // embeddings are stored as half precision floats, which represent these values exactly
+      assert(read.embeddings.toSeq == written.embeddings.toSeq)
+    }
+  }
+
   "NerDLModel" should "successfully load saved model" taggedAs FastTest in {
 
     val conll = CoNLL()
@@ -17,7 +17,7 @@
 package com.johnsnowlabs.nlp.annotators.pos.perceptron
 
 import com.johnsnowlabs.nlp.annotators.Tokenizer
-import com.johnsnowlabs.nlp.annotators.common.Sentence
+import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, Sentence, TokenizedSentence}
 import com.johnsnowlabs.nlp.training.POS
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
 import com.johnsnowlabs.nlp.{ContentProvider, DataBuilder}
@@ -143,6 +143,43 @@ class PerceptronApproachTestSpec extends AnyFlatSpec with PerceptronApproachBeha
       case _: java.io.IOException => succeed
     }
   }
+  "A compiled Perceptron Tagger" should "tag as its model" taggedAs FastTest in {
+    val compiled = CompiledPerceptron.compile(trainedTagger.getModel)
+    assert(compiled.isDefined)
+    assert(compiled.get.tags.toSet == trainedTagger.getModel.getTags.toSet)
+
+    val expected = trainedTagger.tag(trainedTagger.getModel, tokenizedSentenceFromWsj)
+    val result = trainedTagger.tag(compiled.get, tokenizedSentenceFromWsj)
+    assert(result.map(_.tags.toSeq).toSeq == expected.map(_.tags.toSeq).toSeq)
+    assert(
+      result.flatMap(_.indexedTaggedWords).toSeq ==
+        expected.flatMap(_.indexedTaggedWords).toSeq)
+  }
+
+  it should "compare scores as doubles like its model" taggedAs FastTest in {
+    // both weights round to the same float, which would tie and give the last tag
+    val model = AveragedPerceptron(
+      Array("A", "B"),
+      Map.empty,
+      Map("bias" -> Map("A" -> (1.0 + 1e-9), "B" -> 1.0)))
+    val sentence = Array(TokenizedSentence(Array(IndexedToken("word", 0, 3)), 0))
+
+    val compiled = CompiledPerceptron.compile(model).get
+    assert(trainedTagger.tag(model, sentence).head.tags.toSeq == Seq("A"))
+    assert(trainedTagger.tag(compiled, sentence).head.tags.toSeq == Seq("A"))
+  }
+
+  it should "hash feature keys from their parts" taggedAs FastTest in {
+    val key = CompiledPerceptron.hash(
+      CompiledPerceptron.hash(CompiledPerceptron.hash("i-1 tag+i word "), "NN"),
+      ' ')
+    assert(
+      CompiledPerceptron.hash(key, "the") == CompiledPerceptron.hash("i-1 tag+i word NN the"))
+    assert(
+      CompiledPerceptron.hash(CompiledPerceptron.hash("i suffix "), "running", 4, 7) ==
+        CompiledPerceptron.hash("i suffix ing"))
+  }
+
   /*
    * Testing POS() class
    * Making sure it only extracts good token_labels
@@ -197,4 +197,11 @@ class GPT2TestSpec extends AnyFlatSpec {
     assert(dataframe1.equals(dataframe2))
   }
 
+  "gpt2" should "not cache past keys and values of models without them" taggedAs SlowTest in {
+    val gpt2 = GPT2Transformer.pretrained()
+
+    assert(!gpt2.getUseCache)
+    assert(!gpt2.getModelIfNotSet.supportsCache)
+  }
+
 }
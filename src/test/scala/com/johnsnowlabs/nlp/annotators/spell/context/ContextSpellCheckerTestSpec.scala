@@ -520,4 +520,96 @@ class ContextSpellCheckerTestSpec extends AnyFlatSpec {
 
   }
 
+  "a Spell Checker" should "decode sentences of a batch together as one by one" taggedAs SlowTest in {
+    val data = Seq(
+      "It was a cold , dreary day and the country was white with smow .",
+      "He wos re1uctant to clange .",
+      "he is gane .",
+      "Peter lives in a smal house in tge country .").toDF("text").repartition(1)
+
+    val documentAssembler =
+      new DocumentAssembler().setInputCol("text").setOutputCol("doc")
+
+    val tokenizer: Tokenizer = new Tokenizer()
+      .setInputCols(Array("doc"))
+      .setOutputCol("token")
+
+    val spellChecker = ContextSpellCheckerModel
+      .pretrained()
+      .setTradeOff(12.0f)
+      .setInputCols("token")
+      .setOutputCol("checked")
+
+    def corrections(batchSize: Int): Seq[Seq[(String, Double)]] = {
+      spellChecker.setBatchSize(batchSize)
+      new Pipeline()
+        .setStages(Array(documentAssembler, tokenizer, spellChecker))
+        .fit(data)
+        .transform(data)
+        .selectExpr("checked.result", "checked.metadata")
+        .as[(Seq[String], Seq[Map[String, String]])]
+        .collect()
+        .map { case (results, metadata) => results.zip(metadata.map(_("cost").toDouble)) }
+        .toSeq
+    }
+
+    val oneByOne = corrections(1)
+    val batched = corrections(4)
+    assert(batched.map(_.map(_._1)) == oneByOne.map(_.map(_._1)))
+    batched.flatten.zip(oneByOne.flatten).foreach { case ((_, batchedCost), (_, cost)) =>
+      assert(math.abs(batchedCost - cost) < 1e-3)
+    }
+  }
+
+
+  "a Spell Checker" should "keep the corrections of the pretrained model from before batched decoding" taggedAs SlowTest in {
+    // corrections of the pretrained model as documented before sentences were decoded in batches
+    val data = Seq(
+      "It was a cold , dreary day and the country was white with smow .",
+      "It was a cold. The country was white withh snow .",
+      "It had been raining just this way all day and hal1 of last night, and to all" +
+        " appearances it intended to continue raining in the same manner for another twenty-four hours." +
+        " Yesterday the Yard had ben a foot deep in nice clean snow, the result of the blizzard that had" +
+        " sweptr over Wisining and New Eng1and in general two days before.").toDF("text").repartition(1)
+
+    val documentAssembler =
+      new DocumentAssembler().setInputCol("text").setOutputCol("doc")
+
+    val sentenceDetector = new SentenceDetector()
+      .setInputCols(Array("doc"))
+      .setOutputCol("sentence")
+
+    val tokenizer: Tokenizer = new Tokenizer()
+      .setInputCols(Array("sentence"))
+      .setOutputCol("token")
+
+    val spellChecker = ContextSpellCheckerModel
+      .pretrained()
+      .setTradeOff(12.0f)
+      .setInputCols("token")
+      .setOutputCol("checked")
+
+    Seq(1, 4).foreach { batchSize =>
+      spellChecker.setBatchSize(batchSize)
+      val checked = new Pipeline()
+        .setStages(Array(documentAssembler, sentenceDetector, tokenizer, spellChecker))
+        .fit(data)
+        .transform(data)
+        .select("checked")
+        .as[Array[Annotation]]
+        .collect()
+      def sentence(row: Int, index: Int): Seq[String] =
+        checked(row).filter(_.metadata("sentence") == index.toString).map(_.result).toSeq
+
+      assert(
+        sentence(0, 0) == Seq(
+          "It", "was", "a", "cold", ",", "dreary", "day", "and", "the", "country", "was",
+          "white", "with", "snow", "."))
+      assert(sentence(1, 0) == Seq("It", "was", "a", "cold", "."))
+      assert(sentence(1, 1) == Seq("The", "country", "was", "white", "with", "snow", "."))
+      assert(sentence(2, 0).contains("half"))
+      assert(sentence(2, 1).contains("swept"))
+    }
+  }
+
 }
@@ -134,4 +134,42 @@ trait BpeTokenizerBehaviours {
       assertEncodedCorrectly(text, encoded, expected, expectedIds)
     }
   }
+
+  def correctlyCachedBpeTokenizer(text: String): Unit = {
+    it should "share cached merges between tokenizers of the same merges" taggedAs FastTest in {
+      val (_, expected: Array[TokenPiece]) = tokenizeAndEncode(defaultTokenizer, text)
+
+      val otherTokenizer = BpeTokenizer.forModel(modelType, merges, vocab)
+      val hitsBefore = otherTokenizer.getCacheHits
+      val missesBefore = otherTokenizer.getCacheMisses
+      val (_, encoded: Array[TokenPiece]) = tokenizeAndEncode(otherTokenizer, text)
+
+      assert(encoded.toSeq == expected.toSeq)
+      assert(otherTokenizer.getCacheHits > hitsBefore)
+      assert(otherTokenizer.getCacheMisses == missesBefore)
+      assert(otherTokenizer.getCacheHitRate > 0.0)
+    }
+
+    it should "encode the same pieces from concurrent threads" taggedAs FastTest in {
+      val (_, expected: Array[TokenPiece]) = tokenizeAndEncode(defaultTokenizer, text)
+
+      val encodedByThread = (1 to 16).par.map { _ =>
+        val tokenizer = BpeTokenizer.forModel(modelType, merges, vocab)
+        (1 to 50).map(_ => tokenizeAndEncode(tokenizer, text)._2.toSeq).distinct
+      }
+
+      assert(encodedByThread.forall(_ == Seq(expected.toSeq)))
+    }
+
+    it should "encode warmed words from the cache" taggedAs FastTest in {
+      val tokenizer = BpeTokenizer.forModel(modelType, merges, vocab)
+      val sentence = Sentence(text, 0, text.length - 1, 0)
+      val words = tokenizer.tokenize(sentence).map(_.token).toSeq
+      tokenizer.warmCache(words)
+
+      val missesBefore = tokenizer.getCacheMisses
+      tokenizer.encode(tokenizer.tokenize(sentence))
+      assert(tokenizer.getCacheMisses == missesBefore)
+    }
+  }
 }
@@ -89,4 +89,6 @@ class RobertaTokenizerTestSpec extends AnyFlatSpec with BpeTokenizerBehaviours {
     expected =
       Array("I", "Ġunamb", "ig", "ou", "os", "ly", "<mask>", "Ġgood", "Ġ3", "As", "d", "<mask>"),
     expectedIds = Array(16, 4, 5, 6, 7, 8, 2, 9, 10, 11, 12, 2))
+
+  it should behave like correctlyCachedBpeTokenizer(text = "I unambigouosly good 3Asd!")
 }
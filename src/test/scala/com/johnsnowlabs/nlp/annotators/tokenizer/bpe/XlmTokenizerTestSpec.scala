@@ -112,4 +112,6 @@ class XlmTokenizerTestSpec extends AnyFlatSpec with BpeTokenizerBehaviours {
       "d",
       "<special1>"),
     expectedIds = Array(14, 15, 16, 17, 18, 19, 5, 20, 21, 22, 23, 5))
+
+  it should behave like correctlyCachedBpeTokenizer(text = "I unambigouosly good 3Asd!")
 }
@@ -16,11 +16,15 @@
 
 package com.johnsnowlabs.nlp.annotators.tokenizer.wordpiece
 
-import com.johnsnowlabs.nlp.annotators.common.Sentence
+import com.johnsnowlabs.nlp.annotators.common.{IndexedToken, Sentence}
 import com.johnsnowlabs.nlp.embeddings.BertSentenceEmbeddings
-import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.tags.{FastTest, SlowTest}
+import com.johnsnowlabs.util.Benchmark
 import org.scalatest.flatspec.AnyFlatSpec
 
+import scala.io.Source
+import scala.util.Random
+
 class WordpieceTestSpec extends AnyFlatSpec {
   val basicTokenizer = new BasicTokenizer()
 
@@ -219,4 +223,118 @@ class WordpieceTestSpec extends AnyFlatSpec {
       assert(token.isWordStart == isWordStart)
     }
   }
+
+  /** Greedy longest match probing the vocabulary with every substring, as a reference */
+  private def probingEncode(vocabulary: Map[String, Int], word: String): Seq[(String, Int)] = {
+    val pieces = Seq.newBuilder[(String, Int)]
+    var start = 0
+    while (start < word.length) {
+      val prefix = if (start > 0) "##" else ""
+      val end = (word.length until start by -1)
+        .find(end => vocabulary.contains(prefix + word.substring(start, end)))
+      if (end.isEmpty) return Seq(("[UNK]", 0))
+      pieces += ((prefix + word.substring(start, end.get), start))
+      start = end.get
+    }
+    pieces.result()
+  }
+
+  private def encodedPieces(encoder: WordpieceEncoder, word: String): Seq[(String, Int)] =
+    encoder
+      .encode(IndexedToken(word, 0, word.length - 1))
+      .map(piece => (piece.wordpiece, piece.begin))
+      .toSeq
+
+  private lazy val bertVocabulary: Map[String, Int] = {
+    val source = Source.fromFile("src/test/resources/tf-hub-bert/model/assets/vocab.txt")
+    try source.getLines().zipWithIndex.toMap
+    finally source.close()
+  }
+
+  private def randomWords(random: Random, alphabet: String, count: Int): Seq[String] =
+    Seq.fill(count) {
+      Seq.fill(1 + random.nextInt(12))(alphabet(random.nextInt(alphabet.length))).mkString
+    }
+
+  "wordpiece" should "encode words like probing the vocabulary with substrings" taggedAs FastTest in {
+    val words = Seq("", "unambigouosly", "Iunly", "goodgood", "##am", "unx", "3Asd", "ü") ++
+      randomWords(new Random(42), "Iunambigolyd!#", 500)
+    val encoder = new WordpieceEncoder(vocabulary)
+
+    words.foreach { word =>
+      assert(encodedPieces(encoder, word) == probingEncode(vocabulary, word), s"for '$word'")
+    }
+  }
+
+  it should "encode words like probing a BERT vocabulary with substrings" taggedAs FastTest in {
+    val encoder = new WordpieceEncoder(bertVocabulary)
+    val vocabularyWords = bertVocabulary.keys.toSeq.sorted.take(2000)
+    val words = vocabularyWords ++ vocabularyWords.sliding(2).map(_.mkString).toSeq ++
+      randomWords(new Random(42), "abcdefghijklmnopqrstuvwxyz#é", 2000)
+
+    words.foreach { word =>
+      assert(encodedPieces(encoder, word) == probingEncode(bertVocabulary, word), s"for '$word'")
+    }
+  }
+
+  it should "share the trie and cache of a vocabulary between encoders" taggedAs FastTest in {
+    val trie = WordpieceEncoder.sharedTrie(vocabulary, "##")
+    assert(WordpieceEncoder.sharedTrie(vocabulary, "##") eq trie)
+    assert(WordpieceEncoder.sharedTrie(vocabulary, "@@") ne trie)
+
+    val hits = trie.cache.getHits
+    new WordpieceEncoder(vocabulary).encode(IndexedToken("unambigouosly", 0, 12))
+    new WordpieceEncoder(vocabulary).encode(IndexedToken("unambigouosly", 0, 12))
+    assert(trie.cache.getHits > hits)
+  }
+
+  it should "benchmark the trie against probing substrings" taggedAs SlowTest in {
+    val random = new Random(42)
+    val syntheticPieces = randomWords(random, "abcdefghij", 100000) ++
+      randomWords(random, "abcdefghij", 100000).map("##" + _) :+ "[UNK]"
+    val syntheticVocabulary = syntheticPieces.distinct.zipWithIndex.toMap
+
+    Seq(
+      ("test", vocabulary, "Iunambigolyd!"),
+      ("bert", bertVocabulary, "abcdefghijklmnopqrstuvwxyz"),
+      ("synthetic", syntheticVocabulary, "abcdefghij")).foreach {
+      case (name, benchmarkVocabulary, alphabet) =>
+        val words = randomWords(random, alphabet, 1000)
+        val corpus =
+          Seq.fill(100)(words).flatten.map(word => IndexedToken(word, 0, word.length - 1))
+        val encoder = new WordpieceEncoder(benchmarkVocabulary)
+        val trie = WordpieceEncoder.sharedTrie(benchmarkVocabulary, "##")
+
+        // Cleared before every pass, so each distinct word is matched once as on a new executor
+        Benchmark.measure(
+          iterations = 5,
+          forcePrint = true,
+          description = s"WordPiece trie over $name vocabulary, cold cache") {
+          trie.cache.clear()
+          corpus.foreach(encoder.encode)
+        }
+        Benchmark.measure(
+          iterations = 5,
+          forcePrint = true,
+          description = s"WordPiece trie over $name vocabulary, warm cache") {
+          corpus.foreach(encoder.encode)
+        }
+        Benchmark.measure(
+          iterations = 5,
+          forcePrint = true,
+          description = s"WordPiece trie over $name vocabulary, without cache") {
+          corpus.foreach(token => trie.matchPieces(token.token))
+        }
+        Benchmark.measure(
+          iterations = 5,
+          forcePrint = true,
+          description = s"WordPiece substring probing over $name vocabulary") {
+          corpus.foreach(token => probingEncode(benchmarkVocabulary, token.token))
+        }
+
+        words.foreach { word =>
+          assert(encodedPieces(encoder, word) == probingEncode(benchmarkVocabulary, word))
+        }
+    }
+  }
 }
@@ -0,0 +1,75 @@
+/*
+ * Copyright 2017-2022 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.embeddings
+
+import com.johnsnowlabs.tags.FastTest
+import org.scalatest.flatspec.AnyFlatSpec
+
+class EmbeddingsQuantizationTestSpec extends AnyFlatSpec {
+
+  private val vector = Array(0.9076976f, -0.13794145f, 0.7322122f, 0.0f, -1.5e-6f, 3.25f)
+
+  "EmbeddingsQuantization" should "keep float32 vectors unchanged" taggedAs FastTest in {
+    val encoded = EmbeddingsQuantization.encode(vector, EmbeddingsQuantization.NONE)
+
+    val decoded = EmbeddingsQuantization.decode(encoded, EmbeddingsQuantization.NONE)
+
+    assert(encoded.length == EmbeddingsQuantization.encodedSize(vector.length, "none"))
+    assert(decoded sameElements vector)
+  }
+
+  it should "round trip half precision vectors" taggedAs FastTest in {
+    val encoded = EmbeddingsQuantization.encode(vector, EmbeddingsQuantization.FP16)
+    val decoded = EmbeddingsQuantization.decode(encoded, EmbeddingsQuantization.FP16)
+
+    assert(encoded.length == EmbeddingsQuantization.encodedSize(vector.length, "fp16"))
+    vector.zip(decoded).foreach { case (expected, actual) =>
+      assert(math.abs(expected - actual) <= math.abs(expected) / 1024 + 6e-8f)
+    }
+  }
+
+  it should "convert special half precision values" taggedAs FastTest in {
+    import EmbeddingsQuantization.{floatToHalf, halfToFloat}
+
+    assert(floatToHalf(65504f) == 0x7bff.toShort)
+    assert(halfToFloat(floatToHalf(70000f)).isPosInfinity)
+    assert(halfToFloat(floatToHalf(Float.NaN)).isNaN)
+    assert(halfToFloat(floatToHalf(5.9604645e-8f)) == 5.9604645e-8f)
+    assert(halfToFloat(floatToHalf(1e-9f)) == 0f)
+  }
+
+  it should "round trip 8-bit vectors with a scale per vector" taggedAs FastTest in {
+    val encoded = EmbeddingsQuantization.encode(vector, EmbeddingsQuantization.INT8)
+    val decoded = EmbeddingsQuantization.decode(encoded, EmbeddingsQuantization.INT8)
+    val scale = vector.map(math.abs).max / 127
+
+    assert(encoded.length == EmbeddingsQuantization.encodedSize(vector.length, "int8"))
+    vector.zip(decoded).foreach { case (expected, actual) =>
+      assert(math.abs(expected - actual) <= scale / 2 + 1e-6f)
+    }
+  }
+
+  it should "encode zero vectors" taggedAs FastTest in {
+    val zeros = Array.fill(4)(0f)
+
+    EmbeddingsQuantization.quantizations.foreach { quantization =>
+      val encoded = EmbeddingsQuantization.encode(zeros, quantization)
+      assert(EmbeddingsQuantization.decode(encoded, quantization) sameElements zeros)
+    }
+  }
+
+}
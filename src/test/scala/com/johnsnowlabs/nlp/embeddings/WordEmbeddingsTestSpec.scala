@@ -20,11 +20,16 @@ import com.johnsnowlabs.nlp.AnnotatorType.WORD_EMBEDDINGS
 import com.johnsnowlabs.nlp.annotators.SparkSessionTest
 import com.johnsnowlabs.nlp.util.io.{ReadAs, ResourceHelper}
 import com.johnsnowlabs.nlp.{Annotation, AssertAnnotations}
+import com.johnsnowlabs.storage.RocksDBConnection
 import com.johnsnowlabs.tags.{FastTest, SlowTest}
+import com.johnsnowlabs.util.FileHelper
 import org.apache.spark.ml.{Pipeline, PipelineModel}
 import org.apache.spark.sql.DataFrame
 import org.scalatest.flatspec.AnyFlatSpec
 
+import java.io.File
+import java.nio.file.{Files, Paths}
+
 class WordEmbeddingsTestSpec extends AnyFlatSpec with SparkSessionTest {
 
   val clinicalWords: DataFrame = spark.read
@@ -145,6 +150,142 @@ class WordEmbeddingsTestSpec extends AnyFlatSpec with SparkSessionTest {
     AssertAnnotations.assertFields(expectedEmbeddings, actualEmbeddingsInMemory)
   }
 
+  it should "look up the same embeddings from memory mapped storage" taggedAs FastTest in {
+
+    documentAssembler
+      .setInputCol("word")
+      .setOutputCol("document")
+
+    val embeddingsMmap = new WordEmbeddings()
+      .setStoragePath("src/test/resources/random_embeddings_dim4.txt", ReadAs.TEXT)
+      .setDimension(4)
+      .setStorageRef("glove_4d_mmap")
+      .setInputCols("document", "token")
+      .setOutputCol("embeddings")
+      .setStorageFormat("mmap")
+
+    val pipelineMmap = new Pipeline()
+      .setStages(Array(documentAssembler, tokenizer, embeddingsMmap))
+    val embeddingsMmapDataset = pipelineMmap.fit(clinicalWords).transform(clinicalWords)
+
+    val actualEmbeddingsMmap =
+      AssertAnnotations.getActualResult(embeddingsMmapDataset, "embeddings")
+    AssertAnnotations.assertFields(getExpectedEmbeddings, actualEmbeddingsMmap)
+  }
+
+  it should "not serve the flat storage of embeddings indexed again" taggedAs FastTest in {
+    val index = Files.createTempDirectory("flat_reindexed_").resolve("index").toString
+
+    def openIndexed(value: Float): FlatEmbeddingsReader = {
+      FileHelper.delete(index)
+      val connection = RocksDBConnection.getOrCreate(index)
+      connection.connectReadWrite.put(
+        "word".getBytes,
+        EmbeddingsQuantization.encode(Array(value, value), EmbeddingsQuantization.NONE))
+      try
+        FlatEmbeddingsStorage.getOrOpen(
+          None,
+          2,
+          caseSensitiveIndex = true,
+          EmbeddingsQuantization.NONE,
+          connection)
+      finally connection.close()
+    }
+
+    assert(openIndexed(1f).lookup("word").get.toSeq == Seq(1f, 1f))
+    assert(openIndexed(2f).lookup("word").get.toSeq == Seq(2f, 2f))
+  }
+
+  it should "keep quantized vectors quantized in the flat storage" taggedAs FastTest in {
+    val folder = Files.createTempDirectory("flat_quantized_")
+    val connection = RocksDBConnection.getOrCreate(folder.resolve("index").toString)
+    connection.connectReadWrite.put(
+      "word".getBytes,
+      EmbeddingsQuantization.encode(Array(0.5f, -2f, 3f), EmbeddingsQuantization.FP16))
+    val storage = folder.resolve("storage").toString
+    try FlatEmbeddingsStorage.write(connection, 3, storage, EmbeddingsQuantization.FP16)
+    finally connection.close()
+
+    assert(new File(storage, FlatEmbeddingsStorage.vectorsFile).length() == 2 * 3)
+    val reader = new FlatEmbeddingsReader(
+      storage,
+      3,
+      caseSensitiveIndex = true,
+      EmbeddingsQuantization.FP16)
+    assert(reader.lookup("word").get.toSeq == Seq(0.5f, -2f, 3f))
+    FileHelper.delete(folder.toString)
+  }
+
+  it should "open the flat storage shipped to an executor" taggedAs FastTest in {
+    val folder = Files.createTempDirectory("flat_shipped_")
+    val connection = RocksDBConnection.getOrCreate(folder.resolve("index").toString)
+    connection.connectReadWrite.put(
+      "word".getBytes,
+      EmbeddingsQuantization.encode(Array(3f, 4f), EmbeddingsQuantization.NONE))
+    val storageName = FlatEmbeddingsStorage.resolveStorageName(
+      "flat_shipped",
+      FlatEmbeddingsStorage.version(connection, 2, EmbeddingsQuantization.NONE))
+    val storage = folder.resolve("storage").toString
+    try FlatEmbeddingsStorage.write(connection, 2, storage, EmbeddingsQuantization.NONE)
+    finally connection.close()
+
+    // files are shipped to a cluster under unique names, see FlatEmbeddingsStorage.distribute
+    Seq(FlatEmbeddingsStorage.keysFile, FlatEmbeddingsStorage.vectorsFile).foreach { file =>
+      val shipped = folder.resolve(s"${storageName}_$file")
+      Files.copy(Paths.get(storage, file), shipped)
+      spark.sparkContext.addFile(shipped.toString)
+    }
+
+    val reader = FlatEmbeddingsStorage.getOrOpen(
+      Some(storageName),
+      2,
+      caseSensitiveIndex = true,
+      EmbeddingsQuantization.NONE,
+      throw new IllegalStateException("the shipped storage should be opened"))
+
+    assert(reader.lookup("word").get.toSeq == Seq(3f, 4f))
+    FileHelper.delete(folder.toString)
+  }
+
+  it should "look up dequantized embeddings from quantized storage" taggedAs FastTest in {
+
+    documentAssembler
+      .setInputCol("word")
+      .setOutputCol("document")
+
+    val expectedEmbeddings = getExpectedEmbeddings
+
+    Seq("fp16", "int8").foreach { quantization =>
+      val embeddingsQuantized = new WordEmbeddings()
+        .setStoragePath("src/test/resources/random_embeddings_dim4.txt", ReadAs.TEXT)
+        .setDimension(4)
+        .setStorageRef(s"glove_4d_$quantization")
+        .setInputCols("document", "token")
+        .setOutputCol("embeddings")
+        .setStorageQuantization(quantization)
+
+      val pipeline = new Pipeline()
+        .setStages(Array(documentAssembler, tokenizer, embeddingsQuantized))
+      val actualEmbeddings = AssertAnnotations.getActualResult(
+        pipeline.fit(clinicalWords).transform(clinicalWords),
+        "embeddings")
+
+      expectedEmbeddings.flatten.zip(actualEmbeddings.flatten).foreach {
+        case (expected, actual) =>
+          assert(expected.metadata == actual.metadata)
+          expected.embeddings.zip(actual.embeddings).foreach { case (expectedValue, value) =>
+            assert(math.abs(expectedValue - value) < 0.01f)
+          }
+      }
+    }
+  }
+
+  it should "reject unknown storage formats" taggedAs FastTest in {
+    assertThrows[IllegalArgumentException] {
+      new WordEmbeddingsModel().setStorageFormat("parquet")
+    }
+  }
+
   private def getExpectedEmbeddings: Array[Seq[Annotation]] = {
     val expectedEmbeddings = Array(
       Seq(
@@ -0,0 +1,92 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.pretrained
+
+import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.util.FileHelper
+import org.json4s.jackson.Serialization
+import org.scalatest.BeforeAndAfter
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.io.File
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.Files
+
+class ResourceBundleTestSpec extends AnyFlatSpec with BeforeAndAfter {
+
+  private var folder: File = _
+
+  private val resourceName = "pos_test_en_5.0.0_3.0_1"
+
+  before {
+    folder = Files.createTempDirectory("resource_bundle").toFile
+    val resource = new File(folder, s"$resourceName/metadata/part-00000")
+    resource.getParentFile.mkdirs()
+    Files.write(resource.toPath, "weights".getBytes(UTF_8))
+    val bundled = BundledResource("pos_test", Some("en"), "public/models", resourceName, 7)
+    Files.write(
+      new File(folder, ResourceBundle.manifestFile).toPath,
+      Serialization.write(bundled)(ResourceBundle.formats).getBytes(UTF_8))
+  }
+
+  after {
+    ResourceDownloader.clearBundle()
+    FileHelper.delete(folder.getPath)
+  }
+
+  "ResourceBundle" should "resolve the requests of its resources" taggedAs FastTest in {
+    val bundle = ResourceBundle.load(folder.getPath)
+
+    val path = bundle.resolve(ResourceRequest("pos_test", Some("en")))
+    assert(path.map(new File(_).getName).contains(resourceName))
+    assert(bundle.resolve(ResourceRequest("pos_test", None)).isDefined)
+    assert(bundle.resolve(ResourceRequest("pos_test", Some("fr"))).isEmpty)
+    assert(bundle.resolve(ResourceRequest("pos_test", Some("en"), "clinical/models")).isEmpty)
+    assert(bundle.size(ResourceRequest("pos_test", Some("en"))).contains(7L))
+  }
+
+  it should "refuse incomplete bundles" taggedAs FastTest in {
+    Files.write(
+      new File(folder, s"$resourceName/metadata/part-00000").toPath,
+      "truncated weights".getBytes(UTF_8))
+
+    assertThrows[IllegalArgumentException] {
+      ResourceBundle.load(folder.getPath)
+    }
+    assertThrows[IllegalArgumentException] {
+      ResourceBundle.load(new File(folder, resourceName).getPath)
+    }
+  }
+
+  it should "be used by the downloader and archived into another bundle" taggedAs FastTest in {
+    ResourceDownloader.useBundle(folder.getPath)
+    val request = ResourceRequest("pos_test", Some("en"))
+    assert(new File(ResourceDownloader.downloadResource(request)).getName == resourceName)
+    assert(ResourceDownloader.getDownloadSize(request) == "7 B")
+
+    val archive = new File(folder, "bundle.zip").getPath
+    ResourceBundle.build(Seq(request), archive)
+    ResourceDownloader.clearBundle()
+
+    val bundle = ResourceDownloader.useBundle(archive)
+    assert(bundle.location != folder.getPath)
+    val path = ResourceDownloader.downloadResource(request)
+    val content = new File(path, "metadata/part-00000")
+    assert(new String(Files.readAllBytes(content.toPath), UTF_8) == "weights")
+  }
+
+}
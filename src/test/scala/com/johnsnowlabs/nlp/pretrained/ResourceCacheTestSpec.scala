@@ -0,0 +1,130 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.pretrained
+
+import com.johnsnowlabs.tags.FastTest
+import com.johnsnowlabs.util.FileHelper
+import org.scalatest.BeforeAndAfter
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.io.{File, FileOutputStream}
+import java.nio.charset.StandardCharsets.UTF_8
+import java.nio.file.Files
+import java.util.concurrent.atomic.AtomicInteger
+import java.util.zip.{ZipEntry, ZipOutputStream}
+import scala.concurrent.ExecutionContext.Implicits.global
+import scala.concurrent.duration.Duration
+import scala.concurrent.{Await, Future}
+
+class ResourceCacheTestSpec extends AnyFlatSpec with BeforeAndAfter {
+
+  private var folder: File = _
+
+  before {
+    folder = Files.createTempDirectory("resource_cache").toFile
+  }
+
+  after {
+    FileHelper.delete(folder.getPath)
+  }
+
+  private def writeArchive(archive: File, content: String): Unit = {
+    val zip = new ZipOutputStream(new FileOutputStream(archive))
+    zip.putNextEntry(new ZipEntry("metadata/part-00000"))
+    zip.write(content.getBytes(UTF_8))
+    zip.closeEntry()
+    zip.close()
+  }
+
+  private def checksum(content: String): String = {
+    val archive = File.createTempFile("archive", ".zip")
+    writeArchive(archive, content)
+    try FileHelper.generateChecksum(archive.getPath)
+    finally archive.delete()
+  }
+
+  "ResourceCache" should "download and unzip a resource once" taggedAs FastTest in {
+    val cache = new ResourceCache(folder.getPath)
+    val downloads = new AtomicInteger()
+    val install = () =>
+      cache.getOrInstall("model_en_5.0.0_3.0_1", checksum("weights"), unzip = true) { archive =>
+        downloads.incrementAndGet()
+        writeArchive(archive, "weights")
+      }
+
+    val installed =
+      Await.result(Future.sequence((1 to 4).map(_ => Future(install()))), Duration.Inf)
+
+    assert(downloads.get() == 1)
+    assert(installed.map(_.path).distinct.length == 1)
+    val content = new File(installed.head.path, "metadata/part-00000")
+    assert(new String(Files.readAllBytes(content.toPath), UTF_8) == "weights")
+    assert(cache.entries.map(_.name) == Seq("model_en_5.0.0_3.0_1"))
+    assert(cache.entries.head.size == "weights".length)
+    assert(!new File(folder, ".cache/staging").list().exists(_.startsWith("model")))
+  }
+
+  it should "not install a resource that fails its checksum" taggedAs FastTest in {
+    val cache = new ResourceCache(folder.getPath)
+
+    assertThrows[IllegalArgumentException] {
+      cache.getOrInstall("model_en_5.0.0_3.0_1", checksum("weights"), unzip = true) { archive =>
+        writeArchive(archive, "corrupted")
+      }
+    }
+    assert(cache.get("model_en_5.0.0_3.0_1").isEmpty)
+    assert(cache.entries.isEmpty)
+  }
+
+  it should "evict the least recently used resources" taggedAs FastTest in {
+    val cache = new ResourceCache(folder.getPath, maxSize = 2 * "weights".length)
+    def install(name: String): CachedResource =
+      cache.getOrInstall(name, "", unzip = true)(archive => writeArchive(archive, "weights"))
+
+    install("first")
+    Thread.sleep(20)
+    install("second")
+    Thread.sleep(20)
+    assert(cache.get("first").isDefined)
+    Thread.sleep(20)
+    install("third")
+
+    assert(cache.entries.map(_.name).toSet == Set("first", "third"))
+    assert(!new File(folder, "second").exists())
+
+    assert(cache.evictToSize(0).map(_.name) == Seq("first", "third"))
+    assert(cache.size == 0)
+  }
+
+  it should "evict a resource" taggedAs FastTest in {
+    val cache = new ResourceCache(folder.getPath)
+    cache.getOrInstall("model.bin", "", unzip = false) { archive =>
+      Files.write(archive.toPath, "weights".getBytes(UTF_8))
+    }
+
+    assert(new File(folder, "model.bin").isFile)
+    assert(cache.evict("model.bin"))
+    assert(!cache.evict("model.bin"))
+    assert(cache.entries.isEmpty)
+  }
+
+  it should "only manage caches on the local file system" taggedAs FastTest in {
+    assert(ResourceCache.local(folder.getPath).map(_.folder).contains(folder.getPath))
+    assert(ResourceCache.local("s3://bucket/cache_pretrained").isEmpty)
+  }
+
+}
@@ -1,20 +1,33 @@
 package com.johnsnowlabs.nlp.similarity
 
 import com.johnsnowlabs.nlp.AnnotatorType.DOC_SIMILARITY_RANKINGS
-import com.johnsnowlabs.nlp.EmbeddingsFinisher
+import com.johnsnowlabs.nlp.{Annotation, EmbeddingsFinisher, LightPipeline}
 import com.johnsnowlabs.nlp.annotators.Tokenizer
 import com.johnsnowlabs.nlp.annotators.sbd.pragmatic.SentenceDetector
-import com.johnsnowlabs.nlp.annotators.similarity.DocumentSimilarityRankerApproach
+import com.johnsnowlabs.nlp.annotators.similarity.{
+  DocumentSimilarityIndex,
+  DocumentSimilarityRankerApproach,
+  DocumentSimilarityRankerModel,
+  IndexedNeighborsWithDistance,
+  NeighborAnnotation
+}
 import com.johnsnowlabs.nlp.base.DocumentAssembler
 import com.johnsnowlabs.nlp.embeddings.{AlbertEmbeddings, SentenceEmbeddings}
 import com.johnsnowlabs.nlp.finisher.DocumentSimilarityRankerFinisher
 import com.johnsnowlabs.nlp.util.io.ResourceHelper
-import com.johnsnowlabs.tags.SlowTest
+import com.johnsnowlabs.tags.{FastTest, SlowTest}
+import org.apache.spark.ml.linalg.Vectors
 import org.apache.spark.ml.{Pipeline, PipelineModel}
 import org.apache.spark.sql.SparkSession
 import org.apache.spark.sql.functions.{col, element_at, size}
 import org.scalatest.flatspec.AnyFlatSpec
 
+import java.io.File
+import java.nio.file.Files
+import scala.util.hashing.MurmurHash3
+
+case class RankerEmbeddings(embeddings: Seq[Float])
+
 class DocumentSimilarityRankerTestSpec extends AnyFlatSpec {
   val spark: SparkSession = ResourceHelper.spark
 
@@ -302,4 +315,222 @@ class DocumentSimilarityRankerTestSpec extends AnyFlatSpec {
     assert(transformed.columns.contains("nearest_neighbor_id"))
     assert(transformed.columns.contains("nearest_neighbor_distance"))
   }
+
+  "DocumentSimilarityRanker" should "rank the neighbours of all documents with a single join" taggedAs FastTest in {
+    import spark.implicits._
+
+    val vectors = Seq(
+      (1, Vectors.dense(0.0, 0.0)),
+      (2, Vectors.dense(0.1, 0.0)),
+      (3, Vectors.dense(0.0, 0.3)),
+      (4, Vectors.dense(5.0, 5.0)),
+      (5, Vectors.dense(5.0, 5.2))).toDF("index", "features")
+
+    val ranker = new DocumentSimilarityRankerApproach()
+      .setSimilarityMethod("brp")
+      .setBucketLength(10.0)
+      .setNumHashTables(5)
+      .setNumberOfNeighbours(2)
+      .setVisibleDistances(true)
+
+    val mappings = ranker.getNeighborsMappings(vectors, vectors)
+
+    assert(mappings.keySet == Set(1, 2, 3, 4, 5))
+    mappings.foreach { case (index, neighbors) =>
+      val rankedNeighbors = neighbors.asInstanceOf[IndexedNeighborsWithDistance].neighbors
+      assert(rankedNeighbors.length <= 2)
+      assert(!rankedNeighbors.map(_._1).contains(index))
+      assert(rankedNeighbors.map(_._2).toSeq == rankedNeighbors.map(_._2).sorted.toSeq)
+    }
+    assert(mappings(1).asInstanceOf[IndexedNeighborsWithDistance].neighbors.head._1 == 2)
+    assert(mappings(4).asInstanceOf[IndexedNeighborsWithDistance].neighbors.head._1 == 5)
+  }
+
+  private def embeddedCorpus = {
+    import spark.implicits._
+
+    Seq(
+      ("first", Seq(RankerEmbeddings(Seq(0.0f, 0.0f)))),
+      ("second", Seq(RankerEmbeddings(Seq(0.1f, 0.0f)))),
+      ("third", Seq(RankerEmbeddings(Seq(5.0f, 5.0f))))).toDF("text", "sentence_embeddings")
+  }
+
+  "DocumentSimilarityRanker" should "not build a search index by default" taggedAs FastTest in {
+    val model = new DocumentSimilarityRankerApproach()
+      .setBucketLength(10.0)
+      .train(embeddedCorpus)
+
+    assert(model.getSimilarityIndexPath.isEmpty)
+    assert(model.getSimilarityIndex.isEmpty)
+
+    val path = Files.createTempDirectory("doc_sim_ranker_").resolve("model").toString
+    model.write.save(path)
+
+    assert(!new File(path, DocumentSimilarityIndex.fileName).exists())
+  }
+
+  it should "save the search index next to the model with buildSearchIndex" taggedAs FastTest in {
+    val model = new DocumentSimilarityRankerApproach()
+      .setBucketLength(10.0)
+      .setBuildSearchIndex(true)
+      .train(embeddedCorpus)
+
+    assert(model.getSimilarityIndex.map(_.size).contains(3))
+    val expected = model.search(Array(4.0f, 4.0f), 3)
+
+    val path = Files.createTempDirectory("doc_sim_ranker_").resolve("model").toString
+    model.write.save(path)
+
+    val indexFile = new File(path, DocumentSimilarityIndex.fileName)
+    assert(indexFile.exists())
+    assert(!new File(path, "fields/similarityIndex").exists())
+
+    val loaded = DocumentSimilarityRankerModel.load(path)
+
+    assert(loaded.getSimilarityIndexPath.contains(indexFile.getAbsolutePath))
+    assert(loaded.search(Array(4.0f, 4.0f), 3).toSeq == expected.toSeq)
+    assert(expected.head._1 == MurmurHash3.stringHash("third", MurmurHash3.stringSeed))
+  }
+
+  "DocumentSimilarityIndex" should "return the exact closest documents" taggedAs FastTest in {
+    val index = DocumentSimilarityIndex.build(
+      Seq(
+        (1, Array(0.0f, 0.0f)),
+        (2, Array(1.0f, 0.0f)),
+        (3, Array(0.0f, 3.0f)),
+        (4, Array(5.0f, 5.0f))),
+      dimension = 2,
+      metric = DocumentSimilarityIndex.EUCLIDEAN)
+
+    val neighbors = index.search(Array(0.9f, 0.1f), k = 3)
+
+    assert(index.size == 4)
+    assert(index.contains(3) && !index.contains(5))
+    assert(neighbors.map(_._1).toSeq == Seq(2, 1, 3))
+    assert(math.abs(neighbors.head._2 - math.sqrt(0.02)) < 1e-6)
+    assert(index.search(Array(0.0f, 0.0f), k = 2, excludeId = Some(1)).head._1 == 2)
+  }
+
+  it should "find the neighbours of a brute force search in a larger corpus" taggedAs FastTest in {
+    val random = new scala.util.Random(42)
+    val rows = (0 until 2000).map(id => (id, Array.fill(16)(random.nextFloat())))
+    val index = DocumentSimilarityIndex.build(rows, 16, DocumentSimilarityIndex.EUCLIDEAN)
+
+    val queries = Seq.fill(50)(Array.fill(16)(random.nextFloat()))
+    val recall = queries.map { query =>
+      val exact = rows
+        .sortBy { case (_, vector) =>
+          vector.zip(query).map { case (a, b) => (a - b) * (a - b) }.sum
+        }
+        .take(10)
+        .map(_._1)
+        .toSet
+      index.search(query, 10).count { case (id, _) => exact.contains(id) } / 10.0
+    }.sum / queries.length
+
+    assert(recall >= 0.9)
+  }
+
+  it should "rank documents by jaccard distance" taggedAs FastTest in {
+    val index = DocumentSimilarityIndex.build(
+      Seq((1, Array(1f, 0f, 0f, 1f)), (2, Array(1f, 1f, 0f, 1f)), (3, Array(0f, 0f, 1f, 0f))),
+      dimension = 4,
+      metric = DocumentSimilarityIndex.JACCARD)
+
+    val neighbors = index.search(Array(1f, 1f, 0f, 0f), k = 3)
+
+    assert(neighbors.map(_._1).toSeq == Seq(2, 1, 3))
+    assert(neighbors.map(_._2).toSeq == Seq(1.0 - 2.0 / 3, 1.0 - 1.0 / 3, 1.0))
+  }
+
+  it should "be opened from its file" taggedAs FastTest in {
+    val path = Files.createTempDirectory("doc_sim_index_").resolve("index.bin").toString
+    DocumentSimilarityIndex.write(
+      Seq((7, Array(0.0f, 0.0f)), (8, Array(2.0f, 2.0f))),
+      dimension = 2,
+      metric = DocumentSimilarityIndex.EUCLIDEAN,
+      destination = path)
+
+    val index = DocumentSimilarityIndex.open(path)
+
+    assert(index.dimension == 2)
+    assert(index.metric == DocumentSimilarityIndex.EUCLIDEAN)
+    assert(index.search(Array(1.5f, 1.5f), k = 1).map(_._1).toSeq == Seq(8))
+    assert(DocumentSimilarityIndex.open(path) eq index)
+  }
+
+  "DocumentSimilarityRankerModel" should "rank documents it was not trained on" taggedAs FastTest in {
+    val index = DocumentSimilarityIndex.build(
+      Seq((1, Array(0.0f, 0.0f)), (2, Array(1.0f, 1.0f)), (3, Array(4.0f, 4.0f))),
+      dimension = 2,
+      metric = DocumentSimilarityIndex.EUCLIDEAN)
+    val model = new DocumentSimilarityRankerModel()
+      .setSimilarityMappings(Map("similarityMappings" -> Map.empty[Int, NeighborAnnotation]))
+      .setSimilarityIndexPath(index.path)
+      .setNumberOfNeighbours(2)
+
+    assert(model.search(Array(3.5f, 3.5f), 1).head._1 == 3)
+
+    val query = Annotation(
+      annotatorType = "sentence_embeddings",
+      begin = 0,
+      end = 9,
+      result = "new query",
+      metadata = Map.empty,
+      embeddings = Array(0.9f, 0.9f))
+    val ranking = model.annotate(Seq(query)).head
+
+    assert(ranking.metadata("lshNeighbors") == "[2,1]")
+  }
+
+  "LightPipeline" should "search the documents a ranker was trained on" taggedAs SlowTest in {
+    val documentAssembler = new DocumentAssembler()
+      .setInputCol("text")
+      .setOutputCol("document")
+
+    val sentence = new SentenceDetector()
+      .setInputCols("document")
+      .setOutputCol("sentence")
+
+    val tokenizer = new Tokenizer()
+      .setInputCols(Array("document"))
+      .setOutputCol("token")
+
+    val embeddings = AlbertEmbeddings
+      .pretrained()
+      .setInputCols("sentence", "token")
+      .setOutputCol("embeddings")
+
+    val embeddingsSentence = new SentenceEmbeddings()
+      .setInputCols(Array("document", "embeddings"))
+      .setOutputCol("sentence_embeddings")
+      .setPoolingStrategy("AVERAGE")
+
+    val docSimilarityRanker = new DocumentSimilarityRankerApproach()
+      .setInputCols("sentence_embeddings")
+      .setOutputCol(DOC_SIMILARITY_RANKINGS)
+      .setBuildSearchIndex(true)
+
+    val pipelineModel = new Pipeline()
+      .setStages(
+        Array(
+          documentAssembler,
+          sentence,
+          tokenizer,
+          embeddings,
+          embeddingsSentence,
+          docSimilarityRanker))
+      .fit(smallCorpus)
+
+    val path = Files.createTempDirectory("doc_sim_ranker_").resolve("pipeline").toString
+    pipelineModel.write.save(path)
+    val light = new LightPipeline(PipelineModel.load(path))
+
+    val text = smallCorpus.head().getString(0)
+    val neighbors = light.search(text, 3)
+
+    assert(neighbors.length == 3)
+    assert(neighbors.head._1 == MurmurHash3.stringHash(text, MurmurHash3.stringSeed))
+    assert(neighbors.head._2 < 1e-3)
+  }
 }
@@ -0,0 +1,82 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.util
+
+import com.johnsnowlabs.nlp.{Annotation, AnnotatorType}
+import com.johnsnowlabs.tags.FastTest
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.nio.charset.StandardCharsets
+import java.nio.{ByteBuffer, ByteOrder}
+
+class AnnotationPackerTest extends AnyFlatSpec {
+
+  behavior of "AnnotationPacker"
+
+  private def embeddings(word: String, values: Float*) =
+    Annotation(AnnotatorType.WORD_EMBEDDINGS, 0, word.length - 1, word, Map.empty, values.toArray)
+
+  private def readString(buffer: ByteBuffer): String = {
+    val bytes = new Array[Byte](buffer.getInt)
+    buffer.get(bytes)
+    new String(bytes, StandardCharsets.UTF_8)
+  }
+
+  /** Reads the dimension of the matrix of every column of a single document */
+  private def matrixDimensions(packed: Array[Byte]): Map[String, (Int, Int)] = {
+    val buffer = ByteBuffer.wrap(packed).order(ByteOrder.LITTLE_ENDIAN)
+    assert(buffer.getInt == 1)
+    (0 until buffer.getInt).map { _ =>
+      val column = readString(buffer)
+      (0 until buffer.getInt).foreach { _ =>
+        readString(buffer)
+        buffer.getInt
+        buffer.getInt
+        readString(buffer)
+        (0 until buffer.getInt).foreach { _ =>
+          readString(buffer)
+          readString(buffer)
+        }
+      }
+      val rows = buffer.getInt
+      val dimension = buffer.getInt
+      buffer.position(buffer.position() + (-buffer.position() & 3) + 4 * rows * dimension)
+      column -> (rows, dimension)
+    }.toMap
+  }
+
+  it should "pack columns with embeddings of different dimensions" taggedAs FastTest in {
+    val packed = AnnotationPacker.packAnnotationsWithEmbeddings(
+      Seq(
+        Map(
+          "word" -> Seq(embeddings("a", 1f, 2f), embeddings("b", 3f, 4f)),
+          "sentence" -> Seq(embeddings("a b", 1f, 2f, 3f)))))
+
+    assert(matrixDimensions(packed) == Map("word" -> (2, 2), "sentence" -> (1, 3)))
+  }
+
+  it should "name the column with embeddings of different dimensions" taggedAs FastTest in {
+    val error = intercept[IllegalArgumentException] {
+      AnnotationPacker.packAnnotationsWithEmbeddings(
+        Seq(Map("mixed" -> Seq(embeddings("a", 1f, 2f), embeddings("b", 3f)))))
+    }
+
+    assert(error.getMessage.contains("'mixed'"))
+    assert(error.getMessage.contains("1, 2"))
+  }
+
+}
@@ -56,4 +56,35 @@ class LruMapTestSpec extends AnyFlatSpec {
 
   }
 
+  "A LruMap" should "refresh recency on get and count cache statistics" taggedAs FastTest in {
+
+    val lru = new LruMap[String, Int](3)
+
+    Seq("a", "b", "c").foreach(key => lru.getOrElseUpdate(key, key.length))
+    lru.get("a")
+    lru.getOrElseUpdate("d", 1)
+
+    assert(lru.getSize == 3)
+    assert(lru.get("a").isDefined, "Recently read key 'a' should not be evicted")
+    assert(lru.get("b").isEmpty, "Least recently used key 'b' should be evicted")
+
+    lru.getOrElseUpdate("a", 0)
+    assert(lru.getHits == 1)
+    assert(lru.getMisses == 4)
+    assert(lru.getEvictions == 1)
+  }
+
+  "A LruMap" should "cache missing values as well" taggedAs FastTest in {
+
+    val lru = new LruMap[String, Option[Int]](3)
+    var computed = 0
+
+    (1 to 3).foreach { _ =>
+      lru.getOrElseUpdate("missing", { computed += 1; None })
+    }
+
+    assert(computed == 1)
+    assert(lru.getHits == 2)
+  }
+
 }
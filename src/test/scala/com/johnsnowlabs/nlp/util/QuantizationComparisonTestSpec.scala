@@ -0,0 +1,120 @@
+/*
+ * Copyright 2017-2023 John Snow Labs
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *    http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package com.johnsnowlabs.nlp.util
+
+import ai.onnxruntime.{OnnxTensor, OrtEnvironment}
+import com.johnsnowlabs.ml.onnx.OnnxQuantization
+import com.johnsnowlabs.nlp.{Annotation, AnnotatorType, HasOutputAnnotationCol}
+import com.johnsnowlabs.nlp.util.io.ResourceHelper
+import com.johnsnowlabs.tags.FastTest
+import org.apache.spark.ml.Transformer
+import org.apache.spark.ml.param.ParamMap
+import org.apache.spark.ml.util.Identifiable
+import org.apache.spark.sql.functions.{col, udf}
+import org.apache.spark.sql.types.StructType
+import org.apache.spark.sql.{DataFrame, Dataset}
+import org.scalatest.flatspec.AnyFlatSpec
+
+import java.nio.file.{Files, Paths}
+import scala.util.Random
+
+/** Embeds a column of features with a single Gemm ONNX model, see OnnxQuantizationTestSpec */
+class GemmEmbeddings(model: Array[Byte], override val uid: String)
+    extends Transformer
+    with HasOutputAnnotationCol {
+
+  def this(model: Array[Byte]) = this(model, Identifiable.randomUID("GEMM_EMBEDDINGS"))
+
+  setDefault(outputCol -> "embeddings")
+
+  override def transform(dataset: Dataset[_]): DataFrame = {
+    val bytes = model
+    val embed = udf { features: Seq[Float] =>
+      val env = OrtEnvironment.getEnvironment()
+      val session = env.createSession(bytes)
+      val tensor = OnnxTensor.createTensor(env, Array(features.toArray))
+      try {
+        val result = session.run(java.util.Collections.singletonMap("onnx::Gemm_0", tensor))
+        val embeddings =
+          try result.get(0).getValue.asInstanceOf[Array[Array[Float]]].head
+          finally result.close()
+        Seq(Annotation(AnnotatorType.SENTENCE_EMBEDDINGS, 0, 0, "", Map.empty, embeddings))
+      } finally {
+        tensor.close()
+        session.close()
+      }
+    }
+    dataset.withColumn(getOutputCol, embed(col("features")))
+  }
+
+  override def transformSchema(schema: StructType): StructType = schema
+
+  override def copy(extra: ParamMap): Transformer = defaultCopy(extra)
+
+}
+
+class QuantizationComparisonTestSpec extends AnyFlatSpec {
+
+  import ResourceHelper.spark.implicits._
+
+  behavior of "QuantizationComparison"
+
+  it should "measure the cosine similarity of embeddings" taggedAs FastTest in {
+    val vector = Array(1f, 2f, 3f)
+
+    assert(math.abs(QuantizationComparison.cosineSimilarity(vector, vector) - 1.0) < 1e-9)
+    assert(QuantizationComparison.cosineSimilarity(Array(1f, 0f), Array(0f, 2f)) == 0.0)
+    assert(QuantizationComparison.cosineSimilarity(Array(0f, 0f), Array(1f, 2f)) == 0.0)
+    assert(QuantizationComparison.cosineSimilarity(Array(1f, 2f), Array(0f, 0f)) == 0.0)
+  }
+
+  it should "compare a model with its quantized version" taggedAs FastTest in {
+    val modelBytes =
+      Files.readAllBytes(Paths.get("src/test/resources/onnx/models/dummy_model.onnx"))
+    val random = new Random(42)
+    val dataset = Seq.fill(8)(Seq.fill(10)(random.nextGaussian().toFloat)).toDF("features")
+
+    val report = QuantizationComparison.compare(
+      new GemmEmbeddings(modelBytes),
+      new GemmEmbeddings(OnnxQuantization.quantize(modelBytes, OnnxQuantization.DYNAMIC_INT8)),
+      dataset,
+      iterations = 2)
+
+    assert(report.annotations == 8)
+    assert(report.resultAgreement == 1.0)
+    assert(report.minCosineSimilarity > 0.99)
+    assert(report.meanCosineSimilarity >= report.minCosineSimilarity)
+    assert(report.referenceSeconds > 0 && report.quantizedSeconds > 0)
+    assert(report.speedup > 0)
+  }
+
+  it should "compare a model with itself" taggedAs FastTest in {
+    val modelBytes =
+      Files.readAllBytes(Paths.get("src/test/resources/onnx/models/dummy_model.onnx"))
+    val dataset = Seq(Seq.fill(10)(1f)).toDF("features")
+    val model = new GemmEmbeddings(modelBytes)
+
+    val report = QuantizationComparison.compare(model, model, dataset, iterations = 1)
+
+    assert(report.annotations == 1)
+    assert(math.abs(report.meanCosineSimilarity - 1.0) < 1e-6)
+    assertThrows[IllegalArgumentException] {
+      QuantizationComparison.compare(model, model, dataset, iterations = 0)
+    }
+  }
+
+}